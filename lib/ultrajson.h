@@ -80,6 +80,13 @@ Dictates and limits how much stack space for buffers UltraJSON will use before r
 #define JSON_MAX_STACK_BUFFER_SIZE 131072
 #endif
 
+/*
+How many values of the arrays and objects being decoded the decoder keeps on the stack before resorting to
+provided heap functions, when they are built with newArrayFromItems and newObjectFromItems */
+#ifndef JSON_MAX_STACK_VALUES
+#define JSON_MAX_STACK_VALUES 1024
+#endif
+
 #ifdef _WIN32
 
 typedef __int64 JSINT64;
@@ -162,11 +169,44 @@ enum JSTYPES
 typedef void * JSOBJ;
 typedef void * JSITER;
 
+/*
+Size in pointers of the storage JSONTypeContext carries for the implementation's per value state */
+#ifndef JSON_TYPE_CONTEXT_STORAGE
+#define JSON_TYPE_CONTEXT_STORAGE 16
+#endif
+
+/*
+How the strings handed to the encoder by getStringValue and iterGetName are stored. JS_UTF8 strings are
+measured in bytes, the others are code units of that many bytes, measured in units, and must not hold
+surrogates */
+enum JSSTRINGKINDS
+{
+  JS_UTF8 = 0,
+  JS_UCS1 = 1,
+  JS_UCS2 = 2,
+  JS_UCS4 = 4,
+};
+
 typedef struct __JSONTypeContext
 {
   int type;
   void *prv;
   void *encoder_prv;
+
+  /*
+  Kind of the string getStringValue and iterGetName return. Both are JS_UTF8 unless the call changes them */
+  int stringKind;
+  int nameKind;
+
+  /*
+  Lives on the encoder's stack for as long as the value is encoded. beginTypeContext can point prv
+  here instead of allocating its state on the heap for every value */
+  union
+  {
+    void *pointers[JSON_TYPE_CONTEXT_STORAGE];
+    JSINT64 longValue;
+    double doubleValue;
+  } storage;
 } JSONTypeContext;
 
 /*
@@ -257,6 +297,18 @@ typedef struct __JSONObjectEncoder
   Configuration for spaces of indent */
   int indent;
 
+  /*
+  If true, doubles are encoded as the shortest string that reads back as the exact same value, laid out
+  like Python's repr(), and doublePrecision is ignored */
+  int shortestFloat;
+
+  /*
+  If true, doubles are laid out as RFC 8785 (JSON Canonicalization Scheme) asks, like ECMAScript's
+  Number.prototype.toString: shortest round trip digits, no fraction for integral values, exponents
+  outside 1e-7 to 1e21 and -0 written as 0. The caller takes care of the rest of the scheme, key order and
+  string escaping */
+  int canonical;
+
   /*
   Private pointer to be used by the caller. Passed as encoder_prv in JSONTypeContext */
   void *prv;
@@ -273,6 +325,14 @@ typedef struct __JSONObjectEncoder
   int heap;
   int level;
 
+  /*
+  Optional. When the buffer runs full, the output encoded so far is passed to flush instead of growing
+  the buffer, so memory use stays bounded by the buffer size rather than the size of the output.
+  Returns the number of leading bytes consumed, any remainder is kept at the start of the buffer.
+  Set errorMsg to abort encoding. Output still in the buffer once encoding completes is left for the
+  caller to flush */
+  size_t (*flush)(struct __JSONObjectEncoder *enc, const char *data, size_t cbData);
+
 } JSONObjectEncoder;
 
 
@@ -297,11 +357,30 @@ JSONObjectEncoder.free or free() as specified when calling this function.
 */
 EXPORTFUNCTION char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *buffer, size_t cbBuffer);
 
+/*
+Encode several objects back to back into one output buffer.
+
+JSON_EncodeBegin sets up the encoder exactly like JSON_EncodeObject does, then each call to
+JSON_EncodeAppend encodes one object after whatever was written before it and JSON_EncodeAppendRaw
+copies raw bytes, such as a separator, into the output. No terminating null character is written.
+The output is the enc->offset - enc->start bytes at enc->start, and the buffer grows exactly as with
+JSON_EncodeObject; if enc->heap is set the caller must release enc->start.
+
+On failure enc->errorMsg is set and the output is left as it was before the failing call.
+*/
+EXPORTFUNCTION void JSON_EncodeBegin(JSONObjectEncoder *enc, char *buffer, size_t cbBuffer);
+EXPORTFUNCTION void JSON_EncodeAppend(JSOBJ obj, JSONObjectEncoder *enc);
+EXPORTFUNCTION void JSON_EncodeAppendRaw(JSONObjectEncoder *enc, const char *data, size_t cbData);
+
 
 
 typedef struct __JSONObjectDecoder
 {
-  JSOBJ (*newString)(void *prv, wchar_t *start, wchar_t *end);
+  /*
+  Strings are passed as the UTF-8 between start and end (lone surrogates from unicode escapes encoded as
+  3 byte sequences) along with their largest code point, so maxChar < 0x80 means plain ASCII.
+  The range may point into the input and is only valid during the call */
+  JSOBJ (*newString)(void *prv, char *start, char *end, JSUINT32 maxChar);
   void (*objectAddKey)(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value);
   void (*arrayAddItem)(void *prv, JSOBJ obj, JSOBJ value);
   JSOBJ (*newTrue)(void *prv);
@@ -321,8 +400,158 @@ typedef struct __JSONObjectDecoder
   char *errorOffset;
   int preciseFloat;
   void *prv;
+
+  /*
+  Optional, called instead of newString for the key names of objects so the caller can reuse
+  objects for keys that repeat. Leave NULL to use newString for keys as well */
+  JSOBJ (*newKey)(void *prv, char *start, char *end, JSUINT32 maxChar);
+
+  /*
+  Optional, called once the closing bracket of an array or object is seen with all of its count values
+  (for objects count / 2 key/value pairs, key first) so the caller can create it at its final size. The
+  values are handed over, also when the call fails and returns NULL. Leave NULL to build arrays and
+  objects with newArray/arrayAddItem and newObject/objectAddKey instead */
+  JSOBJ (*newArrayFromItems)(void *prv, JSOBJ *items, size_t count);
+  JSOBJ (*newObjectFromItems)(void *prv, JSOBJ *items, size_t count);
 } JSONObjectDecoder;
 
+/*
+Decode the cbBuffer bytes at buffer. No byte past buffer + cbBuffer is ever read, so the buffer
+doesn't need to be null terminated and may be a read only memory mapping */
 EXPORTFUNCTION JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer);
 
+/*
+Checks that the cbBuffer bytes at buffer hold a single valid JSON value with arrays and objects nested
+at most maxDepth deep (capped at JSON_MAX_OBJECT_DEPTH), without building anything. Only preciseFloat,
+errorStr and errorOffset of the decoder are used, so like JSON_DecodeObjectToTape it may run where the
+callbacks are not allowed to run. Memory, only needed for very long numbers and strings with escapes,
+is taken from the C runtime. Returns 1 when the input is valid, 0 with dec->errorStr set otherwise */
+EXPORTFUNCTION int JSON_Validate(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, JSUINT32 maxDepth);
+
+/*
+Extraction of the values RFC 6901 JSON pointers refer to, such as "/items/0/id".
+
+A pointer is a range of UTF-8 that is either empty (the whole document) or a list of reference tokens
+each preceded by '/', with "~1" standing for '/' and "~0" for '~' inside a token.
+
+JSON_Extract walks the cbBuffer bytes at buffer once and decodes only the values the pointers refer to,
+through the same callbacks JSON_DecodeObject uses, into results[i] for pointers[i], or NULL when the
+document holds no such value. Where an object has the same key more than once the last one wins.
+Values no pointer leads into are skipped without calling any callback: they are only checked for
+balanced brackets and terminated strings, not fully validated.
+
+Returns 1 on success. On failure dec->errorStr is set and every result is released and NULL. */
+typedef struct __JSONPointer
+{
+  const char *start;
+  size_t length;
+} JSONPointer;
+
+EXPORTFUNCTION int JSON_Extract(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, const JSONPointer *pointers, size_t count, JSOBJ *results);
+
+/*
+Columnar decoding of an array of objects, such as a list of records.
+
+JSON_DecodeColumns decodes the cbBuffer bytes at buffer, which must hold an array of objects, without building
+the array or the objects. addField is called with dec->prv for every key/value pair, along with the index of
+the object it is in, its key as newKey (or newString) made it and its value, both handed over. A value that is
+a number decoding to JT_INT, JT_LONG or JT_DOUBLE is not built either: value is NULL and the number is passed as
+longValue (type JT_LONG) or doubleValue (type JT_DOUBLE). Otherwise type is the JSTYPES of value. Where an object
+has the same key more than once, addField sees each of them.
+
+addField returns 0 to stop decoding. Returns 1 with the number of objects in *count on success, 0 with
+dec->errorStr set otherwise */
+typedef int (*JSPFN_ADDFIELD)(void *prv, size_t index, JSOBJ name, JSOBJ value, int type, JSINT64 longValue, double doubleValue);
+
+EXPORTFUNCTION int JSON_DecodeColumns(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, JSPFN_ADDFIELD addField, size_t *count);
+
+/*
+Two-phase decoding.
+
+JSON_DecodeObjectToTape scans and validates a buffer into a flat tape without calling any of the
+JSONObjectDecoder object callbacks, so it may run where those callbacks are not allowed to run
+(for example on another thread). Only preciseFloat, errorStr and errorOffset of the decoder are used.
+Memory for the tape is always taken from the C runtime (malloc/realloc/free).
+
+JSON_DecodeTape then replays the tape through the decoder callbacks, building the same object
+structure JSON_DecodeObject would have built. JSON_DecodeTapeItem does the same for the value
+starting at any item of the tape.
+
+Items are stored in document order. JT_ARRAY and JT_OBJECT items hold the number of children
+(key/value pairs for objects) which directly follow them on the tape, and the index of the item
+following their last descendant, so a whole subtree can be skipped. JT_UTF8 items refer to
+a range of UTF-8 in the tape's character pool.
+*/
+typedef struct __JSONTapeItem
+{
+  int type;
+  union
+  {
+    JSINT64 longValue;
+    JSUINT64 unsignedLongValue;
+    double doubleValue;
+    struct
+    {
+      size_t count;
+      size_t end;
+    } container;
+    struct
+    {
+      size_t offset;
+      size_t length;
+      JSUINT32 maxChar;
+    } string;
+  } value;
+} JSONTapeItem;
+
+typedef struct __JSONTape
+{
+  JSONTapeItem *items;
+  size_t count;
+  size_t capacity;
+  char *chars;
+  size_t charCount;
+  size_t charCapacity;
+  int outOfMemory;
+} JSONTape;
+
+/*
+Returns 1 on success. On failure dec->errorStr is set and the tape must still be released with JSON_FreeTape */
+EXPORTFUNCTION int JSON_DecodeObjectToTape(JSONObjectDecoder *dec, JSONTape *tape, const char *buffer, size_t cbBuffer);
+EXPORTFUNCTION JSOBJ JSON_DecodeTape(JSONObjectDecoder *dec, JSONTape *tape);
+EXPORTFUNCTION JSOBJ JSON_DecodeTapeItem(JSONObjectDecoder *dec, JSONTape *tape, size_t index);
+EXPORTFUNCTION void JSON_FreeTape(JSONTape *tape);
+
+/*
+Incremental scanner locating complete values in a stream of concatenated JSON values, or in
+the elements of a single top-level array when arrayItems is set. The scanner only tracks nesting
+and string state; each located value is meant to be handed to JSON_DecodeObject.
+Zero-initialize, then set arrayItems before the first call. */
+typedef struct __JSONStreamScanner
+{
+  int arrayItems;
+  int state;
+  int arrayState;
+  int depth;
+  int inString;
+  int escape;
+  size_t offset;
+  size_t valueStart;
+  char *errorStr;
+} JSONStreamScanner;
+
+/*
+Scans buffer from where the previous call stopped. Set final when no more data will be appended.
+
+Returns:
+1 with *valueStart and *valueEnd set when a complete value was found
+0 when more data is needed (or the stream ended cleanly if final was set)
+-1 on malformed input, with scanner->errorStr set */
+EXPORTFUNCTION int JSON_ScanValue(JSONStreamScanner *scanner, const char *buffer, size_t cbBuffer, int final, size_t *valueStart, size_t *valueEnd);
+
+/*
+Returns how many leading bytes of the buffer the scanner no longer needs and rebases its offsets
+so the caller can drop that many bytes from the front of the buffer. */
+EXPORTFUNCTION size_t JSON_ScanRebase(JSONStreamScanner *scanner);
+
 #endif
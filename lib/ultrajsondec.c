@@ -44,6 +44,10 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 #include <wchar.h>
 #include <stdlib.h>
 #include <errno.h>
+#include <float.h>
+#include <locale.h>
+#include "ultrajsonpow10.h"
+#include "ultrajsonsimd.h"
 
 #ifndef TRUE
 #define TRUE 1
@@ -57,13 +61,21 @@ struct DecoderState
 {
   char *start;
   char *end;
-  wchar_t *escStart;
-  wchar_t *escEnd;
+  char *escStart;
+  char *escEnd;
   int escHeap;
   int lastType;
   JSUINT32 objDepth;
+  JSUINT32 maxDepth;
   void *prv;
   JSONObjectDecoder *dec;
+
+  /*
+  Values of the arrays and objects being decoded when the caller builds them in one go, innermost last */
+  JSOBJ *values;
+  size_t valueCount;
+  size_t valueCapacity;
+  int valueHeap;
 };
 
 JSOBJ FASTCALL_MSVC decode_any( struct DecoderState *ds) FASTCALL_ATTR;
@@ -76,45 +88,505 @@ static JSOBJ SetError( struct DecoderState *ds, int offset, const char *message)
   return NULL;
 }
 
+static int Values_grow(struct DecoderState *ds)
+{
+  JSOBJ *values;
+  size_t newCapacity = ds->valueCapacity * 2;
+
+  if (newCapacity > (SIZE_MAX / sizeof(JSOBJ)))
+  {
+    return 0;
+  }
+
+  if (ds->valueHeap)
+  {
+    values = (JSOBJ *) ds->dec->realloc(ds->values, newCapacity * sizeof(JSOBJ));
+  }
+  else
+  {
+    values = (JSOBJ *) ds->dec->malloc(newCapacity * sizeof(JSOBJ));
+    if (values)
+    {
+      memcpy(values, ds->values, ds->valueCount * sizeof(JSOBJ));
+    }
+  }
+
+  if (!values)
+  {
+    return 0;
+  }
+
+  ds->values = values;
+  ds->valueCapacity = newCapacity;
+  ds->valueHeap = 1;
+  return 1;
+}
+
+/*
+Takes over value, releasing it if there's no room for it */
+static INLINE_PREFIX int Values_push(struct DecoderState *ds, JSOBJ value)
+{
+  if (ds->valueCount == ds->valueCapacity && !Values_grow(ds))
+  {
+    ds->dec->releaseObject(ds->prv, value);
+    return 0;
+  }
+
+  ds->values[ds->valueCount ++] = value;
+  return 1;
+}
+
+/*
+Releases a container that failed to decode: newObj if it was created up front, and the values collected for
+it from base on */
+static void Values_release(struct DecoderState *ds, JSOBJ newObj, size_t base)
+{
+  if (newObj)
+  {
+    ds->dec->releaseObject(ds->prv, newObj);
+  }
+
+  while (ds->valueCount > base)
+  {
+    ds->dec->releaseObject(ds->prv, ds->values[-- ds->valueCount]);
+  }
+}
+
+static JSOBJ Values_popArray(struct DecoderState *ds, size_t base)
+{
+  JSOBJ newObj = ds->dec->newArrayFromItems(ds->prv, ds->values + base, ds->valueCount - base);
+  ds->valueCount = base;
+  return newObj;
+}
+
+static JSOBJ Values_popObject(struct DecoderState *ds, size_t base)
+{
+  JSOBJ newObj = ds->dec->newObjectFromItems(ds->prv, ds->values + base, ds->valueCount - base);
+  ds->valueCount = base;
+  return newObj;
+}
+
+/*
+Reads 8 digits at once when the next 8 bytes are all digits. Returns 0 and leaves value alone otherwise */
+static INLINE_PREFIX int SWAR_readEightDigits(const char *offset, const char *end, JSUINT32 *value)
+{
+#ifdef JSON_SWAR_LITTLE_ENDIAN
+  JSUINT64 chunk;
+
+  if (end - offset < 8)
+  {
+    return 0;
+  }
+
+  memcpy(&chunk, offset, 8);
+
+  // Every byte must be 0x30-0x39: high nibble 3, and still 3 after adding 6 to the low nibble
+  if ((((chunk & 0xf0f0f0f0f0f0f0f0ULL) | (((chunk + 0x0606060606060606ULL) & 0xf0f0f0f0f0f0f0f0ULL) >> 4))) != 0x3333333333333333ULL)
+  {
+    return 0;
+  }
+
+  // Combine neighbouring digits, then pairs, then quads
+  chunk = ((chunk & 0x0f0f0f0f0f0f0f0fULL) * 2561) >> 8;
+  chunk = ((chunk & 0x00ff00ff00ff00ffULL) * 6553601) >> 16;
+  *value = (JSUINT32) (((chunk & 0x0000ffff0000ffffULL) * 42949672960001ULL) >> 32);
+  return 1;
+#else
+  return 0;
+#endif
+}
+
 double createDouble(double intNeg, double intValue, double frcValue, int frcDecimalCount)
 {
   static const double g_pow10[] = {1.0, 0.1, 0.01, 0.001, 0.0001, 0.00001, 0.000001,0.0000001, 0.00000001, 0.000000001, 0.0000000001, 0.00000000001, 0.000000000001, 0.0000000000001, 0.00000000000001, 0.000000000000001};
   return (intValue + (frcValue * g_pow10[frcDecimalCount])) * intNeg;
 }
 
-FASTCALL_ATTR JSOBJ FASTCALL_MSVC decodePreciseFloat(struct DecoderState *ds)
+/*
+Exact double parsing used when preciseFloat is set
+The significant digits are gathered into a 64-bit mantissa and scaled by the decimal exponent with
+Clinger's fast path when both fit a double exactly, otherwise with Eisel-Lemire (Daniel Lemire,
+https://arxiv.org/abs/2101.11408) which multiplies by a 128 bit approximation of the power of ten.
+The rare inputs it cannot round with certainty (halfway cases, subnormals, overflow) go to strtod.
+*/
+
+#if defined(__SIZEOF_INT128__)
+
+static JSUINT64 Lemire_umul128(JSUINT64 a, JSUINT64 b, JSUINT64 *productHi)
+{
+  __uint128_t product = ((__uint128_t) a) * b;
+  *productHi = (JSUINT64) (product >> 64);
+  return (JSUINT64) product;
+}
+
+#else
+
+static JSUINT64 Lemire_umul128(JSUINT64 a, JSUINT64 b, JSUINT64 *productHi)
+{
+  JSUINT64 aLo = a & 0xffffffffULL;
+  JSUINT64 aHi = a >> 32;
+  JSUINT64 bLo = b & 0xffffffffULL;
+  JSUINT64 bHi = b >> 32;
+  JSUINT64 b00 = aLo * bLo;
+  JSUINT64 b01 = aLo * bHi;
+  JSUINT64 b10 = aHi * bLo;
+  JSUINT64 b11 = aHi * bHi;
+  JSUINT64 mid1 = b10 + (b00 >> 32);
+  JSUINT64 mid2 = b01 + (mid1 & 0xffffffffULL);
+
+  *productHi = b11 + (mid1 >> 32) + (mid2 >> 32);
+  return (mid2 << 32) | (b00 & 0xffffffffULL);
+}
+
+#endif
+
+static int Lemire_clz64(JSUINT64 value)
+{
+#if defined(__GNUC__)
+  return __builtin_clzll(value);
+#else
+  int count = 0;
+
+  while (!(value & 0x8000000000000000ULL))
+  {
+    value <<= 1;
+    count ++;
+  }
+  return count;
+#endif
+}
+
+/*
+Returns 1 and stores mantissa * 10^exp10 correctly rounded in *value, or 0 when the result can't be
+decided here. mantissa must not be zero */
+static int Lemire_toDouble(JSUINT64 mantissa, int exp10, int negative, double *value)
+{
+  const JSUINT64 *power;
+  JSUINT64 productHi;
+  JSUINT64 productLo;
+  JSUINT64 wideHi;
+  JSUINT64 wideLo;
+  JSUINT64 mergedHi;
+  JSUINT64 mergedLo;
+  JSUINT64 retMantissa;
+  JSUINT64 retExp2;
+  JSUINT64 msb;
+  int clz;
+  union
+  {
+    double d;
+    JSUINT64 bits;
+  } result;
+
+  if (exp10 < POW10_MANTISSA_MIN_EXP10 || exp10 > POW10_MANTISSA_MAX_EXP10)
+  {
+    return 0;
+  }
+
+  // Normalize the mantissa and estimate the binary exponent, 217706 / 2^16 being log2(10)
+  clz = Lemire_clz64(mantissa);
+  mantissa <<= clz;
+  retExp2 = (JSUINT64) (((217706 * exp10) >> 16) + 64 + 1023) - (JSUINT64) clz;
+
+  power = POW10_MANTISSA[exp10 - POW10_MANTISSA_MIN_EXP10];
+  productLo = Lemire_umul128(mantissa, power[1], &productHi);
+
+  // The truncated lower half of the power may still carry into the bits we keep, widen to 192 bits
+  if ((productHi & 0x1ff) == 0x1ff && productLo + mantissa < mantissa)
+  {
+    wideLo = Lemire_umul128(mantissa, power[0], &wideHi);
+    mergedHi = productHi;
+    mergedLo = productLo + wideHi;
+
+    if (mergedLo < productLo)
+    {
+      mergedHi ++;
+    }
+
+    if ((mergedHi & 0x1ff) == 0x1ff && mergedLo + 1 == 0 && wideLo + mantissa < mantissa)
+    {
+      return 0;
+    }
+
+    productHi = mergedHi;
+    productLo = mergedLo;
+  }
+
+  // Keep 54 bits, the extra one to round with
+  msb = productHi >> 63;
+  retMantissa = productHi >> (msb + 9);
+  retExp2 -= 1 ^ msb;
+
+  // Exactly halfway between two doubles
+  if (productLo == 0 && (productHi & 0x1ff) == 0 && (retMantissa & 3) == 1)
+  {
+    return 0;
+  }
+
+  retMantissa += retMantissa & 1;
+  retMantissa >>= 1;
+
+  if (retMantissa >> 53)
+  {
+    retMantissa >>= 1;
+    retExp2 ++;
+  }
+
+  // Subnormal, infinite or overflowed
+  if (retExp2 - 1 >= 0x7ff - 1)
+  {
+    return 0;
+  }
+
+  result.bits = (retExp2 << 52) | (retMantissa & 0x000fffffffffffffULL) | (negative ? 0x8000000000000000ULL : 0);
+  *value = result.d;
+  return 1;
+}
+
+/*
+Parses the number between ds->start and numEnd with strtod, fixing up the decimal point for the
+current locale */
+static int decodeDoubleFallback(struct DecoderState *ds, char *numEnd, double *value)
 {
+  char buffer[128];
+  char *numStart = buffer;
+  const char *decimalPoint = localeconv()->decimal_point;
+  size_t decimalPointLen = strlen(decimalPoint);
+  size_t len = numEnd - ds->start;
+  char *src;
+  char *dst;
   char *end;
-  double value;
+  int rangeError;
+
+  if (len + decimalPointLen >= sizeof(buffer))
+  {
+    numStart = (char *) ds->dec->malloc(len + decimalPointLen + 1);
+    if (!numStart)
+    {
+      SetError(ds, -1, "Could not reserve memory block");
+      return 0;
+    }
+  }
+
+  for (src = ds->start, dst = numStart; src < numEnd; src ++)
+  {
+    if (*src == '.')
+    {
+      memcpy(dst, decimalPoint, decimalPointLen);
+      dst += decimalPointLen;
+      continue;
+    }
+    *(dst++) = *src;
+  }
+  *dst = '\0';
+
   errno = 0;
+  *value = strtod(numStart, &end);
+  rangeError = (errno == ERANGE && (*value == HUGE_VAL || *value == -HUGE_VAL));
+
+  if (numStart != buffer)
+  {
+    ds->dec->free(numStart);
+  }
+
+  // Underflow still yields the correctly rounded subnormal or zero, only overflow is an error
+  if (rangeError)
+  {
+    SetError(ds, -1, "Range error when decoding numeric as double");
+    return 0;
+  }
+
+  return 1;
+}
+
+/*
+Gathers the first 19 significant digits between start and stop into a mantissa, the remaining ones
+only move the decimal exponent and set truncated when any of them is nonzero */
+static JSUINT64 readTruncatedMantissa(char *start, char *stop, int *exp10, int *truncated)
+{
+  JSUINT64 mantissa = 0;
+  int mantDigits = 0;
+  int fraction = 0;
+  int chr;
+
+  *exp10 = 0;
+  *truncated = 0;
+
+  for (; start < stop; start ++)
+  {
+    if (*start == '.')
+    {
+      fraction = 1;
+      continue;
+    }
+
+    chr = *start - '0';
+
+    if (mantDigits < 19)
+    {
+      mantissa = mantissa * 10 + chr;
+      mantDigits += (mantissa != 0);
+      *exp10 -= fraction;
+    }
+    else
+    {
+      *truncated |= (chr != 0);
+      *exp10 += !fraction;
+    }
+  }
+
+  return mantissa;
+}
+
+FASTCALL_ATTR JSOBJ FASTCALL_MSVC decodePreciseFloat(struct DecoderState *ds)
+{
+  static const double g_exactPow10[] = {1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11, 1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22};
+  char *offset = ds->start;
+  char *end = ds->end;
+  char *digitsStart;
+  char *fracStart;
+  char *expStart;
+  JSUINT64 mantissa = 0;
+  JSUINT32 eightDigits;
+  size_t digits;
+  int truncated = 0;
+  int negative = 0;
+  int exp10 = 0;
+  int expNeg = 0;
+  int expValue = 0;
+  double value;
+  double upper;
+
+  if (offset < end && *offset == '-')
+  {
+    negative = 1;
+    offset ++;
+  }
+
+  digitsStart = offset;
+
+  // Optimistically accumulate every digit, more than 19 of them may wrap and are redone below
+  for (; SWAR_readEightDigits(offset, end, &eightDigits); offset += 8)
+  {
+    mantissa = mantissa * 100000000ULL + eightDigits;
+  }
+
+  for (; offset < end && (unsigned) (*offset - '0') < 10; offset ++)
+  {
+    mantissa = mantissa * 10 + (*offset - '0');
+  }
+
+  digits = offset - digitsStart;
+
+  if (offset < end && *offset == '.')
+  {
+    fracStart = ++offset;
+
+    for (; SWAR_readEightDigits(offset, end, &eightDigits); offset += 8)
+    {
+      mantissa = mantissa * 100000000ULL + eightDigits;
+    }
+
+    for (; offset < end && (unsigned) (*offset - '0') < 10; offset ++)
+    {
+      mantissa = mantissa * 10 + (*offset - '0');
+    }
+
+    exp10 = -(int) (offset - fracStart);
+    digits += offset - fracStart;
+  }
+
+  if (digits == 0)
+  {
+    return SetError(ds, -1, "Expected digits when decoding numeric as double");
+  }
+
+  if (digits > 19)
+  {
+    mantissa = readTruncatedMantissa(digitsStart, offset, &exp10, &truncated);
+  }
+
+  // An exponent without digits isn't part of the number
+  if (offset < end && (*offset == 'e' || *offset == 'E'))
+  {
+    expStart = offset + 1;
+
+    if (expStart < end && (*expStart == '-' || *expStart == '+'))
+    {
+      expNeg = (*expStart == '-');
+      expStart ++;
+    }
+
+    if (expStart < end && (unsigned) (*expStart - '0') < 10)
+    {
+      for (offset = expStart; offset < end && (unsigned) (*offset - '0') < 10; offset ++)
+      {
+        if (expValue < 100000)
+        {
+          expValue = expValue * 10 + (*offset - '0');
+        }
+      }
 
-  value = strtod(ds->start, &end);
+      exp10 += expNeg ? -expValue : expValue;
+    }
+  }
 
-  if (errno == ERANGE)
+  if (mantissa == 0)
+  {
+    value = negative ? -0.0 : 0.0;
+  }
+#if defined(FLT_EVAL_METHOD) && FLT_EVAL_METHOD == 0
+  else if (!truncated && mantissa <= (1ULL << 53) && exp10 >= -22 && exp10 <= 22)
+  {
+    value = (double) mantissa;
+    value = exp10 < 0 ? value / g_exactPow10[-exp10] : value * g_exactPow10[exp10];
+    value = negative ? -value : value;
+  }
+#endif
+  // With digits dropped the value lies between mantissa and mantissa + 1, both must round alike
+  else if (!Lemire_toDouble(mantissa, exp10, negative, &value) ||
+           (truncated && !(Lemire_toDouble(mantissa + 1, exp10, negative, &upper) && upper == value)))
   {
-    return SetError(ds, -1, "Range error when decoding numeric as double");
+    if (!decodeDoubleFallback(ds, offset, &value))
+    {
+      return NULL;
+    }
   }
 
-  ds->start = end;
+  ds->lastType = JT_DOUBLE;
+  ds->start = offset;
   return ds->dec->newDouble(ds->prv, value);
 }
 
+/*
+Tells whether the digits at offset continue into a fraction or an exponent */
+static int isPreciseFloatAhead(char *offset, char *end)
+{
+  while (offset < end && *offset >= '0' && *offset <= '9')
+  {
+    offset ++;
+  }
+  return offset < end && (*offset == '.' || *offset == 'e' || *offset == 'E');
+}
+
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_numeric (struct DecoderState *ds)
 {
   int intNeg = 1;
   int mantSize = 0;
   JSUINT64 intValue;
-  JSUINT64 prevIntValue;
+  JSUINT32 eightDigits;
+  int overflow;
   int chr;
   int decimalCount = 0;
   double frcValue = 0.0;
   double expNeg;
   double expValue;
   char *offset = ds->start;
+  char *end = ds->end;
 
   JSUINT64 overflowLimit = LLONG_MAX;
 
-  if (*(offset) == '-')
+  if (offset < end && *(offset) == '-')
   {
     offset ++;
     intNeg = -1;
@@ -124,9 +596,17 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_numeric (struct DecoderState *ds)
   // Scan integer part
   intValue = 0;
 
+  // Up to 18 digits can't overflow, take them 8 at a time while that holds
+  while (mantSize <= 10 && SWAR_readEightDigits(offset, end, &eightDigits))
+  {
+    intValue = intValue * 100000000ULL + eightDigits;
+    offset += 8;
+    mantSize += 8;
+  }
+
   while (1)
   {
-    chr = (int) (unsigned char) *(offset);
+    chr = (offset < end) ? (int) (unsigned char) *(offset) : 0;
 
     switch (chr)
     {
@@ -142,16 +622,18 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_numeric (struct DecoderState *ds)
       case '9':
       {
         //PERF: Don't do 64-bit arithmetic here unless we know we have to
-        prevIntValue = intValue;
+        // Checked before multiplying, a wrapped product can look like a smaller valid value
+        overflow = intValue > (0xffffffffffffffffULL - (JSUINT64) (chr - 48)) / 10ULL;
         intValue = intValue * 10ULL + (JSLONG) (chr - 48);
 
-        if (intNeg == 1 && prevIntValue > intValue)
-        {
-          return SetError(ds, -1, "Value is too big!");
-        }
-        else if (intNeg == -1 && intValue > overflowLimit)
+        if (overflow || (intNeg == -1 && intValue > overflowLimit))
         {
-          return SetError(ds, -1, overflowLimit == LLONG_MAX ? "Value is too big!" : "Value is too small");
+          // Too long for an integer, but still fine as the integer part of a precise double
+          if (ds->dec->preciseFloat && isPreciseFloatAhead(offset, end))
+          {
+            return decodePreciseFloat(ds);
+          }
+          return SetError(ds, -1, intNeg == 1 ? "Value is too big!" : "Value is too small");
         }
 
         offset ++;
@@ -205,11 +687,18 @@ DECODE_FRACTION:
     return decodePreciseFloat(ds);
   }
 
-  // Scan fraction part
+  // Scan fraction part, exact in a double as long as the digits stay within JSON_DOUBLE_MAX_DECIMALS
   frcValue = 0.0;
+  while (decimalCount + 8 <= JSON_DOUBLE_MAX_DECIMALS && SWAR_readEightDigits(offset, end, &eightDigits))
+  {
+    frcValue = frcValue * 100000000.0 + (double) eightDigits;
+    decimalCount += 8;
+    offset += 8;
+  }
+
   for (;;)
   {
-    chr = (int) (unsigned char) *(offset);
+    chr = (offset < end) ? (int) (unsigned char) *(offset) : 0;
 
     switch (chr)
     {
@@ -260,13 +749,13 @@ DECODE_EXPONENT:
 
   expNeg = 1.0;
 
-  if (*(offset) == '-')
+  if (offset < end && *(offset) == '-')
   {
     expNeg = -1.0;
     offset ++;
   }
   else
-  if (*(offset) == '+')
+  if (offset < end && *(offset) == '+')
   {
     expNeg = +1.0;
     offset ++;
@@ -276,7 +765,7 @@ DECODE_EXPONENT:
 
   for (;;)
   {
-    chr = (int) (unsigned char) *(offset);
+    chr = (offset < end) ? (int) (unsigned char) *(offset) : 0;
 
     switch (chr)
     {
@@ -312,6 +801,10 @@ BREAK_EXP_LOOP:
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_true ( struct DecoderState *ds)
 {
   char *offset = ds->start;
+
+  if (ds->end - offset < 4)
+    goto SETERROR;
+
   offset ++;
 
   if (*(offset++) != 'r')
@@ -332,6 +825,10 @@ SETERROR:
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_false ( struct DecoderState *ds)
 {
   char *offset = ds->start;
+
+  if (ds->end - offset < 5)
+    goto SETERROR;
+
   offset ++;
 
   if (*(offset++) != 'a')
@@ -354,6 +851,10 @@ SETERROR:
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_null ( struct DecoderState *ds)
 {
   char *offset = ds->start;
+
+  if (ds->end - offset < 4)
+    goto SETERROR;
+
   offset ++;
 
   if (*(offset++) != 'u')
@@ -374,8 +875,39 @@ SETERROR:
 FASTCALL_ATTR void FASTCALL_MSVC SkipWhitespace(struct DecoderState *ds)
 {
   char *offset = ds->start;
+  char *end = ds->end;
+#ifdef JSON_SIMD_SSE2
+  __m128i chunk;
+  __m128i space;
+  int mask;
+#endif
 
-  for (;;)
+  // Compact documents rarely have any, and nothing above ' ' is whitespace
+  if (offset < end && (unsigned char) *offset > ' ')
+  {
+    return;
+  }
+
+#ifdef JSON_SIMD_SSE2
+  // Indentation of pretty printed documents comes in runs, look at 16 bytes at a time
+  while (end - offset >= 16)
+  {
+    chunk = _mm_loadu_si128((const __m128i *) offset);
+    space = _mm_or_si128(_mm_cmpeq_epi8(chunk, _mm_set1_epi8(' ')), _mm_cmpeq_epi8(chunk, _mm_set1_epi8('\n')));
+    space = _mm_or_si128(space, _mm_or_si128(_mm_cmpeq_epi8(chunk, _mm_set1_epi8('\t')), _mm_cmpeq_epi8(chunk, _mm_set1_epi8('\r'))));
+    mask = ~_mm_movemask_epi8(space) & 0xffff;
+
+    if (mask)
+    {
+      ds->start = offset + JSON_ctz32((unsigned int) mask);
+      return;
+    }
+
+    offset += 16;
+  }
+#endif
+
+  for (; offset < end; offset ++)
   {
     switch (*offset)
     {
@@ -383,7 +915,6 @@ FASTCALL_ATTR void FASTCALL_MSVC SkipWhitespace(struct DecoderState *ds)
       case '\t':
       case '\r':
       case '\n':
-        offset ++;
         break;
 
       default:
@@ -391,6 +922,8 @@ FASTCALL_ATTR void FASTCALL_MSVC SkipWhitespace(struct DecoderState *ds)
         return;
     }
   }
+
+  ds->start = offset;
 }
 
 enum DECODESTRINGSTATE
@@ -399,6 +932,7 @@ enum DECODESTRINGSTATE
   DS_ISQUOTE,
   DS_ISESCAPE,
   DS_UTFLENERROR,
+  DS_ISSTRAY,
 
 };
 
@@ -412,260 +946,491 @@ static const JSUINT8 g_decoderLookup[256] =
   /* 0x50 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, DS_ISESCAPE, 1, 1, 1,
   /* 0x60 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
   /* 0x70 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
-  /* 0x80 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
-  /* 0x90 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
-  /* 0xa0 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
-  /* 0xb0 */ 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  /* 0x80 */ DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY,
+  /* 0x90 */ DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY,
+  /* 0xa0 */ DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY,
+  /* 0xb0 */ DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY, DS_ISSTRAY,
   /* 0xc0 */ 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2,
   /* 0xd0 */ 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2,
   /* 0xe0 */ 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3,
   /* 0xf0 */ 4, 4, 4, 4, 4, 4, 4, 4, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR,
 };
 
-FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
+/*
+Makes room for cbNeeded more bytes at escOffset in the scratch buffer. Returns the new write position,
+or NULL when out of memory */
+static char *Scratch_Reserve(struct DecoderState *ds, char *escOffset, size_t cbNeeded)
 {
-  JSUTF16 sur[2] = { 0 };
-  int iSur = 0;
-  int index;
-  wchar_t *escOffset;
-  wchar_t *escStart;
-  size_t escLen = (ds->escEnd - ds->escStart);
-  JSUINT8 *inputOffset;
-  JSUINT8 oct;
-  JSUTF32 ucs;
-  ds->lastType = JT_INVALID;
-  ds->start ++;
+  size_t used = escOffset - ds->escStart;
+  size_t newSize = (ds->escEnd - ds->escStart);
+  char *escStart;
 
-  if ( (size_t) (ds->end - ds->start) > escLen)
+  if ((size_t) (ds->escEnd - escOffset) >= cbNeeded)
   {
-    size_t newSize = (ds->end - ds->start);
+    return escOffset;
+  }
 
-    if (ds->escHeap)
+  do
+  {
+    if (newSize > SIZE_MAX / 2)
     {
-      if (newSize > (SIZE_MAX / sizeof(wchar_t)))
-      {
-        return SetError(ds, -1, "Could not reserve memory block");
-      }
-      escStart = (wchar_t *)ds->dec->realloc(ds->escStart, newSize * sizeof(wchar_t));
-      if (!escStart)
-      {
-        ds->dec->free(ds->escStart);
-        return SetError(ds, -1, "Could not reserve memory block");
-      }
-      ds->escStart = escStart;
+      SetError(ds, -1, "Could not reserve memory block");
+      return NULL;
     }
-    else
+    newSize *= 2;
+  } while (newSize - used < cbNeeded);
+
+  if (ds->escHeap)
+  {
+    escStart = (char *) ds->dec->realloc(ds->escStart, newSize);
+    if (!escStart)
     {
-      wchar_t *oldStart = ds->escStart;
-      if (newSize > (SIZE_MAX / sizeof(wchar_t)))
-      {
-        return SetError(ds, -1, "Could not reserve memory block");
-      }
-      ds->escStart = (wchar_t *) ds->dec->malloc(newSize * sizeof(wchar_t));
-      if (!ds->escStart)
-      {
-        return SetError(ds, -1, "Could not reserve memory block");
-      }
-      ds->escHeap = 1;
-      memcpy(ds->escStart, oldStart, escLen * sizeof(wchar_t));
+      SetError(ds, -1, "Could not reserve memory block");
+      return NULL;
+    }
+  }
+  else
+  {
+    escStart = (char *) ds->dec->malloc(newSize);
+    if (!escStart)
+    {
+      SetError(ds, -1, "Could not reserve memory block");
+      return NULL;
+    }
+    memcpy(escStart, ds->escStart, used);
+    ds->escHeap = 1;
+  }
+
+  ds->escStart = escStart;
+  ds->escEnd = escStart + newSize;
+  return escStart + used;
+}
+
+/*
+Writes ucs as UTF-8, surrogates included, returns the new write position */
+static INLINE_PREFIX char *Scratch_AppendUTF8(char *escOffset, JSUTF32 ucs)
+{
+  if (ucs < 0x80)
+  {
+    *(escOffset++) = (char) ucs;
+  }
+  else if (ucs < 0x800)
+  {
+    *(escOffset++) = (char) (0xc0 | (ucs >> 6));
+    *(escOffset++) = (char) (0x80 | (ucs & 0x3f));
+  }
+  else if (ucs < 0x10000)
+  {
+    *(escOffset++) = (char) (0xe0 | (ucs >> 12));
+    *(escOffset++) = (char) (0x80 | ((ucs >> 6) & 0x3f));
+    *(escOffset++) = (char) (0x80 | (ucs & 0x3f));
+  }
+  else
+  {
+    *(escOffset++) = (char) (0xf0 | (ucs >> 18));
+    *(escOffset++) = (char) (0x80 | ((ucs >> 12) & 0x3f));
+    *(escOffset++) = (char) (0x80 | ((ucs >> 6) & 0x3f));
+    *(escOffset++) = (char) (0x80 | (ucs & 0x3f));
+  }
+  return escOffset;
+}
+
+/*
+Reads the 4 hex digits of a unicode escape. Returns NULL on error */
+static JSUINT8 *decode_hex4(struct DecoderState *ds, JSUINT8 *inputOffset, JSUTF32 *ucs)
+{
+  JSUINT8 *inputEnd = (JSUINT8 *) ds->end;
+  int index;
+  JSUTF32 value = 0;
+
+  for (index = 0; index < 4; index ++, inputOffset ++)
+  {
+    switch ((inputOffset < inputEnd) ? *inputOffset : '\0')
+    {
+      case '\0':
+        SetError (ds, -1, "Unterminated unicode escape sequence when decoding 'string'");
+        return NULL;
+
+      case '0': case '1': case '2': case '3': case '4': case '5': case '6': case '7': case '8': case '9':
+        value = (value << 4) + (JSUTF32) (*inputOffset - '0');
+        break;
+
+      case 'a': case 'b': case 'c': case 'd': case 'e': case 'f':
+        value = (value << 4) + 10 + (JSUTF32) (*inputOffset - 'a');
+        break;
+
+      case 'A': case 'B': case 'C': case 'D': case 'E': case 'F':
+        value = (value << 4) + 10 + (JSUTF32) (*inputOffset - 'A');
+        break;
+
+      default:
+        SetError (ds, -1, "Unexpected character in unicode escape sequence when decoding 'string'");
+        return NULL;
+    }
+  }
+
+  *ucs = value;
+  return inputOffset;
+}
+
+/*
+Plain string characters
+Anything but '"', '\\', NUL and bytes from 0x80 up can be taken as is. PlainRun_length tells how many
+such bytes start at offset, looking at 16 bytes with SSE2 and then handing long runs on to the widest
+loop the CPU supports. Runs that end within the last 16 bytes of the input are left to the scalar
+loops in decode_string.
+*/
+#ifdef JSON_SIMD_SSE2
+
+static INLINE_PREFIX int PlainRun_maskSSE2(const JSUINT8 *offset)
+{
+  __m128i chunk = _mm_loadu_si128((const __m128i *) offset);
+  __m128i special = _mm_or_si128(_mm_cmpeq_epi8(chunk, _mm_set1_epi8('\"')), _mm_cmpeq_epi8(chunk, _mm_set1_epi8('\\')));
+  special = _mm_or_si128(special, _mm_cmpeq_epi8(chunk, _mm_setzero_si128()));
+  return _mm_movemask_epi8(special) | _mm_movemask_epi8(chunk);
+}
+
+/*
+Same as PlainRun_maskSSE2 but also stores the 16 bytes at output */
+static INLINE_PREFIX int PlainRun_copySSE2(const JSUINT8 *offset, char *output)
+{
+  __m128i chunk = _mm_loadu_si128((const __m128i *) offset);
+  __m128i special = _mm_or_si128(_mm_cmpeq_epi8(chunk, _mm_set1_epi8('\"')), _mm_cmpeq_epi8(chunk, _mm_set1_epi8('\\')));
+  special = _mm_or_si128(special, _mm_cmpeq_epi8(chunk, _mm_setzero_si128()));
+  _mm_storeu_si128((__m128i *) output, chunk);
+  return _mm_movemask_epi8(special) | _mm_movemask_epi8(chunk);
+}
+
+static size_t PlainRun_SSE2(const JSUINT8 *offset, const JSUINT8 *end)
+{
+  const JSUINT8 *start = offset;
+  int mask;
+
+  while (end - offset >= 16)
+  {
+    if ((mask = PlainRun_maskSSE2(offset)))
+    {
+      return (offset - start) + JSON_ctz32((unsigned int) mask);
+    }
+    offset += 16;
+  }
+
+  return offset - start;
+}
+
+#ifdef JSON_SIMD_AVX2
+
+JSON_TARGET_AVX2 static size_t PlainRun_AVX2(const JSUINT8 *offset, const JSUINT8 *end)
+{
+  const JSUINT8 *start = offset;
+  const __m256i quote = _mm256_set1_epi8('\"');
+  const __m256i backslash = _mm256_set1_epi8('\\');
+  const __m256i zero = _mm256_setzero_si256();
+  __m256i chunk;
+  __m256i special;
+  unsigned int mask;
+
+  while (end - offset >= 32)
+  {
+    chunk = _mm256_loadu_si256((const __m256i *) offset);
+    special = _mm256_or_si256(_mm256_cmpeq_epi8(chunk, quote), _mm256_cmpeq_epi8(chunk, backslash));
+    special = _mm256_or_si256(special, _mm256_cmpeq_epi8(chunk, zero));
+    mask = (unsigned int) _mm256_movemask_epi8(special) | (unsigned int) _mm256_movemask_epi8(chunk);
+
+    if (mask)
+    {
+      return (offset - start) + JSON_ctz32(mask);
     }
+    offset += 32;
+  }
+
+  return (offset - start) + PlainRun_SSE2(offset, end);
+}
+
+#endif
+
+typedef size_t (*PFN_PLAINRUN)(const JSUINT8 *offset, const JSUINT8 *end);
+
+static size_t PlainRun_resolve(const JSUINT8 *offset, const JSUINT8 *end);
+static PFN_PLAINRUN g_plainRun = PlainRun_resolve;
+
+/*
+Picks the widest implementation the CPU supports on first use */
+static size_t PlainRun_resolve(const JSUINT8 *offset, const JSUINT8 *end)
+{
+#ifdef JSON_SIMD_AVX2
+  g_plainRun = JSON_CPUHasAVX2() ? PlainRun_AVX2 : PlainRun_SSE2;
+#else
+  g_plainRun = PlainRun_SSE2;
+#endif
+  return g_plainRun(offset, end);
+}
+
+static INLINE_PREFIX size_t PlainRun_length(const JSUINT8 *offset, const JSUINT8 *end)
+{
+  int mask;
+
+  if (end - offset < 16)
+  {
+    return 0;
+  }
 
-    ds->escEnd = ds->escStart + newSize;
+  // Most keys and short values end within the first 16 bytes
+  if ((mask = PlainRun_maskSSE2(offset)))
+  {
+    return JSON_ctz32((unsigned int) mask);
   }
 
-  escOffset = ds->escStart;
+  return 16 + g_plainRun(offset + 16, end);
+}
+
+#endif
+
+/*
+Strings are handed to newString as UTF-8 along with their largest code point. A string without
+escapes is passed straight from the input, only escapes (and stray continuation bytes, which are
+taken as the Latin-1 character of the same value) make it go through the scratch buffer, which
+then holds the whole unescaped string. escOffset stays NULL until that happens. */
+FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds, int isKey)
+{
+  JSUINT8 *inputOffset;
+  JSUINT8 *inputEnd = (JSUINT8 *) ds->end;
+  char *escOffset = NULL;
+  char *strStart;
+  char *strEnd;
+  JSUTF32 maxChar = 0;
+  JSUTF32 ucs;
+  JSUTF32 low;
+  JSUINT8 oct;
+  int index;
+  int len;
+#ifdef JSON_SIMD_SSE2
+  int mask;
+#endif
+
+  ds->lastType = JT_INVALID;
+  ds->start ++;
   inputOffset = (JSUINT8 *) ds->start;
 
+#ifdef JSON_SIMD_SSE2
+  // Most strings are plain ASCII all the way to the closing quote
+  inputOffset += PlainRun_length(inputOffset, inputEnd);
+#endif
+
   for (;;)
   {
-    switch (g_decoderLookup[(JSUINT8)(*inputOffset)])
+
+    if (!escOffset)
+    {
+      while (inputOffset < inputEnd && g_decoderLookup[*inputOffset] == 1)
+      {
+        inputOffset ++;
+      }
+    }
+    else
+    {
+      while (inputOffset < inputEnd && g_decoderLookup[*inputOffset] == 1)
+      {
+        if (escOffset == ds->escEnd)
+        {
+          if (!(escOffset = Scratch_Reserve(ds, escOffset, inputEnd - inputOffset)))
+          {
+            return NULL;
+          }
+        }
+        *(escOffset++) = (char) *(inputOffset++);
+      }
+    }
+
+    if (inputOffset >= inputEnd)
+    {
+      return SetError(ds, -1, "Unmatched ''\"' when when decoding 'string'");
+    }
+
+    switch (g_decoderLookup[*inputOffset])
     {
       case DS_ISNULL:
       {
         return SetError(ds, -1, "Unmatched ''\"' when when decoding 'string'");
       }
+
       case DS_ISQUOTE:
       {
         ds->lastType = JT_UTF8;
-        inputOffset ++;
-        ds->start += ( (char *) inputOffset - (ds->start));
-        return ds->dec->newString(ds->prv, ds->escStart, escOffset);
+
+        if (escOffset)
+        {
+          strStart = ds->escStart;
+          strEnd = escOffset;
+        }
+        else
+        {
+          strStart = ds->start;
+          strEnd = (char *) inputOffset;
+        }
+
+        ds->start = (char *) inputOffset + 1;
+
+        if (isKey && ds->dec->newKey)
+        {
+          return ds->dec->newKey(ds->prv, strStart, strEnd, maxChar);
+        }
+        return ds->dec->newString(ds->prv, strStart, strEnd, maxChar);
       }
+
       case DS_UTFLENERROR:
       {
         return SetError (ds, -1, "Invalid UTF-8 sequence length when decoding 'string'");
       }
+
       case DS_ISESCAPE:
-        inputOffset ++;
-        switch (*inputOffset)
-        {
-          case '\\': *(escOffset++) = L'\\'; inputOffset++; continue;
-          case '\"': *(escOffset++) = L'\"'; inputOffset++; continue;
-          case '/':  *(escOffset++) = L'/';  inputOffset++; continue;
-          case 'b':  *(escOffset++) = L'\b'; inputOffset++; continue;
-          case 'f':  *(escOffset++) = L'\f'; inputOffset++; continue;
-          case 'n':  *(escOffset++) = L'\n'; inputOffset++; continue;
-          case 'r':  *(escOffset++) = L'\r'; inputOffset++; continue;
-          case 't':  *(escOffset++) = L'\t'; inputOffset++; continue;
-
-          case 'u':
+      case DS_ISSTRAY:
+      {
+        // Everything up to here was valid UTF-8 from the input, from now on the string is rebuilt in the scratch buffer
+        if (!escOffset)
+        {
+          if (!(escOffset = Scratch_Reserve(ds, ds->escStart, (char *) inputOffset - ds->start + 4)))
           {
-            int index;
-            inputOffset ++;
-
-            for (index = 0; index < 4; index ++)
-            {
-              switch (*inputOffset)
-              {
-                case '\0': return SetError (ds, -1, "Unterminated unicode escape sequence when decoding 'string'");
-                default: return SetError (ds, -1, "Unexpected character in unicode escape sequence when decoding 'string'");
-
-                case '0':
-                case '1':
-                case '2':
-                case '3':
-                case '4':
-                case '5':
-                case '6':
-                case '7':
-                case '8':
-                case '9':
-                  sur[iSur] = (sur[iSur] << 4) + (JSUTF16) (*inputOffset - '0');
-                  break;
-
-                case 'a':
-                case 'b':
-                case 'c':
-                case 'd':
-                case 'e':
-                case 'f':
-                  sur[iSur] = (sur[iSur] << 4) + 10 + (JSUTF16) (*inputOffset - 'a');
-                  break;
-
-                case 'A':
-                case 'B':
-                case 'C':
-                case 'D':
-                case 'E':
-                case 'F':
-                  sur[iSur] = (sur[iSur] << 4) + 10 + (JSUTF16) (*inputOffset - 'A');
-                  break;
-              }
+            return NULL;
+          }
+          memcpy(escOffset, ds->start, (char *) inputOffset - ds->start);
+          escOffset += (char *) inputOffset - ds->start;
+        }
+        else if (ds->escEnd - escOffset < 4 && !(escOffset = Scratch_Reserve(ds, escOffset, 4)))
+        {
+          return NULL;
+        }
 
-              inputOffset ++;
-            }
+        if (g_decoderLookup[*inputOffset] == DS_ISSTRAY)
+        {
+          ucs = *(inputOffset++);
+        }
+        else
+        {
+          inputOffset ++;
 
-            if (iSur == 0)
+          switch ((inputOffset < inputEnd) ? *inputOffset : '\0')
+          {
+            case '\\': ucs = '\\'; inputOffset++; break;
+            case '\"': ucs = '\"'; inputOffset++; break;
+            case '/':  ucs = '/';  inputOffset++; break;
+            case 'b':  ucs = '\b'; inputOffset++; break;
+            case 'f':  ucs = '\f'; inputOffset++; break;
+            case 'n':  ucs = '\n'; inputOffset++; break;
+            case 'r':  ucs = '\r'; inputOffset++; break;
+            case 't':  ucs = '\t'; inputOffset++; break;
+
+            case 'u':
             {
-              if((sur[iSur] & 0xfc00) == 0xd800)
+              if (!(inputOffset = decode_hex4(ds, inputOffset + 1, &ucs)))
               {
-                // First of a surrogate pair, continue parsing
-                iSur ++;
-                break;
+                return NULL;
               }
-              (*escOffset++) = (wchar_t) sur[iSur];
-              iSur = 0;
-            }
-            else
-            {
-              // Decode pair
-              if ((sur[1] & 0xfc00) != 0xdc00)
+
+              // A high surrogate followed by another escape must pair with it, on its own it's kept as is
+              if ((ucs & 0xfc00) == 0xd800 && inputEnd - inputOffset >= 2 && inputOffset[0] == '\\' && inputOffset[1] == 'u')
               {
-                return SetError (ds, -1, "Unpaired high surrogate when decoding 'string'");
+                if (!(inputOffset = decode_hex4(ds, inputOffset + 2, &low)))
+                {
+                  return NULL;
+                }
+
+                if ((low & 0xfc00) != 0xdc00)
+                {
+                  return SetError (ds, -1, "Unpaired high surrogate when decoding 'string'");
+                }
+
+                ucs = 0x10000 + (((ucs - 0xd800) << 10) | (low - 0xdc00));
               }
-#if WCHAR_MAX == 0xffff
-              (*escOffset++) = (wchar_t) sur[0];
-              (*escOffset++) = (wchar_t) sur[1];
-#else
-              (*escOffset++) = (wchar_t) 0x10000 + (((sur[0] - 0xd800) << 10) | (sur[1] - 0xdc00));
-#endif
-              iSur = 0;
+              break;
             }
-          break;
+
+            case '\0': return SetError(ds, -1, "Unterminated escape sequence when decoding 'string'");
+            default: return SetError(ds, -1, "Unrecognized escape sequence when decoding 'string'");
+          }
         }
 
-        case '\0': return SetError(ds, -1, "Unterminated escape sequence when decoding 'string'");
-        default: return SetError(ds, -1, "Unrecognized escape sequence when decoding 'string'");
-      }
-      break;
+        maxChar = (ucs > maxChar) ? ucs : maxChar;
+        escOffset = Scratch_AppendUTF8(escOffset, ucs);
 
-      case 1:
-      {
-        *(escOffset++) = (wchar_t) (*inputOffset++);
+#ifdef JSON_SIMD_SSE2
+        // Copy the plain run after the escape, whole chunks go to the scratch buffer and only the plain part of the last one is kept
+        while (inputEnd - inputOffset >= 16)
+        {
+          if (ds->escEnd - escOffset < 16 && !(escOffset = Scratch_Reserve(ds, escOffset, 16)))
+          {
+            return NULL;
+          }
+
+          if ((mask = PlainRun_copySSE2(inputOffset, escOffset)))
+          {
+            inputOffset += JSON_ctz32((unsigned int) mask);
+            escOffset += JSON_ctz32((unsigned int) mask);
+            break;
+          }
+
+          inputOffset += 16;
+          escOffset += 16;
+        }
+#endif
         break;
       }
 
       case 2:
+      case 3:
+      case 4:
       {
-        ucs = (*inputOffset++) & 0x1f;
-        ucs <<= 6;
-        if (((*inputOffset) & 0x80) != 0x80)
+        static const JSUTF32 g_leadMask[] = { 0, 0, 0x1f, 0x0f, 0x07 };
+        static const JSUTF32 g_minValue[] = { 0, 0, 0x80, 0x800, 0x10000 };
+
+        len = g_decoderLookup[*inputOffset];
+
+        if (inputEnd - inputOffset < len)
         {
           return SetError(ds, -1, "Invalid octet in UTF-8 sequence when decoding 'string'");
         }
-        ucs |= (*inputOffset++) & 0x3f;
-        if (ucs < 0x80) return SetError (ds, -1, "Overlong 2 byte UTF-8 sequence detected when decoding 'string'");
-        *(escOffset++) = (wchar_t) ucs;
-        break;
-      }
 
-      case 3:
-      {
-        JSUTF32 ucs = 0;
-        ucs |= (*inputOffset++) & 0x0f;
+        ucs = inputOffset[0] & g_leadMask[len];
 
-        for (index = 0; index < 2; index ++)
+        for (index = 1; index < len; index ++)
         {
-          ucs <<= 6;
-          oct = (*inputOffset++);
+          oct = inputOffset[index];
 
-          if ((oct & 0x80) != 0x80)
+          if ((oct & 0xc0) != 0x80)
           {
             return SetError(ds, -1, "Invalid octet in UTF-8 sequence when decoding 'string'");
           }
 
-          ucs |= oct & 0x3f;
+          ucs = (ucs << 6) | (oct & 0x3f);
         }
 
-        if (ucs < 0x800) return SetError (ds, -1, "Overlong 3 byte UTF-8 sequence detected when encoding string");
-        *(escOffset++) = (wchar_t) ucs;
-        break;
-      }
-
-      case 4:
-      {
-        JSUTF32 ucs = 0;
-        ucs |= (*inputOffset++) & 0x07;
-
-        for (index = 0; index < 3; index ++)
+        if (ucs < g_minValue[len])
         {
-          ucs <<= 6;
-          oct = (*inputOffset++);
-
-          if ((oct & 0x80) != 0x80)
+          switch (len)
           {
-            return SetError(ds, -1, "Invalid octet in UTF-8 sequence when decoding 'string'");
+            case 2: return SetError (ds, -1, "Overlong 2 byte UTF-8 sequence detected when decoding 'string'");
+            case 3: return SetError (ds, -1, "Overlong 3 byte UTF-8 sequence detected when encoding string");
+            default: return SetError (ds, -1, "Overlong 4 byte UTF-8 sequence detected when decoding 'string'");
           }
-
-          ucs |= oct & 0x3f;
         }
 
-        if (ucs < 0x10000) return SetError (ds, -1, "Overlong 4 byte UTF-8 sequence detected when decoding 'string'");
-
-#if WCHAR_MAX == 0xffff
-        if (ucs >= 0x10000)
+        if (ucs > 0x10ffff)
         {
-          ucs -= 0x10000;
-          *(escOffset++) = (wchar_t) (ucs >> 10) + 0xd800;
-          *(escOffset++) = (wchar_t) (ucs & 0x3ff) + 0xdc00;
+          return SetError (ds, -1, "Code point out of range in UTF-8 sequence when decoding 'string'");
         }
-        else
+
+        if (escOffset)
         {
-          *(escOffset++) = (wchar_t) ucs;
+          if (ds->escEnd - escOffset < len && !(escOffset = Scratch_Reserve(ds, escOffset, len)))
+          {
+            return NULL;
+          }
+          memcpy(escOffset, inputOffset, len);
+          escOffset += len;
         }
-#else
-        *(escOffset++) = (wchar_t) ucs;
-#endif
+
+        maxChar = (ucs > maxChar) ? ucs : maxChar;
+        inputOffset += len;
         break;
       }
     }
@@ -675,14 +1440,19 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_array(struct DecoderState *ds)
 {
   JSOBJ itemValue;
-  JSOBJ newObj;
+  JSOBJ newObj = NULL;
+  size_t base = ds->valueCount;
+  int batch = ds->dec->newArrayFromItems != NULL;
   int len;
   ds->objDepth++;
-  if (ds->objDepth > JSON_MAX_OBJECT_DEPTH) {
-    return SetError(ds, -1, "Reached object decoding depth limit");
+  if (ds->objDepth > ds->maxDepth) {
+    return SetError(ds, 0, "Reached object decoding depth limit");
   }
 
-  newObj = ds->dec->newArray(ds->prv);
+  if (!batch)
+  {
+    newObj = ds->dec->newArray(ds->prv);
+  }
   len = 0;
 
   ds->lastType = JT_INVALID;
@@ -692,16 +1462,16 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_array(struct DecoderState *ds)
   {
     SkipWhitespace(ds);
 
-    if ((*ds->start) == ']')
+    if (ds->start < ds->end && (*ds->start) == ']')
     {
       ds->objDepth--;
       if (len == 0)
       {
         ds->start ++;
-        return newObj;
+        return batch ? Values_popArray(ds, base) : newObj;
       }
 
-      ds->dec->releaseObject(ds->prv, newObj);
+      Values_release(ds, newObj, base);
       return SetError(ds, -1, "Unexpected character found when decoding array value (1)");
     }
 
@@ -709,26 +1479,37 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_array(struct DecoderState *ds)
 
     if (itemValue == NULL)
     {
-      ds->dec->releaseObject(ds->prv, newObj);
+      Values_release(ds, newObj, base);
       return NULL;
     }
 
-    ds->dec->arrayAddItem (ds->prv, newObj, itemValue);
+    if (batch)
+    {
+      if (!Values_push(ds, itemValue))
+      {
+        Values_release(ds, newObj, base);
+        return SetError(ds, -1, "Could not reserve memory block");
+      }
+    }
+    else
+    {
+      ds->dec->arrayAddItem (ds->prv, newObj, itemValue);
+    }
 
     SkipWhitespace(ds);
 
-    switch (*(ds->start++))
+    switch ((ds->start < ds->end) ? *(ds->start++) : '\0')
     {
     case ']':
     {
       ds->objDepth--;
-      return newObj;
+      return batch ? Values_popArray(ds, base) : newObj;
     }
     case ',':
       break;
 
     default:
-      ds->dec->releaseObject(ds->prv, newObj);
+      Values_release(ds, newObj, base);
       return SetError(ds, -1, "Unexpected character found when decoding array value (2)");
     }
 
@@ -740,14 +1521,19 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_object( struct DecoderState *ds)
 {
   JSOBJ itemName;
   JSOBJ itemValue;
-  JSOBJ newObj;
+  JSOBJ newObj = NULL;
+  size_t base = ds->valueCount;
+  int batch = ds->dec->newObjectFromItems != NULL;
 
   ds->objDepth++;
-  if (ds->objDepth > JSON_MAX_OBJECT_DEPTH) {
-    return SetError(ds, -1, "Reached object decoding depth limit");
+  if (ds->objDepth > ds->maxDepth) {
+    return SetError(ds, 0, "Reached object decoding depth limit");
   }
 
-  newObj = ds->dec->newObject(ds->prv);
+  if (!batch)
+  {
+    newObj = ds->dec->newObject(ds->prv);
+  }
 
   ds->start ++;
 
@@ -755,35 +1541,35 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_object( struct DecoderState *ds)
   {
     SkipWhitespace(ds);
 
-    if ((*ds->start) == '}')
+    if (ds->start < ds->end && (*ds->start) == '}')
     {
       ds->objDepth--;
       ds->start ++;
-      return newObj;
+      return batch ? Values_popObject(ds, base) : newObj;
     }
 
     ds->lastType = JT_INVALID;
-    itemName = decode_any(ds);
+    itemName = (ds->start < ds->end && (*ds->start) == '\"') ? decode_string(ds, 1) : decode_any(ds);
 
     if (itemName == NULL)
     {
-      ds->dec->releaseObject(ds->prv, newObj);
+      Values_release(ds, newObj, base);
       return NULL;
     }
 
     if (ds->lastType != JT_UTF8)
     {
-      ds->dec->releaseObject(ds->prv, newObj);
       ds->dec->releaseObject(ds->prv, itemName);
+      Values_release(ds, newObj, base);
       return SetError(ds, -1, "Key name of object must be 'string' when decoding 'object'");
     }
 
     SkipWhitespace(ds);
 
-    if (*(ds->start++) != ':')
+    if (ds->start >= ds->end || *(ds->start++) != ':')
     {
-      ds->dec->releaseObject(ds->prv, newObj);
       ds->dec->releaseObject(ds->prv, itemName);
+      Values_release(ds, newObj, base);
       return SetError(ds, -1, "No ':' found when decoding object value");
     }
 
@@ -793,27 +1579,45 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_object( struct DecoderState *ds)
 
     if (itemValue == NULL)
     {
-      ds->dec->releaseObject(ds->prv, newObj);
       ds->dec->releaseObject(ds->prv, itemName);
+      Values_release(ds, newObj, base);
       return NULL;
     }
 
-    ds->dec->objectAddKey (ds->prv, newObj, itemName, itemValue);
+    if (batch)
+    {
+      if (!Values_push(ds, itemName))
+      {
+        ds->dec->releaseObject(ds->prv, itemValue);
+        Values_release(ds, newObj, base);
+        return SetError(ds, -1, "Could not reserve memory block");
+      }
+
+      if (!Values_push(ds, itemValue))
+      {
+        Values_release(ds, newObj, base);
+        return SetError(ds, -1, "Could not reserve memory block");
+      }
+    }
+    else
+    {
+      ds->dec->objectAddKey (ds->prv, newObj, itemName, itemValue);
+    }
 
     SkipWhitespace(ds);
 
-    switch (*(ds->start++))
+    switch ((ds->start < ds->end) ? *(ds->start++) : '\0')
     {
       case '}':
       {
         ds->objDepth--;
-        return newObj;
+        return batch ? Values_popObject(ds, base) : newObj;
       }
       case ',':
         break;
 
       default:
-        ds->dec->releaseObject(ds->prv, newObj);
+        Values_release(ds, newObj, base);
         return SetError(ds, -1, "Unexpected character in found when decoding object value");
     }
   }
@@ -823,10 +1627,10 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_any(struct DecoderState *ds)
 {
   for (;;)
   {
-    switch (*ds->start)
+    switch ((ds->start < ds->end) ? *ds->start : '\0')
     {
       case '\"':
-        return decode_string (ds);
+        return decode_string (ds, 0);
       case '0':
       case '1':
       case '2':
@@ -860,25 +1664,29 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_any(struct DecoderState *ds)
   }
 }
 
-JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer)
+static JSOBJ DecodeBuffer(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, JSUINT32 maxDepth)
 {
-  /*
-  FIXME: Base the size of escBuffer of that of cbBuffer so that the unicode escaping doesn't run into the wall each time */
   struct DecoderState ds;
-  wchar_t escBuffer[(JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t))];
+  char escBuffer[JSON_MAX_STACK_BUFFER_SIZE];
+  JSOBJ values[JSON_MAX_STACK_VALUES];
   JSOBJ ret;
 
   ds.start = (char *) buffer;
   ds.end = ds.start + cbBuffer;
 
   ds.escStart = escBuffer;
-  ds.escEnd = ds.escStart + (JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t));
+  ds.escEnd = ds.escStart + JSON_MAX_STACK_BUFFER_SIZE;
   ds.escHeap = 0;
   ds.prv = dec->prv;
   ds.dec = dec;
   ds.dec->errorStr = NULL;
   ds.dec->errorOffset = NULL;
   ds.objDepth = 0;
+  ds.maxDepth = maxDepth;
+  ds.values = values;
+  ds.valueCount = 0;
+  ds.valueCapacity = JSON_MAX_STACK_VALUES;
+  ds.valueHeap = 0;
 
   ds.dec = dec;
 
@@ -889,6 +1697,11 @@ JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuf
     dec->free(ds.escStart);
   }
 
+  if (ds.valueHeap)
+  {
+    dec->free(ds.values);
+  }
+
   if (!(dec->errorStr))
   {
     if ((ds.end - ds.start) > 0)
@@ -905,3 +1718,1628 @@ JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuf
 
   return ret;
 }
+
+JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer)
+{
+  return DecodeBuffer(dec, buffer, cbBuffer, JSON_MAX_OBJECT_DEPTH);
+}
+
+/*
+Validation callbacks. Nothing is built, every value is the same non-NULL handle */
+static char g_validValue;
+
+static JSOBJ Validate_newString(void *prv, char *start, char *end, JSUINT32 maxChar)
+{
+  return &g_validValue;
+}
+
+static void Validate_addItem(void *prv, JSOBJ obj, JSOBJ value)
+{
+}
+
+static void Validate_addKey(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value)
+{
+}
+
+static JSOBJ Validate_newValue(void *prv)
+{
+  return &g_validValue;
+}
+
+static JSOBJ Validate_newInt(void *prv, JSINT32 value)
+{
+  return &g_validValue;
+}
+
+static JSOBJ Validate_newLong(void *prv, JSINT64 value)
+{
+  return &g_validValue;
+}
+
+static JSOBJ Validate_newUnsignedLong(void *prv, JSUINT64 value)
+{
+  return &g_validValue;
+}
+
+static JSOBJ Validate_newDouble(void *prv, double value)
+{
+  return &g_validValue;
+}
+
+static void Validate_releaseObject(void *prv, JSOBJ obj)
+{
+}
+
+int JSON_Validate(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, JSUINT32 maxDepth)
+{
+  JSOBJ ret;
+  JSONObjectDecoder validateDecoder =
+  {
+    Validate_newString,
+    Validate_addKey,
+    Validate_addItem,
+    Validate_newValue,
+    Validate_newValue,
+    Validate_newValue,
+    Validate_newValue,
+    Validate_newValue,
+    Validate_newInt,
+    Validate_newLong,
+    Validate_newUnsignedLong,
+    Validate_newDouble,
+    Validate_releaseObject,
+    malloc,
+    free,
+    realloc
+  };
+
+  validateDecoder.preciseFloat = dec->preciseFloat;
+
+  ret = DecodeBuffer(&validateDecoder, buffer, cbBuffer, maxDepth < JSON_MAX_OBJECT_DEPTH ? maxDepth : JSON_MAX_OBJECT_DEPTH);
+
+  dec->errorStr = validateDecoder.errorStr;
+  dec->errorOffset = validateDecoder.errorOffset;
+
+  return ret != NULL;
+}
+
+/*
+JSON pointer extraction. Every pointer is split once into its unescaped reference tokens, then the
+document is walked keeping the pointers that still match the path taken so far. Pointers ending at
+a value have it decoded in full, values no pointer leads into are skipped. */
+#define EXTRACT_NO_INDEX ((size_t) -1)
+
+struct ExtractState
+{
+  JSONObjectDecoder *dec;
+  JSOBJ *results;
+  size_t count;
+
+  /*
+  Number of tokens and index of the first one, per pointer */
+  size_t *depths;
+  size_t *firstTokens;
+
+  /*
+  Unescaped tokens in chars, with the array index each one stands for or EXTRACT_NO_INDEX */
+  size_t *tokenStarts;
+  size_t *tokenLengths;
+  size_t *tokenIndices;
+  char *chars;
+
+  /*
+  Pointers still matching, count entries for each level of the walk */
+  size_t *active;
+
+  /*
+  Object keys are read with a copy of the decoder recording where they are instead of building them */
+  JSONObjectDecoder keyDecoder;
+  char *keyStart;
+  char *keyEnd;
+};
+
+static JSOBJ Extract_newKey(void *prv, char *start, char *end, JSUINT32 maxChar)
+{
+  struct ExtractState *es = (struct ExtractState *) prv;
+  es->keyStart = start;
+  es->keyEnd = end;
+  return (JSOBJ) es;
+}
+
+static int Extract_parsePointers(struct ExtractState *es, const JSONPointer *pointers)
+{
+  JSONObjectDecoder *dec = es->dec;
+  size_t tokenCount = 0;
+  size_t charCount = 0;
+  size_t maxDepth = 0;
+  size_t words;
+  size_t index;
+  size_t token;
+  size_t depth;
+  const char *offset;
+  const char *end;
+  char *chars;
+
+  for (index = 0; index < es->count; index ++)
+  {
+    offset = pointers[index].start;
+    end = offset + pointers[index].length;
+
+    if (offset < end && *offset != '/')
+    {
+      dec->errorStr = "Invalid JSON pointer";
+      return 0;
+    }
+
+    for (depth = 0; offset < end; offset ++)
+    {
+      if (*offset == '/')
+      {
+        depth ++;
+      }
+      else
+      if (*offset == '~' && (offset + 1 == end || (offset[1] != '0' && offset[1] != '1')))
+      {
+        dec->errorStr = "Invalid JSON pointer";
+        return 0;
+      }
+    }
+
+    tokenCount += depth;
+    charCount += pointers[index].length;
+    maxDepth = depth > maxDepth ? depth : maxDepth;
+  }
+
+  if (es->count > (SIZE_MAX / sizeof(size_t) - 2 * es->count - 3 * tokenCount - charCount) / (maxDepth + 1))
+  {
+    dec->errorStr = "Could not reserve memory block";
+    return 0;
+  }
+
+  words = 2 * es->count + 3 * tokenCount + es->count * (maxDepth + 1);
+  es->depths = (size_t *) dec->malloc(words * sizeof(size_t) + charCount + 1);
+  if (!es->depths)
+  {
+    dec->errorStr = "Could not reserve memory block";
+    return 0;
+  }
+
+  es->firstTokens = es->depths + es->count;
+  es->tokenStarts = es->firstTokens + es->count;
+  es->tokenLengths = es->tokenStarts + tokenCount;
+  es->tokenIndices = es->tokenLengths + tokenCount;
+  es->active = es->tokenIndices + tokenCount;
+  es->chars = (char *) (es->active + es->count * (maxDepth + 1));
+
+  chars = es->chars;
+  token = 0;
+
+  for (index = 0; index < es->count; index ++)
+  {
+    offset = pointers[index].start;
+    end = offset + pointers[index].length;
+    es->firstTokens[index] = token;
+    es->depths[index] = 0;
+
+    while (offset < end)
+    {
+      // Skip the '/' and copy the token up to the next one
+      offset ++;
+      es->tokenStarts[token] = chars - es->chars;
+
+      for (; offset < end && *offset != '/'; offset ++)
+      {
+        if (*offset == '~')
+        {
+          offset ++;
+          *(chars++) = (*offset == '0') ? '~' : '/';
+        }
+        else
+        {
+          *(chars++) = *offset;
+        }
+      }
+
+      es->tokenLengths[token] = (chars - es->chars) - es->tokenStarts[token];
+      es->depths[index] ++;
+      token ++;
+    }
+  }
+
+  // Array indices are decimal without leading zeros, "-" (past the end) never matches
+  for (token = 0; token < tokenCount; token ++)
+  {
+    const char *digits = es->chars + es->tokenStarts[token];
+    size_t length = es->tokenLengths[token];
+    size_t value = 0;
+
+    es->tokenIndices[token] = EXTRACT_NO_INDEX;
+
+    if (length == 0 || (length > 1 && digits[0] == '0'))
+    {
+      continue;
+    }
+
+    for (index = 0; index < length; index ++)
+    {
+      if (digits[index] < '0' || digits[index] > '9' || value > (EXTRACT_NO_INDEX - 10) / 10)
+      {
+        break;
+      }
+      value = value * 10 + (digits[index] - '0');
+    }
+
+    if (index == length)
+    {
+      es->tokenIndices[token] = value;
+    }
+  }
+
+  return 1;
+}
+
+/*
+Returns the first of the bytes that matter when skipping over an array or object: '"', '[', ']', '{' or '}' */
+static INLINE_PREFIX char *Extract_findStructural(char *offset, char *end)
+{
+#ifdef JSON_SIMD_SSE2
+  __m128i chunk;
+  __m128i folded;
+  __m128i found;
+  int mask;
+
+  while (end - offset >= 16)
+  {
+    chunk = _mm_loadu_si128((const __m128i *) offset);
+    // Clearing bit 5 folds '{' and '}' onto '[' and ']'
+    folded = _mm_and_si128(chunk, _mm_set1_epi8((char) 0xdf));
+    found = _mm_or_si128(_mm_cmpeq_epi8(folded, _mm_set1_epi8('[')), _mm_cmpeq_epi8(folded, _mm_set1_epi8(']')));
+    found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, _mm_set1_epi8('\"')));
+    mask = _mm_movemask_epi8(found);
+
+    if (mask)
+    {
+      return offset + JSON_ctz32(mask);
+    }
+
+    offset += 16;
+  }
+#endif
+
+  for (; offset < end; offset ++)
+  {
+    switch (*offset)
+    {
+      case '\"':
+      case '[':
+      case ']':
+      case '{':
+      case '}':
+        return offset;
+    }
+  }
+
+  return end;
+}
+
+static int Extract_skipString(struct DecoderState *ds)
+{
+  char *first = ds->start + 1;
+  char *offset = first;
+  char *quote;
+  char *escape;
+
+  for (;;)
+  {
+    quote = (char *) memchr(offset, '\"', ds->end - offset);
+    if (!quote)
+    {
+      SetError(ds, -1, "Unmatched ''\"' when when decoding 'string'");
+      return 0;
+    }
+
+    // The quote is escaped when an odd number of backslashes precede it
+    for (escape = quote; escape > first && escape[-1] == '\\'; escape --);
+    offset = quote + 1;
+
+    if (((quote - escape) & 1) == 0)
+    {
+      ds->start = offset;
+      return 1;
+    }
+  }
+}
+
+static int Extract_skipContainer(struct DecoderState *ds)
+{
+  char opened[JSON_MAX_OBJECT_DEPTH];
+  char *offset = ds->start;
+  JSUINT32 depth = 0;
+
+  for (;;)
+  {
+    offset = Extract_findStructural(offset, ds->end);
+
+    if (offset == ds->end)
+    {
+      ds->start = offset;
+      SetError(ds, 0, "Unexpected end of data when skipping 'array' or 'object'");
+      return 0;
+    }
+
+    switch (*offset)
+    {
+      case '\"':
+        ds->start = offset;
+        if (!Extract_skipString(ds))
+        {
+          return 0;
+        }
+        offset = ds->start;
+        break;
+
+      case '[':
+      case '{':
+        if (ds->objDepth + depth >= ds->maxDepth)
+        {
+          ds->start = offset + 1;
+          SetError(ds, -1, "Reached object decoding depth limit");
+          return 0;
+        }
+        opened[depth ++] = *(offset++);
+        break;
+
+      default:
+        // ']' is '[' + 2 and '}' is '{' + 2
+        if (*offset != opened[--depth] + 2)
+        {
+          ds->start = offset + 1;
+          SetError(ds, -1, "Mismatched bracket when skipping 'array' or 'object'");
+          return 0;
+        }
+
+        offset ++;
+        if (depth == 0)
+        {
+          ds->start = offset;
+          return 1;
+        }
+        break;
+    }
+  }
+}
+
+static int Extract_skip(struct DecoderState *ds)
+{
+  char *offset;
+
+  SkipWhitespace(ds);
+
+  switch ((ds->start < ds->end) ? *ds->start : '\0')
+  {
+    case '\"':
+      return Extract_skipString(ds);
+
+    case '[':
+    case '{':
+      return Extract_skipContainer(ds);
+
+    case '0': case '1': case '2': case '3': case '4':
+    case '5': case '6': case '7': case '8': case '9':
+    case '-':
+    case 't':
+    case 'f':
+    case 'n':
+      // Numbers and literals run up to the next delimiter
+      for (offset = ds->start + 1; offset < ds->end; offset ++)
+      {
+        if (!((*offset >= '0' && *offset <= '9') || (*offset >= 'a' && *offset <= 'z') || (*offset >= 'A' && *offset <= 'Z') || *offset == '.' || *offset == '+' || *offset == '-'))
+        {
+          break;
+        }
+      }
+      ds->start = offset;
+      return 1;
+
+    default:
+      SetError(ds, -1, "Expected object or value");
+      return 0;
+  }
+}
+
+static int Extract_value(struct ExtractState *es, struct DecoderState *ds, size_t depth, size_t *active, size_t activeCount);
+
+static int Extract_object(struct ExtractState *es, struct DecoderState *ds, size_t depth, size_t *active, size_t activeCount)
+{
+  JSONObjectDecoder *dec = ds->dec;
+  void *prv = ds->prv;
+  size_t *matching = active + es->count;
+  size_t matchCount;
+  size_t index;
+  size_t token;
+  size_t keyLength;
+  JSOBJ key;
+
+  ds->objDepth++;
+  if (ds->objDepth > ds->maxDepth) {
+    SetError(ds, 0, "Reached object decoding depth limit");
+    return 0;
+  }
+
+  ds->start ++;
+
+  for (;;)
+  {
+    SkipWhitespace(ds);
+
+    if (ds->start < ds->end && (*ds->start) == '}')
+    {
+      ds->objDepth--;
+      ds->start ++;
+      return 1;
+    }
+
+    if (ds->start >= ds->end || (*ds->start) != '\"')
+    {
+      SetError(ds, 0, "Key name of object must be 'string' when decoding 'object'");
+      return 0;
+    }
+
+    ds->dec = &es->keyDecoder;
+    ds->prv = es;
+    key = decode_string(ds, 1);
+    ds->dec = dec;
+    ds->prv = prv;
+
+    if (key == NULL)
+    {
+      dec->errorStr = es->keyDecoder.errorStr;
+      dec->errorOffset = es->keyDecoder.errorOffset;
+      return 0;
+    }
+
+    keyLength = es->keyEnd - es->keyStart;
+    matchCount = 0;
+
+    for (index = 0; index < activeCount; index ++)
+    {
+      token = es->firstTokens[active[index]] + depth;
+
+      if (es->tokenLengths[token] == keyLength && memcmp(es->chars + es->tokenStarts[token], es->keyStart, keyLength) == 0)
+      {
+        matching[matchCount ++] = active[index];
+      }
+    }
+
+    SkipWhitespace(ds);
+
+    if (ds->start >= ds->end || *(ds->start++) != ':')
+    {
+      SetError(ds, -1, "No ':' found when decoding object value");
+      return 0;
+    }
+
+    if (!(matchCount ? Extract_value(es, ds, depth + 1, matching, matchCount) : Extract_skip(ds)))
+    {
+      return 0;
+    }
+
+    SkipWhitespace(ds);
+
+    switch ((ds->start < ds->end) ? *(ds->start++) : '\0')
+    {
+      case '}':
+        ds->objDepth--;
+        return 1;
+
+      case ',':
+        break;
+
+      default:
+        SetError(ds, -1, "Unexpected character in found when decoding object value");
+        return 0;
+    }
+  }
+}
+
+static int Extract_array(struct ExtractState *es, struct DecoderState *ds, size_t depth, size_t *active, size_t activeCount)
+{
+  size_t *matching = active + es->count;
+  size_t matchCount;
+  size_t index;
+  size_t item = 0;
+
+  ds->objDepth++;
+  if (ds->objDepth > ds->maxDepth) {
+    SetError(ds, 0, "Reached object decoding depth limit");
+    return 0;
+  }
+
+  ds->start ++;
+  SkipWhitespace(ds);
+
+  if (ds->start < ds->end && (*ds->start) == ']')
+  {
+    ds->objDepth--;
+    ds->start ++;
+    return 1;
+  }
+
+  for (;; item ++)
+  {
+    matchCount = 0;
+
+    for (index = 0; index < activeCount; index ++)
+    {
+      if (es->tokenIndices[es->firstTokens[active[index]] + depth] == item)
+      {
+        matching[matchCount ++] = active[index];
+      }
+    }
+
+    if (!(matchCount ? Extract_value(es, ds, depth + 1, matching, matchCount) : Extract_skip(ds)))
+    {
+      return 0;
+    }
+
+    SkipWhitespace(ds);
+
+    switch ((ds->start < ds->end) ? *(ds->start++) : '\0')
+    {
+      case ']':
+        ds->objDepth--;
+        return 1;
+
+      case ',':
+        break;
+
+      default:
+        SetError(ds, -1, "Unexpected character found when decoding array value (2)");
+        return 0;
+    }
+  }
+}
+
+static int Extract_value(struct ExtractState *es, struct DecoderState *ds, size_t depth, size_t *active, size_t activeCount)
+{
+  size_t deeperCount = 0;
+  size_t index;
+  size_t pointer;
+  char *start;
+  JSOBJ value;
+  int decoded = 0;
+
+  SkipWhitespace(ds);
+  start = ds->start;
+
+  for (index = 0; index < activeCount; index ++)
+  {
+    pointer = active[index];
+
+    if (es->depths[pointer] > depth)
+    {
+      // Keep the pointers leading further down, in place
+      active[deeperCount ++] = pointer;
+      continue;
+    }
+
+    ds->start = start;
+    value = decode_any(ds);
+    if (value == NULL)
+    {
+      return 0;
+    }
+
+    if (es->results[pointer])
+    {
+      ds->dec->releaseObject(ds->prv, es->results[pointer]);
+    }
+    es->results[pointer] = value;
+    decoded = 1;
+  }
+
+  if (deeperCount == 0)
+  {
+    return decoded ? 1 : Extract_skip(ds);
+  }
+
+  ds->start = start;
+
+  switch ((ds->start < ds->end) ? *ds->start : '\0')
+  {
+    case '{':
+      return Extract_object(es, ds, depth, active, deeperCount);
+    case '[':
+      return Extract_array(es, ds, depth, active, deeperCount);
+    default:
+      // A scalar has nothing to look into, step over it again
+      return Extract_skip(ds);
+  }
+}
+
+int JSON_Extract(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, const JSONPointer *pointers, size_t count, JSOBJ *results)
+{
+  struct DecoderState ds;
+  struct ExtractState es;
+  char escBuffer[JSON_MAX_STACK_BUFFER_SIZE];
+  JSOBJ values[JSON_MAX_STACK_VALUES];
+  size_t index;
+  int ret;
+
+  dec->errorStr = NULL;
+  dec->errorOffset = NULL;
+
+  for (index = 0; index < count; index ++)
+  {
+    results[index] = NULL;
+  }
+
+  es.dec = dec;
+  es.results = results;
+  es.count = count;
+
+  if (!Extract_parsePointers(&es, pointers))
+  {
+    return 0;
+  }
+
+  for (index = 0; index < count; index ++)
+  {
+    es.active[index] = index;
+  }
+
+  es.keyDecoder = *dec;
+  es.keyDecoder.newKey = Extract_newKey;
+  es.keyDecoder.newString = Extract_newKey;
+
+  ds.start = (char *) buffer;
+  ds.end = ds.start + cbBuffer;
+
+  ds.escStart = escBuffer;
+  ds.escEnd = ds.escStart + JSON_MAX_STACK_BUFFER_SIZE;
+  ds.escHeap = 0;
+  ds.prv = dec->prv;
+  ds.dec = dec;
+  ds.objDepth = 0;
+  ds.maxDepth = JSON_MAX_OBJECT_DEPTH;
+  ds.values = values;
+  ds.valueCount = 0;
+  ds.valueCapacity = JSON_MAX_STACK_VALUES;
+  ds.valueHeap = 0;
+
+  ret = Extract_value(&es, &ds, 0, es.active, count);
+
+  if (ret)
+  {
+    SkipWhitespace(&ds);
+
+    if (ds.start != ds.end)
+    {
+      SetError(&ds, -1, "Trailing data");
+      ret = 0;
+    }
+  }
+
+  if (ds.escHeap)
+  {
+    dec->free(ds.escStart);
+  }
+
+  if (ds.valueHeap)
+  {
+    dec->free(ds.values);
+  }
+
+  dec->free(es.depths);
+
+  if (!ret)
+  {
+    for (index = 0; index < count; index ++)
+    {
+      if (results[index])
+      {
+        dec->releaseObject(dec->prv, results[index]);
+        results[index] = NULL;
+      }
+    }
+  }
+
+  return ret;
+}
+
+/*
+Columnar decoding. Numbers making up a whole field value are decoded with a copy of the decoder capturing them
+instead of building them */
+struct ColumnsState
+{
+  JSONObjectDecoder *dec;
+  JSONObjectDecoder numberDecoder;
+  int type;
+  JSINT64 longValue;
+  double doubleValue;
+};
+
+static char g_columnNumber;
+
+static JSOBJ Columns_newInt(void *prv, JSINT32 value)
+{
+  struct ColumnsState *cs = (struct ColumnsState *) prv;
+  cs->type = JT_LONG;
+  cs->longValue = value;
+  return &g_columnNumber;
+}
+
+static JSOBJ Columns_newLong(void *prv, JSINT64 value)
+{
+  struct ColumnsState *cs = (struct ColumnsState *) prv;
+  cs->type = JT_LONG;
+  cs->longValue = value;
+  return &g_columnNumber;
+}
+
+static JSOBJ Columns_newUnsignedLong(void *prv, JSUINT64 value)
+{
+  struct ColumnsState *cs = (struct ColumnsState *) prv;
+  cs->type = JT_ULONG;
+  return cs->dec->newUnsignedLong(cs->dec->prv, value);
+}
+
+static JSOBJ Columns_newDouble(void *prv, double value)
+{
+  struct ColumnsState *cs = (struct ColumnsState *) prv;
+  cs->type = JT_DOUBLE;
+  cs->doubleValue = value;
+  return &g_columnNumber;
+}
+
+static int Columns_object(struct ColumnsState *cs, struct DecoderState *ds, size_t index, JSPFN_ADDFIELD addField)
+{
+  JSONObjectDecoder *dec = cs->dec;
+  JSOBJ name;
+  JSOBJ value;
+  int type;
+
+  ds->start ++;
+
+  SkipWhitespace(ds);
+  if (ds->start < ds->end && *ds->start == '}')
+  {
+    ds->start ++;
+    return 1;
+  }
+
+  for (;;)
+  {
+    SkipWhitespace(ds);
+
+    if (ds->start >= ds->end || *ds->start != '\"')
+    {
+      SetError(ds, -1, "Key name of object must be 'string' when decoding 'object'");
+      return 0;
+    }
+
+    name = decode_string(ds, 1);
+    if (name == NULL)
+    {
+      return 0;
+    }
+
+    SkipWhitespace(ds);
+
+    if (ds->start >= ds->end || *(ds->start++) != ':')
+    {
+      dec->releaseObject(ds->prv, name);
+      SetError(ds, -1, "No ':' found when decoding object value");
+      return 0;
+    }
+
+    SkipWhitespace(ds);
+
+    if (ds->start < ds->end && ((*ds->start >= '0' && *ds->start <= '9') || *ds->start == '-'))
+    {
+      ds->dec = &cs->numberDecoder;
+      ds->prv = cs;
+      value = decode_numeric(ds);
+      ds->dec = dec;
+      ds->prv = dec->prv;
+
+      if (value == NULL)
+      {
+        dec->releaseObject(ds->prv, name);
+        dec->errorStr = cs->numberDecoder.errorStr;
+        dec->errorOffset = cs->numberDecoder.errorOffset;
+        return 0;
+      }
+
+      type = cs->type;
+      if (value == &g_columnNumber)
+      {
+        value = NULL;
+      }
+    }
+    else
+    {
+      ds->lastType = JT_INVALID;
+      value = decode_any(ds);
+
+      if (value == NULL)
+      {
+        dec->releaseObject(ds->prv, name);
+        return 0;
+      }
+
+      // Arrays and objects leave the type of their last value behind
+      type = (*(ds->start - 1) == ']') ? JT_ARRAY : (*(ds->start - 1) == '}') ? JT_OBJECT : ds->lastType;
+    }
+
+    if (!addField(ds->prv, index, name, value, type, cs->longValue, cs->doubleValue))
+    {
+      SetError(ds, -1, "Could not add field");
+      return 0;
+    }
+
+    SkipWhitespace(ds);
+
+    switch ((ds->start < ds->end) ? *(ds->start++) : '\0')
+    {
+      case '}':
+        return 1;
+
+      case ',':
+        break;
+
+      default:
+        SetError(ds, -1, "Unexpected character in found when decoding object value");
+        return 0;
+    }
+  }
+}
+
+int JSON_DecodeColumns(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer, JSPFN_ADDFIELD addField, size_t *count)
+{
+  struct DecoderState ds;
+  struct ColumnsState cs;
+  char escBuffer[JSON_MAX_STACK_BUFFER_SIZE];
+  JSOBJ values[JSON_MAX_STACK_VALUES];
+  size_t index = 0;
+  int ret = 0;
+
+  dec->errorStr = NULL;
+  dec->errorOffset = NULL;
+
+  cs.dec = dec;
+  cs.numberDecoder = *dec;
+  cs.numberDecoder.newInt = Columns_newInt;
+  cs.numberDecoder.newLong = Columns_newLong;
+  cs.numberDecoder.newUnsignedLong = Columns_newUnsignedLong;
+  cs.numberDecoder.newDouble = Columns_newDouble;
+  cs.longValue = 0;
+  cs.doubleValue = 0.0;
+
+  ds.start = (char *) buffer;
+  ds.end = ds.start + cbBuffer;
+
+  ds.escStart = escBuffer;
+  ds.escEnd = ds.escStart + JSON_MAX_STACK_BUFFER_SIZE;
+  ds.escHeap = 0;
+  ds.prv = dec->prv;
+  ds.dec = dec;
+  // Field values are nested in the array and an object
+  ds.objDepth = 2;
+  ds.maxDepth = JSON_MAX_OBJECT_DEPTH;
+  ds.values = values;
+  ds.valueCount = 0;
+  ds.valueCapacity = JSON_MAX_STACK_VALUES;
+  ds.valueHeap = 0;
+
+  SkipWhitespace(&ds);
+
+  if (ds.start >= ds.end || *ds.start != '[')
+  {
+    SetError(&ds, 0, "Expected an array of objects");
+    goto END;
+  }
+
+  ds.start ++;
+  SkipWhitespace(&ds);
+
+  if (ds.start < ds.end && *ds.start == ']')
+  {
+    ds.start ++;
+    ret = 1;
+  }
+
+  while (!ret)
+  {
+    SkipWhitespace(&ds);
+
+    if (ds.start >= ds.end || *ds.start != '{')
+    {
+      SetError(&ds, 0, "Expected an array of objects");
+      goto END;
+    }
+
+    if (!Columns_object(&cs, &ds, index, addField))
+    {
+      goto END;
+    }
+    index ++;
+
+    SkipWhitespace(&ds);
+
+    switch ((ds.start < ds.end) ? *(ds.start++) : '\0')
+    {
+      case ']':
+        ret = 1;
+        break;
+
+      case ',':
+        break;
+
+      default:
+        SetError(&ds, -1, "Unexpected character found when decoding array value (2)");
+        goto END;
+    }
+  }
+
+  SkipWhitespace(&ds);
+
+  if (ds.start != ds.end)
+  {
+    SetError(&ds, -1, "Trailing data");
+    ret = 0;
+  }
+
+END:
+  if (ds.escHeap)
+  {
+    dec->free(ds.escStart);
+  }
+
+  if (ds.valueHeap)
+  {
+    dec->free(ds.values);
+  }
+
+  *count = index;
+  return ret;
+}
+
+/*
+Tape building callbacks. Objects handed back to the decoder are tape indices biased by one so they are never NULL */
+#define TAPE_HANDLE(__index) ((JSOBJ) ((__index) + 1))
+#define TAPE_INDEX(__obj) (((size_t) (__obj)) - 1)
+
+static JSONTapeItem *Tape_push(JSONTape *tape, int type)
+{
+  JSONTapeItem *item;
+
+  if (tape->count == tape->capacity)
+  {
+    size_t newCapacity = tape->capacity ? tape->capacity * 2 : 256;
+
+    if (newCapacity > (SIZE_MAX / sizeof(JSONTapeItem)))
+    {
+      tape->outOfMemory = 1;
+      return NULL;
+    }
+
+    item = (JSONTapeItem *) realloc(tape->items, newCapacity * sizeof(JSONTapeItem));
+    if (!item)
+    {
+      tape->outOfMemory = 1;
+      return NULL;
+    }
+
+    tape->items = item;
+    tape->capacity = newCapacity;
+  }
+
+  item = &tape->items[tape->count ++];
+  item->type = type;
+  return item;
+}
+
+static JSOBJ Tape_newString(void *prv, char *start, char *end, JSUINT32 maxChar)
+{
+  JSONTape *tape = (JSONTape *) prv;
+  JSONTapeItem *item;
+  size_t length = end - start;
+
+  if (tape->charCapacity - tape->charCount < length)
+  {
+    char *chars;
+    size_t newCapacity = tape->charCapacity ? tape->charCapacity * 2 : 4096;
+
+    while (newCapacity - tape->charCount < length)
+    {
+      if (newCapacity > SIZE_MAX / 2)
+      {
+        tape->outOfMemory = 1;
+        return NULL;
+      }
+      newCapacity *= 2;
+    }
+
+    chars = (char *) realloc(tape->chars, newCapacity);
+    if (!chars)
+    {
+      tape->outOfMemory = 1;
+      return NULL;
+    }
+
+    tape->chars = chars;
+    tape->charCapacity = newCapacity;
+  }
+
+  item = Tape_push(tape, JT_UTF8);
+  if (!item)
+  {
+    return NULL;
+  }
+
+  memcpy(tape->chars + tape->charCount, start, length);
+  item->value.string.offset = tape->charCount;
+  item->value.string.length = length;
+  item->value.string.maxChar = maxChar;
+  tape->charCount += length;
+  return TAPE_HANDLE(tape->count - 1);
+}
+
+static void Tape_addChild(void *prv, JSOBJ obj, JSOBJ value)
+{
+  JSONTape *tape = (JSONTape *) prv;
+  JSONTapeItem *item = &tape->items[TAPE_INDEX(obj)];
+
+  // The value is complete when it's added, so the container now ends after it
+  item->value.container.count ++;
+  item->value.container.end = tape->count;
+}
+
+static void Tape_objectAddKey(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value)
+{
+  Tape_addChild(prv, obj, value);
+}
+
+static JSOBJ Tape_newItem(void *prv, int type)
+{
+  JSONTape *tape = (JSONTape *) prv;
+  JSONTapeItem *item = Tape_push(tape, type);
+
+  if (!item)
+  {
+    return NULL;
+  }
+
+  item->value.container.count = 0;
+  item->value.container.end = tape->count;
+  return TAPE_HANDLE(tape->count - 1);
+}
+
+static JSOBJ Tape_newTrue(void *prv)
+{
+  return Tape_newItem(prv, JT_TRUE);
+}
+
+static JSOBJ Tape_newFalse(void *prv)
+{
+  return Tape_newItem(prv, JT_FALSE);
+}
+
+static JSOBJ Tape_newNull(void *prv)
+{
+  return Tape_newItem(prv, JT_NULL);
+}
+
+static JSOBJ Tape_newObject(void *prv)
+{
+  return Tape_newItem(prv, JT_OBJECT);
+}
+
+static JSOBJ Tape_newArray(void *prv)
+{
+  return Tape_newItem(prv, JT_ARRAY);
+}
+
+static JSOBJ Tape_newInt(void *prv, JSINT32 value)
+{
+  JSOBJ ret = Tape_newItem(prv, JT_INT);
+
+  if (ret)
+  {
+    ((JSONTape *) prv)->items[TAPE_INDEX(ret)].value.longValue = value;
+  }
+  return ret;
+}
+
+static JSOBJ Tape_newLong(void *prv, JSINT64 value)
+{
+  JSOBJ ret = Tape_newItem(prv, JT_LONG);
+
+  if (ret)
+  {
+    ((JSONTape *) prv)->items[TAPE_INDEX(ret)].value.longValue = value;
+  }
+  return ret;
+}
+
+static JSOBJ Tape_newUnsignedLong(void *prv, JSUINT64 value)
+{
+  JSOBJ ret = Tape_newItem(prv, JT_ULONG);
+
+  if (ret)
+  {
+    ((JSONTape *) prv)->items[TAPE_INDEX(ret)].value.unsignedLongValue = value;
+  }
+  return ret;
+}
+
+static JSOBJ Tape_newDouble(void *prv, double value)
+{
+  JSOBJ ret = Tape_newItem(prv, JT_DOUBLE);
+
+  if (ret)
+  {
+    ((JSONTape *) prv)->items[TAPE_INDEX(ret)].value.doubleValue = value;
+  }
+  return ret;
+}
+
+static void Tape_releaseObject(void *prv, JSOBJ obj)
+{
+  // The whole tape is discarded on error, nothing to release per item
+}
+
+int JSON_DecodeObjectToTape(JSONObjectDecoder *dec, JSONTape *tape, const char *buffer, size_t cbBuffer)
+{
+  JSOBJ ret;
+  JSONObjectDecoder tapeDecoder =
+  {
+    Tape_newString,
+    Tape_objectAddKey,
+    Tape_addChild,
+    Tape_newTrue,
+    Tape_newFalse,
+    Tape_newNull,
+    Tape_newObject,
+    Tape_newArray,
+    Tape_newInt,
+    Tape_newLong,
+    Tape_newUnsignedLong,
+    Tape_newDouble,
+    Tape_releaseObject,
+    malloc,
+    free,
+    realloc
+  };
+
+  tape->items = NULL;
+  tape->count = 0;
+  tape->capacity = 0;
+  tape->chars = NULL;
+  tape->charCount = 0;
+  tape->charCapacity = 0;
+  tape->outOfMemory = 0;
+
+  tapeDecoder.preciseFloat = dec->preciseFloat;
+  tapeDecoder.prv = tape;
+
+  ret = JSON_DecodeObject(&tapeDecoder, buffer, cbBuffer);
+
+  dec->errorStr = tapeDecoder.errorStr;
+  dec->errorOffset = tapeDecoder.errorOffset;
+
+  if (ret == NULL && !dec->errorStr)
+  {
+    dec->errorStr = (char *) "Could not reserve memory block";
+  }
+
+  return dec->errorStr == NULL;
+}
+
+static JSOBJ decode_tape_item(struct DecoderState *ds, JSONTape *tape, size_t *index, int isKey)
+{
+  JSONObjectDecoder *dec = ds->dec;
+  JSONTapeItem *item = &tape->items[(*index) ++];
+  JSOBJ newObj = NULL;
+  JSOBJ itemName;
+  JSOBJ itemValue;
+  size_t base = ds->valueCount;
+  size_t count;
+
+  switch (item->type)
+  {
+    case JT_NULL: return dec->newNull(dec->prv);
+    case JT_TRUE: return dec->newTrue(dec->prv);
+    case JT_FALSE: return dec->newFalse(dec->prv);
+    case JT_INT: return dec->newInt(dec->prv, (JSINT32) item->value.longValue);
+    case JT_LONG: return dec->newLong(dec->prv, item->value.longValue);
+    case JT_ULONG: return dec->newUnsignedLong(dec->prv, item->value.unsignedLongValue);
+    case JT_DOUBLE: return dec->newDouble(dec->prv, item->value.doubleValue);
+    case JT_UTF8:
+    {
+      char *start = tape->chars + item->value.string.offset;
+      if (isKey && dec->newKey)
+      {
+        return dec->newKey(dec->prv, start, start + item->value.string.length, item->value.string.maxChar);
+      }
+      return dec->newString(dec->prv, start, start + item->value.string.length, item->value.string.maxChar);
+    }
+
+    case JT_ARRAY:
+    {
+      if (!dec->newArrayFromItems)
+      {
+        newObj = dec->newArray(dec->prv);
+        if (!newObj)
+        {
+          return NULL;
+        }
+      }
+
+      for (count = item->value.container.count; count > 0; count --)
+      {
+        itemValue = decode_tape_item(ds, tape, index, 0);
+        if (!itemValue)
+        {
+          Values_release(ds, newObj, base);
+          return NULL;
+        }
+
+        if (!newObj)
+        {
+          if (!Values_push(ds, itemValue))
+          {
+            Values_release(ds, newObj, base);
+            dec->errorStr = (char *) "Could not reserve memory block";
+            return NULL;
+          }
+        }
+        else
+        {
+          dec->arrayAddItem(dec->prv, newObj, itemValue);
+        }
+      }
+      return newObj ? newObj : Values_popArray(ds, base);
+    }
+
+    case JT_OBJECT:
+    {
+      if (!dec->newObjectFromItems)
+      {
+        newObj = dec->newObject(dec->prv);
+        if (!newObj)
+        {
+          return NULL;
+        }
+      }
+
+      for (count = item->value.container.count; count > 0; count --)
+      {
+        itemName = decode_tape_item(ds, tape, index, 1);
+        if (!itemName)
+        {
+          Values_release(ds, newObj, base);
+          return NULL;
+        }
+
+        itemValue = decode_tape_item(ds, tape, index, 0);
+        if (!itemValue)
+        {
+          dec->releaseObject(dec->prv, itemName);
+          Values_release(ds, newObj, base);
+          return NULL;
+        }
+
+        if (!newObj)
+        {
+          if (!Values_push(ds, itemName))
+          {
+            dec->releaseObject(dec->prv, itemValue);
+            Values_release(ds, newObj, base);
+            dec->errorStr = (char *) "Could not reserve memory block";
+            return NULL;
+          }
+
+          if (!Values_push(ds, itemValue))
+          {
+            Values_release(ds, newObj, base);
+            dec->errorStr = (char *) "Could not reserve memory block";
+            return NULL;
+          }
+        }
+        else
+        {
+          dec->objectAddKey(dec->prv, newObj, itemName, itemValue);
+        }
+      }
+      return newObj ? newObj : Values_popObject(ds, base);
+    }
+  }
+
+  return NULL;
+}
+
+JSOBJ JSON_DecodeTape(JSONObjectDecoder *dec, JSONTape *tape)
+{
+  if (tape->count == 0)
+  {
+    dec->errorStr = NULL;
+    dec->errorOffset = NULL;
+    return NULL;
+  }
+
+  return JSON_DecodeTapeItem(dec, tape, 0);
+}
+
+JSOBJ JSON_DecodeTapeItem(JSONObjectDecoder *dec, JSONTape *tape, size_t index)
+{
+  struct DecoderState ds;
+  JSOBJ values[JSON_MAX_STACK_VALUES];
+  JSOBJ ret;
+
+  dec->errorStr = NULL;
+  dec->errorOffset = NULL;
+
+  ds.prv = dec->prv;
+  ds.dec = dec;
+  ds.values = values;
+  ds.valueCount = 0;
+  ds.valueCapacity = JSON_MAX_STACK_VALUES;
+  ds.valueHeap = 0;
+
+  ret = decode_tape_item(&ds, tape, &index, 0);
+
+  if (ds.valueHeap)
+  {
+    dec->free(ds.values);
+  }
+
+  return ret;
+}
+
+void JSON_FreeTape(JSONTape *tape)
+{
+  free(tape->items);
+  free(tape->chars);
+  tape->items = NULL;
+  tape->chars = NULL;
+  tape->count = tape->capacity = 0;
+  tape->charCount = tape->charCapacity = 0;
+}
+
+enum SCANSTATE
+{
+  SS_BETWEEN = 0,
+  SS_CONTAINER,
+  SS_STRING,
+  SS_SCALAR,
+};
+
+enum SCANARRAYSTATE
+{
+  SAS_OPEN = 0,
+  SAS_FIRST,
+  SAS_ITEM,
+  SAS_SEPARATOR,
+  SAS_CLOSED,
+};
+
+static int Scan_setError(JSONStreamScanner *scanner, const char *message)
+{
+  scanner->errorStr = (char *) message;
+  return -1;
+}
+
+static int Scan_isScalarChar(char chr)
+{
+  return (chr >= '0' && chr <= '9') || (chr >= 'a' && chr <= 'z') || (chr >= 'A' && chr <= 'Z') || chr == '-' || chr == '+' || chr == '.';
+}
+
+int JSON_ScanValue(JSONStreamScanner *scanner, const char *buffer, size_t cbBuffer, int final, size_t *valueStart, size_t *valueEnd)
+{
+  const char *offset = buffer + scanner->offset;
+  const char *end = buffer + cbBuffer;
+  char chr;
+
+  for (; offset < end; offset ++)
+  {
+    chr = *offset;
+
+    switch (scanner->state)
+    {
+      case SS_BETWEEN:
+      {
+        if (chr == ' ' || chr == '\t' || chr == '\r' || chr == '\n')
+        {
+          continue;
+        }
+
+        if (scanner->arrayItems)
+        {
+          switch (scanner->arrayState)
+          {
+            case SAS_OPEN:
+            {
+              if (chr != '[')
+              {
+                return Scan_setError(scanner, "Expected '[' when scanning array items");
+              }
+              scanner->arrayState = SAS_FIRST;
+              continue;
+            }
+            case SAS_FIRST:
+            {
+              if (chr == ']')
+              {
+                scanner->arrayState = SAS_CLOSED;
+                continue;
+              }
+              break;
+            }
+            case SAS_SEPARATOR:
+            {
+              if (chr == ',')
+              {
+                scanner->arrayState = SAS_ITEM;
+                continue;
+              }
+              if (chr == ']')
+              {
+                scanner->arrayState = SAS_CLOSED;
+                continue;
+              }
+              return Scan_setError(scanner, "Unexpected character found when scanning array items");
+            }
+            case SAS_CLOSED:
+            {
+              return Scan_setError(scanner, "Trailing data");
+            }
+          }
+
+          scanner->arrayState = SAS_SEPARATOR;
+        }
+
+        scanner->valueStart = offset - buffer;
+
+        if (chr == '{' || chr == '[')
+        {
+          scanner->state = SS_CONTAINER;
+          scanner->depth = 1;
+          scanner->inString = 0;
+          scanner->escape = 0;
+          continue;
+        }
+
+        if (chr == '\"')
+        {
+          scanner->state = SS_STRING;
+          scanner->escape = 0;
+          continue;
+        }
+
+        if (Scan_isScalarChar(chr))
+        {
+          scanner->state = SS_SCALAR;
+          continue;
+        }
+
+        // Let the decoder report the unexpected character
+        goto VALUE_COMPLETE;
+      }
+
+      case SS_CONTAINER:
+      {
+        if (scanner->inString)
+        {
+          if (scanner->escape)
+          {
+            scanner->escape = 0;
+          }
+          else
+          if (chr == '\\')
+          {
+            scanner->escape = 1;
+          }
+          else
+          if (chr == '\"')
+          {
+            scanner->inString = 0;
+          }
+          continue;
+        }
+
+        switch (chr)
+        {
+          case '\"':
+            scanner->inString = 1;
+            break;
+          case '{':
+          case '[':
+            scanner->depth ++;
+            break;
+          case '}':
+          case ']':
+            if (-- scanner->depth == 0)
+            {
+              goto VALUE_COMPLETE;
+            }
+            break;
+        }
+        continue;
+      }
+
+      case SS_STRING:
+      {
+        if (scanner->escape)
+        {
+          scanner->escape = 0;
+        }
+        else
+        if (chr == '\\')
+        {
+          scanner->escape = 1;
+        }
+        else
+        if (chr == '\"')
+        {
+          goto VALUE_COMPLETE;
+        }
+        continue;
+      }
+
+      case SS_SCALAR:
+      {
+        if (Scan_isScalarChar(chr))
+        {
+          continue;
+        }
+
+        scanner->state = SS_BETWEEN;
+        scanner->offset = offset - buffer;
+        *valueStart = scanner->valueStart;
+        *valueEnd = scanner->offset;
+        return 1;
+      }
+    }
+  }
+
+  scanner->offset = cbBuffer;
+
+  if (!final)
+  {
+    return 0;
+  }
+
+  if (scanner->state != SS_BETWEEN)
+  {
+    // Hand over what is left, complete or not, and let the decoder judge it
+    scanner->state = SS_BETWEEN;
+    *valueStart = scanner->valueStart;
+    *valueEnd = cbBuffer;
+    return 1;
+  }
+
+  if (scanner->arrayItems && scanner->arrayState != SAS_CLOSED)
+  {
+    return Scan_setError(scanner, "Unexpected end of input when scanning array items");
+  }
+
+  return 0;
+
+VALUE_COMPLETE:
+  scanner->state = SS_BETWEEN;
+  scanner->offset = (offset + 1) - buffer;
+  *valueStart = scanner->valueStart;
+  *valueEnd = scanner->offset;
+  return 1;
+}
+
+size_t JSON_ScanRebase(JSONStreamScanner *scanner)
+{
+  size_t discard = (scanner->state == SS_BETWEEN) ? scanner->offset : scanner->valueStart;
+
+  scanner->offset -= discard;
+  scanner->valueStart = (scanner->state == SS_BETWEEN) ? 0 : scanner->valueStart - discard;
+  return discard;
+}
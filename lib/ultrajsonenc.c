@@ -44,6 +44,8 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 #include <math.h>
 
 #include <float.h>
+#include "ultrajsonryu.h"
+#include "ultrajsonsimd.h"
 
 #ifndef TRUE
 #define TRUE 1
@@ -73,6 +75,11 @@ The extra 2 bytes are for the quotes around the string
 */
 #define RESERVE_STRING(_len) (2 + ((_len) * 6))
 
+/*
+Fixed width strings are measured in code units. A JS_UCS4 unit can take a surrogate pair (12 bytes),
+reserve for it as for two characters */
+#define RESERVE_UNITS(_len, _kind) ((_kind) == JS_UCS4 ? (_len) * 2 : (_len))
+
 static const double g_pow10[] = {1, 10, 100, 1000, 10000, 100000, 1000000, 10000000, 100000000, 1000000000, 10000000000, 100000000000, 1000000000000, 10000000000000, 100000000000000, 1000000000000000};
 static const char g_hexChars[] = "0123456789abcdef";
 static const char g_escapeChars[] = "0123456789\\b\\t\\n\\f\\r\\\"\\\\\\/";
@@ -114,13 +121,52 @@ FIXME: Keep track of how big these get across several encoder calls and try to m
 That way we won't run our head into the wall each call */
 void Buffer_Realloc (JSONObjectEncoder *enc, size_t cbNeeded)
 {
-  size_t curSize = enc->end - enc->start;
-  size_t newSize = curSize * 2;
-  size_t offset = enc->offset - enc->start;
+  size_t curSize;
+  size_t newSize;
+  size_t offset;
+
+  if (enc->flush && enc->offset > enc->start)
+  {
+    // Hand off what has been encoded so far and reuse the buffer rather than growing it
+    size_t cbData = enc->offset - enc->start;
+    size_t cbFlushed = 0;
+
+    if (!enc->errorMsg)
+    {
+      cbFlushed = enc->flush(enc, enc->start, cbData);
+    }
+
+    if (enc->errorMsg)
+    {
+      // Encoding is being aborted, drop the output to leave room for what is appended on the way out
+      enc->offset = enc->start;
+      return;
+    }
+
+    memmove (enc->start, enc->start + cbFlushed, cbData - cbFlushed);
+    enc->offset = enc->start + (cbData - cbFlushed);
+
+    if ((size_t) (enc->end - enc->offset) >= cbNeeded)
+    {
+      return;
+    }
+  }
 
-  while (newSize < curSize + cbNeeded)
+  curSize = enc->end - enc->start;
+  newSize = curSize < 16 ? 32 : curSize * 2;
+  offset = enc->offset - enc->start;
+
+  if (enc->flush)
+  {
+    // The buffer is flushed again before the next reservation, grow just enough to keep it near the chunk size
+    newSize = offset + cbNeeded;
+  }
+  else
   {
-    newSize *= 2;
+    while (newSize < curSize + cbNeeded)
+    {
+      newSize *= 2;
+    }
   }
 
   if (enc->heap)
@@ -156,12 +202,171 @@ FASTCALL_ATTR INLINE_PREFIX void FASTCALL_MSVC Buffer_AppendShortHexUnchecked (c
   *(outputOffset++) = g_hexChars[(value & 0x000f) >> 0];
 }
 
+/*
+Bulk copying of characters that need no escaping
+Escape_CopySafeRun copies bytes from io to of for as long as none of them needs escaping, 16 or 32 at a
+time, and returns how many it copied. It stops at the first byte needing attention, or when fewer than
+16 bytes are left before end; the per character loops below handle those. Whole vectors are stored
+even when only part of them is safe, which the RESERVE_STRING worst case always leaves room for.
+*/
+#ifdef JSON_SIMD_SSE2
+
+#define ESCAPE_NONASCII 1
+#define ESCAPE_HTML 2
+#define ESCAPE_SLASH 4
+
+static INLINE_PREFIX int Escape_Flags(JSONObjectEncoder *enc, int nonASCII)
+{
+  return (nonASCII ? ESCAPE_NONASCII : 0) | (enc->encodeHTMLChars ? ESCAPE_HTML : 0) | (enc->escapeForwardSlashes ? ESCAPE_SLASH : 0);
+}
+
+static size_t Escape_CopySafeRunSSE2(const char *io, const char *end, char *of, int flags)
+{
+  const char *start = io;
+  const __m128i quote = _mm_set1_epi8('\"');
+  const __m128i backslash = _mm_set1_epi8('\\');
+  const __m128i control = _mm_set1_epi8(0x1f);
+  const __m128i slash = _mm_set1_epi8('/');
+  const __m128i lt = _mm_set1_epi8('<');
+  const __m128i gt = _mm_set1_epi8('>');
+  const __m128i amp = _mm_set1_epi8('&');
+  __m128i chunk;
+  __m128i special;
+  int mask;
+
+  while (end - io >= 16)
+  {
+    chunk = _mm_loadu_si128((const __m128i *) io);
+
+    // max(chunk, 0x1f) == 0x1f picks the control characters
+    special = _mm_or_si128(_mm_cmpeq_epi8(chunk, quote), _mm_cmpeq_epi8(chunk, backslash));
+    special = _mm_or_si128(special, _mm_cmpeq_epi8(_mm_max_epu8(chunk, control), control));
+
+    if (flags & ESCAPE_SLASH)
+    {
+      special = _mm_or_si128(special, _mm_cmpeq_epi8(chunk, slash));
+    }
+
+    if (flags & ESCAPE_HTML)
+    {
+      special = _mm_or_si128(special, _mm_or_si128(_mm_cmpeq_epi8(chunk, lt), _mm_or_si128(_mm_cmpeq_epi8(chunk, gt), _mm_cmpeq_epi8(chunk, amp))));
+    }
+
+    mask = _mm_movemask_epi8(special);
+
+    if (flags & ESCAPE_NONASCII)
+    {
+      mask |= _mm_movemask_epi8(chunk);
+    }
+
+    _mm_storeu_si128((__m128i *) of, chunk);
+
+    if (mask)
+    {
+      return (io - start) + JSON_ctz32((unsigned int) mask);
+    }
+
+    io += 16;
+    of += 16;
+  }
+
+  return io - start;
+}
+
+#ifdef JSON_SIMD_AVX2
+
+JSON_TARGET_AVX2 static size_t Escape_CopySafeRunAVX2(const char *io, const char *end, char *of, int flags)
+{
+  const char *start = io;
+  const __m256i quote = _mm256_set1_epi8('\"');
+  const __m256i backslash = _mm256_set1_epi8('\\');
+  const __m256i control = _mm256_set1_epi8(0x1f);
+  const __m256i slash = _mm256_set1_epi8('/');
+  const __m256i lt = _mm256_set1_epi8('<');
+  const __m256i gt = _mm256_set1_epi8('>');
+  const __m256i amp = _mm256_set1_epi8('&');
+  __m256i chunk;
+  __m256i special;
+  unsigned int mask;
+
+  while (end - io >= 32)
+  {
+    chunk = _mm256_loadu_si256((const __m256i *) io);
+
+    special = _mm256_or_si256(_mm256_cmpeq_epi8(chunk, quote), _mm256_cmpeq_epi8(chunk, backslash));
+    special = _mm256_or_si256(special, _mm256_cmpeq_epi8(_mm256_max_epu8(chunk, control), control));
+
+    if (flags & ESCAPE_SLASH)
+    {
+      special = _mm256_or_si256(special, _mm256_cmpeq_epi8(chunk, slash));
+    }
+
+    if (flags & ESCAPE_HTML)
+    {
+      special = _mm256_or_si256(special, _mm256_or_si256(_mm256_cmpeq_epi8(chunk, lt), _mm256_or_si256(_mm256_cmpeq_epi8(chunk, gt), _mm256_cmpeq_epi8(chunk, amp))));
+    }
+
+    mask = (unsigned int) _mm256_movemask_epi8(special);
+
+    if (flags & ESCAPE_NONASCII)
+    {
+      mask |= (unsigned int) _mm256_movemask_epi8(chunk);
+    }
+
+    _mm256_storeu_si256((__m256i *) of, chunk);
+
+    if (mask)
+    {
+      return (io - start) + JSON_ctz32(mask);
+    }
+
+    io += 32;
+    of += 32;
+  }
+
+  return (io - start) + Escape_CopySafeRunSSE2(io, end, of, flags);
+}
+
+#endif
+
+typedef size_t (*PFN_COPYSAFERUN)(const char *io, const char *end, char *of, int flags);
+
+static size_t Escape_CopySafeRunResolve(const char *io, const char *end, char *of, int flags);
+static PFN_COPYSAFERUN g_copySafeRun = Escape_CopySafeRunResolve;
+
+/*
+Picks the widest implementation the CPU supports on first use */
+static size_t Escape_CopySafeRunResolve(const char *io, const char *end, char *of, int flags)
+{
+#ifdef JSON_SIMD_AVX2
+  g_copySafeRun = JSON_CPUHasAVX2() ? Escape_CopySafeRunAVX2 : Escape_CopySafeRunSSE2;
+#else
+  g_copySafeRun = Escape_CopySafeRunSSE2;
+#endif
+  return g_copySafeRun(io, end, of, flags);
+}
+
+#endif
+
 int Buffer_EscapeStringUnvalidated (JSONObjectEncoder *enc, const char *io, const char *end)
 {
   char *of = (char *) enc->offset;
+#ifdef JSON_SIMD_SSE2
+  int flags = Escape_Flags(enc, 0);
+  size_t run;
+#endif
 
   for (;;)
   {
+#ifdef JSON_SIMD_SSE2
+    if (end - io >= 16)
+    {
+      run = g_copySafeRun(io, end, of, flags);
+      io += run;
+      of += run;
+    }
+#endif
+
     switch (*io)
     {
       case 0x00:
@@ -190,20 +395,25 @@ int Buffer_EscapeStringUnvalidated (JSONObjectEncoder *enc, const char *io, cons
       case '\r': (*of++) = '\\'; (*of++) = 'r'; break;
       case '\t': (*of++) = '\\'; (*of++) = 't'; break;
 
-      case 0x26: // '/'
+      case 0x26: // '&'
       case 0x3c: // '<'
       case 0x3e: // '>'
       {
         if (enc->encodeHTMLChars)
         {
-          // Fall through to \u00XX case below.
+          *(of++) = '\\';
+          *(of++) = 'u';
+          *(of++) = '0';
+          *(of++) = '0';
+          *(of++) = g_hexChars[ (unsigned char) (((*io) & 0xf0) >> 4)];
+          *(of++) = g_hexChars[ (unsigned char) ((*io) & 0x0f)];
         }
         else
         {
           // Same as default case below.
           (*of++) = (*io);
-          break;
         }
+        break;
       }
       case '/':
       {
@@ -263,10 +473,25 @@ int Buffer_EscapeStringValidated (JSOBJ obj, JSONObjectEncoder *enc, const char
 {
   JSUTF32 ucs;
   char *of = (char *) enc->offset;
+#ifdef JSON_SIMD_SSE2
+  int flags = Escape_Flags(enc, 1);
+  size_t run;
+#endif
 
   for (;;)
   {
-    JSUINT8 utflen = g_asciiOutputTable[(unsigned char) *io];
+    JSUINT8 utflen;
+
+#ifdef JSON_SIMD_SSE2
+    if (end - io >= 16)
+    {
+      run = g_copySafeRun(io, end, of, flags);
+      io += run;
+      of += run;
+    }
+#endif
+
+    utflen = g_asciiOutputTable[(unsigned char) *io];
 
     switch (utflen)
     {
@@ -487,6 +712,194 @@ int Buffer_EscapeStringValidated (JSOBJ obj, JSONObjectEncoder *enc, const char
   }
 }
 
+/*
+Escapes one code point of a fixed width string. Above 0x7f it's written as UTF-8, or as a \uXXXX escape
+(a surrogate pair above U+FFFF) when forceASCII is set */
+static INLINE_PREFIX char *Escape_CodePoint(JSONObjectEncoder *enc, char *of, JSUTF32 ucs)
+{
+  if (ucs < 0x80)
+  {
+    JSUINT8 code = g_asciiOutputTable[ucs];
+
+    switch (code)
+    {
+      case 1:
+        *(of++) = (char) ucs;
+        return of;
+
+      case 24:
+        if (enc->escapeForwardSlashes)
+        {
+          *(of++) = '\\';
+        }
+        *(of++) = '/';
+        return of;
+
+      case 29:
+        if (!enc->encodeHTMLChars)
+        {
+          *(of++) = (char) ucs;
+          return of;
+        }
+        break;
+
+      case 0:
+      case 30:
+        break;
+
+      default:
+        *(of++) = g_escapeChars[code];
+        *(of++) = g_escapeChars[code + 1];
+        return of;
+    }
+
+    *(of++) = '\\';
+    *(of++) = 'u';
+    *(of++) = '0';
+    *(of++) = '0';
+    *(of++) = g_hexChars[ucs >> 4];
+    *(of++) = g_hexChars[ucs & 0x0f];
+    return of;
+  }
+
+  if (enc->forceASCII)
+  {
+    if (ucs >= 0x10000)
+    {
+      ucs -= 0x10000;
+      *(of++) = '\\';
+      *(of++) = 'u';
+      Buffer_AppendShortHexUnchecked(of, (unsigned short) (ucs >> 10) + 0xd800);
+      of += 4;
+      ucs = (ucs & 0x3ff) + 0xdc00;
+    }
+
+    *(of++) = '\\';
+    *(of++) = 'u';
+    Buffer_AppendShortHexUnchecked(of, (unsigned short) ucs);
+    return of + 4;
+  }
+
+  if (ucs < 0x800)
+  {
+    *(of++) = (char) (0xc0 | (ucs >> 6));
+  }
+  else
+  {
+    if (ucs < 0x10000)
+    {
+      *(of++) = (char) (0xe0 | (ucs >> 12));
+    }
+    else
+    {
+      *(of++) = (char) (0xf0 | (ucs >> 18));
+      *(of++) = (char) (0x80 | ((ucs >> 12) & 0x3f));
+    }
+    *(of++) = (char) (0x80 | ((ucs >> 6) & 0x3f));
+  }
+  *(of++) = (char) (0x80 | (ucs & 0x3f));
+  return of;
+}
+
+/*
+Escapes length code units of kind JS_UCS1, JS_UCS2 or JS_UCS4 read straight from the caller's string */
+void Buffer_EscapeStringUCS (JSONObjectEncoder *enc, const char *io, size_t length, int kind)
+{
+  char *of = (char *) enc->offset;
+  size_t index = 0;
+  int forceASCII = enc->forceASCII;
+
+  switch (kind)
+  {
+    case JS_UCS1:
+    {
+      const JSUINT8 *units = (const JSUINT8 *) io;
+#ifdef JSON_SIMD_SSE2
+      int flags = Escape_Flags(enc, 1);
+      size_t run;
+#endif
+
+      while (index < length)
+      {
+#ifdef JSON_SIMD_SSE2
+        if (units[index] >= 0x80 && !forceASCII && length - index >= 16)
+        {
+          // Latin-1 above 0x7f never needs escaping, a block of it becomes 0xc2/0xc3 lead and masked trail bytes
+          __m128i block = _mm_loadu_si128((const __m128i *) (units + index));
+
+          if (_mm_movemask_epi8(block) == 0xffff)
+          {
+            __m128i lead = _mm_sub_epi8(_mm_set1_epi8((char) 0xc2), _mm_cmpgt_epi8(block, _mm_set1_epi8(-65)));
+            __m128i trail = _mm_and_si128(block, _mm_set1_epi8((char) 0xbf));
+
+            _mm_storeu_si128((__m128i *) of, _mm_unpacklo_epi8(lead, trail));
+            _mm_storeu_si128((__m128i *) (of + 16), _mm_unpackhi_epi8(lead, trail));
+            index += 16;
+            of += 32;
+            continue;
+          }
+        }
+#endif
+        if (units[index] >= 0x80 && !forceASCII)
+        {
+          *(of++) = (char) (0xc0 | (units[index] >> 6));
+          *(of++) = (char) (0x80 | (units[index ++] & 0x3f));
+          continue;
+        }
+#ifdef JSON_SIMD_SSE2
+        // Latin-1 below 0x80 is ASCII, copy the runs needing no escaping as such
+        if (units[index] < 0x80 && length - index >= 16)
+        {
+          run = g_copySafeRun(io + index, io + length, of, flags);
+          index += run;
+          of += run;
+          if (index == length)
+          {
+            break;
+          }
+        }
+#endif
+        of = Escape_CodePoint(enc, of, units[index ++]);
+      }
+      break;
+    }
+
+    case JS_UCS2:
+    {
+      const JSUTF16 *units = (const JSUTF16 *) io;
+      JSUTF16 unit;
+
+      for (; index < length; index ++)
+      {
+        unit = units[index];
+
+        if (unit >= 0x800 && !forceASCII)
+        {
+          *(of++) = (char) (0xe0 | (unit >> 12));
+          *(of++) = (char) (0x80 | ((unit >> 6) & 0x3f));
+          *(of++) = (char) (0x80 | (unit & 0x3f));
+          continue;
+        }
+        of = Escape_CodePoint(enc, of, unit);
+      }
+      break;
+    }
+
+    default:
+    {
+      const JSUTF32 *units = (const JSUTF32 *) io;
+
+      for (; index < length; index ++)
+      {
+        of = Escape_CodePoint(enc, of, units[index]);
+      }
+      break;
+    }
+  }
+
+  enc->offset = of;
+}
+
 #define Buffer_Reserve(__enc, __len) \
     if ( (size_t) ((__enc)->end - (__enc)->offset) < (size_t) (__len))  \
     {   \
@@ -713,7 +1126,445 @@ Handle integration functions returning NULL here */
 FIXME:
 Perhaps implement recursion detection */
 
-void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
+/*
+Shortest round trip double formatting
+Ryu by Ulf Adams, https://github.com/ulfjack/ryu. Finds the shortest decimal that reads back as the
+exact same double using only integer arithmetic, then lays it out the way Python's repr() does.
+*/
+
+#if defined(__SIZEOF_INT128__)
+
+static JSUINT64 Ryu_mulShift64(JSUINT64 m, const JSUINT64 *mul, int j)
+{
+  __uint128_t b0 = ((__uint128_t) m) * mul[0];
+  __uint128_t b2 = ((__uint128_t) m) * mul[1];
+  return (JSUINT64) (((b0 >> 64) + b2) >> (j - 64));
+}
+
+#else
+
+static JSUINT64 Ryu_umul128(JSUINT64 a, JSUINT64 b, JSUINT64 *productHi)
+{
+  JSUINT64 aLo = a & 0xffffffffULL;
+  JSUINT64 aHi = a >> 32;
+  JSUINT64 bLo = b & 0xffffffffULL;
+  JSUINT64 bHi = b >> 32;
+  JSUINT64 b00 = aLo * bLo;
+  JSUINT64 b01 = aLo * bHi;
+  JSUINT64 b10 = aHi * bLo;
+  JSUINT64 b11 = aHi * bHi;
+  JSUINT64 mid1 = b10 + (b00 >> 32);
+  JSUINT64 mid2 = b01 + (mid1 & 0xffffffffULL);
+
+  *productHi = b11 + (mid1 >> 32) + (mid2 >> 32);
+  return (mid2 << 32) | (b00 & 0xffffffffULL);
+}
+
+static JSUINT64 Ryu_mulShift64(JSUINT64 m, const JSUINT64 *mul, int j)
+{
+  JSUINT64 high1;
+  JSUINT64 high0;
+  JSUINT64 low1 = Ryu_umul128(m, mul[1], &high1);
+  JSUINT64 low0 = Ryu_umul128(m, mul[0], &high0);
+  JSUINT64 sum = high0 + low1;
+  int shift = j - 64;
+
+  if (sum < high0)
+  {
+    high1 ++;
+  }
+  return (high1 << (64 - shift)) | (sum >> shift);
+}
+
+#endif
+
+static int Ryu_pow5bits(int e)
+{
+  return (int) (((JSUINT32) e * 1217359) >> 19) + 1;
+}
+
+static int Ryu_log10Pow2(int e)
+{
+  return (int) (((JSUINT32) e * 78913) >> 18);
+}
+
+static int Ryu_log10Pow5(int e)
+{
+  return (int) (((JSUINT32) e * 732923) >> 20);
+}
+
+static int Ryu_multipleOfPowerOf5(JSUINT64 value, int p)
+{
+  int count = 0;
+
+  while (value % 5 == 0)
+  {
+    value /= 5;
+    count ++;
+  }
+  return count >= p;
+}
+
+static int Ryu_multipleOfPowerOf2(JSUINT64 value, int p)
+{
+  return (value & ((1ULL << p) - 1)) == 0;
+}
+
+/*
+Computes the shortest digits and decimal exponent, value == *output * 10^*exponent, of a positive finite double */
+static void Ryu_d2d(JSUINT64 ieeeMantissa, JSUINT32 ieeeExponent, JSUINT64 *output, int *exponent)
+{
+  int e2;
+  JSUINT64 m2;
+  JSUINT64 mv;
+  JSUINT64 vr, vp, vm;
+  JSUINT32 mmShift;
+  int e10;
+  int q, i, j, k;
+  int acceptBounds;
+  int vmIsTrailingZeros = 0;
+  int vrIsTrailingZeros = 0;
+  int removed = 0;
+  int lastRemovedDigit = 0;
+
+  if (ieeeExponent == 0)
+  {
+    e2 = 1 - 1023 - 52 - 2;
+    m2 = ieeeMantissa;
+  }
+  else
+  {
+    e2 = (int) ieeeExponent - 1023 - 52 - 2;
+    m2 = (1ULL << 52) | ieeeMantissa;
+  }
+
+  acceptBounds = (m2 & 1) == 0;
+
+  // Step 2: Determine the interval of valid decimal representations
+  mv = 4 * m2;
+  mmShift = ieeeMantissa != 0 || ieeeExponent <= 1;
+
+  // Step 3: Convert to a decimal power base using 128-bit arithmetic
+  if (e2 >= 0)
+  {
+    q = Ryu_log10Pow2(e2) - (e2 > 3);
+    e10 = q;
+    k = DOUBLE_POW5_INV_BITCOUNT + Ryu_pow5bits(q) - 1;
+    i = -e2 + q + k;
+    vr = Ryu_mulShift64(4 * m2, DOUBLE_POW5_INV_SPLIT[q], i);
+    vp = Ryu_mulShift64(4 * m2 + 2, DOUBLE_POW5_INV_SPLIT[q], i);
+    vm = Ryu_mulShift64(4 * m2 - 1 - mmShift, DOUBLE_POW5_INV_SPLIT[q], i);
+
+    if (q <= 21)
+    {
+      if (mv % 5 == 0)
+      {
+        vrIsTrailingZeros = Ryu_multipleOfPowerOf5(mv, q);
+      }
+      else
+      if (acceptBounds)
+      {
+        vmIsTrailingZeros = Ryu_multipleOfPowerOf5(mv - 1 - mmShift, q);
+      }
+      else
+      {
+        vp -= Ryu_multipleOfPowerOf5(mv + 2, q);
+      }
+    }
+  }
+  else
+  {
+    q = Ryu_log10Pow5(-e2) - (-e2 > 1);
+    e10 = q + e2;
+    i = -e2 - q;
+    k = Ryu_pow5bits(i) - DOUBLE_POW5_BITCOUNT;
+    j = q - k;
+    vr = Ryu_mulShift64(4 * m2, DOUBLE_POW5_SPLIT[i], j);
+    vp = Ryu_mulShift64(4 * m2 + 2, DOUBLE_POW5_SPLIT[i], j);
+    vm = Ryu_mulShift64(4 * m2 - 1 - mmShift, DOUBLE_POW5_SPLIT[i], j);
+
+    if (q <= 1)
+    {
+      vrIsTrailingZeros = 1;
+      if (acceptBounds)
+      {
+        vmIsTrailingZeros = mmShift == 1;
+      }
+      else
+      {
+        vp --;
+      }
+    }
+    else
+    if (q < 63)
+    {
+      vrIsTrailingZeros = Ryu_multipleOfPowerOf2(mv, q);
+    }
+  }
+
+  // Step 4: Find the shortest decimal representation in the interval of valid representations
+  if (vmIsTrailingZeros || vrIsTrailingZeros)
+  {
+    // Rare general case
+    while (vp / 10 > vm / 10)
+    {
+      vmIsTrailingZeros &= vm % 10 == 0;
+      vrIsTrailingZeros &= lastRemovedDigit == 0;
+      lastRemovedDigit = (int) (vr % 10);
+      vr /= 10;
+      vp /= 10;
+      vm /= 10;
+      removed ++;
+    }
+
+    if (vmIsTrailingZeros)
+    {
+      while (vm % 10 == 0)
+      {
+        vrIsTrailingZeros &= lastRemovedDigit == 0;
+        lastRemovedDigit = (int) (vr % 10);
+        vr /= 10;
+        vp /= 10;
+        vm /= 10;
+        removed ++;
+      }
+    }
+
+    if (vrIsTrailingZeros && lastRemovedDigit == 5 && vr % 2 == 0)
+    {
+      // Round even if the exact number is .....50..0
+      lastRemovedDigit = 4;
+    }
+
+    *output = vr + ((vr == vm && (!acceptBounds || !vmIsTrailingZeros)) || lastRemovedDigit >= 5);
+  }
+  else
+  {
+    // Common case, no trailing zeros to keep track of
+    int roundUp = 0;
+
+    if (vp / 100 > vm / 100)
+    {
+      roundUp = vr % 100 >= 50;
+      vr /= 100;
+      vp /= 100;
+      vm /= 100;
+      removed += 2;
+    }
+
+    while (vp / 10 > vm / 10)
+    {
+      roundUp = vr % 10 >= 5;
+      vr /= 10;
+      vp /= 10;
+      vm /= 10;
+      removed ++;
+    }
+
+    *output = vr + (vr == vm || roundUp);
+  }
+
+  *exponent = e10 + removed;
+}
+
+int Buffer_AppendShortestDoubleUnchecked(JSOBJ obj, JSONObjectEncoder *enc, double value)
+{
+  union { double d; JSUINT64 u; } bits;
+  JSUINT64 ieeeMantissa;
+  JSUINT32 ieeeExponent;
+  JSUINT64 output;
+  int exponent;
+  char digits[24];
+  int olength;
+  int decpt;
+  int index;
+  char *wstr = enc->offset;
+
+  bits.d = value;
+  ieeeMantissa = bits.u & ((1ULL << 52) - 1);
+  ieeeExponent = (JSUINT32) ((bits.u >> 52) & 0x7ff);
+
+  if (ieeeExponent == 0x7ff)
+  {
+    SetError (obj, enc, ieeeMantissa ? "Invalid Nan value when encoding double" : "Invalid Inf value when encoding double");
+    return FALSE;
+  }
+
+  if (enc->canonical && ieeeExponent == 0 && ieeeMantissa == 0)
+  {
+    *wstr++ = '0';
+    enc->offset = wstr;
+    return TRUE;
+  }
+
+  if (bits.u >> 63)
+  {
+    *wstr++ = '-';
+  }
+
+  if (ieeeExponent == 0 && ieeeMantissa == 0)
+  {
+    *wstr++ = '0';
+    *wstr++ = '.';
+    *wstr++ = '0';
+    enc->offset = wstr;
+    return TRUE;
+  }
+
+  Ryu_d2d(ieeeMantissa, ieeeExponent, &output, &exponent);
+
+  olength = 0;
+  do
+  {
+    digits[olength++] = (char) ('0' + (output % 10));
+  } while (output /= 10);
+  strreverse(digits, digits + olength - 1);
+
+  // Position of the decimal point relative to the digits, laid out like repr()
+  decpt = exponent + olength;
+
+  if (enc->canonical)
+  {
+    // ECMAScript writes integral values up to 1e21 without a fraction and switches to exponents sooner
+    if (decpt > -6 && decpt <= 21)
+    {
+      if (decpt <= 0)
+      {
+        *wstr++ = '0';
+        *wstr++ = '.';
+        for (index = decpt; index < 0; index ++)
+        {
+          *wstr++ = '0';
+        }
+        memcpy(wstr, digits, olength);
+        wstr += olength;
+      }
+      else
+      if (decpt >= olength)
+      {
+        memcpy(wstr, digits, olength);
+        wstr += olength;
+        for (index = olength; index < decpt; index ++)
+        {
+          *wstr++ = '0';
+        }
+      }
+      else
+      {
+        memcpy(wstr, digits, decpt);
+        wstr += decpt;
+        *wstr++ = '.';
+        memcpy(wstr, digits + decpt, olength - decpt);
+        wstr += olength - decpt;
+      }
+    }
+    else
+    {
+      *wstr++ = digits[0];
+      if (olength > 1)
+      {
+        *wstr++ = '.';
+        memcpy(wstr, digits + 1, olength - 1);
+        wstr += olength - 1;
+      }
+
+      *wstr++ = 'e';
+      decpt --;
+      if (decpt < 0)
+      {
+        *wstr++ = '-';
+        decpt = -decpt;
+      }
+      else
+      {
+        *wstr++ = '+';
+      }
+
+      if (decpt >= 100)
+      {
+        *wstr++ = (char) ('0' + decpt / 100);
+      }
+      if (decpt >= 10)
+      {
+        *wstr++ = (char) ('0' + (decpt / 10) % 10);
+      }
+      *wstr++ = (char) ('0' + decpt % 10);
+    }
+
+    enc->offset = wstr;
+    return TRUE;
+  }
+
+  if (decpt > -4 && decpt <= 16)
+  {
+    if (decpt <= 0)
+    {
+      *wstr++ = '0';
+      *wstr++ = '.';
+      for (index = decpt; index < 0; index ++)
+      {
+        *wstr++ = '0';
+      }
+      memcpy(wstr, digits, olength);
+      wstr += olength;
+    }
+    else
+    if (decpt >= olength)
+    {
+      memcpy(wstr, digits, olength);
+      wstr += olength;
+      for (index = olength; index < decpt; index ++)
+      {
+        *wstr++ = '0';
+      }
+      *wstr++ = '.';
+      *wstr++ = '0';
+    }
+    else
+    {
+      memcpy(wstr, digits, decpt);
+      wstr += decpt;
+      *wstr++ = '.';
+      memcpy(wstr, digits + decpt, olength - decpt);
+      wstr += olength - decpt;
+    }
+  }
+  else
+  {
+    *wstr++ = digits[0];
+    if (olength > 1)
+    {
+      *wstr++ = '.';
+      memcpy(wstr, digits + 1, olength - 1);
+      wstr += olength - 1;
+    }
+
+    *wstr++ = 'e';
+    decpt --;
+    if (decpt < 0)
+    {
+      *wstr++ = '-';
+      decpt = -decpt;
+    }
+    else
+    {
+      *wstr++ = '+';
+    }
+
+    if (decpt >= 100)
+    {
+      *wstr++ = (char) ('0' + decpt / 100);
+      decpt %= 100;
+    }
+    *wstr++ = (char) ('0' + decpt / 10);
+    *wstr++ = (char) ('0' + decpt % 10);
+  }
+
+  enc->offset = wstr;
+  return TRUE;
+}
+
+void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName, int nameKind)
 {
   const char *value;
   char *objName;
@@ -735,7 +1586,7 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
   maxLength of double to string OR maxLength of JSLONG to string
   */
 
-  Buffer_Reserve(enc, 256 + RESERVE_STRING(cbName));
+  Buffer_Reserve(enc, 256 + RESERVE_STRING(RESERVE_UNITS(cbName, nameKind)));
   if (enc->errorMsg)
   {
     return;
@@ -745,7 +1596,11 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
   {
     Buffer_AppendCharUnchecked(enc, '\"');
 
-    if (enc->forceASCII)
+    if (nameKind != JS_UTF8)
+    {
+      Buffer_EscapeStringUCS(enc, name, cbName, nameKind);
+    }
+    else if (enc->forceASCII)
     {
       if (!Buffer_EscapeStringValidated(obj, enc, name, name + cbName))
       {
@@ -800,11 +1655,20 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
 
           enc->level ++;
           Buffer_AppendIndentUnchecked (enc, enc->level);
-          encode (iterObj, enc, NULL, 0);
+          encode (iterObj, enc, NULL, 0, JS_UTF8);
           count ++;
+
+          if (enc->errorMsg)
+          {
+            break;
+          }
       }
 
       enc->iterEnd(obj, &tc);
+      if (enc->errorMsg)
+      {
+        break;
+      }
       Buffer_AppendIndentNewlineUnchecked (enc);
       Buffer_AppendIndentUnchecked (enc, enc->level);
       Buffer_AppendCharUnchecked (enc, ']');
@@ -830,15 +1694,25 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
       }
 
       iterObj = enc->iterGetValue(obj, &tc);
+      tc.nameKind = JS_UTF8;
       objName = enc->iterGetName(obj, &tc, &szlen);
 
       enc->level ++;
       Buffer_AppendIndentUnchecked (enc, enc->level);
-      encode (iterObj, enc, objName, szlen);
+      encode (iterObj, enc, objName, szlen, tc.nameKind);
       count ++;
+
+      if (enc->errorMsg)
+      {
+        break;
+      }
     }
 
     enc->iterEnd(obj, &tc);
+    if (enc->errorMsg)
+    {
+      break;
+    }
     Buffer_AppendIndentNewlineUnchecked (enc);
     Buffer_AppendIndentUnchecked (enc, enc->level);
     Buffer_AppendCharUnchecked (enc, '}');
@@ -894,7 +1768,9 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
 
   case JT_DOUBLE:
   {
-    if (!Buffer_AppendDoubleUnchecked (obj, enc, enc->getDoubleValue(obj, &tc)))
+    double value = enc->getDoubleValue(obj, &tc);
+
+    if (!((enc->shortestFloat || enc->canonical) ? Buffer_AppendShortestDoubleUnchecked (obj, enc, value) : Buffer_AppendDoubleUnchecked (obj, enc, value)))
     {
       enc->endTypeContext(obj, &tc);
       enc->level --;
@@ -905,6 +1781,7 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
 
   case JT_UTF8:
   {
+      tc.stringKind = JS_UTF8;
       value = enc->getStringValue(obj, &tc, &szlen);
       if(!value)
       {
@@ -912,7 +1789,7 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
         return;
       }
 
-      Buffer_Reserve(enc, RESERVE_STRING(szlen));
+      Buffer_Reserve(enc, RESERVE_STRING(RESERVE_UNITS(szlen, tc.stringKind)));
       if (enc->errorMsg)
       {
         enc->endTypeContext(obj, &tc);
@@ -920,7 +1797,11 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
       }
       Buffer_AppendCharUnchecked (enc, '\"');
 
-      if (enc->forceASCII)
+      if (tc.stringKind != JS_UTF8)
+      {
+        Buffer_EscapeStringUCS(enc, value, szlen, tc.stringKind);
+      }
+      else if (enc->forceASCII)
       {
         if (!Buffer_EscapeStringValidated(obj, enc, value, value + szlen))
         {
@@ -948,7 +1829,7 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
   enc->level --;
 }
 
-char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
+void JSON_EncodeBegin(JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
 {
   enc->malloc = enc->malloc ? enc->malloc : malloc;
   enc->free =  enc->free ? enc->free : free;
@@ -974,8 +1855,8 @@ char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t
     enc->start = (char *) enc->malloc (_cbBuffer);
     if (!enc->start)
     {
-      SetError(obj, enc, "Could not reserve memory block");
-      return NULL;
+      SetError(NULL, enc, "Could not reserve memory block");
+      return;
     }
     enc->heap = 1;
   }
@@ -987,8 +1868,44 @@ char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t
 
   enc->end = enc->start + _cbBuffer;
   enc->offset = enc->start;
+}
+
+void JSON_EncodeAppend(JSOBJ obj, JSONObjectEncoder *enc)
+{
+  size_t offset = enc->offset - enc->start;
+
+  enc->errorMsg = NULL;
+  enc->errorObj = NULL;
+  enc->level = 0;
+
+  encode (obj, enc, NULL, 0, JS_UTF8);
+
+  if (enc->errorMsg && enc->start)
+  {
+    enc->offset = enc->start + offset;
+  }
+}
+
+void JSON_EncodeAppendRaw(JSONObjectEncoder *enc, const char *data, size_t cbData)
+{
+  Buffer_Reserve(enc, cbData);
+  if (enc->errorMsg)
+  {
+    return;
+  }
+  memcpy(enc->offset, data, cbData);
+  enc->offset += cbData;
+}
+
+char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
+{
+  JSON_EncodeBegin(enc, _buffer, _cbBuffer);
+  if (enc->errorMsg)
+  {
+    return NULL;
+  }
 
-  encode (obj, enc, NULL, 0);
+  encode (obj, enc, NULL, 0, JS_UTF8);
 
   Buffer_Reserve(enc, 1);
   if (enc->errorMsg)
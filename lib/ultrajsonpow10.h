@@ -0,0 +1,665 @@
+/*
+Table for the exact double parsing in ultrajsondec.c (Eisel-Lemire, Daniel Lemire 2020,
+https://arxiv.org/abs/2101.11408).
+
+POW10_MANTISSA[i] holds the 128 bit mantissa of 10^(i + POW10_MANTISSA_MIN_EXP10), normalized so the
+top bit is set and rounded down, stored as { low 64 bits, high 64 bits }.
+*/
+
+#define POW10_MANTISSA_MIN_EXP10 -342
+#define POW10_MANTISSA_MAX_EXP10 308
+
+static const JSUINT64 POW10_MANTISSA[POW10_MANTISSA_MAX_EXP10 - POW10_MANTISSA_MIN_EXP10 + 1][2] =
+{
+  { 1242899115359157055uLL, 17218479456385750618uLL },
+  { 5388497965526861063uLL, 10761549660241094136uLL },
+  { 6735622456908576329uLL, 13451937075301367670uLL },
+  { 17642900107990496220uLL, 16814921344126709587uLL },
+  { 8720969558280366185uLL, 10509325840079193492uLL },
+  { 10901211947850457732uLL, 13136657300098991865uLL },
+  { 18238200953240460069uLL, 16420821625123739831uLL },
+  { 18316404623416369399uLL, 10263013515702337394uLL },
+  { 13672133742415685941uLL, 12828766894627921743uLL },
+  { 12478481159592219522uLL, 16035958618284902179uLL },
+  { 5493207715531443249uLL, 10022474136428063862uLL },
+  { 16089881681269079869uLL, 12528092670535079827uLL },
+  { 15500666083158961933uLL, 15660115838168849784uLL },
+  { 9687916301974351208uLL, 9787572398855531115uLL },
+  { 7498209359040551106uLL, 12234465498569413894uLL },
+  { 149389661945913074uLL, 15293081873211767368uLL },
+  { 93368538716195671uLL, 9558176170757354605uLL },
+  { 4728396691822632493uLL, 11947720213446693256uLL },
+  { 5910495864778290617uLL, 14934650266808366570uLL },
+  { 8305745933913819539uLL, 9334156416755229106uLL },
+  { 1158810380537498616uLL, 11667695520944036383uLL },
+  { 15283571030954036982uLL, 14584619401180045478uLL },
+  { 9881091751837770420uLL, 18230774251475056848uLL },
+  { 6175682344898606512uLL, 11394233907171910530uLL },
+  { 16942974967978033949uLL, 14242792383964888162uLL },
+  { 11955346673117766628uLL, 17803490479956110203uLL },
+  { 5166248661484910190uLL, 11127181549972568877uLL },
+  { 11069496845283525642uLL, 13908976937465711096uLL },
+  { 13836871056604407053uLL, 17386221171832138870uLL },
+  { 4036358391950366504uLL, 10866388232395086794uLL },
+  { 14268820026792733938uLL, 13582985290493858492uLL },
+  { 17836025033490917422uLL, 16978731613117323115uLL },
+  { 8841672636718129437uLL, 10611707258198326947uLL },
+  { 6440404777470273892uLL, 13264634072747908684uLL },
+  { 8050505971837842365uLL, 16580792590934885855uLL },
+  { 11949095260039733334uLL, 10362995369334303659uLL },
+  { 10324683056622278764uLL, 12953744211667879574uLL },
+  { 3682481783923072647uLL, 16192180264584849468uLL },
+  { 11524923151806696212uLL, 10120112665365530917uLL },
+  { 571095884476206553uLL, 12650140831706913647uLL },
+  { 14548927910877421904uLL, 15812676039633642058uLL },
+  { 13704765962725776594uLL, 9882922524771026286uLL },
+  { 7907585416552444934uLL, 12353653155963782858uLL },
+  { 661109733835780360uLL, 15442066444954728573uLL },
+  { 2719036592861056677uLL, 9651291528096705358uLL },
+  { 12622167777931096654uLL, 12064114410120881697uLL },
+  { 1942651667131707105uLL, 15080143012651102122uLL },
+  { 5825843310384704845uLL, 9425089382906938826uLL },
+  { 16505676174835656864uLL, 11781361728633673532uLL },
+  { 2185351144835019464uLL, 14726702160792091916uLL },
+  { 2731688931043774330uLL, 18408377700990114895uLL },
+  { 8624834609543440812uLL, 11505236063118821809uLL },
+  { 15392729280356688919uLL, 14381545078898527261uLL },
+  { 5405853545163697437uLL, 17976931348623159077uLL },
+  { 5684501474941004850uLL, 11235582092889474423uLL },
+  { 2493940825248868159uLL, 14044477616111843029uLL },
+  { 7729112049988473103uLL, 17555597020139803786uLL },
+  { 9442381049670183593uLL, 10972248137587377366uLL },
+  { 2579604275232953683uLL, 13715310171984221708uLL },
+  { 3224505344041192104uLL, 17144137714980277135uLL },
+  { 8932844867666826921uLL, 10715086071862673209uLL },
+  { 15777742103010921555uLL, 13393857589828341511uLL },
+  { 15110491610336264040uLL, 16742321987285426889uLL },
+  { 2526528228819083169uLL, 10463951242053391806uLL },
+  { 12381532322878629770uLL, 13079939052566739757uLL },
+  { 1641857348316123500uLL, 16349923815708424697uLL },
+  { 12555375888766046947uLL, 10218702384817765435uLL },
+  { 11082533842530170780uLL, 12773377981022206794uLL },
+  { 4629795266307937667uLL, 15966722476277758493uLL },
+  { 5199465050656154994uLL, 9979201547673599058uLL },
+  { 15722703350174969551uLL, 12474001934591998822uLL },
+  { 10430007150863936130uLL, 15592502418239998528uLL },
+  { 6518754469289960081uLL, 9745314011399999080uLL },
+  { 8148443086612450102uLL, 12181642514249998850uLL },
+  { 962181821410786819uLL, 15227053142812498563uLL },
+  { 16742264702877599426uLL, 9516908214257811601uLL },
+  { 7092772823314835570uLL, 11896135267822264502uLL },
+  { 18089338065998320271uLL, 14870169084777830627uLL },
+  { 8999993282035256217uLL, 9293855677986144142uLL },
+  { 2026619565689294464uLL, 11617319597482680178uLL },
+  { 11756646493966393888uLL, 14521649496853350222uLL },
+  { 5472436080603216552uLL, 18152061871066687778uLL },
+  { 8031958568804398249uLL, 11345038669416679861uLL },
+  { 14651634229432885715uLL, 14181298336770849826uLL },
+  { 9091170749936331336uLL, 17726622920963562283uLL },
+  { 3376138709496513133uLL, 11079139325602226427uLL },
+  { 18055231442152805128uLL, 13848924157002783033uLL },
+  { 8733981247408842698uLL, 17311155196253478792uLL },
+  { 5458738279630526686uLL, 10819471997658424245uLL },
+  { 11435108867965546262uLL, 13524339997073030306uLL },
+  { 5070514048102157020uLL, 16905424996341287883uLL },
+  { 863228270850154185uLL, 10565890622713304927uLL },
+  { 14914093393844856443uLL, 13207363278391631158uLL },
+  { 9419244705451294746uLL, 16509204097989538948uLL },
+  { 15110399977761835024uLL, 10318252561243461842uLL },
+  { 9664627935347517973uLL, 12897815701554327303uLL },
+  { 7469098900757009562uLL, 16122269626942909129uLL },
+  { 16197401859041600736uLL, 10076418516839318205uLL },
+  { 6411694268519837208uLL, 12595523146049147757uLL },
+  { 12626303854077184414uLL, 15744403932561434696uLL },
+  { 7891439908798240259uLL, 9840252457850896685uLL },
+  { 14475985904425188227uLL, 12300315572313620856uLL },
+  { 18094982380531485284uLL, 15375394465392026070uLL },
+  { 6697677969404790399uLL, 9609621540870016294uLL },
+  { 17595469498610763806uLL, 12012026926087520367uLL },
+  { 17382650854836066854uLL, 15015033657609400459uLL },
+  { 8558313775058847832uLL, 9384396036005875287uLL },
+  { 6086206200396171886uLL, 11730495045007344109uLL },
+  { 12219443768922602761uLL, 14663118806259180136uLL },
+  { 15274304711153253452uLL, 18328898507823975170uLL },
+  { 14158126462898171311uLL, 11455561567389984481uLL },
+  { 3862600023340550427uLL, 14319451959237480602uLL },
+  { 14051622066030463842uLL, 17899314949046850752uLL },
+  { 8782263791269039901uLL, 11187071843154281720uLL },
+  { 10977829739086299876uLL, 13983839803942852150uLL },
+  { 4498915137003099037uLL, 17479799754928565188uLL },
+  { 12035193997481712706uLL, 10924874846830353242uLL },
+  { 5820620459997365075uLL, 13656093558537941553uLL },
+  { 11887461593424094248uLL, 17070116948172426941uLL },
+  { 9735506505103752857uLL, 10668823092607766838uLL },
+  { 2946011094524915263uLL, 13336028865759708548uLL },
+  { 3682513868156144079uLL, 16670036082199635685uLL },
+  { 4607414176811284001uLL, 10418772551374772303uLL },
+  { 1147581702586717097uLL, 13023465689218465379uLL },
+  { 15269535183515560084uLL, 16279332111523081723uLL },
+  { 7237616480483531100uLL, 10174582569701926077uLL },
+  { 13658706619031801779uLL, 12718228212127407596uLL },
+  { 17073383273789752224uLL, 15897785265159259495uLL },
+  { 17588393573759676996uLL, 9936115790724537184uLL },
+  { 3538747893490044629uLL, 12420144738405671481uLL },
+  { 9035120885289943691uLL, 15525180923007089351uLL },
+  { 12564479580947296663uLL, 9703238076879430844uLL },
+  { 15705599476184120828uLL, 12129047596099288555uLL },
+  { 15020313326802763131uLL, 15161309495124110694uLL },
+  { 4776009810824339053uLL, 9475818434452569184uLL },
+  { 5970012263530423816uLL, 11844773043065711480uLL },
+  { 7462515329413029771uLL, 14805966303832139350uLL },
+  { 52386062455755702uLL, 9253728939895087094uLL },
+  { 9288854614924470436uLL, 11567161174868858867uLL },
+  { 6999382250228200141uLL, 14458951468586073584uLL },
+  { 8749227812785250177uLL, 18073689335732591980uLL },
+  { 14691639419845557168uLL, 11296055834832869987uLL },
+  { 13752863256379558556uLL, 14120069793541087484uLL },
+  { 17191079070474448196uLL, 17650087241926359355uLL },
+  { 8438581409832836170uLL, 11031304526203974597uLL },
+  { 15159912780718433117uLL, 13789130657754968246uLL },
+  { 9726518939043265588uLL, 17236413322193710308uLL },
+  { 15302446373756816800uLL, 10772758326371068942uLL },
+  { 9904685930341245193uLL, 13465947907963836178uLL },
+  { 3157485376071780683uLL, 16832434884954795223uLL },
+  { 8890957387685944783uLL, 10520271803096747014uLL },
+  { 1890324697752655170uLL, 13150339753870933768uLL },
+  { 2362905872190818963uLL, 16437924692338667210uLL },
+  { 6088502188546649756uLL, 10273702932711667006uLL },
+  { 16833999772538088003uLL, 12842128665889583757uLL },
+  { 7207441660390446292uLL, 16052660832361979697uLL },
+  { 16033866083812498692uLL, 10032913020226237310uLL },
+  { 10818960567910847557uLL, 12541141275282796638uLL },
+  { 4300328673033783639uLL, 15676426594103495798uLL },
+  { 16522763475928278486uLL, 9797766621314684873uLL },
+  { 6818396289628184396uLL, 12247208276643356092uLL },
+  { 8522995362035230495uLL, 15309010345804195115uLL },
+  { 3021029092058325107uLL, 9568131466127621947uLL },
+  { 17611344420355070096uLL, 11960164332659527433uLL },
+  { 8179122470161673908uLL, 14950205415824409292uLL },
+  { 14335323580705822000uLL, 9343878384890255807uLL },
+  { 13307468457454889596uLL, 11679847981112819759uLL },
+  { 12022649553391224092uLL, 14599809976391024699uLL },
+  { 10416625923311642211uLL, 18249762470488780874uLL },
+  { 11122077220497164286uLL, 11406101544055488046uLL },
+  { 4679224488766679549uLL, 14257626930069360058uLL },
+  { 15072402647813125244uLL, 17822033662586700072uLL },
+  { 9420251654883203278uLL, 11138771039116687545uLL },
+  { 16387000587031392001uLL, 13923463798895859431uLL },
+  { 15872064715361852097uLL, 17404329748619824289uLL },
+  { 3002511419460075705uLL, 10877706092887390181uLL },
+  { 8364825292752482535uLL, 13597132616109237726uLL },
+  { 1232659579085827361uLL, 16996415770136547158uLL },
+  { 14605470292210805812uLL, 10622759856335341973uLL },
+  { 4421779809981343554uLL, 13278449820419177467uLL },
+  { 915538744049291538uLL, 16598062275523971834uLL },
+  { 5183897733458195115uLL, 10373788922202482396uLL },
+  { 6479872166822743894uLL, 12967236152753102995uLL },
+  { 3488154190101041964uLL, 16209045190941378744uLL },
+  { 2180096368813151227uLL, 10130653244338361715uLL },
+  { 16560178516298602746uLL, 12663316555422952143uLL },
+  { 16088537126945865529uLL, 15829145694278690179uLL },
+  { 7749492695127472003uLL, 9893216058924181362uLL },
+  { 463493832054564196uLL, 12366520073655226703uLL },
+  { 14414425345350368957uLL, 15458150092069033378uLL },
+  { 13620701859271368502uLL, 9661343807543145861uLL },
+  { 3190819268807046916uLL, 12076679759428932327uLL },
+  { 17823582141290972357uLL, 15095849699286165408uLL },
+  { 11139738838306857723uLL, 9434906062053853380uLL },
+  { 13924673547883572154uLL, 11793632577567316725uLL },
+  { 3570783879572301480uLL, 14742040721959145907uLL },
+  { 18298537904747540562uLL, 18427550902448932383uLL },
+  { 18354115218108294707uLL, 11517219314030582739uLL },
+  { 18330958004207980480uLL, 14396524142538228424uLL },
+  { 4466953431550423984uLL, 17995655178172785531uLL },
+  { 486002885505321038uLL, 11247284486357990957uLL },
+  { 5219189625309039202uLL, 14059105607947488696uLL },
+  { 6523987031636299002uLL, 17573882009934360870uLL },
+  { 17912549950054850588uLL, 10983676256208975543uLL },
+  { 17779001419141175331uLL, 13729595320261219429uLL },
+  { 8388693718644305452uLL, 17161994150326524287uLL },
+  { 12160462601793772764uLL, 10726246343954077679uLL },
+  { 10588892233814828051uLL, 13407807929942597099uLL },
+  { 8624429273841147159uLL, 16759759912428246374uLL },
+  { 778582277723329070uLL, 10474849945267653984uLL },
+  { 973227847154161338uLL, 13093562431584567480uLL },
+  { 1216534808942701673uLL, 16366953039480709350uLL },
+  { 14595392310871352257uLL, 10229345649675443343uLL },
+  { 13632554370161802418uLL, 12786682062094304179uLL },
+  { 12429006944274865118uLL, 15983352577617880224uLL },
+  { 7768129340171790699uLL, 9989595361011175140uLL },
+  { 9710161675214738374uLL, 12486994201263968925uLL },
+  { 16749388112445810871uLL, 15608742751579961156uLL },
+  { 1244995533423855986uLL, 9755464219737475723uLL },
+  { 15391302472061983695uLL, 12194330274671844653uLL },
+  { 5404070034795315907uLL, 15242912843339805817uLL },
+  { 14906758817815542202uLL, 9526820527087378635uLL },
+  { 14021762503842039848uLL, 11908525658859223294uLL },
+  { 8303831092947774002uLL, 14885657073574029118uLL },
+  { 578208414664970847uLL, 9303535670983768199uLL },
+  { 14557818573613377271uLL, 11629419588729710248uLL },
+  { 18197273217016721589uLL, 14536774485912137810uLL },
+  { 13523219484416126178uLL, 18170968107390172263uLL },
+  { 15369541205401160717uLL, 11356855067118857664uLL },
+  { 765182433041899281uLL, 14196068833898572081uLL },
+  { 5568164059729762005uLL, 17745086042373215101uLL },
+  { 5785945546544795205uLL, 11090678776483259438uLL },
+  { 16455803970035769814uLL, 13863348470604074297uLL },
+  { 6734696907262548556uLL, 17329185588255092872uLL },
+  { 4209185567039092847uLL, 10830740992659433045uLL },
+  { 9873167977226253963uLL, 13538426240824291306uLL },
+  { 3118087934678041646uLL, 16923032801030364133uLL },
+  { 4254647968387469981uLL, 10576895500643977583uLL },
+  { 706623942056949572uLL, 13221119375804971979uLL },
+  { 14718337982853350677uLL, 16526399219756214973uLL },
+  { 11504804248497038125uLL, 10328999512347634358uLL },
+  { 5157633273766521849uLL, 12911249390434542948uLL },
+  { 6447041592208152311uLL, 16139061738043178685uLL },
+  { 6335244004343789146uLL, 10086913586276986678uLL },
+  { 17142427042284512241uLL, 12608641982846233347uLL },
+  { 16816347784428252397uLL, 15760802478557791684uLL },
+  { 1286845328412881940uLL, 9850501549098619803uLL },
+  { 15443614715798266137uLL, 12313126936373274753uLL },
+  { 5469460339465668959uLL, 15391408670466593442uLL },
+  { 8030098730593431003uLL, 9619630419041620901uLL },
+  { 14649309431669176658uLL, 12024538023802026126uLL },
+  { 9088264752731695015uLL, 15030672529752532658uLL },
+  { 10291851488884697288uLL, 9394170331095332911uLL },
+  { 8253128342678483706uLL, 11742712913869166139uLL },
+  { 5704724409920716729uLL, 14678391142336457674uLL },
+  { 16354277549255671720uLL, 18347988927920572092uLL },
+  { 998051431430019017uLL, 11467493079950357558uLL },
+  { 10470936326142299579uLL, 14334366349937946947uLL },
+  { 8476984389250486570uLL, 17917957937422433684uLL },
+  { 14521487280136329914uLL, 11198723710889021052uLL },
+  { 18151859100170412392uLL, 13998404638611276315uLL },
+  { 18078137856785627587uLL, 17498005798264095394uLL },
+  { 15910522178918405146uLL, 10936253623915059621uLL },
+  { 6053094668365842720uLL, 13670317029893824527uLL },
+  { 2954682317029915496uLL, 17087896287367280659uLL },
+  { 17987577512639554849uLL, 10679935179604550411uLL },
+  { 17872785872372055657uLL, 13349918974505688014uLL },
+  { 13117610303610293764uLL, 16687398718132110018uLL },
+  { 12810192458183821506uLL, 10429624198832568761uLL },
+  { 2177682517447613171uLL, 13037030248540710952uLL },
+  { 2722103146809516464uLL, 16296287810675888690uLL },
+  { 6313000485183335694uLL, 10185179881672430431uLL },
+  { 3279564588051781713uLL, 12731474852090538039uLL },
+  { 17934513790346890853uLL, 15914343565113172548uLL },
+  { 1985699082112030975uLL, 9946464728195732843uLL },
+  { 16317181907922202431uLL, 12433080910244666053uLL },
+  { 6561419329620589327uLL, 15541351137805832567uLL },
+  { 11018416108653950185uLL, 9713344461128645354uLL },
+  { 4549648098962661924uLL, 12141680576410806693uLL },
+  { 10298746142130715309uLL, 15177100720513508366uLL },
+  { 1825030320404309164uLL, 9485687950320942729uLL },
+  { 6892973918932774359uLL, 11857109937901178411uLL },
+  { 4004531380238580045uLL, 14821387422376473014uLL },
+  { 16337890167931276240uLL, 9263367138985295633uLL },
+  { 6587304654631931588uLL, 11579208923731619542uLL },
+  { 17457502855144690293uLL, 14474011154664524427uLL },
+  { 17210192550503474962uLL, 18092513943330655534uLL },
+  { 6144684325637283947uLL, 11307821214581659709uLL },
+  { 12292541425473992838uLL, 14134776518227074636uLL },
+  { 15365676781842491048uLL, 17668470647783843295uLL },
+  { 16521077016292638761uLL, 11042794154864902059uLL },
+  { 16039660251938410547uLL, 13803492693581127574uLL },
+  { 10826203278068237376uLL, 17254365866976409468uLL },
+  { 15989749085647424168uLL, 10783978666860255917uLL },
+  { 6152128301777116498uLL, 13479973333575319897uLL },
+  { 12301846395648783526uLL, 16849966666969149871uLL },
+  { 14606183024921571560uLL, 10531229166855718669uLL },
+  { 4422670725869800738uLL, 13164036458569648337uLL },
+  { 10140024425764638826uLL, 16455045573212060421uLL },
+  { 8643358275316593218uLL, 10284403483257537763uLL },
+  { 6192511825718353619uLL, 12855504354071922204uLL },
+  { 7740639782147942024uLL, 16069380442589902755uLL },
+  { 2532056854628769813uLL, 10043362776618689222uLL },
+  { 12388443105140738074uLL, 12554203470773361527uLL },
+  { 10873867862998534689uLL, 15692754338466701909uLL },
+  { 9102010423587778132uLL, 9807971461541688693uLL },
+  { 15989199047912110569uLL, 12259964326927110866uLL },
+  { 10763126773035362404uLL, 15324955408658888583uLL },
+  { 13644483260788183358uLL, 9578097130411805364uLL },
+  { 17055604075985229198uLL, 11972621413014756705uLL },
+  { 7484447039699372786uLL, 14965776766268445882uLL },
+  { 9289465418239495895uLL, 9353610478917778676uLL },
+  { 11611831772799369869uLL, 11692013098647223345uLL },
+  { 679731660717048624uLL, 14615016373309029182uLL },
+  { 10073036612751086588uLL, 18268770466636286477uLL },
+  { 8601490892183123069uLL, 11417981541647679048uLL },
+  { 10751863615228903837uLL, 14272476927059598810uLL },
+  { 4216457482181353988uLL, 17840596158824498513uLL },
+  { 14164500972431816002uLL, 11150372599265311570uLL },
+  { 8482254178684994195uLL, 13937965749081639463uLL },
+  { 5991131704928854840uLL, 17422457186352049329uLL },
+  { 15273672361649004035uLL, 10889035741470030830uLL },
+  { 9868718415206479236uLL, 13611294676837538538uLL },
+  { 3112525982153323237uLL, 17014118346046923173uLL },
+  { 4251171748059520975uLL, 10633823966279326983uLL },
+  { 702278666647013314uLL, 13292279957849158729uLL },
+  { 5489534351736154547uLL, 16615349947311448411uLL },
+  { 1125115960621402640uLL, 10384593717069655257uLL },
+  { 6018080969204141204uLL, 12980742146337069071uLL },
+  { 2910915193077788601uLL, 16225927682921336339uLL },
+  { 17960223060169475539uLL, 10141204801825835211uLL },
+  { 17838592806784456520uLL, 12676506002282294014uLL },
+  { 13074868971625794843uLL, 15845632502852867518uLL },
+  { 3560107088838733872uLL, 9903520314283042199uLL },
+  { 18285191916330581053uLL, 12379400392853802748uLL },
+  { 4409745821703674700uLL, 15474250491067253436uLL },
+  { 11979463175419572495uLL, 9671406556917033397uLL },
+  { 1139270913992301907uLL, 12089258196146291747uLL },
+  { 15259146697772541096uLL, 15111572745182864683uLL },
+  { 7231123676894144233uLL, 9444732965739290427uLL },
+  { 4427218577690292387uLL, 11805916207174113034uLL },
+  { 14757395258967641292uLL, 14757395258967641292uLL },
+  { 0uLL, 9223372036854775808uLL },
+  { 0uLL, 11529215046068469760uLL },
+  { 0uLL, 14411518807585587200uLL },
+  { 0uLL, 18014398509481984000uLL },
+  { 0uLL, 11258999068426240000uLL },
+  { 0uLL, 14073748835532800000uLL },
+  { 0uLL, 17592186044416000000uLL },
+  { 0uLL, 10995116277760000000uLL },
+  { 0uLL, 13743895347200000000uLL },
+  { 0uLL, 17179869184000000000uLL },
+  { 0uLL, 10737418240000000000uLL },
+  { 0uLL, 13421772800000000000uLL },
+  { 0uLL, 16777216000000000000uLL },
+  { 0uLL, 10485760000000000000uLL },
+  { 0uLL, 13107200000000000000uLL },
+  { 0uLL, 16384000000000000000uLL },
+  { 0uLL, 10240000000000000000uLL },
+  { 0uLL, 12800000000000000000uLL },
+  { 0uLL, 16000000000000000000uLL },
+  { 0uLL, 10000000000000000000uLL },
+  { 0uLL, 12500000000000000000uLL },
+  { 0uLL, 15625000000000000000uLL },
+  { 0uLL, 9765625000000000000uLL },
+  { 0uLL, 12207031250000000000uLL },
+  { 0uLL, 15258789062500000000uLL },
+  { 0uLL, 9536743164062500000uLL },
+  { 0uLL, 11920928955078125000uLL },
+  { 0uLL, 14901161193847656250uLL },
+  { 4611686018427387904uLL, 9313225746154785156uLL },
+  { 5764607523034234880uLL, 11641532182693481445uLL },
+  { 11817445422220181504uLL, 14551915228366851806uLL },
+  { 5548434740920451072uLL, 18189894035458564758uLL },
+  { 17302829768357445632uLL, 11368683772161602973uLL },
+  { 7793479155164643328uLL, 14210854715202003717uLL },
+  { 14353534962383192064uLL, 17763568394002504646uLL },
+  { 4359273333062107136uLL, 11102230246251565404uLL },
+  { 5449091666327633920uLL, 13877787807814456755uLL },
+  { 2199678564482154496uLL, 17347234759768070944uLL },
+  { 1374799102801346560uLL, 10842021724855044340uLL },
+  { 1718498878501683200uLL, 13552527156068805425uLL },
+  { 6759809616554491904uLL, 16940658945086006781uLL },
+  { 6530724019560251392uLL, 10587911840678754238uLL },
+  { 17386777061305090048uLL, 13234889800848442797uLL },
+  { 7898413271349198848uLL, 16543612251060553497uLL },
+  { 16465723340661719040uLL, 10339757656912845935uLL },
+  { 15970468157399760896uLL, 12924697071141057419uLL },
+  { 15351399178322313216uLL, 16155871338926321774uLL },
+  { 4982938468024057856uLL, 10097419586828951109uLL },
+  { 10840359103457460224uLL, 12621774483536188886uLL },
+  { 4327076842467049472uLL, 15777218104420236108uLL },
+  { 11927795063396681728uLL, 9860761315262647567uLL },
+  { 10298057810818464256uLL, 12325951644078309459uLL },
+  { 8260886245095692416uLL, 15407439555097886824uLL },
+  { 5163053903184807760uLL, 9629649721936179265uLL },
+  { 11065503397408397604uLL, 12037062152420224081uLL },
+  { 18443565265187884909uLL, 15046327690525280101uLL },
+  { 13833071299956122020uLL, 9403954806578300063uLL },
+  { 12679653106517764621uLL, 11754943508222875079uLL },
+  { 11237880364719817872uLL, 14693679385278593849uLL },
+  { 212292400617608628uLL, 18367099231598242312uLL },
+  { 132682750386005392uLL, 11479437019748901445uLL },
+  { 4777539456409894645uLL, 14349296274686126806uLL },
+  { 15195296357367144114uLL, 17936620343357658507uLL },
+  { 7191217214140771119uLL, 11210387714598536567uLL },
+  { 4377335499248575995uLL, 14012984643248170709uLL },
+  { 10083355392488107898uLL, 17516230804060213386uLL },
+  { 10913783138732455340uLL, 10947644252537633366uLL },
+  { 4418856886560793367uLL, 13684555315672041708uLL },
+  { 5523571108200991709uLL, 17105694144590052135uLL },
+  { 10369760970266701674uLL, 10691058840368782584uLL },
+  { 12962201212833377092uLL, 13363823550460978230uLL },
+  { 6979379479186945558uLL, 16704779438076222788uLL },
+  { 13585484211346616781uLL, 10440487148797639242uLL },
+  { 7758483227328495169uLL, 13050608935997049053uLL },
+  { 14309790052588006865uLL, 16313261169996311316uLL },
+  { 18166990819722280098uLL, 10195788231247694572uLL },
+  { 4261994450943298507uLL, 12744735289059618216uLL },
+  { 5327493063679123134uLL, 15930919111324522770uLL },
+  { 7941369183226839863uLL, 9956824444577826731uLL },
+  { 5315025460606161924uLL, 12446030555722283414uLL },
+  { 15867153862612478214uLL, 15557538194652854267uLL },
+  { 7611128154919104931uLL, 9723461371658033917uLL },
+  { 14125596212076269068uLL, 12154326714572542396uLL },
+  { 17656995265095336336uLL, 15192908393215677995uLL },
+  { 8729779031470891258uLL, 9495567745759798747uLL },
+  { 6300537770911226168uLL, 11869459682199748434uLL },
+  { 17099044250493808518uLL, 14836824602749685542uLL },
+  { 6075216638131242420uLL, 9273015376718553464uLL },
+  { 7594020797664053025uLL, 11591269220898191830uLL },
+  { 269153960225290473uLL, 14489086526122739788uLL },
+  { 336442450281613091uLL, 18111358157653424735uLL },
+  { 7127805559067090038uLL, 11319598848533390459uLL },
+  { 4298070930406474644uLL, 14149498560666738074uLL },
+  { 14595960699862869113uLL, 17686873200833422592uLL },
+  { 9122475437414293195uLL, 11054295750520889120uLL },
+  { 11403094296767866494uLL, 13817869688151111400uLL },
+  { 14253867870959833118uLL, 17272337110188889250uLL },
+  { 13520353437777283602uLL, 10795210693868055781uLL },
+  { 3065383741939440791uLL, 13494013367335069727uLL },
+  { 17666787732706464701uLL, 16867516709168837158uLL },
+  { 6430056314514152534uLL, 10542197943230523224uLL },
+  { 8037570393142690668uLL, 13177747429038154030uLL },
+  { 823590954573587527uLL, 16472184286297692538uLL },
+  { 5126430365035880108uLL, 10295115178936057836uLL },
+  { 6408037956294850135uLL, 12868893973670072295uLL },
+  { 3398361426941174765uLL, 16086117467087590369uLL },
+  { 13653190937906703988uLL, 10053823416929743980uLL },
+  { 17066488672383379985uLL, 12567279271162179975uLL },
+  { 16721424822051837077uLL, 15709099088952724969uLL },
+  { 3533361486141316317uLL, 9818186930595453106uLL },
+  { 13640073894531421205uLL, 12272733663244316382uLL },
+  { 7826720331309500698uLL, 15340917079055395478uLL },
+  { 280014188641050032uLL, 9588073174409622174uLL },
+  { 9573389772656088348uLL, 11985091468012027717uLL },
+  { 16578423234247498339uLL, 14981364335015034646uLL },
+  { 5749828502977298558uLL, 9363352709384396654uLL },
+  { 16410657665576399005uLL, 11704190886730495817uLL },
+  { 6678264026688335045uLL, 14630238608413119772uLL },
+  { 8347830033360418806uLL, 18287798260516399715uLL },
+  { 2911550761636567802uLL, 11429873912822749822uLL },
+  { 12862810488900485560uLL, 14287342391028437277uLL },
+  { 2243455055843443238uLL, 17859177988785546597uLL },
+  { 3708002419115845976uLL, 11161986242990966623uLL },
+  { 23317005467419566uLL, 13952482803738708279uLL },
+  { 13864204312116438170uLL, 17440603504673385348uLL },
+  { 17888499731927549664uLL, 10900377190420865842uLL },
+  { 13137252628054661272uLL, 13625471488026082303uLL },
+  { 11809879766640938686uLL, 17031839360032602879uLL },
+  { 14298703881791668535uLL, 10644899600020376799uLL },
+  { 13261693833812197764uLL, 13306124500025470999uLL },
+  { 11965431273837859301uLL, 16632655625031838749uLL },
+  { 9784237555362356015uLL, 10395409765644899218uLL },
+  { 3006924907348169211uLL, 12994262207056124023uLL },
+  { 17593714189467375226uLL, 16242827758820155028uLL },
+  { 1772699331562333708uLL, 10151767349262596893uLL },
+  { 6827560182880305039uLL, 12689709186578246116uLL },
+  { 8534450228600381299uLL, 15862136483222807645uLL },
+  { 7639874402088932264uLL, 9913835302014254778uLL },
+  { 326470965756389522uLL, 12392294127517818473uLL },
+  { 5019774725622874806uLL, 15490367659397273091uLL },
+  { 831516194300602802uLL, 9681479787123295682uLL },
+  { 10262767279730529310uLL, 12101849733904119602uLL },
+  { 3605087062808385830uLL, 15127312167380149503uLL },
+  { 9170708441896323000uLL, 9454570104612593439uLL },
+  { 6851699533943015846uLL, 11818212630765741799uLL },
+  { 3952938399001381903uLL, 14772765788457177249uLL },
+  { 13999801545444333449uLL, 9232978617785735780uLL },
+  { 17499751931805416812uLL, 11541223272232169725uLL },
+  { 8039631859474607303uLL, 14426529090290212157uLL },
+  { 14661225842770647033uLL, 18033161362862765196uLL },
+  { 18386638188586430203uLL, 11270725851789228247uLL },
+  { 18371611717305649850uLL, 14088407314736535309uLL },
+  { 9129456591349898601uLL, 17610509143420669137uLL },
+  { 17235125415662156385uLL, 11006568214637918210uLL },
+  { 12320534732722919674uLL, 13758210268297397763uLL },
+  { 10788982397476261688uLL, 17197762835371747204uLL },
+  { 15966486035277439363uLL, 10748601772107342002uLL },
+  { 10734735507242023396uLL, 13435752215134177503uLL },
+  { 8806733365625141341uLL, 16794690268917721879uLL },
+  { 12421737381156795194uLL, 10496681418073576174uLL },
+  { 6303799689591218185uLL, 13120851772591970218uLL },
+  { 17103121648843798539uLL, 16401064715739962772uLL },
+  { 1466078993672598279uLL, 10250665447337476733uLL },
+  { 6444284760518135752uLL, 12813331809171845916uLL },
+  { 8055355950647669691uLL, 16016664761464807395uLL },
+  { 2728754459941099604uLL, 10010415475915504622uLL },
+  { 12634315111781150314uLL, 12513019344894380777uLL },
+  { 1957835834444274180uLL, 15641274181117975972uLL },
+  { 10447019433382447170uLL, 9775796363198734982uLL },
+  { 3835402254873283155uLL, 12219745453998418728uLL },
+  { 4794252818591603944uLL, 15274681817498023410uLL },
+  { 7608094030047140369uLL, 9546676135936264631uLL },
+  { 4898431519131537557uLL, 11933345169920330789uLL },
+  { 10734725417341809851uLL, 14916681462400413486uLL },
+  { 2097517367411243253uLL, 9322925914000258429uLL },
+  { 7233582727691441970uLL, 11653657392500323036uLL },
+  { 9041978409614302462uLL, 14567071740625403795uLL },
+  { 6690786993590490174uLL, 18208839675781754744uLL },
+  { 4181741870994056359uLL, 11380524797363596715uLL },
+  { 615491320315182544uLL, 14225655996704495894uLL },
+  { 9992736187248753989uLL, 17782069995880619867uLL },
+  { 3939617107816777291uLL, 11113793747425387417uLL },
+  { 9536207403198359517uLL, 13892242184281734271uLL },
+  { 7308573235570561493uLL, 17365302730352167839uLL },
+  { 11485387299872682789uLL, 10853314206470104899uLL },
+  { 9745048106413465582uLL, 13566642758087631124uLL },
+  { 12181310133016831978uLL, 16958303447609538905uLL },
+  { 695789805494438130uLL, 10598939654755961816uLL },
+  { 869737256868047663uLL, 13248674568444952270uLL },
+  { 10310543607939835386uLL, 16560843210556190337uLL },
+  { 17973304801030866876uLL, 10350527006597618960uLL },
+  { 4019886927579031980uLL, 12938158758247023701uLL },
+  { 9636544677901177879uLL, 16172698447808779626uLL },
+  { 10634526442115624078uLL, 10107936529880487266uLL },
+  { 4069786015789754290uLL, 12634920662350609083uLL },
+  { 475546501309804958uLL, 15793650827938261354uLL },
+  { 4908902581746016003uLL, 9871031767461413346uLL },
+  { 15359500264037295811uLL, 12338789709326766682uLL },
+  { 9976003293191843956uLL, 15423487136658458353uLL },
+  { 17764217104313372233uLL, 9639679460411536470uLL },
+  { 12981899343536939483uLL, 12049599325514420588uLL },
+  { 16227374179421174354uLL, 15061999156893025735uLL },
+  { 17059637889779315827uLL, 9413749473058141084uLL },
+  { 2877803288514593168uLL, 11767186841322676356uLL },
+  { 3597254110643241460uLL, 14708983551653345445uLL },
+  { 9108253656731439729uLL, 18386229439566681806uLL },
+  { 1080972517029761926uLL, 11491393399729176129uLL },
+  { 5962901664714590312uLL, 14364241749661470161uLL },
+  { 12065313099320625794uLL, 17955302187076837701uLL },
+  { 9846663696289085073uLL, 11222063866923023563uLL },
+  { 7696643601933968437uLL, 14027579833653779454uLL },
+  { 397432465562684739uLL, 17534474792067224318uLL },
+  { 14083453346258841674uLL, 10959046745042015198uLL },
+  { 8380944645968776284uLL, 13698808431302518998uLL },
+  { 1252808770606194547uLL, 17123510539128148748uLL },
+  { 10006377518483647400uLL, 10702194086955092967uLL },
+  { 7896285879677171346uLL, 13377742608693866209uLL },
+  { 14482043368023852087uLL, 16722178260867332761uLL },
+  { 2133748077373825698uLL, 10451361413042082976uLL },
+  { 2667185096717282123uLL, 13064201766302603720uLL },
+  { 3333981370896602653uLL, 16330252207878254650uLL },
+  { 6695424375237764562uLL, 10206407629923909156uLL },
+  { 8369280469047205703uLL, 12758009537404886445uLL },
+  { 15073286604736395033uLL, 15947511921756108056uLL },
+  { 9420804127960246895uLL, 9967194951097567535uLL },
+  { 7164319141522920715uLL, 12458993688871959419uLL },
+  { 4343712908476262990uLL, 15573742111089949274uLL },
+  { 7326506586225052273uLL, 9733588819431218296uLL },
+  { 9158133232781315341uLL, 12166986024289022870uLL },
+  { 2224294504121868368uLL, 15208732530361278588uLL },
+  { 10613556101930943538uLL, 9505457831475799117uLL },
+  { 17878631145841067327uLL, 11881822289344748896uLL },
+  { 3901544858591782542uLL, 14852277861680936121uLL },
+  { 13967680582688333849uLL, 9282673663550585075uLL },
+  { 12847914709933029407uLL, 11603342079438231344uLL },
+  { 16059893387416286759uLL, 14504177599297789180uLL },
+  { 1628122660560806833uLL, 18130221999122236476uLL },
+  { 10240948699705280078uLL, 11331388749451397797uLL },
+  { 17412871893058988002uLL, 14164235936814247246uLL },
+  { 12542717829468959195uLL, 17705294921017809058uLL },
+  { 12450884661845487401uLL, 11065809325636130661uLL },
+  { 1728547772024695539uLL, 13832261657045163327uLL },
+  { 15995742770313033136uLL, 17290327071306454158uLL },
+  { 5385653213018257806uLL, 10806454419566533849uLL },
+  { 11343752534700210161uLL, 13508068024458167311uLL },
+  { 9568004649947874797uLL, 16885085030572709139uLL },
+  { 3674159897003727796uLL, 10553178144107943212uLL },
+  { 4592699871254659745uLL, 13191472680134929015uLL },
+  { 1129188820640936778uLL, 16489340850168661269uLL },
+  { 3011586022114279438uLL, 10305838031355413293uLL },
+  { 8376168546070237202uLL, 12882297539194266616uLL },
+  { 10470210682587796502uLL, 16102871923992833270uLL },
+  { 1932195658189984910uLL, 10064294952495520794uLL },
+  { 11638616609592256945uLL, 12580368690619400992uLL },
+  { 14548270761990321182uLL, 15725460863274251240uLL },
+  { 9092669226243950738uLL, 9828413039546407025uLL },
+  { 15977522551232326327uLL, 12285516299433008781uLL },
+  { 6136845133758244197uLL, 15356895374291260977uLL },
+  { 15364743254667372383uLL, 9598059608932038110uLL },
+  { 9982557031479439671uLL, 11997574511165047638uLL },
+  { 3254824252494523781uLL, 14996968138956309548uLL },
+  { 11257637194663853171uLL, 9373105086847693467uLL },
+  { 9460360474902428559uLL, 11716381358559616834uLL },
+  { 2602078556773259891uLL, 14645476698199521043uLL },
+  { 17087656251248738576uLL, 18306845872749401303uLL },
+  { 17597314184671543466uLL, 11441778670468375814uLL },
+  { 12773270693984653525uLL, 14302223338085469768uLL },
+  { 15966588367480816906uLL, 17877779172606837210uLL },
+  { 14590803748102898470uLL, 11173611982879273256uLL },
+  { 18238504685128623088uLL, 13967014978599091570uLL },
+  { 13574758819556003052uLL, 17458768723248864463uLL },
+  { 15401753289863583763uLL, 10911730452030540289uLL },
+  { 5417133557047315992uLL, 13639663065038175362uLL },
+  { 15994788983163920798uLL, 17049578831297719202uLL },
+  { 14608429132904838403uLL, 10655986769561074501uLL },
+  { 4425478360848884291uLL, 13319983461951343127uLL },
+  { 920161932633717460uLL, 16649979327439178909uLL },
+  { 2880944217109767365uLL, 10406237079649486818uLL },
+  { 12824552308241985014uLL, 13007796349561858522uLL },
+  { 6807318348447705459uLL, 16259745436952323153uLL },
+  { 15783789013848285672uLL, 10162340898095201970uLL },
+  { 10506364230455581282uLL, 12702926122619002463uLL },
+  { 8521269269642088699uLL, 15878657653273753079uLL },
+  { 12243322321167387293uLL, 9924161033296095674uLL },
+  { 6080780864604458308uLL, 12405201291620119593uLL },
+  { 12212662099182960789uLL, 15506501614525149491uLL },
+  { 5327070802775656541uLL, 9691563509078218432uLL },
+  { 6658838503469570676uLL, 12114454386347773040uLL },
+  { 8323548129336963345uLL, 15143067982934716300uLL },
+  { 14425589617690377899uLL, 9464417489334197687uLL },
+  { 13420301003685584469uLL, 11830521861667747109uLL },
+  { 2940318199324816875uLL, 14788152327084683887uLL },
+  { 8755227902219092403uLL, 9242595204427927429uLL },
+  { 15555720896201253407uLL, 11553244005534909286uLL },
+  { 10221279083396790951uLL, 14441555006918636608uLL },
+  { 12776598854245988689uLL, 18051943758648295760uLL },
+  { 7985374283903742931uLL, 11282464849155184850uLL },
+  { 758345818024902856uLL, 14103081061443981063uLL },
+  { 14782990327813292282uLL, 17628851326804976328uLL },
+  { 9239368954883307676uLL, 11018032079253110205uLL },
+  { 16160897212031522499uLL, 13772540099066387756uLL },
+  { 1754377441329851508uLL, 17215675123832984696uLL },
+  { 1096485900831157192uLL, 10759796952395615435uLL },
+  { 15205665431321110202uLL, 13449746190494519293uLL },
+  { 5172023733869224041uLL, 16812182738118149117uLL },
+  { 5538357842881958977uLL, 10507614211323843198uLL },
+  { 16146319340457224530uLL, 13134517764154803997uLL },
+  { 6347841120289366950uLL, 16418147205193504997uLL },
+  { 6273243709394548296uLL, 10261342003245940623uLL }
+};
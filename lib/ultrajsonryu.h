@@ -0,0 +1,689 @@
+/*
+Tables for the shortest double formatting in ultrajsonenc.c (Ryu, Ulf Adams 2018,
+https://github.com/ulfjack/ryu, Apache 2.0 / Boost licensed).
+
+Each entry is a 125 bit approximation of a power of 5 stored as { low 64 bits, high 64 bits }:
+DOUBLE_POW5_SPLIT[i]     = 5^i scaled to exactly 125 bits (truncated)
+DOUBLE_POW5_INV_SPLIT[i] = floor(2^(bitlength(5^i) - 1 + 125) / 5^i) + 1
+*/
+
+#define DOUBLE_POW5_INV_BITCOUNT 125
+#define DOUBLE_POW5_BITCOUNT 125
+#define DOUBLE_POW5_INV_TABLE_SIZE 342
+#define DOUBLE_POW5_TABLE_SIZE 326
+
+static const JSUINT64 DOUBLE_POW5_INV_SPLIT[DOUBLE_POW5_INV_TABLE_SIZE][2] =
+{
+  { 1uLL, 2305843009213693952uLL },
+  { 11068046444225730970uLL, 1844674407370955161uLL },
+  { 5165088340638674453uLL, 1475739525896764129uLL },
+  { 7821419487252849886uLL, 1180591620717411303uLL },
+  { 8824922364862649494uLL, 1888946593147858085uLL },
+  { 7059937891890119595uLL, 1511157274518286468uLL },
+  { 13026647942995916322uLL, 1208925819614629174uLL },
+  { 9774590264567735146uLL, 1934281311383406679uLL },
+  { 11509021026396098440uLL, 1547425049106725343uLL },
+  { 16585914450600699399uLL, 1237940039285380274uLL },
+  { 15469416676735388068uLL, 1980704062856608439uLL },
+  { 16064882156130220778uLL, 1584563250285286751uLL },
+  { 9162556910162266299uLL, 1267650600228229401uLL },
+  { 7281393426775805432uLL, 2028240960365167042uLL },
+  { 16893161185646375315uLL, 1622592768292133633uLL },
+  { 2446482504291369283uLL, 1298074214633706907uLL },
+  { 7603720821608101175uLL, 2076918743413931051uLL },
+  { 2393627842544570617uLL, 1661534994731144841uLL },
+  { 16672297533003297786uLL, 1329227995784915872uLL },
+  { 11918280793837635165uLL, 2126764793255865396uLL },
+  { 5845275820328197809uLL, 1701411834604692317uLL },
+  { 15744267100488289217uLL, 1361129467683753853uLL },
+  { 3054734472329800808uLL, 2177807148294006166uLL },
+  { 17201182836831481939uLL, 1742245718635204932uLL },
+  { 6382248639981364905uLL, 1393796574908163946uLL },
+  { 2832900194486363201uLL, 2230074519853062314uLL },
+  { 5955668970331000884uLL, 1784059615882449851uLL },
+  { 1075186361522890384uLL, 1427247692705959881uLL },
+  { 12788344622662355584uLL, 2283596308329535809uLL },
+  { 13920024512871794791uLL, 1826877046663628647uLL },
+  { 3757321980813615186uLL, 1461501637330902918uLL },
+  { 10384555214134712795uLL, 1169201309864722334uLL },
+  { 5547241898389809503uLL, 1870722095783555735uLL },
+  { 4437793518711847602uLL, 1496577676626844588uLL },
+  { 10928932444453298728uLL, 1197262141301475670uLL },
+  { 17486291911125277965uLL, 1915619426082361072uLL },
+  { 6610335899416401726uLL, 1532495540865888858uLL },
+  { 12666966349016942027uLL, 1225996432692711086uLL },
+  { 12888448528943286597uLL, 1961594292308337738uLL },
+  { 17689456452638449924uLL, 1569275433846670190uLL },
+  { 14151565162110759939uLL, 1255420347077336152uLL },
+  { 7885109000409574610uLL, 2008672555323737844uLL },
+  { 9997436015069570011uLL, 1606938044258990275uLL },
+  { 7997948812055656009uLL, 1285550435407192220uLL },
+  { 12796718099289049614uLL, 2056880696651507552uLL },
+  { 2858676849947419045uLL, 1645504557321206042uLL },
+  { 13354987924183666206uLL, 1316403645856964833uLL },
+  { 17678631863951955605uLL, 2106245833371143733uLL },
+  { 3074859046935833515uLL, 1684996666696914987uLL },
+  { 13527933681774397782uLL, 1347997333357531989uLL },
+  { 10576647446613305481uLL, 2156795733372051183uLL },
+  { 15840015586774465031uLL, 1725436586697640946uLL },
+  { 8982663654677661702uLL, 1380349269358112757uLL },
+  { 18061610662226169046uLL, 2208558830972980411uLL },
+  { 10759939715039024913uLL, 1766847064778384329uLL },
+  { 12297300586773130254uLL, 1413477651822707463uLL },
+  { 15986332124095098083uLL, 2261564242916331941uLL },
+  { 9099716884534168143uLL, 1809251394333065553uLL },
+  { 14658471137111155161uLL, 1447401115466452442uLL },
+  { 4348079280205103483uLL, 1157920892373161954uLL },
+  { 14335624477811986218uLL, 1852673427797059126uLL },
+  { 7779150767507678651uLL, 1482138742237647301uLL },
+  { 2533971799264232598uLL, 1185710993790117841uLL },
+  { 15122401323048503126uLL, 1897137590064188545uLL },
+  { 12097921058438802501uLL, 1517710072051350836uLL },
+  { 5988988032009131678uLL, 1214168057641080669uLL },
+  { 16961078480698431330uLL, 1942668892225729070uLL },
+  { 13568862784558745064uLL, 1554135113780583256uLL },
+  { 7165741412905085728uLL, 1243308091024466605uLL },
+  { 11465186260648137165uLL, 1989292945639146568uLL },
+  { 16550846638002330379uLL, 1591434356511317254uLL },
+  { 16930026125143774626uLL, 1273147485209053803uLL },
+  { 4951948911778577463uLL, 2037035976334486086uLL },
+  { 272210314680951647uLL, 1629628781067588869uLL },
+  { 3907117066486671641uLL, 1303703024854071095uLL },
+  { 6251387306378674625uLL, 2085924839766513752uLL },
+  { 16069156289328670670uLL, 1668739871813211001uLL },
+  { 9165976216721026213uLL, 1334991897450568801uLL },
+  { 7286864317269821294uLL, 2135987035920910082uLL },
+  { 16897537898041588005uLL, 1708789628736728065uLL },
+  { 13518030318433270404uLL, 1367031702989382452uLL },
+  { 6871453250525591353uLL, 2187250724783011924uLL },
+  { 9186511415162383406uLL, 1749800579826409539uLL },
+  { 11038557946871817048uLL, 1399840463861127631uLL },
+  { 10282995085511086630uLL, 2239744742177804210uLL },
+  { 8226396068408869304uLL, 1791795793742243368uLL },
+  { 13959814484210916090uLL, 1433436634993794694uLL },
+  { 11267656730511734774uLL, 2293498615990071511uLL },
+  { 5324776569667477496uLL, 1834798892792057209uLL },
+  { 7949170070475892320uLL, 1467839114233645767uLL },
+  { 17427382500606444826uLL, 1174271291386916613uLL },
+  { 5747719112518849781uLL, 1878834066219066582uLL },
+  { 15666221734240810795uLL, 1503067252975253265uLL },
+  { 12532977387392648636uLL, 1202453802380202612uLL },
+  { 5295368560860596524uLL, 1923926083808324180uLL },
+  { 4236294848688477220uLL, 1539140867046659344uLL },
+  { 7078384693692692099uLL, 1231312693637327475uLL },
+  { 11325415509908307358uLL, 1970100309819723960uLL },
+  { 9060332407926645887uLL, 1576080247855779168uLL },
+  { 14626963555825137356uLL, 1260864198284623334uLL },
+  { 12335095245094488799uLL, 2017382717255397335uLL },
+  { 9868076196075591040uLL, 1613906173804317868uLL },
+  { 15273158586344293478uLL, 1291124939043454294uLL },
+  { 13369007293925138595uLL, 2065799902469526871uLL },
+  { 7005857020398200553uLL, 1652639921975621497uLL },
+  { 16672732060544291412uLL, 1322111937580497197uLL },
+  { 11918976037903224966uLL, 2115379100128795516uLL },
+  { 5845832015580669650uLL, 1692303280103036413uLL },
+  { 12055363241948356366uLL, 1353842624082429130uLL },
+  { 841837113407818570uLL, 2166148198531886609uLL },
+  { 4362818505468165179uLL, 1732918558825509287uLL },
+  { 14558301248600263113uLL, 1386334847060407429uLL },
+  { 12225235553534690011uLL, 2218135755296651887uLL },
+  { 2401490813343931363uLL, 1774508604237321510uLL },
+  { 1921192650675145090uLL, 1419606883389857208uLL },
+  { 17831303500047873437uLL, 2271371013423771532uLL },
+  { 6886345170554478103uLL, 1817096810739017226uLL },
+  { 1819727321701672159uLL, 1453677448591213781uLL },
+  { 16213177116328979020uLL, 1162941958872971024uLL },
+  { 14873036941900635463uLL, 1860707134196753639uLL },
+  { 15587778368262418694uLL, 1488565707357402911uLL },
+  { 8780873879868024632uLL, 1190852565885922329uLL },
+  { 2981351763563108441uLL, 1905364105417475727uLL },
+  { 13453127855076217722uLL, 1524291284333980581uLL },
+  { 7073153469319063855uLL, 1219433027467184465uLL },
+  { 11317045550910502167uLL, 1951092843947495144uLL },
+  { 12742985255470312057uLL, 1560874275157996115uLL },
+  { 10194388204376249646uLL, 1248699420126396892uLL },
+  { 1553625868034358140uLL, 1997919072202235028uLL },
+  { 8621598323911307159uLL, 1598335257761788022uLL },
+  { 17965325103354776697uLL, 1278668206209430417uLL },
+  { 13987124906400001422uLL, 2045869129935088668uLL },
+  { 121653480894270168uLL, 1636695303948070935uLL },
+  { 97322784715416134uLL, 1309356243158456748uLL },
+  { 14913111714512307107uLL, 2094969989053530796uLL },
+  { 8241140556867935363uLL, 1675975991242824637uLL },
+  { 17660958889720079260uLL, 1340780792994259709uLL },
+  { 17189487779326395846uLL, 2145249268790815535uLL },
+  { 13751590223461116677uLL, 1716199415032652428uLL },
+  { 18379969808252713988uLL, 1372959532026121942uLL },
+  { 14650556434236701088uLL, 2196735251241795108uLL },
+  { 652398703163629901uLL, 1757388200993436087uLL },
+  { 11589965406756634890uLL, 1405910560794748869uLL },
+  { 7475898206584884855uLL, 2249456897271598191uLL },
+  { 2291369750525997561uLL, 1799565517817278553uLL },
+  { 9211793429904618695uLL, 1439652414253822842uLL },
+  { 18428218302589300235uLL, 2303443862806116547uLL },
+  { 7363877012587619542uLL, 1842755090244893238uLL },
+  { 13269799239553916280uLL, 1474204072195914590uLL },
+  { 10615839391643133024uLL, 1179363257756731672uLL },
+  { 2227947767661371545uLL, 1886981212410770676uLL },
+  { 16539753473096738529uLL, 1509584969928616540uLL },
+  { 13231802778477390823uLL, 1207667975942893232uLL },
+  { 6413489186596184024uLL, 1932268761508629172uLL },
+  { 16198837793502678189uLL, 1545815009206903337uLL },
+  { 5580372605318321905uLL, 1236652007365522670uLL },
+  { 8928596168509315048uLL, 1978643211784836272uLL },
+  { 18210923379033183008uLL, 1582914569427869017uLL },
+  { 7190041073742725760uLL, 1266331655542295214uLL },
+  { 436019273762630246uLL, 2026130648867672343uLL },
+  { 7727513048493924843uLL, 1620904519094137874uLL },
+  { 9871359253537050198uLL, 1296723615275310299uLL },
+  { 4726128361433549347uLL, 2074757784440496479uLL },
+  { 7470251503888749801uLL, 1659806227552397183uLL },
+  { 13354898832594820487uLL, 1327844982041917746uLL },
+  { 13989140502667892133uLL, 2124551971267068394uLL },
+  { 14880661216876224029uLL, 1699641577013654715uLL },
+  { 11904528973500979224uLL, 1359713261610923772uLL },
+  { 4289851098633925465uLL, 2175541218577478036uLL },
+  { 18189276137874781665uLL, 1740432974861982428uLL },
+  { 3483374466074094362uLL, 1392346379889585943uLL },
+  { 1884050330976640656uLL, 2227754207823337509uLL },
+  { 5196589079523222848uLL, 1782203366258670007uLL },
+  { 15225317707844309248uLL, 1425762693006936005uLL },
+  { 5913764258841343181uLL, 2281220308811097609uLL },
+  { 8420360221814984868uLL, 1824976247048878087uLL },
+  { 17804334621677718864uLL, 1459980997639102469uLL },
+  { 17932816512084085415uLL, 1167984798111281975uLL },
+  { 10245762345624985047uLL, 1868775676978051161uLL },
+  { 4507261061758077715uLL, 1495020541582440929uLL },
+  { 7295157664148372495uLL, 1196016433265952743uLL },
+  { 7982903447895485668uLL, 1913626293225524389uLL },
+  { 10075671573058298858uLL, 1530901034580419511uLL },
+  { 4371188443704728763uLL, 1224720827664335609uLL },
+  { 14372599139411386667uLL, 1959553324262936974uLL },
+  { 15187428126271019657uLL, 1567642659410349579uLL },
+  { 15839291315758726049uLL, 1254114127528279663uLL },
+  { 3206773216762499739uLL, 2006582604045247462uLL },
+  { 13633465017635730761uLL, 1605266083236197969uLL },
+  { 14596120828850494932uLL, 1284212866588958375uLL },
+  { 4907049252451240275uLL, 2054740586542333401uLL },
+  { 236290587219081897uLL, 1643792469233866721uLL },
+  { 14946427728742906810uLL, 1315033975387093376uLL },
+  { 16535586736504830250uLL, 2104054360619349402uLL },
+  { 5849771759720043554uLL, 1683243488495479522uLL },
+  { 15747863852001765813uLL, 1346594790796383617uLL },
+  { 10439186904235184007uLL, 2154551665274213788uLL },
+  { 15730047152871967852uLL, 1723641332219371030uLL },
+  { 12584037722297574282uLL, 1378913065775496824uLL },
+  { 9066413911450387881uLL, 2206260905240794919uLL },
+  { 10942479943902220628uLL, 1765008724192635935uLL },
+  { 8753983955121776503uLL, 1412006979354108748uLL },
+  { 10317025513452932081uLL, 2259211166966573997uLL },
+  { 874922781278525018uLL, 1807368933573259198uLL },
+  { 8078635854506640661uLL, 1445895146858607358uLL },
+  { 13841606313089133175uLL, 1156716117486885886uLL },
+  { 14767872471458792434uLL, 1850745787979017418uLL },
+  { 746251532941302978uLL, 1480596630383213935uLL },
+  { 597001226353042382uLL, 1184477304306571148uLL },
+  { 15712597221132509104uLL, 1895163686890513836uLL },
+  { 8880728962164096960uLL, 1516130949512411069uLL },
+  { 10793931984473187891uLL, 1212904759609928855uLL },
+  { 17270291175157100626uLL, 1940647615375886168uLL },
+  { 2748186495899949531uLL, 1552518092300708935uLL },
+  { 2198549196719959625uLL, 1242014473840567148uLL },
+  { 18275073973719576693uLL, 1987223158144907436uLL },
+  { 10930710364233751031uLL, 1589778526515925949uLL },
+  { 12433917106128911148uLL, 1271822821212740759uLL },
+  { 8826220925580526867uLL, 2034916513940385215uLL },
+  { 7060976740464421494uLL, 1627933211152308172uLL },
+  { 16716827836597268165uLL, 1302346568921846537uLL },
+  { 11989529279587987770uLL, 2083754510274954460uLL },
+  { 9591623423670390216uLL, 1667003608219963568uLL },
+  { 15051996368420132820uLL, 1333602886575970854uLL },
+  { 13015147745246481542uLL, 2133764618521553367uLL },
+  { 3033420566713364587uLL, 1707011694817242694uLL },
+  { 6116085268112601993uLL, 1365609355853794155uLL },
+  { 9785736428980163188uLL, 2184974969366070648uLL },
+  { 15207286772667951197uLL, 1747979975492856518uLL },
+  { 1097782973908629988uLL, 1398383980394285215uLL },
+  { 1756452758253807981uLL, 2237414368630856344uLL },
+  { 5094511021344956708uLL, 1789931494904685075uLL },
+  { 4075608817075965366uLL, 1431945195923748060uLL },
+  { 6520974107321544586uLL, 2291112313477996896uLL },
+  { 1527430471115325346uLL, 1832889850782397517uLL },
+  { 12289990821117991246uLL, 1466311880625918013uLL },
+  { 17210690286378213644uLL, 1173049504500734410uLL },
+  { 9090360384495590213uLL, 1876879207201175057uLL },
+  { 18340334751822203140uLL, 1501503365760940045uLL },
+  { 14672267801457762512uLL, 1201202692608752036uLL },
+  { 16096930852848599373uLL, 1921924308174003258uLL },
+  { 1809498238053148529uLL, 1537539446539202607uLL },
+  { 12515645034668249793uLL, 1230031557231362085uLL },
+  { 1578287981759648052uLL, 1968050491570179337uLL },
+  { 12330676829633449412uLL, 1574440393256143469uLL },
+  { 13553890278448669853uLL, 1259552314604914775uLL },
+  { 3239480371808320148uLL, 2015283703367863641uLL },
+  { 17348979556414297411uLL, 1612226962694290912uLL },
+  { 6500486015647617283uLL, 1289781570155432730uLL },
+  { 10400777625036187652uLL, 2063650512248692368uLL },
+  { 15699319729512770768uLL, 1650920409798953894uLL },
+  { 16248804598352126938uLL, 1320736327839163115uLL },
+  { 7551343283653851484uLL, 2113178124542660985uLL },
+  { 6041074626923081187uLL, 1690542499634128788uLL },
+  { 12211557331022285596uLL, 1352433999707303030uLL },
+  { 1091747655926105338uLL, 2163894399531684849uLL },
+  { 4562746939482794594uLL, 1731115519625347879uLL },
+  { 7339546366328145998uLL, 1384892415700278303uLL },
+  { 8053925371383123274uLL, 2215827865120445285uLL },
+  { 6443140297106498619uLL, 1772662292096356228uLL },
+  { 12533209867169019542uLL, 1418129833677084982uLL },
+  { 5295740528502789974uLL, 2269007733883335972uLL },
+  { 15304638867027962949uLL, 1815206187106668777uLL },
+  { 4865013464138549713uLL, 1452164949685335022uLL },
+  { 14960057215536570740uLL, 1161731959748268017uLL },
+  { 9178696285890871890uLL, 1858771135597228828uLL },
+  { 14721654658196518159uLL, 1487016908477783062uLL },
+  { 4398626097073393881uLL, 1189613526782226450uLL },
+  { 7037801755317430209uLL, 1903381642851562320uLL },
+  { 5630241404253944167uLL, 1522705314281249856uLL },
+  { 814844308661245011uLL, 1218164251424999885uLL },
+  { 1303750893857992017uLL, 1949062802279999816uLL },
+  { 15800395974054034906uLL, 1559250241823999852uLL },
+  { 5261619149759407279uLL, 1247400193459199882uLL },
+  { 12107939454356961969uLL, 1995840309534719811uLL },
+  { 5997002748743659252uLL, 1596672247627775849uLL },
+  { 8486951013736837725uLL, 1277337798102220679uLL },
+  { 2511075177753209390uLL, 2043740476963553087uLL },
+  { 13076906586428298482uLL, 1634992381570842469uLL },
+  { 14150874083884549109uLL, 1307993905256673975uLL },
+  { 4194654460505726958uLL, 2092790248410678361uLL },
+  { 18113118827372222859uLL, 1674232198728542688uLL },
+  { 3422448617672047318uLL, 1339385758982834151uLL },
+  { 16543964232501006678uLL, 2143017214372534641uLL },
+  { 9545822571258895019uLL, 1714413771498027713uLL },
+  { 15015355686490936662uLL, 1371531017198422170uLL },
+  { 5577825024675947042uLL, 2194449627517475473uLL },
+  { 11840957649224578280uLL, 1755559702013980378uLL },
+  { 16851463748863483271uLL, 1404447761611184302uLL },
+  { 12204946739213931940uLL, 2247116418577894884uLL },
+  { 13453306206113055875uLL, 1797693134862315907uLL },
+  { 3383947335406624054uLL, 1438154507889852726uLL },
+  { 16482362180876329456uLL, 2301047212623764361uLL },
+  { 9496540929959153242uLL, 1840837770099011489uLL },
+  { 11286581558709232917uLL, 1472670216079209191uLL },
+  { 5339916432225476010uLL, 1178136172863367353uLL },
+  { 4854517476818851293uLL, 1885017876581387765uLL },
+  { 3883613981455081034uLL, 1508014301265110212uLL },
+  { 14174937629389795797uLL, 1206411441012088169uLL },
+  { 11611853762797942306uLL, 1930258305619341071uLL },
+  { 5600134195496443521uLL, 1544206644495472857uLL },
+  { 15548153800622885787uLL, 1235365315596378285uLL },
+  { 6430302007287065643uLL, 1976584504954205257uLL },
+  { 16212288050055383484uLL, 1581267603963364205uLL },
+  { 12969830440044306787uLL, 1265014083170691364uLL },
+  { 9683682259845159889uLL, 2024022533073106183uLL },
+  { 15125643437359948558uLL, 1619218026458484946uLL },
+  { 8411165935146048523uLL, 1295374421166787957uLL },
+  { 17147214310975587960uLL, 2072599073866860731uLL },
+  { 10028422634038560045uLL, 1658079259093488585uLL },
+  { 8022738107230848036uLL, 1326463407274790868uLL },
+  { 9147032156827446534uLL, 2122341451639665389uLL },
+  { 11006974540203867551uLL, 1697873161311732311uLL },
+  { 5116230817421183718uLL, 1358298529049385849uLL },
+  { 15564666937357714594uLL, 2173277646479017358uLL },
+  { 1383687105660440706uLL, 1738622117183213887uLL },
+  { 12174996128754083534uLL, 1390897693746571109uLL },
+  { 8411947361780802685uLL, 2225436309994513775uLL },
+  { 6729557889424642148uLL, 1780349047995611020uLL },
+  { 5383646311539713719uLL, 1424279238396488816uLL },
+  { 1235136468979721303uLL, 2278846781434382106uLL },
+  { 15745504434151418335uLL, 1823077425147505684uLL },
+  { 16285752362063044992uLL, 1458461940118004547uLL },
+  { 5649904260166615347uLL, 1166769552094403638uLL },
+  { 5350498001524674232uLL, 1866831283351045821uLL },
+  { 591049586477829062uLL, 1493465026680836657uLL },
+  { 11540886113407994219uLL, 1194772021344669325uLL },
+  { 18673707743239135uLL, 1911635234151470921uLL },
+  { 14772334225162232601uLL, 1529308187321176736uLL },
+  { 8128518565387875758uLL, 1223446549856941389uLL },
+  { 1937583260394870242uLL, 1957514479771106223uLL },
+  { 8928764237799716840uLL, 1566011583816884978uLL },
+  { 14521709019723594119uLL, 1252809267053507982uLL },
+  { 8477339172590109297uLL, 2004494827285612772uLL },
+  { 17849917782297818407uLL, 1603595861828490217uLL },
+  { 6901236596354434079uLL, 1282876689462792174uLL },
+  { 18420676183650915173uLL, 2052602703140467478uLL },
+  { 3668494502695001169uLL, 1642082162512373983uLL },
+  { 10313493231639821582uLL, 1313665730009899186uLL },
+  { 9122891541139893884uLL, 2101865168015838698uLL },
+  { 14677010862395735754uLL, 1681492134412670958uLL },
+  { 673562245690857633uLL, 1345193707530136767uLL }
+};
+
+static const JSUINT64 DOUBLE_POW5_SPLIT[DOUBLE_POW5_TABLE_SIZE][2] =
+{
+  { 0uLL, 1152921504606846976uLL },
+  { 0uLL, 1441151880758558720uLL },
+  { 0uLL, 1801439850948198400uLL },
+  { 0uLL, 2251799813685248000uLL },
+  { 0uLL, 1407374883553280000uLL },
+  { 0uLL, 1759218604441600000uLL },
+  { 0uLL, 2199023255552000000uLL },
+  { 0uLL, 1374389534720000000uLL },
+  { 0uLL, 1717986918400000000uLL },
+  { 0uLL, 2147483648000000000uLL },
+  { 0uLL, 1342177280000000000uLL },
+  { 0uLL, 1677721600000000000uLL },
+  { 0uLL, 2097152000000000000uLL },
+  { 0uLL, 1310720000000000000uLL },
+  { 0uLL, 1638400000000000000uLL },
+  { 0uLL, 2048000000000000000uLL },
+  { 0uLL, 1280000000000000000uLL },
+  { 0uLL, 1600000000000000000uLL },
+  { 0uLL, 2000000000000000000uLL },
+  { 0uLL, 1250000000000000000uLL },
+  { 0uLL, 1562500000000000000uLL },
+  { 0uLL, 1953125000000000000uLL },
+  { 0uLL, 1220703125000000000uLL },
+  { 0uLL, 1525878906250000000uLL },
+  { 0uLL, 1907348632812500000uLL },
+  { 0uLL, 1192092895507812500uLL },
+  { 0uLL, 1490116119384765625uLL },
+  { 4611686018427387904uLL, 1862645149230957031uLL },
+  { 9799832789158199296uLL, 1164153218269348144uLL },
+  { 12249790986447749120uLL, 1455191522836685180uLL },
+  { 15312238733059686400uLL, 1818989403545856475uLL },
+  { 14528612397897220096uLL, 2273736754432320594uLL },
+  { 13692068767113150464uLL, 1421085471520200371uLL },
+  { 12503399940464050176uLL, 1776356839400250464uLL },
+  { 15629249925580062720uLL, 2220446049250313080uLL },
+  { 9768281203487539200uLL, 1387778780781445675uLL },
+  { 7598665485932036096uLL, 1734723475976807094uLL },
+  { 274959820560269312uLL, 2168404344971008868uLL },
+  { 9395221924704944128uLL, 1355252715606880542uLL },
+  { 2520655369026404352uLL, 1694065894508600678uLL },
+  { 12374191248137781248uLL, 2117582368135750847uLL },
+  { 14651398557727195136uLL, 1323488980084844279uLL },
+  { 13702562178731606016uLL, 1654361225106055349uLL },
+  { 3293144668132343808uLL, 2067951531382569187uLL },
+  { 18199116482078572544uLL, 1292469707114105741uLL },
+  { 8913837547316051968uLL, 1615587133892632177uLL },
+  { 15753982952572452864uLL, 2019483917365790221uLL },
+  { 12152082354571476992uLL, 1262177448353618888uLL },
+  { 15190102943214346240uLL, 1577721810442023610uLL },
+  { 9764256642163156992uLL, 1972152263052529513uLL },
+  { 17631875447420442880uLL, 1232595164407830945uLL },
+  { 8204786253993389888uLL, 1540743955509788682uLL },
+  { 1032610780636961552uLL, 1925929944387235853uLL },
+  { 2951224747111794922uLL, 1203706215242022408uLL },
+  { 3689030933889743652uLL, 1504632769052528010uLL },
+  { 13834660704216955373uLL, 1880790961315660012uLL },
+  { 17870034976990372916uLL, 1175494350822287507uLL },
+  { 17725857702810578241uLL, 1469367938527859384uLL },
+  { 3710578054803671186uLL, 1836709923159824231uLL },
+  { 26536550077201078uLL, 2295887403949780289uLL },
+  { 11545800389866720434uLL, 1434929627468612680uLL },
+  { 14432250487333400542uLL, 1793662034335765850uLL },
+  { 8816941072311974870uLL, 2242077542919707313uLL },
+  { 17039803216263454053uLL, 1401298464324817070uLL },
+  { 12076381983474541759uLL, 1751623080406021338uLL },
+  { 5872105442488401391uLL, 2189528850507526673uLL },
+  { 15199280947623720629uLL, 1368455531567204170uLL },
+  { 9775729147674874978uLL, 1710569414459005213uLL },
+  { 16831347453020981627uLL, 2138211768073756516uLL },
+  { 1296220121283337709uLL, 1336382355046097823uLL },
+  { 15455333206886335848uLL, 1670477943807622278uLL },
+  { 10095794471753144002uLL, 2088097429759527848uLL },
+  { 6309871544845715001uLL, 1305060893599704905uLL },
+  { 12499025449484531656uLL, 1631326116999631131uLL },
+  { 11012095793428276666uLL, 2039157646249538914uLL },
+  { 11494245889320060820uLL, 1274473528905961821uLL },
+  { 532749306367912313uLL, 1593091911132452277uLL },
+  { 5277622651387278295uLL, 1991364888915565346uLL },
+  { 7910200175544436838uLL, 1244603055572228341uLL },
+  { 14499436237857933952uLL, 1555753819465285426uLL },
+  { 8900923260467641632uLL, 1944692274331606783uLL },
+  { 12480606065433357876uLL, 1215432671457254239uLL },
+  { 10989071563364309441uLL, 1519290839321567799uLL },
+  { 9124653435777998898uLL, 1899113549151959749uLL },
+  { 8008751406574943263uLL, 1186945968219974843uLL },
+  { 5399253239791291175uLL, 1483682460274968554uLL },
+  { 15972438586593889776uLL, 1854603075343710692uLL },
+  { 759402079766405302uLL, 1159126922089819183uLL },
+  { 14784310654990170340uLL, 1448908652612273978uLL },
+  { 9257016281882937117uLL, 1811135815765342473uLL },
+  { 16182956370781059300uLL, 2263919769706678091uLL },
+  { 7808504722524468110uLL, 1414949856066673807uLL },
+  { 5148944884728197234uLL, 1768687320083342259uLL },
+  { 1824495087482858639uLL, 2210859150104177824uLL },
+  { 1140309429676786649uLL, 1381786968815111140uLL },
+  { 1425386787095983311uLL, 1727233711018888925uLL },
+  { 6393419502297367043uLL, 2159042138773611156uLL },
+  { 13219259225790630210uLL, 1349401336733506972uLL },
+  { 16524074032238287762uLL, 1686751670916883715uLL },
+  { 16043406521870471799uLL, 2108439588646104644uLL },
+  { 803757039314269066uLL, 1317774742903815403uLL },
+  { 14839754354425000045uLL, 1647218428629769253uLL },
+  { 4714634887749086344uLL, 2059023035787211567uLL },
+  { 9864175832484260821uLL, 1286889397367007229uLL },
+  { 16941905809032713930uLL, 1608611746708759036uLL },
+  { 2730638187581340797uLL, 2010764683385948796uLL },
+  { 10930020904093113806uLL, 1256727927116217997uLL },
+  { 18274212148543780162uLL, 1570909908895272496uLL },
+  { 4396021111970173586uLL, 1963637386119090621uLL },
+  { 5053356204195052443uLL, 1227273366324431638uLL },
+  { 15540067292098591362uLL, 1534091707905539547uLL },
+  { 14813398096695851299uLL, 1917614634881924434uLL },
+  { 13870059828862294966uLL, 1198509146801202771uLL },
+  { 12725888767650480803uLL, 1498136433501503464uLL },
+  { 15907360959563101004uLL, 1872670541876879330uLL },
+  { 14553786618154326031uLL, 1170419088673049581uLL },
+  { 4357175217410743827uLL, 1463023860841311977uLL },
+  { 10058155040190817688uLL, 1828779826051639971uLL },
+  { 7961007781811134206uLL, 2285974782564549964uLL },
+  { 14199001900486734687uLL, 1428734239102843727uLL },
+  { 13137066357181030455uLL, 1785917798878554659uLL },
+  { 11809646928048900164uLL, 2232397248598193324uLL },
+  { 16604401366885338411uLL, 1395248280373870827uLL },
+  { 16143815690179285109uLL, 1744060350467338534uLL },
+  { 10956397575869330579uLL, 2180075438084173168uLL },
+  { 6847748484918331612uLL, 1362547148802608230uLL },
+  { 17783057643002690323uLL, 1703183936003260287uLL },
+  { 17617136035325974999uLL, 2128979920004075359uLL },
+  { 17928239049719816230uLL, 1330612450002547099uLL },
+  { 17798612793722382384uLL, 1663265562503183874uLL },
+  { 13024893955298202172uLL, 2079081953128979843uLL },
+  { 5834715712847682405uLL, 1299426220705612402uLL },
+  { 16516766677914378815uLL, 1624282775882015502uLL },
+  { 11422586310538197711uLL, 2030353469852519378uLL },
+  { 11750802462513761473uLL, 1268970918657824611uLL },
+  { 10076817059714813937uLL, 1586213648322280764uLL },
+  { 12596021324643517422uLL, 1982767060402850955uLL },
+  { 5566670318688504437uLL, 1239229412751781847uLL },
+  { 2346651879933242642uLL, 1549036765939727309uLL },
+  { 7545000868343941206uLL, 1936295957424659136uLL },
+  { 4715625542714963254uLL, 1210184973390411960uLL },
+  { 5894531928393704067uLL, 1512731216738014950uLL },
+  { 16591536947346905892uLL, 1890914020922518687uLL },
+  { 17287239619732898039uLL, 1181821263076574179uLL },
+  { 16997363506238734644uLL, 1477276578845717724uLL },
+  { 2799960309088866689uLL, 1846595723557147156uLL },
+  { 10973347230035317489uLL, 1154122327223216972uLL },
+  { 13716684037544146861uLL, 1442652909029021215uLL },
+  { 12534169028502795672uLL, 1803316136286276519uLL },
+  { 11056025267201106687uLL, 2254145170357845649uLL },
+  { 18439230838069161439uLL, 1408840731473653530uLL },
+  { 13825666510731675991uLL, 1761050914342066913uLL },
+  { 3447025083132431277uLL, 2201313642927583642uLL },
+  { 6766076695385157452uLL, 1375821026829739776uLL },
+  { 8457595869231446815uLL, 1719776283537174720uLL },
+  { 10571994836539308519uLL, 2149720354421468400uLL },
+  { 6607496772837067824uLL, 1343575221513417750uLL },
+  { 17482743002901110588uLL, 1679469026891772187uLL },
+  { 17241742735199000331uLL, 2099336283614715234uLL },
+  { 15387775227926763111uLL, 1312085177259197021uLL },
+  { 5399660979626290177uLL, 1640106471573996277uLL },
+  { 11361262242960250625uLL, 2050133089467495346uLL },
+  { 11712474920277544544uLL, 1281333180917184591uLL },
+  { 10028907631919542777uLL, 1601666476146480739uLL },
+  { 7924448521472040567uLL, 2002083095183100924uLL },
+  { 14176152362774801162uLL, 1251301934489438077uLL },
+  { 3885132398186337741uLL, 1564127418111797597uLL },
+  { 9468101516160310080uLL, 1955159272639746996uLL },
+  { 15140935484454969608uLL, 1221974545399841872uLL },
+  { 479425281859160394uLL, 1527468181749802341uLL },
+  { 5210967620751338397uLL, 1909335227187252926uLL },
+  { 17091912818251750210uLL, 1193334516992033078uLL },
+  { 12141518985959911954uLL, 1491668146240041348uLL },
+  { 15176898732449889943uLL, 1864585182800051685uLL },
+  { 11791404716994875166uLL, 1165365739250032303uLL },
+  { 10127569877816206054uLL, 1456707174062540379uLL },
+  { 8047776328842869663uLL, 1820883967578175474uLL },
+  { 836348374198811271uLL, 2276104959472719343uLL },
+  { 7440246761515338900uLL, 1422565599670449589uLL },
+  { 13911994470321561530uLL, 1778206999588061986uLL },
+  { 8166621051047176104uLL, 2222758749485077483uLL },
+  { 2798295147690791113uLL, 1389224218428173427uLL },
+  { 17332926989895652603uLL, 1736530273035216783uLL },
+  { 17054472718942177850uLL, 2170662841294020979uLL },
+  { 8353202440125167204uLL, 1356664275808763112uLL },
+  { 10441503050156459005uLL, 1695830344760953890uLL },
+  { 3828506775840797949uLL, 2119787930951192363uLL },
+  { 86973725686804766uLL, 1324867456844495227uLL },
+  { 13943775212390669669uLL, 1656084321055619033uLL },
+  { 3594660960206173375uLL, 2070105401319523792uLL },
+  { 2246663100128858359uLL, 1293815875824702370uLL },
+  { 12031700912015848757uLL, 1617269844780877962uLL },
+  { 5816254103165035138uLL, 2021587305976097453uLL },
+  { 5941001823691840913uLL, 1263492066235060908uLL },
+  { 7426252279614801142uLL, 1579365082793826135uLL },
+  { 4671129331091113523uLL, 1974206353492282669uLL },
+  { 5225298841145639904uLL, 1233878970932676668uLL },
+  { 6531623551432049880uLL, 1542348713665845835uLL },
+  { 3552843420862674446uLL, 1927935892082307294uLL },
+  { 16055585193321335241uLL, 1204959932551442058uLL },
+  { 10846109454796893243uLL, 1506199915689302573uLL },
+  { 18169322836923504458uLL, 1882749894611628216uLL },
+  { 11355826773077190286uLL, 1176718684132267635uLL },
+  { 9583097447919099954uLL, 1470898355165334544uLL },
+  { 11978871809898874942uLL, 1838622943956668180uLL },
+  { 14973589762373593678uLL, 2298278679945835225uLL },
+  { 2440964573842414192uLL, 1436424174966147016uLL },
+  { 3051205717303017741uLL, 1795530218707683770uLL },
+  { 13037379183483547984uLL, 2244412773384604712uLL },
+  { 8148361989677217490uLL, 1402757983365377945uLL },
+  { 14797138505523909766uLL, 1753447479206722431uLL },
+  { 13884737113477499304uLL, 2191809349008403039uLL },
+  { 15595489723564518921uLL, 1369880843130251899uLL },
+  { 14882676136028260747uLL, 1712351053912814874uLL },
+  { 9379973133180550126uLL, 2140438817391018593uLL },
+  { 17391698254306313589uLL, 1337774260869386620uLL },
+  { 3292878744173340370uLL, 1672217826086733276uLL },
+  { 4116098430216675462uLL, 2090272282608416595uLL },
+  { 266718509671728212uLL, 1306420176630260372uLL },
+  { 333398137089660265uLL, 1633025220787825465uLL },
+  { 5028433689789463235uLL, 2041281525984781831uLL },
+  { 10060300083759496378uLL, 1275800953740488644uLL },
+  { 12575375104699370472uLL, 1594751192175610805uLL },
+  { 1884160825592049379uLL, 1993438990219513507uLL },
+  { 17318501580490888525uLL, 1245899368887195941uLL },
+  { 7813068920331446945uLL, 1557374211108994927uLL },
+  { 5154650131986920777uLL, 1946717763886243659uLL },
+  { 915813323278131534uLL, 1216698602428902287uLL },
+  { 14979824709379828129uLL, 1520873253036127858uLL },
+  { 9501408849870009354uLL, 1901091566295159823uLL },
+  { 12855909558809837702uLL, 1188182228934474889uLL },
+  { 2234828893230133415uLL, 1485227786168093612uLL },
+  { 2793536116537666769uLL, 1856534732710117015uLL },
+  { 8663489100477123587uLL, 1160334207943823134uLL },
+  { 1605989338741628675uLL, 1450417759929778918uLL },
+  { 11230858710281811652uLL, 1813022199912223647uLL },
+  { 9426887369424876662uLL, 2266277749890279559uLL },
+  { 12809333633531629769uLL, 1416423593681424724uLL },
+  { 16011667041914537212uLL, 1770529492101780905uLL },
+  { 6179525747111007803uLL, 2213161865127226132uLL },
+  { 13085575628799155685uLL, 1383226165704516332uLL },
+  { 16356969535998944606uLL, 1729032707130645415uLL },
+  { 15834525901571292854uLL, 2161290883913306769uLL },
+  { 2979049660840976177uLL, 1350806802445816731uLL },
+  { 17558870131333383934uLL, 1688508503057270913uLL },
+  { 8113529608884566205uLL, 2110635628821588642uLL },
+  { 9682642023980241782uLL, 1319147268013492901uLL },
+  { 16714988548402690132uLL, 1648934085016866126uLL },
+  { 11670363648648586857uLL, 2061167606271082658uLL },
+  { 11905663298832754689uLL, 1288229753919426661uLL },
+  { 1047021068258779650uLL, 1610287192399283327uLL },
+  { 15143834390605638274uLL, 2012858990499104158uLL },
+  { 4853210475701136017uLL, 1258036869061940099uLL },
+  { 1454827076199032118uLL, 1572546086327425124uLL },
+  { 1818533845248790147uLL, 1965682607909281405uLL },
+  { 3442426662494187794uLL, 1228551629943300878uLL },
+  { 13526405364972510550uLL, 1535689537429126097uLL },
+  { 3072948650933474476uLL, 1919611921786407622uLL },
+  { 15755650962115585259uLL, 1199757451116504763uLL },
+  { 15082877684217093670uLL, 1499696813895630954uLL },
+  { 9630225068416591280uLL, 1874621017369538693uLL },
+  { 8324733676974063502uLL, 1171638135855961683uLL },
+  { 5794231077790191473uLL, 1464547669819952104uLL },
+  { 7242788847237739342uLL, 1830684587274940130uLL },
+  { 18276858095901949986uLL, 2288355734093675162uLL },
+  { 16034722328366106645uLL, 1430222333808546976uLL },
+  { 1596658836748081690uLL, 1787777917260683721uLL },
+  { 6607509564362490017uLL, 2234722396575854651uLL },
+  { 1823850468512862308uLL, 1396701497859909157uLL },
+  { 6891499104068465790uLL, 1745876872324886446uLL },
+  { 17837745916940358045uLL, 2182346090406108057uLL },
+  { 4231062170446641922uLL, 1363966306503817536uLL },
+  { 5288827713058302403uLL, 1704957883129771920uLL },
+  { 6611034641322878003uLL, 2131197353912214900uLL },
+  { 13355268687681574560uLL, 1331998346195134312uLL },
+  { 16694085859601968200uLL, 1664997932743917890uLL },
+  { 11644235287647684442uLL, 2081247415929897363uLL },
+  { 4971804045566108824uLL, 1300779634956185852uLL },
+  { 6214755056957636030uLL, 1625974543695232315uLL },
+  { 3156757802769657134uLL, 2032468179619040394uLL },
+  { 6584659645158423613uLL, 1270292612261900246uLL },
+  { 17454196593302805324uLL, 1587865765327375307uLL },
+  { 17206059723201118751uLL, 1984832206659219134uLL },
+  { 6142101308573311315uLL, 1240520129162011959uLL },
+  { 3065940617289251240uLL, 1550650161452514949uLL },
+  { 8444111790038951954uLL, 1938312701815643686uLL },
+  { 665883850346957067uLL, 1211445438634777304uLL },
+  { 832354812933696334uLL, 1514306798293471630uLL },
+  { 10263815553021896226uLL, 1892883497866839537uLL },
+  { 17944099766707154901uLL, 1183052186166774710uLL },
+  { 13206752671529167818uLL, 1478815232708468388uLL },
+  { 16508440839411459773uLL, 1848519040885585485uLL },
+  { 12623618533845856310uLL, 1155324400553490928uLL },
+  { 15779523167307320387uLL, 1444155500691863660uLL },
+  { 1277659885424598868uLL, 1805194375864829576uLL },
+  { 1597074856780748586uLL, 2256492969831036970uLL },
+  { 5609857803915355770uLL, 1410308106144398106uLL },
+  { 16235694291748970521uLL, 1762885132680497632uLL },
+  { 1847873790976661535uLL, 2203606415850622041uLL },
+  { 12684136165428883219uLL, 1377254009906638775uLL },
+  { 11243484188358716120uLL, 1721567512383298469uLL },
+  { 219297180166231438uLL, 2151959390479123087uLL },
+  { 7054589765244976505uLL, 1344974619049451929uLL },
+  { 13429923224983608535uLL, 1681218273811814911uLL },
+  { 12175718012802122765uLL, 2101522842264768639uLL },
+  { 14527352785642408584uLL, 1313451776415480399uLL },
+  { 13547504963625622826uLL, 1641814720519350499uLL },
+  { 12322695186104640628uLL, 2052268400649188124uLL },
+  { 16925056528170176201uLL, 1282667750405742577uLL },
+  { 7321262604930556539uLL, 1603334688007178222uLL },
+  { 18374950293017971482uLL, 2004168360008972777uLL },
+  { 4566814905495150320uLL, 1252605225005607986uLL },
+  { 14931890668723713708uLL, 1565756531257009982uLL },
+  { 9441491299049866327uLL, 1957195664071262478uLL },
+  { 1289246043478778550uLL, 1223247290044539049uLL },
+  { 6223243572775861092uLL, 1529059112555673811uLL },
+  { 3167368447542438461uLL, 1911323890694592264uLL },
+  { 1979605279714024038uLL, 1194577431684120165uLL },
+  { 7086192618069917952uLL, 1493221789605150206uLL },
+  { 18081112809442173248uLL, 1866527237006437757uLL },
+  { 13606538515115052232uLL, 1166579523129023598uLL },
+  { 7784801107039039482uLL, 1458224403911279498uLL },
+  { 507629346944023544uLL, 1822780504889099373uLL },
+  { 5246222702107417334uLL, 2278475631111374216uLL },
+  { 3278889188817135834uLL, 1424047269444608885uLL },
+  { 8710297504448807696uLL, 1780059086805761106uLL }
+};
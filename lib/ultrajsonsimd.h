@@ -0,0 +1,89 @@
+/*
+SIMD support shared by the encoder and the decoder.
+
+SSE2 is part of x86-64 so it's used unconditionally there. AVX2 code is compiled for the target with
+function attributes (GCC, clang) or as is (MSVC) and only run after JSON_CPUHasAVX2 says the CPU and
+OS support it, so no special compiler flags are needed. Everywhere else JSON_SIMD_SSE2 stays undefined
+and the callers keep to their scalar loops.
+*/
+
+#ifndef __ULTRAJSONSIMD_H__
+#define __ULTRAJSONSIMD_H__
+
+#if defined(__x86_64__) || defined(_M_X64) || defined(_M_AMD64)
+
+#define JSON_SIMD_SSE2
+#include <emmintrin.h>
+
+#if defined(_MSC_VER)
+#include <intrin.h>
+#include <immintrin.h>
+#define JSON_SIMD_AVX2
+#define JSON_TARGET_AVX2
+#elif defined(__clang__) || (defined(__GNUC__) && (__GNUC__ > 4 || (__GNUC__ == 4 && __GNUC_MINOR__ >= 9)))
+#include <immintrin.h>
+#define JSON_SIMD_AVX2
+#define JSON_TARGET_AVX2 __attribute__((target("avx2")))
+#endif
+
+#endif
+
+/*
+SWAR (SIMD within a register) code reads 8 bytes as one integer and needs them in memory order */
+#if defined(_MSC_VER) || (defined(__BYTE_ORDER__) && __BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__)
+#define JSON_SWAR_LITTLE_ENDIAN
+#endif
+
+#ifdef JSON_SIMD_SSE2
+
+/*
+Index of the lowest set bit, value must not be zero */
+static INLINE_PREFIX int JSON_ctz32(unsigned int value)
+{
+#if defined(_MSC_VER)
+  unsigned long index;
+  _BitScanForward(&index, value);
+  return (int) index;
+#else
+  return __builtin_ctz(value);
+#endif
+}
+
+#ifdef JSON_SIMD_AVX2
+
+/*
+Returns 1 when AVX2 instructions can be used. The answer is computed once */
+static int JSON_CPUHasAVX2(void)
+{
+  static int hasAVX2 = -1;
+
+  if (hasAVX2 < 0)
+  {
+#if defined(_MSC_VER)
+    int info[4];
+    __cpuid(info, 0);
+    hasAVX2 = 0;
+    if (info[0] >= 7)
+    {
+      __cpuid(info, 1);
+      // OSXSAVE and AVX, then the OS must preserve the YMM registers
+      if ((info[2] & (1 << 27)) && (info[2] & (1 << 28)) && (_xgetbv(0) & 6) == 6)
+      {
+        __cpuidex(info, 7, 0);
+        hasAVX2 = (info[1] & (1 << 5)) != 0;
+      }
+    }
+#else
+    __builtin_cpu_init();
+    hasAVX2 = __builtin_cpu_supports("avx2") ? 1 : 0;
+#endif
+  }
+
+  return hasAVX2;
+}
+
+#endif
+
+#endif
+
+#endif
@@ -58,9 +58,239 @@ void Object_arrayAddItem(void *prv, JSOBJ obj, JSOBJ value)
   return;
 }
 
-JSOBJ Object_newString(void *prv, wchar_t *start, wchar_t *end)
+/*
+Builds a str from the UTF-8 handed over by the decoder, which is already validated and comes with its
+largest code point. That's enough to allocate the compact PEP 393 string of the right width up front
+and fill it in a single pass, ASCII being a plain copy. */
+#if PY_VERSION_HEX >= 0x03030000
+
+#define UTF8_NEXT(__ucs, __ptr) \
+  { \
+    __ucs = *(__ptr); \
+    if (__ucs < 0x80) \
+    { \
+      (__ptr) += 1; \
+    } \
+    else if (__ucs < 0xe0) \
+    { \
+      __ucs = ((__ucs & 0x1f) << 6) | ((__ptr)[1] & 0x3f); \
+      (__ptr) += 2; \
+    } \
+    else if (__ucs < 0xf0) \
+    { \
+      __ucs = ((__ucs & 0x0f) << 12) | (((__ptr)[1] & 0x3f) << 6) | ((__ptr)[2] & 0x3f); \
+      (__ptr) += 3; \
+    } \
+    else \
+    { \
+      __ucs = ((__ucs & 0x07) << 18) | (((__ptr)[1] & 0x3f) << 12) | (((__ptr)[2] & 0x3f) << 6) | ((__ptr)[3] & 0x3f); \
+      (__ptr) += 4; \
+    } \
+  }
+
+#define UTF8_FILL(__type, __str, __start, __end) \
+  { \
+    __type *out = (__type *) PyUnicode_DATA(__str); \
+    const JSUINT8 *ptr = (const JSUINT8 *) (__start); \
+    const JSUINT8 *ptrEnd = (const JSUINT8 *) (__end); \
+    Py_UCS4 ucs; \
+    while (ptr < ptrEnd) \
+    { \
+      UTF8_NEXT(ucs, ptr); \
+      *(out++) = (__type) ucs; \
+    } \
+  }
+
+static PyObject *newUnicodeFromUTF8(const char *start, const char *end, JSUINT32 maxChar)
+{
+  PyObject *str;
+  const char *ptr;
+  Py_ssize_t length = 0;
+
+  if (maxChar < 0x80)
+  {
+    str = PyUnicode_New(end - start, 127);
+    if (str)
+    {
+      memcpy(PyUnicode_1BYTE_DATA(str), start, end - start);
+    }
+    return str;
+  }
+
+  for (ptr = start; ptr < end; ptr ++)
+  {
+    length += ((*ptr & 0xc0) != 0x80);
+  }
+
+  str = PyUnicode_New(length, maxChar);
+  if (!str)
+  {
+    return NULL;
+  }
+
+  switch (PyUnicode_KIND(str))
+  {
+    case PyUnicode_1BYTE_KIND: UTF8_FILL(Py_UCS1, str, start, end); break;
+    case PyUnicode_2BYTE_KIND: UTF8_FILL(Py_UCS2, str, start, end); break;
+    default: UTF8_FILL(Py_UCS4, str, start, end); break;
+  }
+
+  return str;
+}
+
+#else
+
+static PyObject *newUnicodeFromUTF8(const char *start, const char *end, JSUINT32 maxChar)
+{
+#if PY_MAJOR_VERSION >= 3
+  return PyUnicode_DecodeUTF8(start, end - start, "surrogatepass");
+#else
+  return PyUnicode_DecodeUTF8(start, end - start, NULL);
+#endif
+}
+
+#endif
+
+JSOBJ Object_newString(void *prv, char *start, char *end, JSUINT32 maxChar)
+{
+  return newUnicodeFromUTF8(start, end, maxChar);
+}
+
+/*
+Key cache
+A small direct mapped table of recently decoded object keys. Records decoded from the same source
+tend to repeat the same few keys, so a hit returns the cached string instead of allocating a new one,
+and dict insertion finds the hash already computed. Keys are not interned: interned strings can be
+immortal, and input with many distinct keys would then keep every one of them alive.
+Comparing a candidate against the cached string needs PEP 393 strings, older versions go without.
+*/
+#define KEY_CACHE_SIZE 256
+#define KEY_CACHE_MAX_LENGTH 64
+
+typedef struct __KeyCacheEntry
+{
+  size_t hash;
+  PyObject *key;
+} KeyCacheEntry;
+
+typedef struct __KeyCache
+{
+  KeyCacheEntry *entries;
+} KeyCache;
+
+static void KeyCache_clear(KeyCache *cache)
+{
+  int index;
+
+  if (!cache->entries)
+  {
+    return;
+  }
+
+  for (index = 0; index < KEY_CACHE_SIZE; index ++)
+  {
+    Py_XDECREF(cache->entries[index].key);
+  }
+
+  PyObject_Free(cache->entries);
+  cache->entries = NULL;
+}
+
+#if PY_VERSION_HEX >= 0x03030000
+
+/*
+Tells whether the cached key holds exactly the given UTF-8. Non-ASCII keys are compared code point by code
+point, asking for their UTF-8 form would leave a copy of it attached to the key */
+static int KeyCache_matches(PyObject *key, const char *start, Py_ssize_t len, JSUINT32 maxChar)
+{
+  const JSUINT8 *ptr = (const JSUINT8 *) start;
+  const JSUINT8 *ptrEnd = ptr + len;
+  Py_ssize_t length = PyUnicode_GET_LENGTH(key);
+  Py_ssize_t index = 0;
+  int kind = PyUnicode_KIND(key);
+  void *data = PyUnicode_DATA(key);
+  Py_UCS4 ucs;
+
+  if (maxChar < 0x80)
+  {
+    return PyUnicode_IS_ASCII(key) && PyUnicode_GET_LENGTH(key) == len && memcmp(PyUnicode_1BYTE_DATA(key), start, len) == 0;
+  }
+
+  if (PyUnicode_IS_ASCII(key))
+  {
+    return 0;
+  }
+
+  while (ptr < ptrEnd)
+  {
+    UTF8_NEXT(ucs, ptr);
+    if (index >= length || PyUnicode_READ(kind, data, index) != ucs)
+    {
+      return 0;
+    }
+    index ++;
+  }
+
+  return index == length;
+}
+
+#endif
+
+JSOBJ Object_newKey(void *prv, char *start, char *end, JSUINT32 maxChar)
 {
-  return PyUnicode_FromWideChar (start, (end - start));
+#if PY_VERSION_HEX >= 0x03030000
+  KeyCache *cache = (KeyCache *) prv;
+  KeyCacheEntry *entry;
+  PyObject *key;
+  size_t hash;
+  Py_ssize_t len = end - start;
+  const char *ptr;
+
+  if (cache == NULL || len > KEY_CACHE_MAX_LENGTH)
+  {
+    return newUnicodeFromUTF8(start, end, maxChar);
+  }
+
+  if (!cache->entries)
+  {
+    cache->entries = (KeyCacheEntry *) PyObject_Malloc(KEY_CACHE_SIZE * sizeof(KeyCacheEntry));
+    if (!cache->entries)
+    {
+      return newUnicodeFromUTF8(start, end, maxChar);
+    }
+    memset(cache->entries, 0, KEY_CACHE_SIZE * sizeof(KeyCacheEntry));
+  }
+
+  // FNV-1a
+  hash = 2166136261U;
+  for (ptr = start; ptr < end; ptr ++)
+  {
+    hash = (hash ^ (size_t) (JSUINT8) *ptr) * 16777619U;
+  }
+
+  entry = &cache->entries[(hash ^ (hash >> 8)) & (KEY_CACHE_SIZE - 1)];
+  key = entry->key;
+
+  if (key && entry->hash == hash && KeyCache_matches(key, start, len, maxChar))
+  {
+    Py_INCREF(key);
+    return key;
+  }
+
+  key = newUnicodeFromUTF8(start, end, maxChar);
+  if (!key)
+  {
+    return NULL;
+  }
+
+  Py_XDECREF(entry->key);
+  Py_INCREF(key);
+  entry->key = key;
+  entry->hash = hash;
+  return key;
+#else
+  return newUnicodeFromUTF8(start, end, maxChar);
+#endif
 }
 
 JSOBJ Object_newTrue(void *prv)
@@ -88,6 +318,50 @@ JSOBJ Object_newArray(void *prv)
   return PyList_New(0);
 }
 
+/*
+Arrays and objects are created once all their values are decoded, at their final size, instead of being
+grown one item at a time */
+JSOBJ Object_newArrayFromItems(void *prv, JSOBJ *items, size_t count)
+{
+  PyObject *list = PyList_New((Py_ssize_t) count);
+  size_t index;
+
+  if (!list)
+  {
+    for (index = 0; index < count; index ++)
+    {
+      Py_DECREF( (PyObject *) items[index]);
+    }
+    return NULL;
+  }
+
+  for (index = 0; index < count; index ++)
+  {
+    PyList_SET_ITEM(list, (Py_ssize_t) index, (PyObject *) items[index]);
+  }
+
+  return list;
+}
+
+JSOBJ Object_newObjectFromItems(void *prv, JSOBJ *items, size_t count)
+{
+  PyObject *dict = _PyDict_NewPresized((Py_ssize_t) (count / 2));
+  size_t index;
+
+  for (index = 0; index < count; index += 2)
+  {
+    if (dict && PyDict_SetItem(dict, (PyObject *) items[index], (PyObject *) items[index + 1]) < 0)
+    {
+      Py_DECREF(dict);
+      dict = NULL;
+    }
+    Py_DECREF( (PyObject *) items[index]);
+    Py_DECREF( (PyObject *) items[index + 1]);
+  }
+
+  return dict;
+}
+
 JSOBJ Object_newInteger(void *prv, JSINT32 value)
 {
   return PyInt_FromLong( (long) value);
@@ -113,38 +387,92 @@ static void Object_releaseObject(void *prv, JSOBJ obj)
   Py_DECREF( ((PyObject *)obj));
 }
 
-static char *g_kwlist[] = {"obj", "precise_float", NULL};
+static const JSONObjectDecoder g_objectDecoder =
+{
+  Object_newString,
+  Object_objectAddKey,
+  Object_arrayAddItem,
+  Object_newTrue,
+  Object_newFalse,
+  Object_newNull,
+  Object_newObject,
+  Object_newArray,
+  Object_newInteger,
+  Object_newLong,
+  Object_newUnsignedLong,
+  Object_newDouble,
+  Object_releaseObject,
+  PyObject_Malloc,
+  PyObject_Free,
+  PyObject_Realloc,
+  NULL, // errorStr
+  NULL, // errorOffset
+  0, // preciseFloat
+  NULL, // prv
+  Object_newKey,
+  Object_newArrayFromItems,
+  Object_newObjectFromItems,
+};
+
+/*
+Exposes the JSON input as a read only buffer. Objects supporting the buffer protocol (bytes, bytearray,
+memoryview, mmap) are decoded in place, and so are ASCII only strings, whose data already is UTF-8. Other
+strings are encoded to a temporary bytes object the view owns, asking for their cached UTF-8 form would keep
+a copy of the whole input attached to the string. Release the view with PyBuffer_Release */
+static int getInputBuffer(PyObject *arg, Py_buffer *view)
+{
+  if (PyUnicode_Check(arg))
+  {
+    PyObject *sarg;
+    int ret;
+
+#if PY_VERSION_HEX >= 0x03030000
+    if (PyUnicode_READY(arg))
+    {
+      return 0;
+    }
+
+    if (PyUnicode_IS_COMPACT_ASCII(arg))
+    {
+      return PyBuffer_FillInfo(view, arg, PyUnicode_DATA(arg), PyUnicode_GET_LENGTH(arg), 1, PyBUF_SIMPLE) == 0;
+    }
+#endif
+
+    sarg = PyUnicode_AsUTF8String(arg);
+    if (sarg == NULL)
+    {
+      //Exception raised above us by codec according to docs
+      return 0;
+    }
+    ret = PyObject_GetBuffer(sarg, view, PyBUF_SIMPLE) == 0;
+    Py_DECREF(sarg);
+    return ret;
+  }
+
+  if (!PyObject_CheckBuffer(arg))
+  {
+    PyErr_Format(PyExc_TypeError, "Expected String, Unicode or an object supporting the buffer protocol");
+    return 0;
+  }
+
+  return PyObject_GetBuffer(arg, view, PyBUF_SIMPLE) == 0;
+}
+
+static char *g_kwlist[] = {"obj", "precise_float", "release_gil", "cache_keys", NULL};
 
 PyObject* JSONToObj(PyObject* self, PyObject *args, PyObject *kwargs)
 {
   PyObject *ret;
-  PyObject *sarg;
   PyObject *arg;
+  Py_buffer view;
   PyObject *opreciseFloat = NULL;
-  JSONObjectDecoder decoder =
-  {
-    Object_newString,
-    Object_objectAddKey,
-    Object_arrayAddItem,
-    Object_newTrue,
-    Object_newFalse,
-    Object_newNull,
-    Object_newObject,
-    Object_newArray,
-    Object_newInteger,
-    Object_newLong,
-    Object_newUnsignedLong,
-    Object_newDouble,
-    Object_releaseObject,
-    PyObject_Malloc,
-    PyObject_Free,
-    PyObject_Realloc
-  };
-
-  decoder.preciseFloat = 0;
-  decoder.prv = NULL;
-
-  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", g_kwlist, &arg, &opreciseFloat))
+  PyObject *oreleaseGIL = NULL;
+  PyObject *ocacheKeys = NULL;
+  JSONTape tape;
+  KeyCache keyCache = { NULL };
+  JSONObjectDecoder decoder = g_objectDecoder;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOO", g_kwlist, &arg, &opreciseFloat, &oreleaseGIL, &ocacheKeys))
   {
       return NULL;
   }
@@ -154,36 +482,43 @@ PyObject* JSONToObj(PyObject* self, PyObject *args, PyObject *kwargs)
       decoder.preciseFloat = 1;
   }
 
-  if (PyString_Check(arg))
-  {
-      sarg = arg;
-  }
-  else
-  if (PyUnicode_Check(arg))
+  if (ocacheKeys == NULL || PyObject_IsTrue(ocacheKeys))
   {
-    sarg = PyUnicode_AsUTF8String(arg);
-    if (sarg == NULL)
-    {
-      //Exception raised above us by codec according to docs
-      return NULL;
-    }
+      decoder.prv = &keyCache;
   }
-  else
+
+  if (!getInputBuffer(arg, &view))
   {
-    PyErr_Format(PyExc_TypeError, "Expected String or Unicode");
     return NULL;
   }
 
   decoder.errorStr = NULL;
   decoder.errorOffset = NULL;
 
-  ret = JSON_DecodeObject(&decoder, PyString_AS_STRING(sarg), PyString_GET_SIZE(sarg));
+  if (oreleaseGIL && PyObject_IsTrue(oreleaseGIL))
+  {
+    /*
+    Scan into a tape without touching any Python objects so other threads can run meanwhile,
+    then build the objects from the tape with the GIL held again */
+    int success;
+    const char *buffer = (const char *) view.buf;
+    size_t cbBuffer = view.len;
+
+    Py_BEGIN_ALLOW_THREADS
+    success = JSON_DecodeObjectToTape(&decoder, &tape, buffer, cbBuffer);
+    Py_END_ALLOW_THREADS
 
-  if (sarg != arg)
+    ret = success ? JSON_DecodeTape(&decoder, &tape) : NULL;
+    JSON_FreeTape(&tape);
+  }
+  else
   {
-    Py_DECREF(sarg);
+    ret = JSON_DecodeObject(&decoder, (const char *) view.buf, view.len);
   }
 
+  KeyCache_clear(&keyCache);
+  PyBuffer_Release(&view);
+
   if (decoder.errorStr)
   {
     /*
@@ -250,3 +585,1787 @@ PyObject* JSONFileToObj(PyObject* self, PyObject *args, PyObject *kwargs)
 
   return result;
 }
+
+PyObject* JSONMmapToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *path;
+  PyObject *io;
+  PyObject *mmap;
+  PyObject *file = NULL;
+  PyObject *fileno = NULL;
+  PyObject *map = NULL;
+  PyObject *mmapType;
+  PyObject *mmapKwargs;
+  PyObject *access;
+  PyObject *argtuple;
+  PyObject *result = NULL;
+  PyObject *closed;
+  PyObject *type, *value, *traceback;
+
+  if (!PyArg_ParseTuple (args, "O", &path))
+  {
+    return NULL;
+  }
+
+  io = PyImport_ImportModule("io");
+  if (io == NULL)
+  {
+    return NULL;
+  }
+
+  mmap = PyImport_ImportModule("mmap");
+  if (mmap == NULL)
+  {
+    Py_DECREF(io);
+    return NULL;
+  }
+
+  file = PyObject_CallMethod(io, "open", "Os", path, "rb");
+  if (file == NULL)
+  {
+    goto BAIL;
+  }
+
+  fileno = PyObject_CallMethod(file, "fileno", NULL);
+  if (fileno == NULL)
+  {
+    goto BAIL;
+  }
+
+  // Map the whole file read only and decode straight from the mapping
+  access = PyObject_GetAttrString(mmap, "ACCESS_READ");
+  mmapType = PyObject_GetAttrString(mmap, "mmap");
+  argtuple = Py_BuildValue("(Oi)", fileno, 0);
+  mmapKwargs = access ? Py_BuildValue("{sO}", "access", access) : NULL;
+
+  if (access && mmapType && argtuple && mmapKwargs)
+  {
+    map = PyObject_Call(mmapType, argtuple, mmapKwargs);
+  }
+
+  Py_XDECREF(access);
+  Py_XDECREF(mmapType);
+  Py_XDECREF(argtuple);
+  Py_XDECREF(mmapKwargs);
+
+  if (map == NULL)
+  {
+    goto BAIL;
+  }
+
+  argtuple = PyTuple_Pack(1, map);
+  if (argtuple == NULL)
+  {
+    goto BAIL;
+  }
+
+  result = JSONToObj (self, argtuple, kwargs);
+  Py_DECREF(argtuple);
+
+BAIL:
+  PyErr_Fetch(&type, &value, &traceback);
+
+  if (map)
+  {
+    closed = PyObject_CallMethod(map, "close", NULL);
+    Py_XDECREF(closed);
+  }
+
+  if (file)
+  {
+    closed = PyObject_CallMethod(file, "close", NULL);
+    Py_XDECREF(closed);
+  }
+
+  PyErr_Clear();
+  PyErr_Restore(type, value, traceback);
+
+  Py_XDECREF(map);
+  Py_XDECREF(fileno);
+  Py_XDECREF(file);
+  Py_DECREF(mmap);
+  Py_DECREF(io);
+  return result;
+}
+
+static char *g_linesKwlist[] = {"obj", "precise_float", "cache_keys", NULL};
+
+PyObject* JSONLinesToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *list;
+  PyObject *obj;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  KeyCache keyCache = { NULL };
+  JSONObjectDecoder decoder = g_objectDecoder;
+  Py_buffer view;
+  const char *line;
+  const char *end;
+  const char *eol;
+  const char *ptr;
+  Py_ssize_t lineNo;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OO", g_linesKwlist, &arg, &opreciseFloat, &ocacheKeys))
+  {
+    return NULL;
+  }
+
+  if (opreciseFloat && PyObject_IsTrue(opreciseFloat))
+  {
+    decoder.preciseFloat = 1;
+  }
+
+  if (ocacheKeys == NULL || PyObject_IsTrue(ocacheKeys))
+  {
+    decoder.prv = &keyCache;
+  }
+
+  if (!getInputBuffer(arg, &view))
+  {
+    return NULL;
+  }
+
+  list = PyList_New(0);
+  if (!list)
+  {
+    PyBuffer_Release(&view);
+    return NULL;
+  }
+
+  end = (const char *) view.buf + view.len;
+  lineNo = 0;
+
+  for (line = (const char *) view.buf; line < end; line = eol + 1)
+  {
+    lineNo ++;
+
+    eol = (const char *) memchr(line, '\n', end - line);
+    if (!eol)
+    {
+      eol = end;
+    }
+
+    for (ptr = line; ptr < eol && (*ptr == ' ' || *ptr == '\t' || *ptr == '\r'); ptr ++);
+    if (ptr == eol)
+    {
+      // Blank lines are allowed between records
+      continue;
+    }
+
+    decoder.errorStr = NULL;
+    decoder.errorOffset = NULL;
+    obj = (PyObject *) JSON_DecodeObject(&decoder, line, eol - line);
+
+    if (decoder.errorStr)
+    {
+      if (!PyErr_Occurred())
+      {
+        PyErr_Format (PyExc_ValueError, "line %d: %s", (int) lineNo, decoder.errorStr);
+      }
+      Py_XDECREF(obj);
+      goto BAIL;
+    }
+
+    if (PyList_Append(list, obj))
+    {
+      Py_DECREF(obj);
+      goto BAIL;
+    }
+    Py_DECREF(obj);
+  }
+
+  KeyCache_clear(&keyCache);
+  PyBuffer_Release(&view);
+  return list;
+
+BAIL:
+  KeyCache_clear(&keyCache);
+  PyBuffer_Release(&view);
+  Py_DECREF(list);
+  return NULL;
+}
+
+static char *g_validateKwlist[] = {"obj", "max_depth", NULL};
+
+PyObject* JSONValidate(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  Py_ssize_t maxDepth = JSON_MAX_OBJECT_DEPTH;
+  Py_ssize_t offset;
+  Py_buffer view;
+  JSONObjectDecoder decoder = g_objectDecoder;
+  const char *buffer;
+  size_t cbBuffer;
+  int success;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|n", g_validateKwlist, &arg, &maxDepth))
+  {
+    return NULL;
+  }
+
+  if (maxDepth < 0 || maxDepth > JSON_MAX_OBJECT_DEPTH)
+  {
+    PyErr_Format (PyExc_ValueError, "max_depth must be between 0 and %d", JSON_MAX_OBJECT_DEPTH);
+    return NULL;
+  }
+
+  if (!getInputBuffer(arg, &view))
+  {
+    return NULL;
+  }
+
+  buffer = (const char *) view.buf;
+  cbBuffer = view.len;
+
+  // Nothing is built, so the whole check runs without the GIL
+  Py_BEGIN_ALLOW_THREADS
+  success = JSON_Validate(&decoder, buffer, cbBuffer, (JSUINT32) maxDepth);
+  Py_END_ALLOW_THREADS
+
+  PyBuffer_Release(&view);
+
+  if (!success)
+  {
+    offset = decoder.errorOffset ? decoder.errorOffset - buffer : 0;
+    offset = offset < 0 ? 0 : (offset > (Py_ssize_t) cbBuffer ? (Py_ssize_t) cbBuffer : offset);
+    PyErr_Format (PyExc_ValueError, "%s at byte %zd", decoder.errorStr, offset);
+    return NULL;
+  }
+
+  Py_RETURN_TRUE;
+}
+
+/*
+Runs JSON_Extract over one document and returns the list of values found, with defaultValue for the
+pointers matching nothing. On failure returns NULL with decoder->errorStr set or a Python exception raised */
+static PyObject *extractList(JSONObjectDecoder *decoder, const char *buffer, size_t cbBuffer, const JSONPointer *pointers, Py_ssize_t count, JSOBJ *results, PyObject *defaultValue)
+{
+  PyObject *list;
+  PyObject *value;
+  Py_ssize_t index;
+
+  decoder->errorStr = NULL;
+  decoder->errorOffset = NULL;
+
+  if (!JSON_Extract(decoder, buffer, cbBuffer, pointers, (size_t) count, results))
+  {
+    return NULL;
+  }
+
+  list = PyList_New(count);
+
+  for (index = 0; index < count; index ++)
+  {
+    value = (PyObject *) results[index];
+
+    if (!value)
+    {
+      value = defaultValue;
+      Py_INCREF(value);
+    }
+
+    if (!list)
+    {
+      Py_DECREF(value);
+      continue;
+    }
+
+    PyList_SET_ITEM(list, index, value);
+  }
+
+  return list;
+}
+
+static char *g_extractKwlist[] = {"obj", "pointers", "default", "precise_float", "lines", "cache_keys", NULL};
+
+PyObject* JSONExtract(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *opointers;
+  PyObject *defaultValue = Py_None;
+  PyObject *opreciseFloat = NULL;
+  PyObject *olines = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *seq = NULL;
+  PyObject *item;
+  PyObject *list = NULL;
+  PyObject *obj;
+  KeyCache keyCache = { NULL };
+  JSONObjectDecoder decoder = g_objectDecoder;
+  Py_buffer view;
+  Py_buffer *views = NULL;
+  JSONPointer *pointers = NULL;
+  JSOBJ *results = NULL;
+  Py_ssize_t count;
+  Py_ssize_t ready = 0;
+  Py_ssize_t index;
+  const char *line;
+  const char *end;
+  const char *eol;
+  const char *ptr;
+  Py_ssize_t lineNo;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|OOOO", g_extractKwlist, &arg, &opointers, &defaultValue, &opreciseFloat, &olines, &ocacheKeys))
+  {
+    return NULL;
+  }
+
+  if (opreciseFloat && PyObject_IsTrue(opreciseFloat))
+  {
+    decoder.preciseFloat = 1;
+  }
+
+  if (ocacheKeys == NULL || PyObject_IsTrue(ocacheKeys))
+  {
+    decoder.prv = &keyCache;
+  }
+
+  if (PyUnicode_Check(opointers) || PyString_Check(opointers))
+  {
+    PyErr_Format(PyExc_TypeError, "pointers must be a sequence of strings, not a single string");
+    return NULL;
+  }
+
+  seq = PySequence_Fast(opointers, "pointers must be a sequence of strings");
+  if (!seq)
+  {
+    return NULL;
+  }
+
+  count = PySequence_Fast_GET_SIZE(seq);
+  views = (Py_buffer *) PyObject_Malloc(sizeof(Py_buffer) * (count + 1));
+  pointers = (JSONPointer *) PyObject_Malloc(sizeof(JSONPointer) * (count + 1));
+  results = (JSOBJ *) PyObject_Malloc(sizeof(JSOBJ) * (count + 1));
+
+  if (!views || !pointers || !results)
+  {
+    PyErr_NoMemory();
+    goto BAIL;
+  }
+
+  for (ready = 0; ready < count; ready ++)
+  {
+    item = PySequence_Fast_GET_ITEM(seq, ready);
+
+    if (!PyUnicode_Check(item) && !PyString_Check(item))
+    {
+      PyErr_Format(PyExc_TypeError, "pointers must be strings, not %s", Py_TYPE(item)->tp_name);
+      goto BAIL;
+    }
+
+    if (!getInputBuffer(item, &views[ready]))
+    {
+      goto BAIL;
+    }
+
+    pointers[ready].start = (const char *) views[ready].buf;
+    pointers[ready].length = views[ready].len;
+  }
+
+  if (!getInputBuffer(arg, &view))
+  {
+    goto BAIL;
+  }
+
+  if (!olines || !PyObject_IsTrue(olines))
+  {
+    list = extractList(&decoder, (const char *) view.buf, view.len, pointers, count, results, defaultValue);
+
+    if (!list && !PyErr_Occurred())
+    {
+      PyErr_Format (PyExc_ValueError, "%s", decoder.errorStr);
+    }
+
+    PyBuffer_Release(&view);
+    goto BAIL;
+  }
+
+  list = PyList_New(0);
+  if (!list)
+  {
+    PyBuffer_Release(&view);
+    goto BAIL;
+  }
+
+  end = (const char *) view.buf + view.len;
+  lineNo = 0;
+
+  for (line = (const char *) view.buf; line < end; line = eol + 1)
+  {
+    lineNo ++;
+
+    eol = (const char *) memchr(line, '\n', end - line);
+    if (!eol)
+    {
+      eol = end;
+    }
+
+    for (ptr = line; ptr < eol && (*ptr == ' ' || *ptr == '\t' || *ptr == '\r'); ptr ++);
+    if (ptr == eol)
+    {
+      // Blank lines are allowed between records
+      continue;
+    }
+
+    obj = extractList(&decoder, line, eol - line, pointers, count, results, defaultValue);
+
+    if (!obj)
+    {
+      if (!PyErr_Occurred())
+      {
+        PyErr_Format (PyExc_ValueError, "line %d: %s", (int) lineNo, decoder.errorStr);
+      }
+      Py_CLEAR(list);
+      break;
+    }
+
+    if (PyList_Append(list, obj))
+    {
+      Py_DECREF(obj);
+      Py_CLEAR(list);
+      break;
+    }
+    Py_DECREF(obj);
+  }
+
+  PyBuffer_Release(&view);
+
+BAIL:
+  for (index = 0; index < ready; index ++)
+  {
+    PyBuffer_Release(&views[index]);
+  }
+
+  KeyCache_clear(&keyCache);
+  PyObject_Free(views);
+  PyObject_Free(pointers);
+  PyObject_Free(results);
+  Py_DECREF(seq);
+  return list;
+}
+
+//=============================================================================
+// Columnar decoding
+// loads_columns decodes an array of objects into one column per key without
+// building the objects. Numbers come unboxed from JSON_DecodeColumns and stay
+// in a C buffer while the column holds nothing else, which then becomes an
+// array.array. Any other value turns the column into a list.
+//=============================================================================
+
+#define COLUMN_LONG 0
+#define COLUMN_DOUBLE 1
+#define COLUMN_LIST 2
+
+// Integers of at most this magnitude convert to doubles exactly
+#define COLUMN_MAX_EXACT_DOUBLE 9007199254740992LL
+
+typedef struct __Column
+{
+  PyObject *name;
+  int kind;
+  size_t count;
+  size_t capacity;
+  JSINT64 *longs;
+  double *doubles;
+  // Marks the doubles that were integers, once a double column has any
+  char *fromLong;
+  PyObject *list;
+} Column;
+
+typedef struct __ColumnsDecoder
+{
+  // First, Object_newKey takes the decoder's prv as its key cache
+  KeyCache keyCache;
+  Column *columns;
+  size_t count;
+  size_t capacity;
+  size_t next;
+  PyObject *positions;
+} ColumnsDecoder;
+
+static PyObject *g_arrayType = NULL;
+
+static int Column_toList(Column *column)
+{
+  PyObject *list;
+  PyObject *item;
+  size_t index;
+
+  list = PyList_New((Py_ssize_t) column->count);
+  if (!list)
+  {
+    return 0;
+  }
+
+  for (index = 0; index < column->count; index ++)
+  {
+    if (column->kind == COLUMN_LONG)
+    {
+      item = PyLong_FromLongLong(column->longs[index]);
+    }
+    else
+    {
+      item = (column->fromLong && column->fromLong[index]) ? PyLong_FromLongLong((JSINT64) column->doubles[index]) : PyFloat_FromDouble(column->doubles[index]);
+    }
+
+    if (!item)
+    {
+      Py_DECREF(list);
+      return 0;
+    }
+    PyList_SET_ITEM(list, (Py_ssize_t) index, item);
+  }
+
+  PyMem_Free(column->longs);
+  PyMem_Free(column->doubles);
+  PyMem_Free(column->fromLong);
+  column->longs = NULL;
+  column->doubles = NULL;
+  column->fromLong = NULL;
+  column->capacity = 0;
+  column->list = list;
+  column->kind = COLUMN_LIST;
+  return 1;
+}
+
+/*
+An integer column getting a double becomes a double column, unless it holds integers doubles can't represent */
+static int Column_toDouble(Column *column)
+{
+  size_t index;
+
+  for (index = 0; index < column->count; index ++)
+  {
+    if (column->longs[index] > COLUMN_MAX_EXACT_DOUBLE || column->longs[index] < -COLUMN_MAX_EXACT_DOUBLE)
+    {
+      return Column_toList(column);
+    }
+  }
+
+  column->doubles = (double *) PyMem_Malloc((column->capacity ? column->capacity : 1) * sizeof(double));
+  column->fromLong = (char *) PyMem_Malloc(column->capacity ? column->capacity : 1);
+  if (!column->doubles || !column->fromLong)
+  {
+    PyMem_Free(column->doubles);
+    PyMem_Free(column->fromLong);
+    column->doubles = NULL;
+    column->fromLong = NULL;
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  for (index = 0; index < column->count; index ++)
+  {
+    column->doubles[index] = (double) column->longs[index];
+  }
+  memset(column->fromLong, 1, column->count);
+
+  PyMem_Free(column->longs);
+  column->longs = NULL;
+  column->kind = COLUMN_DOUBLE;
+  return 1;
+}
+
+static int Column_grow(Column *column)
+{
+  size_t capacity = column->capacity ? column->capacity * 2 : 64;
+  void *data;
+
+  if (capacity > (PY_SSIZE_T_MAX / sizeof(double)))
+  {
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  if (column->kind == COLUMN_LONG)
+  {
+    data = PyMem_Realloc(column->longs, capacity * sizeof(JSINT64));
+    if (data)
+    {
+      column->longs = (JSINT64 *) data;
+    }
+  }
+  else
+  {
+    data = PyMem_Realloc(column->doubles, capacity * sizeof(double));
+    if (data)
+    {
+      column->doubles = (double *) data;
+    }
+
+    if (data && column->fromLong)
+    {
+      data = PyMem_Realloc(column->fromLong, capacity);
+      if (data)
+      {
+        column->fromLong = (char *) data;
+      }
+    }
+  }
+
+  if (!data)
+  {
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  column->capacity = capacity;
+  return 1;
+}
+
+/*
+Appends a value, handed over, or the number in longValue or doubleValue when value is NULL */
+static int Column_append(Column *column, PyObject *value, int type, JSINT64 longValue, double doubleValue)
+{
+  if (!value && column->kind == COLUMN_LONG && type == JT_DOUBLE)
+  {
+    if (!Column_toDouble(column))
+    {
+      return 0;
+    }
+  }
+
+  if (!value && column->kind == COLUMN_DOUBLE && type == JT_LONG)
+  {
+    if (longValue > COLUMN_MAX_EXACT_DOUBLE || longValue < -COLUMN_MAX_EXACT_DOUBLE)
+    {
+      if (!Column_toList(column))
+      {
+        return 0;
+      }
+    }
+    else
+    {
+      if (!column->fromLong)
+      {
+        column->fromLong = (char *) PyMem_Malloc(column->capacity ? column->capacity : 1);
+        if (!column->fromLong)
+        {
+          PyErr_NoMemory();
+          return 0;
+        }
+        memset(column->fromLong, 0, column->capacity ? column->capacity : 1);
+      }
+      doubleValue = (double) longValue;
+    }
+  }
+
+  if (value && column->kind != COLUMN_LIST)
+  {
+    if (!Column_toList(column))
+    {
+      Py_DECREF(value);
+      return 0;
+    }
+  }
+
+  if (column->kind == COLUMN_LIST)
+  {
+    if (!value)
+    {
+      value = (type == JT_LONG) ? PyLong_FromLongLong(longValue) : PyFloat_FromDouble(doubleValue);
+      if (!value)
+      {
+        return 0;
+      }
+    }
+
+    if (PyList_Append(column->list, value))
+    {
+      Py_DECREF(value);
+      return 0;
+    }
+
+    Py_DECREF(value);
+    column->count ++;
+    return 1;
+  }
+
+  if (column->count == column->capacity && !Column_grow(column))
+  {
+    return 0;
+  }
+
+  if (column->kind == COLUMN_LONG)
+  {
+    column->longs[column->count ++] = longValue;
+  }
+  else
+  {
+    if (column->fromLong)
+    {
+      column->fromLong[column->count] = (type == JT_LONG);
+    }
+    column->doubles[column->count ++] = doubleValue;
+  }
+  return 1;
+}
+
+/*
+Fills the rows up to count that had no value for the column with None */
+static int Column_fill(Column *column, size_t count)
+{
+  if (column->count >= count)
+  {
+    return 1;
+  }
+
+  if (column->kind != COLUMN_LIST && !Column_toList(column))
+  {
+    return 0;
+  }
+
+  while (column->count < count)
+  {
+    if (PyList_Append(column->list, Py_None))
+    {
+      return 0;
+    }
+    column->count ++;
+  }
+
+  return 1;
+}
+
+static Column *Columns_lookup(ColumnsDecoder *cd, PyObject *name, PyObject *value, int type)
+{
+  PyObject *position;
+  Column *column;
+  size_t capacity;
+  void *columns;
+
+  // Records usually list their keys in the same order, and cached keys are the same string every time
+  if (cd->next < cd->count && cd->columns[cd->next].name == name)
+  {
+    column = &cd->columns[cd->next];
+    cd->next = (cd->next + 1 < cd->count) ? cd->next + 1 : 0;
+    Py_DECREF(name);
+    return column;
+  }
+
+  position = PyDict_GetItem(cd->positions, name);
+  if (position)
+  {
+    cd->next = (size_t) PyInt_AS_LONG(position);
+    column = &cd->columns[cd->next];
+    cd->next = (cd->next + 1 < cd->count) ? cd->next + 1 : 0;
+    Py_DECREF(name);
+    return column;
+  }
+
+  if (cd->count == cd->capacity)
+  {
+    capacity = cd->capacity ? cd->capacity * 2 : 16;
+    columns = PyMem_Realloc(cd->columns, capacity * sizeof(Column));
+    if (!columns)
+    {
+      Py_DECREF(name);
+      PyErr_NoMemory();
+      return NULL;
+    }
+    cd->columns = (Column *) columns;
+    cd->capacity = capacity;
+  }
+
+  position = PyInt_FromSsize_t((Py_ssize_t) cd->count);
+  if (!position || PyDict_SetItem(cd->positions, name, position))
+  {
+    Py_XDECREF(position);
+    Py_DECREF(name);
+    return NULL;
+  }
+  Py_DECREF(position);
+
+  column = &cd->columns[cd->count ++];
+  column->name = name;
+  column->kind = value ? COLUMN_LIST : (type == JT_DOUBLE) ? COLUMN_DOUBLE : COLUMN_LONG;
+  column->count = 0;
+  column->capacity = 0;
+  column->longs = NULL;
+  column->doubles = NULL;
+  column->fromLong = NULL;
+  column->list = value ? PyList_New(0) : NULL;
+  cd->next = 0;
+
+  if (value && !column->list)
+  {
+    return NULL;
+  }
+
+  return column;
+}
+
+static int Columns_addField(void *prv, size_t index, JSOBJ name, JSOBJ value, int type, JSINT64 longValue, double doubleValue)
+{
+  ColumnsDecoder *cd = (ColumnsDecoder *) prv;
+  Column *column;
+
+  column = Columns_lookup(cd, (PyObject *) name, (PyObject *) value, type);
+  if (!column)
+  {
+    Py_XDECREF( (PyObject *) value);
+    return 0;
+  }
+
+  if (column->count > index)
+  {
+    // A key repeated within an object, the last value is kept
+    column->count --;
+    if (column->kind == COLUMN_LIST && PyList_SetSlice(column->list, (Py_ssize_t) column->count, (Py_ssize_t) column->count + 1, NULL))
+    {
+      Py_XDECREF( (PyObject *) value);
+      return 0;
+    }
+  }
+
+  if (!Column_fill(column, index))
+  {
+    Py_XDECREF( (PyObject *) value);
+    return 0;
+  }
+
+  return Column_append(column, (PyObject *) value, type, longValue, doubleValue);
+}
+
+/*
+Returns the column as a list, an array.array or, given numpy.frombuffer, an ndarray sharing the array's memory */
+static PyObject *Column_toPython(Column *column, PyObject *frombuffer)
+{
+#if PY_VERSION_HEX >= 0x03030000
+  PyObject *array;
+  PyObject *memory;
+  PyObject *result;
+  PyObject *module;
+
+  if (column->kind != COLUMN_LIST)
+  {
+    if (g_arrayType == NULL)
+    {
+      module = PyImport_ImportModule("array");
+      if (module == NULL)
+      {
+        return NULL;
+      }
+      g_arrayType = PyObject_GetAttrString(module, "array");
+      Py_DECREF(module);
+      if (g_arrayType == NULL)
+      {
+        return NULL;
+      }
+    }
+
+    array = PyObject_CallFunction(g_arrayType, "s", (column->kind == COLUMN_LONG) ? "q" : "d");
+    if (!array)
+    {
+      return NULL;
+    }
+
+    memory = PyMemoryView_FromMemory((column->kind == COLUMN_LONG) ? (char *) column->longs : (char *) column->doubles, (Py_ssize_t) (column->count * sizeof(double)), PyBUF_READ);
+    if (!memory)
+    {
+      Py_DECREF(array);
+      return NULL;
+    }
+
+    result = PyObject_CallMethod(array, "frombytes", "O", memory);
+    Py_DECREF(memory);
+    if (!result)
+    {
+      Py_DECREF(array);
+      return NULL;
+    }
+    Py_DECREF(result);
+
+    if (!frombuffer)
+    {
+      return array;
+    }
+
+    result = PyObject_CallFunction(frombuffer, "Os", array, (column->kind == COLUMN_LONG) ? "i8" : "f8");
+    Py_DECREF(array);
+    return result;
+  }
+#endif
+
+  if (column->kind != COLUMN_LIST && !Column_toList(column))
+  {
+    return NULL;
+  }
+
+  Py_INCREF(column->list);
+  return column->list;
+}
+
+static void Columns_clear(ColumnsDecoder *cd)
+{
+  size_t index;
+
+  for (index = 0; index < cd->count; index ++)
+  {
+    Py_DECREF(cd->columns[index].name);
+    Py_XDECREF(cd->columns[index].list);
+    PyMem_Free(cd->columns[index].longs);
+    PyMem_Free(cd->columns[index].doubles);
+    PyMem_Free(cd->columns[index].fromLong);
+  }
+
+  PyMem_Free(cd->columns);
+  Py_XDECREF(cd->positions);
+  KeyCache_clear(&cd->keyCache);
+}
+
+static char *g_columnsKwlist[] = {"obj", "numpy", "precise_float", "cache_keys", NULL};
+
+PyObject* JSONToColumns(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *onumpy = NULL;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *numpy;
+  PyObject *frombuffer = NULL;
+  PyObject *ret = NULL;
+  PyObject *value;
+  ColumnsDecoder cd;
+  JSONObjectDecoder decoder = g_objectDecoder;
+  Py_buffer view;
+  size_t rows;
+  size_t index;
+  int success;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOO", g_columnsKwlist, &arg, &onumpy, &opreciseFloat, &ocacheKeys))
+  {
+    return NULL;
+  }
+
+  if (opreciseFloat && PyObject_IsTrue(opreciseFloat))
+  {
+    decoder.preciseFloat = 1;
+  }
+
+  if (ocacheKeys && !PyObject_IsTrue(ocacheKeys))
+  {
+    decoder.newKey = NULL;
+  }
+
+  if (onumpy && PyObject_IsTrue(onumpy))
+  {
+    numpy = PyImport_ImportModule("numpy");
+    if (!numpy)
+    {
+      return NULL;
+    }
+    frombuffer = PyObject_GetAttrString(numpy, "frombuffer");
+    Py_DECREF(numpy);
+    if (!frombuffer)
+    {
+      return NULL;
+    }
+  }
+
+  cd.keyCache.entries = NULL;
+  cd.columns = NULL;
+  cd.count = 0;
+  cd.capacity = 0;
+  cd.next = 0;
+  cd.positions = PyDict_New();
+  decoder.prv = &cd;
+
+  if (!cd.positions || !getInputBuffer(arg, &view))
+  {
+    goto END;
+  }
+
+  success = JSON_DecodeColumns(&decoder, (const char *) view.buf, view.len, Columns_addField, &rows);
+  PyBuffer_Release(&view);
+
+  if (!success)
+  {
+    if (!PyErr_Occurred())
+    {
+      PyErr_Format (PyExc_ValueError, "%s", decoder.errorStr);
+    }
+    goto END;
+  }
+
+  ret = PyDict_New();
+  if (!ret)
+  {
+    goto END;
+  }
+
+  for (index = 0; index < cd.count; index ++)
+  {
+    if (!Column_fill(&cd.columns[index], rows))
+    {
+      Py_CLEAR(ret);
+      break;
+    }
+
+    value = Column_toPython(&cd.columns[index], frombuffer);
+    if (!value || PyDict_SetItem(ret, cd.columns[index].name, value))
+    {
+      Py_XDECREF(value);
+      Py_CLEAR(ret);
+      break;
+    }
+    Py_DECREF(value);
+  }
+
+END:
+  Columns_clear(&cd);
+  Py_XDECREF(frombuffer);
+  return ret;
+}
+
+//=============================================================================
+// Incremental decoder
+// Input is buffered until JSON_ScanValue reports a complete value, which is then
+// decoded on its own and dropped from the buffer. Memory stays bounded by the
+// largest single value plus the unconsumed tail of the last chunk fed.
+//=============================================================================
+
+typedef struct __DecoderObject
+{
+  PyObject_HEAD
+  char *buffer;
+  size_t size;
+  size_t capacity;
+  int preciseFloat;
+  int closed;
+  JSONStreamScanner scanner;
+  int cacheKeys;
+  KeyCache keyCache;
+} DecoderObject;
+
+static char *g_decoderKwlist[] = {"precise_float", "array_items", "cache_keys", NULL};
+
+static int Decoder_init(DecoderObject *self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *opreciseFloat = NULL;
+  PyObject *oarrayItems = NULL;
+  PyObject *ocacheKeys = NULL;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|OOO", g_decoderKwlist, &opreciseFloat, &oarrayItems, &ocacheKeys))
+  {
+    return -1;
+  }
+
+  PyObject_Free(self->buffer);
+  self->buffer = NULL;
+  self->size = 0;
+  self->capacity = 0;
+  self->closed = 0;
+  self->preciseFloat = (opreciseFloat && PyObject_IsTrue(opreciseFloat)) ? 1 : 0;
+  self->cacheKeys = (ocacheKeys == NULL || PyObject_IsTrue(ocacheKeys)) ? 1 : 0;
+  KeyCache_clear(&self->keyCache);
+  memset(&self->scanner, 0, sizeof(self->scanner));
+  self->scanner.arrayItems = (oarrayItems && PyObject_IsTrue(oarrayItems)) ? 1 : 0;
+  return 0;
+}
+
+static void Decoder_dealloc(DecoderObject *self)
+{
+  KeyCache_clear(&self->keyCache);
+  PyObject_Free(self->buffer);
+  Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static PyObject *Decoder_feed(DecoderObject *self, PyObject *arg)
+{
+  Py_buffer view;
+  size_t discard;
+  size_t cbData;
+
+  if (self->closed)
+  {
+    PyErr_Format(PyExc_ValueError, "Decoder is closed");
+    return NULL;
+  }
+
+  if (!getInputBuffer(arg, &view))
+  {
+    return NULL;
+  }
+
+  cbData = view.len;
+
+  // Drop whatever the scanner is done with before growing the buffer
+  discard = JSON_ScanRebase(&self->scanner);
+  if (discard)
+  {
+    memmove(self->buffer, self->buffer + discard, self->size - discard);
+    self->size -= discard;
+  }
+
+  if (self->size + cbData > self->capacity)
+  {
+    char *buffer;
+    size_t newCapacity = self->capacity ? self->capacity : 4096;
+
+    while (newCapacity < self->size + cbData)
+    {
+      newCapacity *= 2;
+    }
+
+    buffer = (char *) PyObject_Realloc(self->buffer, newCapacity);
+    if (!buffer)
+    {
+      PyBuffer_Release(&view);
+      return PyErr_NoMemory();
+    }
+    self->buffer = buffer;
+    self->capacity = newCapacity;
+  }
+
+  memcpy(self->buffer + self->size, view.buf, cbData);
+  self->size += cbData;
+  PyBuffer_Release(&view);
+
+  Py_RETURN_NONE;
+}
+
+static PyObject *Decoder_close(DecoderObject *self, PyObject *unused)
+{
+  self->closed = 1;
+  Py_RETURN_NONE;
+}
+
+static PyObject *Decoder_iternext(DecoderObject *self)
+{
+  JSONObjectDecoder decoder = g_objectDecoder;
+  PyObject *ret;
+  size_t valueStart;
+  size_t valueEnd;
+  int found;
+
+  found = JSON_ScanValue(&self->scanner, self->buffer, self->size, self->closed, &valueStart, &valueEnd);
+
+  if (found < 0)
+  {
+    PyErr_Format(PyExc_ValueError, "%s", self->scanner.errorStr);
+    return NULL;
+  }
+
+  if (found == 0)
+  {
+    return NULL;
+  }
+
+  decoder.preciseFloat = self->preciseFloat;
+  decoder.prv = self->cacheKeys ? &self->keyCache : NULL;
+
+  ret = JSON_DecodeObject(&decoder, self->buffer + valueStart, valueEnd - valueStart);
+
+  if (decoder.errorStr)
+  {
+    PyErr_Format (PyExc_ValueError, "%s", decoder.errorStr);
+
+    if (ret)
+    {
+      Py_DECREF( (PyObject *) ret);
+    }
+
+    return NULL;
+  }
+
+  return ret;
+}
+
+static PyMethodDef Decoder_methods[] = {
+  {"feed", (PyCFunction) Decoder_feed, METH_O, "Appends a chunk of JSON input, as string, unicode or any object supporting the buffer protocol."},
+  {"close", (PyCFunction) Decoder_close, METH_NOARGS, "Marks the end of input so a trailing value is completed and an incomplete one raises."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+PyTypeObject DecoderType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ultrajson.Decoder",          /* tp_name */
+  sizeof(DecoderObject),        /* tp_basicsize */
+  0,                            /* tp_itemsize */
+  (destructor) Decoder_dealloc, /* tp_dealloc */
+  0,                            /* tp_print */
+  0,                            /* tp_getattr */
+  0,                            /* tp_setattr */
+  0,                            /* tp_compare */
+  0,                            /* tp_repr */
+  0,                            /* tp_as_number */
+  0,                            /* tp_as_sequence */
+  0,                            /* tp_as_mapping */
+  0,                            /* tp_hash */
+  0,                            /* tp_call */
+  0,                            /* tp_str */
+  0,                            /* tp_getattro */
+  0,                            /* tp_setattro */
+  0,                            /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,           /* tp_flags */
+  "Incremental decoder. Feed chunks of input with feed() and iterate to receive each complete top-level value as soon as it is available. "
+  "Set array_items=True to receive the elements of a single top-level array instead.", /* tp_doc */
+  0,                            /* tp_traverse */
+  0,                            /* tp_clear */
+  0,                            /* tp_richcompare */
+  0,                            /* tp_weaklistoffset */
+  PyObject_SelfIter,            /* tp_iter */
+  (iternextfunc) Decoder_iternext, /* tp_iternext */
+  Decoder_methods,              /* tp_methods */
+  0,                            /* tp_members */
+  0,                            /* tp_getset */
+  0,                            /* tp_base */
+  0,                            /* tp_dict */
+  0,                            /* tp_descr_get */
+  0,                            /* tp_descr_set */
+  0,                            /* tp_dictoffset */
+  (initproc) Decoder_init,      /* tp_init */
+  0,                            /* tp_alloc */
+  PyType_GenericNew,            /* tp_new */
+};
+
+//=============================================================================
+// Lazy documents
+// loads_lazy validates the input into a tape, which doubles as an index of it
+// since containers record where their subtree ends. LazyArray and LazyObject
+// proxies refer to a container on the tape and only build Python objects for
+// the children that are accessed, caching them.
+//=============================================================================
+
+typedef struct __LazyDocument
+{
+  JSONTape tape;
+  int cacheKeys;
+  KeyCache keyCache;
+} LazyDocument;
+
+typedef struct __LazyObject
+{
+  PyObject_HEAD
+  PyObject *document; // Capsule owning the LazyDocument
+  LazyDocument *doc;
+  size_t index;
+  Py_ssize_t count;
+  size_t *children; // Tape index of the value of each child, built on first access
+  PyObject **cache; // Child values handed out so far
+  PyObject *keys; // LazyObject only, dict of key to child position
+  PyObject *python; // Whole container as returned by to_python
+} LazyObject;
+
+extern PyTypeObject LazyArrayType;
+extern PyTypeObject LazyObjectType;
+
+static void LazyDocument_destroy(PyObject *document)
+{
+  LazyDocument *doc = (LazyDocument *) PyCapsule_GetPointer(document, NULL);
+
+  JSON_FreeTape(&doc->tape);
+  KeyCache_clear(&doc->keyCache);
+  PyMem_Free(doc);
+}
+
+static void Lazy_initDecoder(LazyDocument *doc, JSONObjectDecoder *decoder)
+{
+  *decoder = g_objectDecoder;
+  decoder->prv = doc->cacheKeys ? &doc->keyCache : NULL;
+}
+
+/*
+Returns a proxy for containers and builds any other value right away */
+static PyObject *Lazy_decodeItem(PyObject *document, LazyDocument *doc, size_t index)
+{
+  JSONTapeItem *item = &doc->tape.items[index];
+  JSONObjectDecoder decoder;
+  LazyObject *lazy;
+
+  if (item->type != JT_ARRAY && item->type != JT_OBJECT)
+  {
+    Lazy_initDecoder(doc, &decoder);
+    return (PyObject *) JSON_DecodeTapeItem(&decoder, &doc->tape, index);
+  }
+
+  lazy = PyObject_New(LazyObject, item->type == JT_ARRAY ? &LazyArrayType : &LazyObjectType);
+  if (!lazy)
+  {
+    return NULL;
+  }
+
+  Py_INCREF(document);
+  lazy->document = document;
+  lazy->doc = doc;
+  lazy->index = index;
+  lazy->count = (Py_ssize_t) item->value.container.count;
+  lazy->children = NULL;
+  lazy->cache = NULL;
+  lazy->keys = NULL;
+  lazy->python = NULL;
+  return (PyObject *) lazy;
+}
+
+static void Lazy_dealloc(LazyObject *self)
+{
+  Py_ssize_t position;
+
+  if (self->cache)
+  {
+    for (position = 0; position < self->count; position ++)
+    {
+      Py_XDECREF(self->cache[position]);
+    }
+  }
+
+  PyMem_Free(self->children);
+  PyMem_Free(self->cache);
+  Py_XDECREF(self->keys);
+  Py_XDECREF(self->python);
+  Py_DECREF(self->document);
+  PyObject_Del(self);
+}
+
+/*
+Locates the children by skipping over the subtrees in between, and for objects builds the keys */
+static int Lazy_index(LazyObject *self)
+{
+  JSONTape *tape = &self->doc->tape;
+  JSONTapeItem *item;
+  PyObject *key;
+  PyObject *position;
+  size_t index = self->index + 1;
+  Py_ssize_t child;
+  int isObject = Py_TYPE(self) == &LazyObjectType;
+
+  if (self->children)
+  {
+    return 1;
+  }
+
+  self->children = (size_t *) PyMem_Malloc((self->count ? self->count : 1) * sizeof(size_t));
+  self->cache = (PyObject **) PyMem_Malloc((self->count ? self->count : 1) * sizeof(PyObject *));
+  if (isObject)
+  {
+    self->keys = PyDict_New();
+  }
+
+  if (!self->children || !self->cache || (isObject && !self->keys))
+  {
+    if (!PyErr_Occurred())
+    {
+      PyErr_NoMemory();
+    }
+    goto ERROR;
+  }
+
+  for (child = 0; child < self->count; child ++)
+  {
+    self->cache[child] = NULL;
+
+    if (isObject)
+    {
+      // With repeated keys the last one wins, as with loads
+      item = &tape->items[index ++];
+      key = (PyObject *) Object_newKey(self->doc->cacheKeys ? &self->doc->keyCache : NULL, tape->chars + item->value.string.offset, tape->chars + item->value.string.offset + item->value.string.length, item->value.string.maxChar);
+      position = key ? PyInt_FromSsize_t(child) : NULL;
+
+      if (!position || PyDict_SetItem(self->keys, key, position) < 0)
+      {
+        Py_XDECREF(key);
+        Py_XDECREF(position);
+        goto ERROR;
+      }
+
+      Py_DECREF(key);
+      Py_DECREF(position);
+    }
+
+    self->children[child] = index;
+    item = &tape->items[index];
+    index = (item->type == JT_ARRAY || item->type == JT_OBJECT) ? item->value.container.end : index + 1;
+  }
+
+  return 1;
+
+ERROR:
+  // Nothing was handed out yet, start over on the next access
+  PyMem_Free(self->children);
+  PyMem_Free(self->cache);
+  Py_CLEAR(self->keys);
+  self->children = NULL;
+  self->cache = NULL;
+  return 0;
+}
+
+static PyObject *Lazy_child(LazyObject *self, Py_ssize_t position)
+{
+  PyObject *value = self->cache[position];
+
+  if (!value)
+  {
+    value = Lazy_decodeItem(self->document, self->doc, self->children[position]);
+    if (!value)
+    {
+      return NULL;
+    }
+    self->cache[position] = value;
+  }
+
+  Py_INCREF(value);
+  return value;
+}
+
+static Py_ssize_t Lazy_length(LazyObject *self)
+{
+  if (Py_TYPE(self) == &LazyObjectType)
+  {
+    // Repeated keys collapse into one
+    if (!Lazy_index(self))
+    {
+      return -1;
+    }
+    return PyDict_Size(self->keys);
+  }
+
+  return self->count;
+}
+
+static PyObject *Lazy_toPython(LazyObject *self, PyObject *unused)
+{
+  JSONObjectDecoder decoder;
+
+  if (!self->python)
+  {
+    Lazy_initDecoder(self->doc, &decoder);
+    self->python = (PyObject *) JSON_DecodeTapeItem(&decoder, &self->doc->tape, self->index);
+    if (!self->python)
+    {
+      return NULL;
+    }
+  }
+
+  Py_INCREF(self->python);
+  return self->python;
+}
+
+static PyObject *LazyArray_item(LazyObject *self, Py_ssize_t position)
+{
+  if (position < 0 || position >= self->count)
+  {
+    PyErr_SetString(PyExc_IndexError, "list index out of range");
+    return NULL;
+  }
+
+  if (!Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  return Lazy_child(self, position);
+}
+
+static PyObject *LazyObject_lookup(LazyObject *self, PyObject *key)
+{
+  PyObject *position;
+
+  if (!Lazy_index(self))
+  {
+    return NULL;
+  }
+
+#if PY_MAJOR_VERSION >= 3
+  position = PyDict_GetItemWithError(self->keys, key);
+#else
+  position = PyDict_GetItem(self->keys, key);
+#endif
+  if (!position)
+  {
+    return NULL;
+  }
+
+  return Lazy_child(self, PyInt_AS_LONG(position));
+}
+
+static PyObject *LazyObject_subscript(LazyObject *self, PyObject *key)
+{
+  PyObject *value = LazyObject_lookup(self, key);
+
+  if (!value && !PyErr_Occurred())
+  {
+    PyErr_SetObject(PyExc_KeyError, key);
+  }
+  return value;
+}
+
+static int LazyObject_contains(LazyObject *self, PyObject *key)
+{
+  if (!Lazy_index(self))
+  {
+    return -1;
+  }
+
+  return PyDict_Contains(self->keys, key);
+}
+
+static PyObject *LazyObject_iter(LazyObject *self)
+{
+  if (!Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  return PyObject_GetIter(self->keys);
+}
+
+static PyObject *LazyObject_get(LazyObject *self, PyObject *args)
+{
+  PyObject *key;
+  PyObject *defaultValue = Py_None;
+  PyObject *value;
+
+  if (!PyArg_ParseTuple(args, "O|O:get", &key, &defaultValue))
+  {
+    return NULL;
+  }
+
+  value = LazyObject_lookup(self, key);
+  if (!value && !PyErr_Occurred())
+  {
+    Py_INCREF(defaultValue);
+    return defaultValue;
+  }
+  return value;
+}
+
+static PyObject *LazyObject_keys(LazyObject *self, PyObject *unused)
+{
+  if (!Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  return PyDict_Keys(self->keys);
+}
+
+/*
+Builds the list of values, or of (key, value) tuples when withKeys is set */
+static PyObject *LazyObject_list(LazyObject *self, int withKeys)
+{
+  PyObject *list;
+  PyObject *key;
+  PyObject *position;
+  PyObject *value;
+  Py_ssize_t pos = 0;
+  Py_ssize_t index = 0;
+
+  if (!Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  list = PyList_New(PyDict_Size(self->keys));
+  if (!list)
+  {
+    return NULL;
+  }
+
+  while (PyDict_Next(self->keys, &pos, &key, &position))
+  {
+    value = Lazy_child(self, PyInt_AS_LONG(position));
+    if (value && withKeys)
+    {
+      PyObject *pair = PyTuple_Pack(2, key, value);
+      Py_DECREF(value);
+      value = pair;
+    }
+
+    if (!value)
+    {
+      Py_DECREF(list);
+      return NULL;
+    }
+
+    PyList_SET_ITEM(list, index ++, value);
+  }
+
+  return list;
+}
+
+static PyObject *LazyObject_values(LazyObject *self, PyObject *unused)
+{
+  return LazyObject_list(self, 0);
+}
+
+static PyObject *LazyObject_items(LazyObject *self, PyObject *unused)
+{
+  return LazyObject_list(self, 1);
+}
+
+static PyObject *Lazy_repr(LazyObject *self)
+{
+  return PyString_FromFormat("<%s with %zd items>", Py_TYPE(self)->tp_name, self->count);
+}
+
+static PySequenceMethods LazyArray_as_sequence = {
+  (lenfunc) Lazy_length,        /* sq_length */
+  0,                            /* sq_concat */
+  0,                            /* sq_repeat */
+  (ssizeargfunc) LazyArray_item, /* sq_item */
+};
+
+static PyMethodDef LazyArray_methods[] = {
+  {"to_python", (PyCFunction) Lazy_toPython, METH_NOARGS, "Builds the whole array as a list, once."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+PyTypeObject LazyArrayType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ultrajson.LazyArray",        /* tp_name */
+  sizeof(LazyObject),           /* tp_basicsize */
+  0,                            /* tp_itemsize */
+  (destructor) Lazy_dealloc,    /* tp_dealloc */
+  0,                            /* tp_print */
+  0,                            /* tp_getattr */
+  0,                            /* tp_setattr */
+  0,                            /* tp_compare */
+  (reprfunc) Lazy_repr,         /* tp_repr */
+  0,                            /* tp_as_number */
+  &LazyArray_as_sequence,       /* tp_as_sequence */
+  0,                            /* tp_as_mapping */
+  0,                            /* tp_hash */
+  0,                            /* tp_call */
+  0,                            /* tp_str */
+  0,                            /* tp_getattro */
+  0,                            /* tp_setattro */
+  0,                            /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,           /* tp_flags */
+  "Array of a document decoded by loads_lazy. Items are built when first accessed, arrays and objects among them as further lazy proxies.", /* tp_doc */
+  0,                            /* tp_traverse */
+  0,                            /* tp_clear */
+  0,                            /* tp_richcompare */
+  0,                            /* tp_weaklistoffset */
+  0,                            /* tp_iter */
+  0,                            /* tp_iternext */
+  LazyArray_methods,            /* tp_methods */
+};
+
+static PySequenceMethods LazyObject_as_sequence = {
+  0,                            /* sq_length */
+  0,                            /* sq_concat */
+  0,                            /* sq_repeat */
+  0,                            /* sq_item */
+  0,                            /* sq_slice */
+  0,                            /* sq_ass_item */
+  0,                            /* sq_ass_slice */
+  (objobjproc) LazyObject_contains, /* sq_contains */
+};
+
+static PyMappingMethods LazyObject_as_mapping = {
+  (lenfunc) Lazy_length,        /* mp_length */
+  (binaryfunc) LazyObject_subscript, /* mp_subscript */
+  0,                            /* mp_ass_subscript */
+};
+
+static PyMethodDef LazyObject_methods[] = {
+  {"get", (PyCFunction) LazyObject_get, METH_VARARGS, "Returns the value for key, or default (None) when there is none."},
+  {"keys", (PyCFunction) LazyObject_keys, METH_NOARGS, "Returns a list of the keys."},
+  {"values", (PyCFunction) LazyObject_values, METH_NOARGS, "Returns a list of the values."},
+  {"items", (PyCFunction) LazyObject_items, METH_NOARGS, "Returns a list of (key, value) tuples."},
+  {"to_python", (PyCFunction) Lazy_toPython, METH_NOARGS, "Builds the whole object as a dict, once."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+PyTypeObject LazyObjectType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ultrajson.LazyObject",       /* tp_name */
+  sizeof(LazyObject),           /* tp_basicsize */
+  0,                            /* tp_itemsize */
+  (destructor) Lazy_dealloc,    /* tp_dealloc */
+  0,                            /* tp_print */
+  0,                            /* tp_getattr */
+  0,                            /* tp_setattr */
+  0,                            /* tp_compare */
+  (reprfunc) Lazy_repr,         /* tp_repr */
+  0,                            /* tp_as_number */
+  &LazyObject_as_sequence,      /* tp_as_sequence */
+  &LazyObject_as_mapping,       /* tp_as_mapping */
+  0,                            /* tp_hash */
+  0,                            /* tp_call */
+  0,                            /* tp_str */
+  0,                            /* tp_getattro */
+  0,                            /* tp_setattro */
+  0,                            /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,           /* tp_flags */
+  "Object of a document decoded by loads_lazy. Values are built when first accessed, arrays and objects among them as further lazy proxies.", /* tp_doc */
+  0,                            /* tp_traverse */
+  0,                            /* tp_clear */
+  0,                            /* tp_richcompare */
+  0,                            /* tp_weaklistoffset */
+  (getiterfunc) LazyObject_iter, /* tp_iter */
+  0,                            /* tp_iternext */
+  LazyObject_methods,           /* tp_methods */
+};
+
+static char *g_lazyKwlist[] = {"obj", "precise_float", "cache_keys", NULL};
+
+PyObject* JSONToLazy(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *document;
+  PyObject *ret;
+  Py_buffer view;
+  LazyDocument *doc;
+  JSONObjectDecoder decoder = g_objectDecoder;
+  const char *buffer;
+  size_t cbBuffer;
+  int success;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OO", g_lazyKwlist, &arg, &opreciseFloat, &ocacheKeys))
+  {
+    return NULL;
+  }
+
+  if (opreciseFloat && PyObject_IsTrue(opreciseFloat))
+  {
+    decoder.preciseFloat = 1;
+  }
+
+  doc = (LazyDocument *) PyMem_Malloc(sizeof(LazyDocument));
+  if (!doc)
+  {
+    return PyErr_NoMemory();
+  }
+  doc->cacheKeys = (ocacheKeys == NULL || PyObject_IsTrue(ocacheKeys)) ? 1 : 0;
+  doc->keyCache.entries = NULL;
+
+  if (!getInputBuffer(arg, &view))
+  {
+    PyMem_Free(doc);
+    return NULL;
+  }
+
+  buffer = (const char *) view.buf;
+  cbBuffer = view.len;
+
+  Py_BEGIN_ALLOW_THREADS
+  success = JSON_DecodeObjectToTape(&decoder, &doc->tape, buffer, cbBuffer);
+  Py_END_ALLOW_THREADS
+
+  PyBuffer_Release(&view);
+
+  if (!success)
+  {
+    PyErr_Format (PyExc_ValueError, "%s", decoder.errorStr);
+    JSON_FreeTape(&doc->tape);
+    PyMem_Free(doc);
+    return NULL;
+  }
+
+  document = PyCapsule_New(doc, NULL, LazyDocument_destroy);
+  if (!document)
+  {
+    JSON_FreeTape(&doc->tape);
+    PyMem_Free(doc);
+    return NULL;
+  }
+
+  ret = Lazy_decodeItem(document, doc, 0);
+  Py_DECREF(document);
+  return ret;
+}
@@ -38,14 +38,101 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 
 #include "py_defines.h"
 #include <stdio.h>
+#include <errno.h>
+#ifdef _WIN32
+#include <io.h>
+#else
+#include <unistd.h>
+#endif
 #include <datetime.h>
 #include <ultrajson.h>
 
 #define EPOCH_ORD 719163
 static PyObject* type_decimal = NULL;
 
+/*
+Handlers registered with ultrajson.register, keyed by the exact type they encode. The dict owns the
+references, g_typeHandlers mirrors it as an open addressing table of type pointers so the lookup every
+object goes through is a few pointer compares. It's rebuilt whenever the dict changes */
+static PyObject* g_typeRegistry = NULL;
+
+typedef struct __TypeHandler
+{
+  PyTypeObject *type;
+  PyObject *handler;
+} TypeHandler;
+
+static TypeHandler *g_typeHandlers = NULL;
+static size_t g_typeHandlersMask = 0;
+
+#define TYPE_HANDLER_SLOT(__type) (((size_t) (__type) >> 4) & g_typeHandlersMask)
+
+/*
+Instances of plain classes are encoded by their public attributes that aren't methods, as listed by dir().
+Running dir() and a getattr per name on every instance is slow, so a plan listing those attributes in dir()
+order, and where each value comes from, is computed once per class and cached. Plans hold for one version
+of the class, the interpreter changes tp_version_tag whenever the class or one of its bases is modified,
+and for one set of instance dict keys, compared by identity in insertion order */
+#define PLAN_INSTANCE 0   // Read from the instance dict
+#define PLAN_CONSTANT 1   // Class attribute the instance doesn't shadow
+#define PLAN_ATTRIBUTE 2  // Anything else, looked up with getattr on each instance
+
+#define CLASS_PLAN_CACHE_SIZE 256
+#define CLASS_PLAN_SLOT(__type) (((size_t) (__type) >> 4) & (CLASS_PLAN_CACHE_SIZE - 1))
+
+typedef struct __ClassPlanField
+{
+  PyObject *name;
+  PyObject *utf8Name;
+  PyObject *value;
+  int kind;
+} ClassPlanField;
+
+typedef struct __ClassPlan
+{
+  Py_ssize_t refs;
+  PyTypeObject *type; // Not owned, only compared along with the version tag
+  unsigned int versionTag;
+  int usable; // 0 when instances need toDict, iteration or a custom __dir__ instead
+  Py_ssize_t cKeys;
+  PyObject **keys;
+  Py_ssize_t cFields;
+  ClassPlanField *fields;
+} ClassPlan;
+
+static ClassPlan *g_classPlans[CLASS_PLAN_CACHE_SIZE];
+static PyObject *g_dirName = NULL;
+static PyObject *g_toDictName = NULL;
+
+/*
+With sort_keys, dicts whose keys are all str are sorted in C as an array of (key, value) pairs, by code point
+like Python compares them. Lists of records tend to repeat one set of keys in one insertion order, often as the
+very same objects when they're interned or came out of the decoder's key cache, so the sorted order of such a
+set is cached and reused for dicts with the same keys, compared by identity in insertion order */
+#define KEY_ORDER_CACHE_SIZE 64
+#define KEY_ORDER_MAX_KEYS 64
+#define KEY_ORDER_SLOT(__key, __count) ((((size_t) (__key) >> 4) ^ (size_t) (__count)) & (KEY_ORDER_CACHE_SIZE - 1))
+
+typedef struct __SortedItem
+{
+  PyObject *key;
+  PyObject *value;
+} SortedItem;
+
+typedef struct __KeyOrder
+{
+  Py_ssize_t cKeys;
+  int utf16Order;
+  PyObject **keys;    // Insertion order
+  Py_ssize_t *order;  // Insertion order index of each key in sorted order
+} KeyOrder;
+
+static KeyOrder *g_keyOrders[KEY_ORDER_CACHE_SIZE];
+
 typedef void *(*PFN_PyTypeToJSON)(JSOBJ obj, JSONTypeContext *ti, void *outValue, size_t *_outLen);
 
+void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName, int nameKind);
+
 #if (PY_VERSION_HEX < 0x02050000)
 typedef ssize_t Py_ssize_t;
 #endif
@@ -65,6 +152,8 @@ typedef struct __TypeContext
   PyObject *itemName;
   PyObject *attrList;
   PyObject *iterator;
+  struct __ClassPlan *plan;
+  struct __SortedItem *items;
 
   union
   {
@@ -75,6 +164,9 @@ typedef struct __TypeContext
 
 #define GET_TC(__ptrtc) ((TypeContext *)((__ptrtc)->prv))
 
+// TypeContext is kept in the storage of JSONTypeContext, this fails to compile if it outgrows it
+typedef char TypeContext_fits_storage[sizeof(TypeContext) <= sizeof(((JSONTypeContext *) 0)->storage) ? 1 : -1];
+
 struct PyDictIterState
 {
   PyObject *keys;
@@ -97,6 +189,10 @@ void initObjToJSON(void)
   else
     PyErr_Clear();
 
+  g_typeRegistry = PyDict_New();
+  g_dirName = PyString_InternFromString("__dir__");
+  g_toDictName = PyString_InternFromString("toDict");
+
   PyDateTime_IMPORT;
 }
 
@@ -142,17 +238,88 @@ static void *PyStringToUTF8(JSOBJ _obj, JSONTypeContext *tc, void *outValue, siz
   return PyString_AS_STRING(obj);
 }
 
+#if (PY_VERSION_HEX >= 0x03030000)
+/*
+Returns 1 when the encoder can read the characters of a str as they are stored. Strings holding
+surrogates can't be encoded, they are left to PyUnicode_AsUTF8String to raise the error */
+static int unicodeIsEncodable(PyObject *obj)
+{
+  Py_ssize_t index;
+  Py_ssize_t length;
+
+#if (PY_VERSION_HEX < 0x030C0000)
+  if (PyUnicode_READY(obj))
+  {
+    return 0;
+  }
+#endif
+
+  length = PyUnicode_GET_LENGTH(obj);
+
+  switch (PyUnicode_KIND(obj))
+  {
+    case PyUnicode_1BYTE_KIND:
+      return 1;
+
+    case PyUnicode_2BYTE_KIND:
+    {
+      const Py_UCS2 *units = PyUnicode_2BYTE_DATA(obj);
+      for (index = 0; index < length; index ++)
+      {
+        if ((units[index] & 0xf800) == 0xd800)
+        {
+          return 0;
+        }
+      }
+      return 1;
+    }
+
+    default:
+    {
+      const Py_UCS4 *units = PyUnicode_4BYTE_DATA(obj);
+      for (index = 0; index < length; index ++)
+      {
+        if ((units[index] & 0xfffff800) == 0xd800)
+        {
+          return 0;
+        }
+      }
+      return 1;
+    }
+  }
+}
+
+/*
+Hands the characters of an encodable str to the encoder without converting them: ASCII strings as their
+bytes, all others as code units of their PEP 393 kind */
+static const char *unicodeToJSON(PyObject *obj, int *kind, size_t *outLen)
+{
+  *outLen = PyUnicode_GET_LENGTH(obj);
+
+  if (PyUnicode_IS_COMPACT_ASCII(obj))
+  {
+    return (const char *) PyUnicode_DATA(obj);
+  }
+
+  switch (PyUnicode_KIND(obj))
+  {
+    case PyUnicode_1BYTE_KIND: *kind = JS_UCS1; break;
+    case PyUnicode_2BYTE_KIND: *kind = JS_UCS2; break;
+    default: *kind = JS_UCS4; break;
+  }
+
+  return (const char *) PyUnicode_DATA(obj);
+}
+#endif
+
 static void *PyUnicodeToUTF8(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
 {
   PyObject *obj = (PyObject *) _obj;
   PyObject *newObj;
 #if (PY_VERSION_HEX >= 0x03030000)
-  if(PyUnicode_IS_COMPACT_ASCII(obj))
+  if (unicodeIsEncodable(obj))
   {
-    Py_ssize_t len;
-    char *data = PyUnicode_AsUTF8AndSize(obj, &len);
-    *_outLen = len;
-    return data;
+    return (void *) unicodeToJSON(obj, &tc->stringKind, _outLen);
   }
 #endif
   newObj = PyUnicode_AsUTF8String(obj);
@@ -397,714 +564,2321 @@ char *Dir_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
   return PyString_AS_STRING(GET_TC(tc)->itemName);
 }
 
-int List_iterNext(JSOBJ obj, JSONTypeContext *tc)
+static void ClassPlan_release(ClassPlan *plan)
 {
-  if (GET_TC(tc)->index >= GET_TC(tc)->size)
+  Py_ssize_t index;
+
+  if (--plan->refs > 0)
   {
-    PRINTMARK();
-    return 0;
+    return;
   }
 
-  GET_TC(tc)->itemValue = PyList_GET_ITEM (obj, GET_TC(tc)->index);
-  GET_TC(tc)->index ++;
-  return 1;
-}
-
-void List_iterEnd(JSOBJ obj, JSONTypeContext *tc)
-{
-}
+  for (index = 0; index < plan->cKeys; index ++)
+  {
+    Py_DECREF(plan->keys[index]);
+  }
 
-JSOBJ List_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  return GET_TC(tc)->itemValue;
-}
+  for (index = 0; index < plan->cFields; index ++)
+  {
+    Py_DECREF(plan->fields[index].name);
+    Py_DECREF(plan->fields[index].utf8Name);
+    Py_XDECREF(plan->fields[index].value);
+  }
 
-char *List_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
-{
-  return NULL;
+  PyMem_Free(plan->keys);
+  PyMem_Free(plan->fields);
+  PyMem_Free(plan);
 }
 
-//=============================================================================
-// Dict iteration functions
-// itemName might converted to string (Python_Str). Do refCounting
-// itemValue is borrowed from object (which is dict). No refCounting
-//=============================================================================
-
-int Dict_iterNext(JSOBJ obj, JSONTypeContext *tc)
+static ClassPlan *ClassPlan_build(PyObject *obj, PyObject *dict)
 {
-#if PY_MAJOR_VERSION >= 3
-  PyObject* itemNameTmp;
-#endif
+  PyTypeObject *type = Py_TYPE(obj);
+  PyObject *attrList = NULL;
+  PyObject *name, *utf8Name, *classAttr, *key, *value;
+  ClassPlanField *field;
+  ClassPlan *plan;
+  Py_ssize_t pos = 0;
+  Py_ssize_t index, count;
+
+  plan = (ClassPlan *) PyMem_Malloc(sizeof(ClassPlan));
+  if (!plan)
+  {
+    PyErr_NoMemory();
+    return NULL;
+  }
+  memset(plan, 0, sizeof(ClassPlan));
+  plan->refs = 1;
+  plan->type = type;
 
-  if (GET_TC(tc)->itemName)
+  count = dict ? PyDict_Size(dict) : 0;
+  plan->keys = (PyObject **) PyMem_Malloc((count ? count : 1) * sizeof(PyObject *));
+  if (!plan->keys)
   {
-    Py_DECREF(GET_TC(tc)->itemName);
-    GET_TC(tc)->itemName = NULL;
+    PyErr_NoMemory();
+    goto ERROR;
   }
 
+  while (dict && plan->cKeys < count && PyDict_Next(dict, &pos, &key, &value))
+  {
+    Py_INCREF(key);
+    plan->keys[plan->cKeys ++] = key;
+  }
 
-  if (!PyDict_Next ( (PyObject *)GET_TC(tc)->dictObj, &GET_TC(tc)->index, &GET_TC(tc)->itemName, &GET_TC(tc)->itemValue))
+  // Leave instances that don't end up in the dir() fallback to the generic path
+  if (_PyType_Lookup(type, g_dirName) != _PyType_Lookup(&PyBaseObject_Type, g_dirName) ||
+      _PyType_Lookup(type, g_toDictName) || (dict && PyDict_GetItem(dict, g_toDictName)) ||
+      type->tp_iter || PySequence_Check(obj))
   {
     PRINTMARK();
-    return 0;
+    goto DONE;
   }
 
-  if (PyUnicode_Check(GET_TC(tc)->itemName))
+  attrList = PyObject_Dir(obj);
+  if (!attrList)
   {
-    GET_TC(tc)->itemName = PyUnicode_AsUTF8String (GET_TC(tc)->itemName);
+    goto ERROR;
   }
-  else
-    if (!PyString_Check(GET_TC(tc)->itemName))
-    {
-      GET_TC(tc)->itemName = PyObject_Str(GET_TC(tc)->itemName);
+
+  count = PyList_GET_SIZE(attrList);
+  plan->fields = (ClassPlanField *) PyMem_Malloc((count ? count : 1) * sizeof(ClassPlanField));
+  if (!plan->fields)
+  {
+    PyErr_NoMemory();
+    goto ERROR;
+  }
+
+  for (index = 0; index < count; index ++)
+  {
+    name = PyList_GET_ITEM(attrList, index);
 #if PY_MAJOR_VERSION >= 3
-      itemNameTmp = GET_TC(tc)->itemName;
-      GET_TC(tc)->itemName = PyUnicode_AsUTF8String (GET_TC(tc)->itemName);
-      Py_DECREF(itemNameTmp);
+    utf8Name = PyUnicode_AsUTF8String(name);
+    if (!utf8Name)
+    {
+      goto ERROR;
+    }
+#else
+    utf8Name = name;
+    Py_INCREF(utf8Name);
 #endif
+
+    if (PyString_AS_STRING(utf8Name)[0] == '_')
+    {
+      Py_DECREF(utf8Name);
+      continue;
+    }
+
+    // Same precedence as getattr: data descriptors on the class, then the instance dict, then the class
+    classAttr = _PyType_Lookup(type, name);
+    field = &plan->fields[plan->cFields];
+    field->value = NULL;
+
+    if (classAttr && Py_TYPE(classAttr)->tp_descr_set)
+    {
+      field->kind = PLAN_ATTRIBUTE;
     }
     else
+    if (dict && PyDict_GetItem(dict, name))
     {
-      Py_INCREF(GET_TC(tc)->itemName);
+      field->kind = PLAN_INSTANCE;
+    }
+    else
+    if (classAttr && (PyFunction_Check(classAttr) || Py_TYPE(classAttr) == &PyMethodDescr_Type ||
+        Py_TYPE(classAttr) == &PyClassMethod_Type || (!Py_TYPE(classAttr)->tp_descr_get && PyCallable_Check(classAttr))))
+    {
+      // Methods and other callables are never encoded
+      Py_DECREF(utf8Name);
+      continue;
+    }
+    else
+    if (classAttr && !Py_TYPE(classAttr)->tp_descr_get)
+    {
+      field->kind = PLAN_CONSTANT;
+      field->value = classAttr;
+      Py_INCREF(classAttr);
+    }
+    else
+    {
+      field->kind = PLAN_ATTRIBUTE;
     }
-    PRINTMARK();
-    return 1;
-}
 
-void Dict_iterEnd(JSOBJ obj, JSONTypeContext *tc)
-{
-  if (GET_TC(tc)->itemName)
-  {
-    Py_DECREF(GET_TC(tc)->itemName);
-    GET_TC(tc)->itemName = NULL;
+    field->name = name;
+    Py_INCREF(name);
+    field->utf8Name = utf8Name;
+    plan->cFields ++;
   }
-  Py_DECREF(GET_TC(tc)->dictObj);
-  PRINTMARK();
-}
 
-JSOBJ Dict_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  return GET_TC(tc)->itemValue;
-}
+  Py_DECREF(attrList);
+  plan->usable = 1;
 
-char *Dict_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
-{
-  *outLen = PyString_GET_SIZE(GET_TC(tc)->itemName);
-  return PyString_AS_STRING(GET_TC(tc)->itemName);
+DONE:
+  // Read last, the lookups above assign the class a version tag if it has none
+  plan->versionTag = type->tp_version_tag;
+  return plan;
+
+ERROR:
+  Py_XDECREF(attrList);
+  ClassPlan_release(plan);
+  return NULL;
 }
 
-int SortedDict_iterNext(JSOBJ obj, JSONTypeContext *tc)
+/*
+Returns the plan to encode obj with and a new reference to its instance dict, or NULL when it has to go
+through the generic fallbacks */
+static ClassPlan *ClassPlan_get(PyObject *obj, PyObject **pdict)
 {
-  PyObject *items = NULL, *item = NULL, *key = NULL, *value = NULL;
-  Py_ssize_t i, nitems;
-#if PY_MAJOR_VERSION >= 3
-  PyObject* keyTmp;
-#endif
+  PyTypeObject *type = Py_TYPE(obj);
+  PyObject **dictPtr;
+  PyObject *dict = NULL;
+  PyObject *key, *value;
+  ClassPlan *plan, *oldPlan;
+  Py_ssize_t pos = 0;
+  Py_ssize_t index;
 
-  // Upon first call, obtain a list of the keys and sort them. This follows the same logic as the
-  // stanard library's _json.c sort_keys handler.
-  if (GET_TC(tc)->newObj == NULL)
+  if (type->tp_getattro != PyObject_GenericGetAttr)
   {
-    // Obtain the list of keys from the dictionary.
-    items = PyMapping_Keys(GET_TC(tc)->dictObj);
-    if (items == NULL)
-    {
-      goto error;
-    }
-    else if (!PyList_Check(items))
-    {
-      PyErr_SetString(PyExc_ValueError, "keys must return list");
-      goto error;
-    }
+    return NULL;
+  }
 
-    // Sort the list.
-    if (PyList_Sort(items) < 0)
+  dictPtr = _PyObject_GetDictPtr(obj);
+  if (dictPtr && *dictPtr)
+  {
+    dict = *dictPtr;
+    if (!PyDict_Check(dict))
     {
-      goto error;
+      return NULL;
     }
+  }
 
-    // Obtain the value for each key, and pack a list of (key, value) 2-tuples.
-    nitems = PyList_GET_SIZE(items);
-    for (i = 0; i < nitems; i++)
+  plan = g_classPlans[CLASS_PLAN_SLOT(type)];
+  if (plan && plan->type == type && PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG) &&
+      plan->versionTag == type->tp_version_tag && plan->cKeys == (dict ? PyDict_Size(dict) : 0))
+  {
+    for (index = 0; dict && PyDict_Next(dict, &pos, &key, &value); index ++)
     {
-      key = PyList_GET_ITEM(items, i);
-      value = PyDict_GetItem(GET_TC(tc)->dictObj, key);
-
-      // Subject the key to the same type restrictions and conversions as in Dict_iterGetValue.
-      if (PyUnicode_Check(key))
-      {
-        key = PyUnicode_AsUTF8String(key);
-      }
-      else if (!PyString_Check(key))
-      {
-        key = PyObject_Str(key);
-#if PY_MAJOR_VERSION >= 3
-        keyTmp = key;
-        key = PyUnicode_AsUTF8String(key);
-        Py_DECREF(keyTmp);
-#endif
-      }
-      else
-      {
-        Py_INCREF(key);
-      }
-
-      item = PyTuple_Pack(2, key, value);
-      if (item == NULL)
+      if (key != plan->keys[index])
       {
-        goto error;
+        plan = NULL;
+        break;
       }
-      PyList_SET_ITEM(items, i, item);
-      Py_DECREF(key);
     }
 
-    // Store the sorted list of tuples in the newObj slot.
-    GET_TC(tc)->newObj = items;
-    GET_TC(tc)->size = nitems;
+    if (plan)
+    {
+      PRINTMARK();
+      plan->refs ++;
+      goto FOUND;
+    }
   }
 
-  if (GET_TC(tc)->index >= GET_TC(tc)->size)
+  plan = ClassPlan_build(obj, dict);
+  if (!plan)
   {
-    PRINTMARK();
-    return 0;
+    PyErr_Clear();
+    return NULL;
   }
 
-  item = PyList_GET_ITEM(GET_TC(tc)->newObj, GET_TC(tc)->index);
-  GET_TC(tc)->itemName = PyTuple_GET_ITEM(item, 0);
-  GET_TC(tc)->itemValue = PyTuple_GET_ITEM(item, 1);
-  GET_TC(tc)->index++;
-  return 1;
+  if (PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG))
+  {
+    oldPlan = g_classPlans[CLASS_PLAN_SLOT(type)];
+    g_classPlans[CLASS_PLAN_SLOT(type)] = plan;
+    plan->refs ++;
 
-error:
-  Py_XDECREF(item);
-  Py_XDECREF(key);
-  Py_XDECREF(value);
-  Py_XDECREF(items);
-  return -1;
-}
+    if (oldPlan)
+    {
+      ClassPlan_release(oldPlan);
+    }
+  }
 
-void SortedDict_iterEnd(JSOBJ obj, JSONTypeContext *tc)
-{
-  GET_TC(tc)->itemName = NULL;
-  GET_TC(tc)->itemValue = NULL;
-  Py_DECREF(GET_TC(tc)->newObj);
-  Py_DECREF(GET_TC(tc)->dictObj);
-  PRINTMARK();
-}
+FOUND:
+  if (!plan->usable)
+  {
+    ClassPlan_release(plan);
+    return NULL;
+  }
 
-JSOBJ SortedDict_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  return GET_TC(tc)->itemValue;
+  Py_XINCREF(dict);
+  *pdict = dict;
+  return plan;
 }
 
-char *SortedDict_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+int ClassPlan_iterNext(JSOBJ _obj, JSONTypeContext *tc)
 {
-  *outLen = PyString_GET_SIZE(GET_TC(tc)->itemName);
-  return PyString_AS_STRING(GET_TC(tc)->itemName);
-}
+  PyObject *obj = (PyObject *) _obj;
+  ClassPlan *plan = GET_TC(tc)->plan;
+  ClassPlanField *field;
+  PyObject *itemValue;
 
+  if (GET_TC(tc)->itemValue)
+  {
+    Py_DECREF(GET_TC(tc)->itemValue);
+    GET_TC(tc)->itemValue = NULL;
+  }
 
-void SetupDictIter(PyObject *dictObj, TypeContext *pc, JSONObjectEncoder *enc)
-{
+  for (; GET_TC(tc)->index < plan->cFields; GET_TC(tc)->index ++)
+  {
+    field = &plan->fields[GET_TC(tc)->index];
+
+    switch (field->kind)
+    {
+      case PLAN_INSTANCE:
+        // Encoding earlier values runs arbitrary code, which could have removed it since
+        itemValue = PyDict_GetItem(GET_TC(tc)->dictObj, field->name);
+        Py_XINCREF(itemValue);
+        break;
+
+      case PLAN_CONSTANT:
+        itemValue = field->value;
+        Py_INCREF(itemValue);
+        break;
+
+      default:
+        itemValue = PyObject_GetAttr(obj, field->name);
+        if (itemValue == NULL)
+        {
+          PyErr_Clear();
+        }
+        break;
+    }
+
+    if (itemValue == NULL)
+    {
+      PRINTMARK();
+      continue;
+    }
+
+    if (field->kind != PLAN_CONSTANT && PyCallable_Check(itemValue))
+    {
+      PRINTMARK();
+      Py_DECREF(itemValue);
+      continue;
+    }
+
+    GET_TC(tc)->itemValue = itemValue;
+    GET_TC(tc)->itemName = field->utf8Name;
+    GET_TC(tc)->index ++;
+    return 1;
+  }
+
+  PRINTMARK();
+  return 0;
+}
+
+void ClassPlan_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+{
+  if (GET_TC(tc)->itemValue)
+  {
+    Py_DECREF(GET_TC(tc)->itemValue);
+    GET_TC(tc)->itemValue = NULL;
+  }
+
+  GET_TC(tc)->itemName = NULL;
+  Py_XDECREF(GET_TC(tc)->dictObj);
+  ClassPlan_release(GET_TC(tc)->plan);
+  PRINTMARK();
+}
+
+JSOBJ ClassPlan_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->itemValue;
+}
+
+char *ClassPlan_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+{
+  *outLen = PyString_GET_SIZE(GET_TC(tc)->itemName);
+  return PyString_AS_STRING(GET_TC(tc)->itemName);
+}
+
+int List_iterNext(JSOBJ obj, JSONTypeContext *tc)
+{
+  if (GET_TC(tc)->index >= GET_TC(tc)->size)
+  {
+    PRINTMARK();
+    return 0;
+  }
+
+  GET_TC(tc)->itemValue = PyList_GET_ITEM (obj, GET_TC(tc)->index);
+  GET_TC(tc)->index ++;
+  return 1;
+}
+
+void List_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+{
+}
+
+JSOBJ List_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->itemValue;
+}
+
+char *List_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+{
+  return NULL;
+}
+
+//=============================================================================
+// Dict iteration functions
+// itemName might converted to string (Python_Str). Do refCounting
+// itemValue is borrowed from object (which is dict). No refCounting
+//=============================================================================
+
+/*
+Turns a dict key into the name handed to the encoder, a str the encoder reads as it is stored or else
+bytes of UTF-8. Returns a new reference, NULL with an exception set on failure */
+static PyObject *dictKeyToName(PyObject *key)
+{
+  PyObject *name;
+
+  if (PyString_Check(key))
+  {
+    Py_INCREF(key);
+    return key;
+  }
+
+  if (PyUnicode_Check(key))
+  {
+    Py_INCREF(key);
+    name = key;
+  }
+  else
+  {
+    name = PyObject_Str(key);
+    if (!name || !PyUnicode_Check(name))
+    {
+      return name;
+    }
+  }
+
+#if (PY_VERSION_HEX >= 0x03030000)
+  if (unicodeIsEncodable(name))
+  {
+    return name;
+  }
+#endif
+
+  key = PyUnicode_AsUTF8String(name);
+  Py_DECREF(name);
+  return key;
+}
+
+static char *dictNameToJSON(PyObject *name, JSONTypeContext *tc, size_t *outLen)
+{
+#if (PY_VERSION_HEX >= 0x03030000)
+  if (PyUnicode_Check(name))
+  {
+    return (char *) unicodeToJSON(name, &tc->nameKind, outLen);
+  }
+#endif
+  *outLen = PyString_GET_SIZE(name);
+  return PyString_AS_STRING(name);
+}
+
+int Dict_iterNext(JSOBJ obj, JSONTypeContext *tc)
+{
+  if (GET_TC(tc)->itemName)
+  {
+    Py_DECREF(GET_TC(tc)->itemName);
+    GET_TC(tc)->itemName = NULL;
+  }
+
+
+  if (!PyDict_Next ( (PyObject *)GET_TC(tc)->dictObj, &GET_TC(tc)->index, &GET_TC(tc)->itemName, &GET_TC(tc)->itemValue))
+  {
+    PRINTMARK();
+    return 0;
+  }
+
+  GET_TC(tc)->itemName = dictKeyToName(GET_TC(tc)->itemName);
+  if (!GET_TC(tc)->itemName)
+  {
+    return 0;
+  }
+
+  PRINTMARK();
+  return 1;
+}
+
+void Dict_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+{
+  if (GET_TC(tc)->itemName)
+  {
+    Py_DECREF(GET_TC(tc)->itemName);
+    GET_TC(tc)->itemName = NULL;
+  }
+  Py_DECREF(GET_TC(tc)->dictObj);
+  PRINTMARK();
+}
+
+JSOBJ Dict_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->itemValue;
+}
+
+char *Dict_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+{
+  return dictNameToJSON(GET_TC(tc)->itemName, tc, outLen);
+}
+
+#if (PY_VERSION_HEX >= 0x03030000)
+/*
+Compares keys by code point, or with utf16Order by UTF-16 code unit as RFC 8785 asks. The orders only differ
+in that U+E000 to U+FFFF go after the surrogate pairs encoding everything above */
+static INLINE_PREFIX int compareKeys(PyObject *left, PyObject *right, int utf16Order)
+{
+  Py_ssize_t leftLength = PyUnicode_GET_LENGTH(left);
+  Py_ssize_t rightLength = PyUnicode_GET_LENGTH(right);
+  Py_ssize_t length = leftLength < rightLength ? leftLength : rightLength;
+  int leftKind = PyUnicode_KIND(left);
+  int rightKind = PyUnicode_KIND(right);
+  void *leftData = PyUnicode_DATA(left);
+  void *rightData = PyUnicode_DATA(right);
+  Py_UCS4 leftChar, rightChar;
+  Py_ssize_t index;
+  int result;
+
+  if (leftKind == PyUnicode_1BYTE_KIND && rightKind == PyUnicode_1BYTE_KIND)
+  {
+    // Latin-1 bytes compare in code point order
+    result = memcmp(leftData, rightData, (size_t) length);
+    if (result)
+    {
+      return result;
+    }
+  }
+  else
+  {
+    for (index = 0; index < length; index ++)
+    {
+      leftChar = PyUnicode_READ(leftKind, leftData, index);
+      rightChar = PyUnicode_READ(rightKind, rightData, index);
+      if (leftChar != rightChar)
+      {
+        if (utf16Order)
+        {
+          leftChar += (leftChar >= 0xe000 && leftChar <= 0xffff) ? 0x110000 : 0;
+          rightChar += (rightChar >= 0xe000 && rightChar <= 0xffff) ? 0x110000 : 0;
+        }
+        return leftChar < rightChar ? -1 : 1;
+      }
+    }
+  }
+
+  return leftLength < rightLength ? -1 : (leftLength > rightLength ? 1 : 0);
+}
+
+static int SortedItem_compare(const void *left, const void *right)
+{
+  return compareKeys((*(const SortedItem **) left)->key, (*(const SortedItem **) right)->key, 0);
+}
+
+static int SortedItem_compareUTF16(const void *left, const void *right)
+{
+  int result = compareKeys((*(const SortedItem **) left)->key, (*(const SortedItem **) right)->key, 1);
+
+  // Different keys can share a name, such as 1 and "1", keep them in insertion order
+  if (result == 0)
+  {
+    result = *(const SortedItem **) left < *(const SortedItem **) right ? -1 : 1;
+  }
+  return result;
+}
+
+static void KeyOrder_store(SortedItem *items, SortedItem **sorted, Py_ssize_t count, int utf16Order)
+{
+  KeyOrder *keyOrder, *oldKeyOrder;
+  Py_ssize_t index;
+
+  keyOrder = (KeyOrder *) PyMem_Malloc(sizeof(KeyOrder) + count * (sizeof(PyObject *) + sizeof(Py_ssize_t)));
+  if (!keyOrder)
+  {
+    return;
+  }
+
+  keyOrder->cKeys = count;
+  keyOrder->utf16Order = utf16Order;
+  keyOrder->keys = (PyObject **) (keyOrder + 1);
+  keyOrder->order = (Py_ssize_t *) (keyOrder->keys + count);
+
+  for (index = 0; index < count; index ++)
+  {
+    keyOrder->keys[index] = items[index].key;
+    Py_INCREF(items[index].key);
+    keyOrder->order[index] = sorted[index] - items;
+  }
+
+  oldKeyOrder = g_keyOrders[KEY_ORDER_SLOT(items[0].key, count)];
+  g_keyOrders[KEY_ORDER_SLOT(items[0].key, count)] = keyOrder;
+
+  if (oldKeyOrder)
+  {
+    for (index = 0; index < oldKeyOrder->cKeys; index ++)
+    {
+      Py_DECREF(oldKeyOrder->keys[index]);
+    }
+    PyMem_Free(oldKeyOrder);
+  }
+}
+
+/*
+Collects the items of a dict with only str keys into an array of pairs followed by pointers to them in sorted
+order. Returns 0 when some key isn't a str and the dict has to be sorted by Python comparisons instead. In
+canonical output (utf16Order) such keys are sorted by the names they are written as */
+static int SortedDict_collect(TypeContext *pc, int utf16Order)
+{
+  PyObject *key, *value, *name;
+  SortedItem *items;
+  SortedItem **sorted;
+  KeyOrder *keyOrder;
+  Py_ssize_t pos = 0;
+  Py_ssize_t index, count;
+  int converted = 0;
+
+  count = PyDict_Size(pc->dictObj);
+  for (index = 0; PyDict_Next(pc->dictObj, &pos, &key, &value); index ++)
+  {
+    if (!PyUnicode_CheckExact(key))
+    {
+      if (!utf16Order)
+      {
+        return 0;
+      }
+      converted = 1;
+    }
+    else
+    if (!unicodeIsEncodable(key))
+    {
+      // Raises the same UnicodeEncodeError as without sort_keys
+      Py_XDECREF(dictKeyToName(key));
+      return -1;
+    }
+  }
+
+  pc->size = 0;
+  if (count == 0)
+  {
+    return 1;
+  }
+
+  items = (SortedItem *) PyMem_Malloc(count * (sizeof(SortedItem) + sizeof(SortedItem *)));
+  if (!items)
+  {
+    PyErr_NoMemory();
+    return -1;
+  }
+  pc->items = items;
+
+  pos = 0;
+  // Converting keys runs arbitrary code that could change the dict, never go past the items allocated
+  for (index = 0; index < count && PyDict_Next(pc->dictObj, &pos, &key, &value); index ++)
+  {
+    if (PyUnicode_CheckExact(key))
+    {
+      Py_INCREF(key);
+    }
+    else
+    {
+      name = dictKeyToName(key);
+      if (name && !PyUnicode_Check(name))
+      {
+        key = PyUnicode_FromEncodedObject(name, "utf-8", "strict");
+        Py_DECREF(name);
+        name = key;
+      }
+
+      if (!name)
+      {
+        return -1;
+      }
+      key = name;
+    }
+
+    // Encoding the values can run code changing the dict, hold on to what is being encoded
+    Py_INCREF(value);
+    items[index].key = key;
+    items[index].value = value;
+    pc->size = index + 1;
+  }
+
+  count = pc->size;
+  if (count == 0)
+  {
+    return 1;
+  }
+  sorted = (SortedItem **) (items + count);
+
+  keyOrder = g_keyOrders[KEY_ORDER_SLOT(items[0].key, count)];
+  if (keyOrder && keyOrder->cKeys == count && keyOrder->utf16Order == utf16Order)
+  {
+    for (index = 0; index < count; index ++)
+    {
+      if (keyOrder->keys[index] != items[index].key)
+      {
+        keyOrder = NULL;
+        break;
+      }
+    }
+
+    if (keyOrder)
+    {
+      PRINTMARK();
+      for (index = 0; index < count; index ++)
+      {
+        sorted[index] = items + keyOrder->order[index];
+      }
+      return 1;
+    }
+  }
+
+  for (index = 0; index < count; index ++)
+  {
+    sorted[index] = items + index;
+  }
+  qsort(sorted, (size_t) count, sizeof(SortedItem *), utf16Order ? SortedItem_compareUTF16 : SortedItem_compare);
+
+  if (converted)
+  {
+    // Keys written as the same name, such as 1 and "1", would give an object with duplicate names
+    for (index = 1; index < count; index ++)
+    {
+      if (compareKeys(sorted[index - 1]->key, sorted[index]->key, utf16Order) == 0)
+      {
+        PyErr_Format (PyExc_ValueError, "Duplicate key %R in canonical output", sorted[index]->key);
+        return -1;
+      }
+    }
+  }
+
+  if (count > 1 && count <= KEY_ORDER_MAX_KEYS && !converted)
+  {
+    KeyOrder_store(items, sorted, count, utf16Order);
+  }
+  return 1;
+}
+#endif
+
+static int SortedDict_next(JSOBJ obj, JSONTypeContext *tc, int utf16Order)
+{
+  PyObject *items = NULL, *item = NULL, *key = NULL, *value = NULL;
+  Py_ssize_t i, nitems;
+
+#if (PY_VERSION_HEX >= 0x03030000)
+  if (GET_TC(tc)->size < 0)
+  {
+    switch (SortedDict_collect(GET_TC(tc), utf16Order))
+    {
+      case -1:
+        return 0;
+
+      case 1:
+        break;
+
+      default:
+        goto KEYS;
+    }
+  }
+
+  if (GET_TC(tc)->newObj == NULL)
+  {
+    SortedItem *item;
+
+    if (GET_TC(tc)->index >= GET_TC(tc)->size)
+    {
+      PRINTMARK();
+      return 0;
+    }
+
+    item = ((SortedItem **) (GET_TC(tc)->items + GET_TC(tc)->size))[GET_TC(tc)->index ++];
+    GET_TC(tc)->itemName = item->key;
+    GET_TC(tc)->itemValue = item->value;
+    return 1;
+  }
+
+KEYS:
+#endif
+  // Upon first call, obtain a list of the keys and sort them. This follows the same logic as the
+  // stanard library's _json.c sort_keys handler.
+  if (GET_TC(tc)->size < 0)
+  {
+    // Obtain the list of keys from the dictionary.
+    items = PyMapping_Keys(GET_TC(tc)->dictObj);
+    if (items == NULL)
+    {
+      goto error;
+    }
+    else if (!PyList_Check(items))
+    {
+      PyErr_SetString(PyExc_ValueError, "keys must return list");
+      goto error;
+    }
+
+    // Sort the list.
+    if (PyList_Sort(items) < 0)
+    {
+      goto error;
+    }
+
+    // Obtain the value for each key, and pack a list of (key, value) 2-tuples.
+    nitems = PyList_GET_SIZE(items);
+    for (i = 0; i < nitems; i++)
+    {
+      key = PyList_GET_ITEM(items, i);
+      value = PyDict_GetItem(GET_TC(tc)->dictObj, key);
+
+      // Subject the key to the same type restrictions and conversions as in Dict_iterNext.
+      key = dictKeyToName(key);
+      if (key == NULL)
+      {
+        goto error;
+      }
+
+      item = PyTuple_Pack(2, key, value);
+      if (item == NULL)
+      {
+        goto error;
+      }
+      PyList_SET_ITEM(items, i, item);
+      item = NULL;
+      Py_DECREF(key);
+      key = NULL;
+    }
+
+    // Store the sorted list of tuples in the newObj slot.
+    GET_TC(tc)->newObj = items;
+    GET_TC(tc)->size = nitems;
+  }
+
+  if (GET_TC(tc)->index >= GET_TC(tc)->size)
+  {
+    PRINTMARK();
+    return 0;
+  }
+
+  item = PyList_GET_ITEM(GET_TC(tc)->newObj, GET_TC(tc)->index);
+  GET_TC(tc)->itemName = PyTuple_GET_ITEM(item, 0);
+  GET_TC(tc)->itemValue = PyTuple_GET_ITEM(item, 1);
+  GET_TC(tc)->index++;
+  return 1;
+
+error:
+  // End the iteration, the encoder notices the pending exception
+  Py_XDECREF(item);
+  Py_XDECREF(key);
+  Py_XDECREF(items);
+  return 0;
+}
+
+int SortedDict_iterNext(JSOBJ obj, JSONTypeContext *tc)
+{
+  return SortedDict_next(obj, tc, 0);
+}
+
+int CanonicalDict_iterNext(JSOBJ obj, JSONTypeContext *tc)
+{
+  return SortedDict_next(obj, tc, 1);
+}
+
+void SortedDict_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+{
+  GET_TC(tc)->itemName = NULL;
+  GET_TC(tc)->itemValue = NULL;
+  Py_XDECREF(GET_TC(tc)->newObj);
+  Py_DECREF(GET_TC(tc)->dictObj);
+
+  if (GET_TC(tc)->items)
+  {
+    Py_ssize_t index;
+
+    for (index = 0; index < GET_TC(tc)->size; index ++)
+    {
+      Py_DECREF(GET_TC(tc)->items[index].key);
+      Py_DECREF(GET_TC(tc)->items[index].value);
+    }
+    PyMem_Free(GET_TC(tc)->items);
+    GET_TC(tc)->items = NULL;
+  }
+  PRINTMARK();
+}
+
+JSOBJ SortedDict_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->itemValue;
+}
+
+char *SortedDict_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+{
+  return dictNameToJSON(GET_TC(tc)->itemName, tc, outLen);
+}
+
+
+void SetupDictIter(PyObject *dictObj, TypeContext *pc, JSONObjectEncoder *enc)
+{
   if (enc->sortKeys) {
     pc->iterEnd = SortedDict_iterEnd;
-    pc->iterNext = SortedDict_iterNext;
+    pc->iterNext = enc->canonical ? CanonicalDict_iterNext : SortedDict_iterNext;
     pc->iterGetValue = SortedDict_iterGetValue;
     pc->iterGetName = SortedDict_iterGetName;
+    pc->size = -1;
+  }
+  else {
+    pc->iterEnd = Dict_iterEnd;
+    pc->iterNext = Dict_iterNext;
+    pc->iterGetValue = Dict_iterGetValue;
+    pc->iterGetName = Dict_iterGetName;
+  }
+  pc->dictObj = dictObj;
+  pc->index = 0;
+}
+
+static PyObject *findTypeHandler(PyTypeObject *type)
+{
+  size_t index;
+
+  for (index = TYPE_HANDLER_SLOT(type); g_typeHandlers[index].type; index = (index + 1) & g_typeHandlersMask)
+  {
+    if (g_typeHandlers[index].type == type)
+    {
+      return g_typeHandlers[index].handler;
+    }
+  }
+
+  return NULL;
+}
+
+static int rebuildTypeHandlers(void)
+{
+  Py_ssize_t pos = 0;
+  PyObject *type;
+  PyObject *handler;
+  size_t size = 8;
+  size_t index;
+
+  // Nothing may point at handlers the dict no longer holds, even if the new table can't be allocated
+  PyMem_Free(g_typeHandlers);
+  g_typeHandlers = NULL;
+
+  if (PyDict_Size(g_typeRegistry) == 0)
+  {
+    return 1;
+  }
+
+  // At most half full, so probing always ends at an empty slot
+  while (size < 2 * (size_t) PyDict_Size(g_typeRegistry))
+  {
+    size *= 2;
+  }
+
+  g_typeHandlers = (TypeHandler *) PyMem_Malloc(size * sizeof(TypeHandler));
+  if (!g_typeHandlers)
+  {
+    PyErr_NoMemory();
+    return 0;
+  }
+  memset(g_typeHandlers, 0, size * sizeof(TypeHandler));
+  g_typeHandlersMask = size - 1;
+
+  while (PyDict_Next(g_typeRegistry, &pos, &type, &handler))
+  {
+    for (index = TYPE_HANDLER_SLOT(type); g_typeHandlers[index].type; index = (index + 1) & g_typeHandlersMask);
+    g_typeHandlers[index].type = (PyTypeObject *) type;
+    g_typeHandlers[index].handler = handler;
+  }
+
+  return 1;
+}
+
+void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc, JSONObjectEncoder *enc)
+{
+  PyObject *obj, *exc, *toDictFunc, *iter, *handler, *newObj;
+  TypeContext *pc;
+  PRINTMARK();
+  if (!_obj) {
+    tc->type = JT_INVALID;
+    return;
+  }
+
+  obj = (PyObject*) _obj;
+
+  tc->prv = &tc->storage;
+  pc = (TypeContext *) tc->prv;
+  pc->newObj = NULL;
+  pc->dictObj = NULL;
+  pc->itemValue = NULL;
+  pc->itemName = NULL;
+  pc->iterator = NULL;
+  pc->attrList = NULL;
+  pc->plan = NULL;
+  pc->items = NULL;
+  pc->index = 0;
+  pc->size = 0;
+  pc->longValue = 0;
+
+  // One lookup by exact type, registered handlers take precedence over everything below
+  if (g_typeHandlers && (handler = findTypeHandler(Py_TYPE(obj))) != NULL)
+  {
+    PRINTMARK();
+    goto SUBSTITUTE;
+  }
+
+  if (PyIter_Check(obj))
+  {
+    PRINTMARK();
+    goto ISITERABLE;
+  }
+
+  if (PyBool_Check(obj))
+  {
+    PRINTMARK();
+    tc->type = (obj == Py_True) ? JT_TRUE : JT_FALSE;
+    return;
+  }
+  else
+  if (PyLong_Check(obj))
+  {
+    PRINTMARK();
+    pc->PyTypeToJSON = PyLongToINT64;
+    tc->type = JT_LONG;
+    GET_TC(tc)->longValue = PyLong_AsLongLong(obj);
+
+    exc = PyErr_Occurred();
+    if (!exc)
+    {
+        return;
+    }
+
+    if (exc && PyErr_ExceptionMatches(PyExc_OverflowError))
+    {
+      PyErr_Clear();
+      pc->PyTypeToJSON = PyLongToUINT64;
+      tc->type = JT_ULONG;
+      GET_TC(tc)->unsignedLongValue = PyLong_AsUnsignedLongLong(obj);
+
+      exc = PyErr_Occurred();
+      if (exc && PyErr_ExceptionMatches(PyExc_OverflowError))
+      {
+        PRINTMARK();
+        goto INVALID;
+      }
+    }
+
+    return;
+  }
+  else
+  if (PyInt_Check(obj))
+  {
+    PRINTMARK();
+#ifdef _LP64
+    pc->PyTypeToJSON = PyIntToINT64; tc->type = JT_LONG;
+#else
+    pc->PyTypeToJSON = PyIntToINT32; tc->type = JT_INT;
+#endif
+    return;
+  }
+  else
+  if (PyString_Check(obj))
+  {
+    PRINTMARK();
+    pc->PyTypeToJSON = PyStringToUTF8; tc->type = JT_UTF8;
+    return;
+  }
+  else
+  if (PyUnicode_Check(obj))
+  {
+    PRINTMARK();
+    pc->PyTypeToJSON = PyUnicodeToUTF8; tc->type = JT_UTF8;
+    return;
+  }
+  else
+  if (PyFloat_Check(obj) || (type_decimal && PyObject_IsInstance(obj, type_decimal)))
+  {
+    PRINTMARK();
+    pc->PyTypeToJSON = PyFloatToDOUBLE; tc->type = JT_DOUBLE;
+    return;
+  }
+  else
+  if (PyDateTime_Check(obj))
+  {
+    PRINTMARK();
+    pc->PyTypeToJSON = PyDateTimeToINT64; tc->type = JT_LONG;
+    return;
+  }
+  else
+  if (PyDate_Check(obj))
+  {
+    PRINTMARK();
+    pc->PyTypeToJSON = PyDateToINT64; tc->type = JT_LONG;
+    return;
+  }
+  else
+  if (obj == Py_None)
+  {
+    PRINTMARK();
+    tc->type = JT_NULL;
+    return;
+  }
+
+ISITERABLE:
+  if (PyDict_Check(obj))
+  {
+    PRINTMARK();
+    tc->type = JT_OBJECT;
+    SetupDictIter(obj, pc, enc);
+    Py_INCREF(obj);
+    return;
+  }
+  else
+  if (PyList_Check(obj))
+  {
+    PRINTMARK();
+    tc->type = JT_ARRAY;
+    pc->iterEnd = List_iterEnd;
+    pc->iterNext = List_iterNext;
+    pc->iterGetValue = List_iterGetValue;
+    pc->iterGetName = List_iterGetName;
+    GET_TC(tc)->index =  0;
+    GET_TC(tc)->size = PyList_GET_SIZE( (PyObject *) obj);
+    return;
+  }
+  else
+  if (PyTuple_Check(obj))
+  {
+    PRINTMARK();
+    tc->type = JT_ARRAY;
+    pc->iterEnd = Tuple_iterEnd;
+    pc->iterNext = Tuple_iterNext;
+    pc->iterGetValue = Tuple_iterGetValue;
+    pc->iterGetName = Tuple_iterGetName;
+    GET_TC(tc)->index = 0;
+    GET_TC(tc)->size = PyTuple_GET_SIZE( (PyObject *) obj);
+    GET_TC(tc)->itemValue = NULL;
+
+    return;
+  }
+  /*
+  else
+  if (PyAnySet_Check(obj))
+  {
+    PRINTMARK();
+    tc->type = JT_ARRAY;
+    pc->iterBegin = NULL;
+    pc->iterEnd = Iter_iterEnd;
+    pc->iterNext = Iter_iterNext;
+    pc->iterGetValue = Iter_iterGetValue;
+    pc->iterGetName = Iter_iterGetName;
+    return;
+  }
+  */
+
+  if (!enc->prv && (pc->plan = ClassPlan_get(obj, &pc->dictObj)) != NULL)
+  {
+    PRINTMARK();
+    tc->type = JT_OBJECT;
+    pc->iterEnd = ClassPlan_iterEnd;
+    pc->iterNext = ClassPlan_iterNext;
+    pc->iterGetValue = ClassPlan_iterGetValue;
+    pc->iterGetName = ClassPlan_iterGetName;
+    return;
+  }
+
+  toDictFunc = PyObject_GetAttrString(obj, "toDict");
+
+  if (toDictFunc)
+  {
+    PyObject* tuple = PyTuple_New(0);
+    PyObject* toDictResult = PyObject_Call(toDictFunc, tuple, NULL);
+    Py_DECREF(tuple);
+    Py_DECREF(toDictFunc);
+
+    if (toDictResult == NULL)
+    {
+      PyErr_Clear();
+      tc->type = JT_NULL;
+      return;
+    }
+
+    if (!PyDict_Check(toDictResult))
+    {
+      Py_DECREF(toDictResult);
+      tc->type = JT_NULL;
+      return;
+    }
+
+    PRINTMARK();
+    tc->type = JT_OBJECT;
+    SetupDictIter(toDictResult, pc, enc);
+    return;
   }
-  else {
-    pc->iterEnd = Dict_iterEnd;
-    pc->iterNext = Dict_iterNext;
-    pc->iterGetValue = Dict_iterGetValue;
-    pc->iterGetName = Dict_iterGetName;
+
+  PRINTMARK();
+  PyErr_Clear();
+
+  iter = PyObject_GetIter(obj);
+
+  if (iter != NULL)
+  {
+    PRINTMARK();
+    tc->type = JT_ARRAY;
+    pc->iterator = iter;
+    pc->iterEnd = Iter_iterEnd;
+    pc->iterNext = Iter_iterNext;
+    pc->iterGetValue = Iter_iterGetValue;
+    pc->iterGetName = Iter_iterGetName;
+    return;
+  }
+
+  PRINTMARK();
+  PyErr_Clear();
+
+  // Iterables are still encoded as arrays, the default handler stands in for the dir() fallback only
+  if (enc->prv)
+  {
+    PRINTMARK();
+    handler = (PyObject *) enc->prv;
+    goto SUBSTITUTE;
+  }
+
+  PRINTMARK();
+  tc->type = JT_OBJECT;
+  GET_TC(tc)->attrList = PyObject_Dir(obj);
+  
+  if (GET_TC(tc)->attrList == NULL)
+  {
+    PyErr_Clear();
+    goto INVALID;
+  }
+
+  GET_TC(tc)->index = 0;
+  GET_TC(tc)->size = PyList_GET_SIZE(GET_TC(tc)->attrList);
+  PRINTMARK();
+  
+  pc->iterEnd = Dir_iterEnd;
+  pc->iterNext = Dir_iterNext;
+  pc->iterGetValue = Dir_iterGetValue;
+  pc->iterGetName = Dir_iterGetName;
+  return;
+
+SUBSTITUTE:
+  Py_INCREF(handler);
+  newObj = PyObject_CallFunctionObjArgs(handler, obj, NULL);
+  Py_DECREF(handler);
+
+  if (!newObj)
+  {
+    enc->errorMsg = "Exception raised by object handler";
+    enc->errorObj = obj;
+    goto INVALID;
+  }
+
+  /*
+  The substitute is written in place of obj by a nested encode at the same level, whose closing level
+  decrement stands in for the one this call skips by returning JT_INVALID. A handler that keeps returning
+  objects it handles again runs into Python's recursion limit */
+  if (Py_EnterRecursiveCall(" while encoding a JSON object"))
+  {
+    Py_DECREF(newObj);
+    enc->errorMsg = "Maximum recursion level reached";
+    enc->errorObj = obj;
+    goto INVALID;
+  }
+
+  encode(newObj, enc, NULL, 0, JS_UTF8);
+  Py_LeaveRecursiveCall();
+  Py_DECREF(newObj);
+
+INVALID:
+  PRINTMARK();
+  tc->type = JT_INVALID;
+  tc->prv = NULL;
+  return;
+}
+
+void Object_endTypeContext(JSOBJ obj, JSONTypeContext *tc)
+{
+  Py_XDECREF(GET_TC(tc)->newObj);
+  tc->prv = NULL;
+}
+
+const char *Object_getStringValue(JSOBJ obj, JSONTypeContext *tc, size_t *_outLen)
+{
+  return GET_TC(tc)->PyTypeToJSON (obj, tc, NULL, _outLen);
+}
+
+JSINT64 Object_getLongValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  JSINT64 ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+JSUINT64 Object_getUnsignedLongValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  JSUINT64 ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+JSINT32 Object_getIntValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  JSINT32 ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+double Object_getDoubleValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  double ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+static void Object_releaseObject(JSOBJ _obj)
+{
+  Py_DECREF( (PyObject *) _obj);
+}
+
+int Object_iterNext(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->iterNext(obj, tc);
+}
+
+void Object_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+{
+  GET_TC(tc)->iterEnd(obj, tc);
+}
+
+JSOBJ Object_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->iterGetValue(obj, tc);
+}
+
+char *Object_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+{
+  return GET_TC(tc)->iterGetName(obj, tc, outLen);
+}
+
+static const JSONObjectEncoder g_objectEncoder =
+{
+  Object_beginTypeContext,
+  Object_endTypeContext,
+  Object_getStringValue,
+  Object_getLongValue,
+  Object_getUnsignedLongValue,
+  Object_getIntValue,
+  Object_getDoubleValue,
+  Object_iterNext,
+  Object_iterEnd,
+  Object_iterGetValue,
+  Object_iterGetName,
+  Object_releaseObject,
+  PyObject_Malloc,
+  PyObject_Realloc,
+  PyObject_Free,
+  -1, //recursionMax
+  10,  // default double precision setting
+  1, //forceAscii
+  0, //encodeHTMLChars
+  1, //escapeForwardSlashes
+  0, //sortKeys
+  0, //indent
+  0, //shortestFloat
+  0, //canonical
+  NULL, //prv, the default handler
+};
+
+/*
+Options shared by all encoding entry points. Each entry point appends ENCODER_KWLIST to its own keywords,
+ENCODER_FORMAT to its format string and ENCODER_ARGS to its arguments, then applies them with setEncoderOptions */
+#define ENCODER_KWLIST "ensure_ascii", "double_precision", "encode_html_chars", "escape_forward_slashes", "sort_keys", "indent", "shortest_float", "default", "canonical"
+#define ENCODER_FORMAT "OiOOOiOOO"
+#define ENCODER_ARGS(__options, __encoder) &(__options).oensureAscii, &(__encoder)->doublePrecision, &(__options).oencodeHTMLChars, &(__options).oescapeForwardSlashes, &(__options).osortKeys, &(__encoder)->indent, &(__options).oshortestFloat, &(__options).odefault, &(__options).ocanonical
+
+typedef struct __EncoderOptions
+{
+  PyObject *oensureAscii;
+  PyObject *oencodeHTMLChars;
+  PyObject *oescapeForwardSlashes;
+  PyObject *osortKeys;
+  PyObject *oshortestFloat;
+  PyObject *odefault;
+  PyObject *ocanonical;
+} EncoderOptions;
+
+static const EncoderOptions g_defaultEncoderOptions = { NULL, NULL, NULL, NULL, NULL, NULL, NULL };
+
+static char *g_encoderKwlist[] = { "obj", ENCODER_KWLIST, NULL };
+
+/*
+Applies the encoder options, NULL leaves the default. The default handler is borrowed from options.
+Returns 0 with an exception set when an option is invalid */
+static int setEncoderOptions(JSONObjectEncoder *encoder, EncoderOptions *options)
+{
+  if (options->oensureAscii != NULL && !PyObject_IsTrue(options->oensureAscii))
+  {
+    encoder->forceASCII = 0;
+  }
+
+  if (options->oencodeHTMLChars != NULL && PyObject_IsTrue(options->oencodeHTMLChars))
+  {
+    encoder->encodeHTMLChars = 1;
+  }
+
+  if (options->oescapeForwardSlashes != NULL && !PyObject_IsTrue(options->oescapeForwardSlashes))
+  {
+    encoder->escapeForwardSlashes = 0;
+  }
+
+  if (options->osortKeys != NULL && PyObject_IsTrue(options->osortKeys))
+  {
+    encoder->sortKeys = 1;
+  }
+
+  if (options->oshortestFloat != NULL && PyObject_IsTrue(options->oshortestFloat))
+  {
+    encoder->shortestFloat = 1;
+  }
+
+  if (options->odefault != NULL && options->odefault != Py_None)
+  {
+    if (!PyCallable_Check(options->odefault))
+    {
+      PyErr_Format (PyExc_TypeError, "default must be callable");
+      return 0;
+    }
+    encoder->prv = options->odefault;
+  }
+
+  if (options->ocanonical != NULL && PyObject_IsTrue(options->ocanonical))
+  {
+    // RFC 8785 output, which leaves nothing to the formatting options
+    encoder->canonical = 1;
+    encoder->forceASCII = 0;
+    encoder->encodeHTMLChars = 0;
+    encoder->escapeForwardSlashes = 0;
+    encoder->sortKeys = 1;
+    encoder->indent = 0;
+  }
+
+  return 1;
+}
+
+/*
+Parses the object to encode and the encoder options into encoder */
+static int parseEncoderArgs(PyObject *args, PyObject *kwargs, JSONObjectEncoder *encoder, PyObject **oinput)
+{
+  EncoderOptions options = g_defaultEncoderOptions;
+
+  *encoder = g_objectEncoder;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|" ENCODER_FORMAT, g_encoderKwlist, oinput, ENCODER_ARGS(options, encoder)))
+  {
+    return 0;
+  }
+
+  return setEncoderOptions(encoder, &options);
+}
+
+/*
+Encodes into a str, or into bytes straight from the output buffer when asBytes is set */
+static PyObject *encodeArgs(PyObject *args, PyObject *kwargs, int asBytes)
+{
+  char buffer[65536];
+  char *ret;
+  PyObject *newobj;
+  PyObject *oinput = NULL;
+  JSONObjectEncoder encoder;
+
+  PRINTMARK();
+
+  if (!parseEncoderArgs(args, kwargs, &encoder, &oinput))
+  {
+    return NULL;
+  }
+
+  PRINTMARK();
+  ret = JSON_EncodeObject (oinput, &encoder, buffer, sizeof (buffer));
+  PRINTMARK();
+
+  if (PyErr_Occurred())
+  {
+    return NULL;
+  }
+
+  if (encoder.errorMsg)
+  {
+    if (ret != buffer)
+    {
+      encoder.free (ret);
+    }
+
+    PyErr_Format (PyExc_OverflowError, "%s", encoder.errorMsg);
+    return NULL;
+  }
+
+  // The output length is known, leave out the terminating null
+  newobj = asBytes ? PyBytes_FromStringAndSize (ret, encoder.offset - encoder.start - 1) : PyString_FromString (ret);
+
+  if (ret != buffer)
+  {
+    encoder.free (ret);
+  }
+
+  PRINTMARK();
+
+  return newobj;
+}
+
+PyObject* objToJSON(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  return encodeArgs(args, kwargs, 0);
+}
+
+PyObject* objToJSONBytes(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  return encodeArgs(args, kwargs, 1);
+}
+
+static char *g_registerKwlist[] = { "type", "func", NULL };
+
+PyObject* objToJSONRegister(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *type;
+  PyObject *func;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO", g_registerKwlist, &type, &func))
+  {
+    return NULL;
+  }
+
+  if (!PyType_Check(type))
+  {
+    PyErr_Format (PyExc_TypeError, "type must be a type");
+    return NULL;
+  }
+
+  if (func == Py_None)
+  {
+    if (PyDict_GetItem(g_typeRegistry, type) && PyDict_DelItem(g_typeRegistry, type) != 0)
+    {
+      return NULL;
+    }
+  }
+  else
+  {
+    if (!PyCallable_Check(func))
+    {
+      PyErr_Format (PyExc_TypeError, "func must be callable or None");
+      return NULL;
+    }
+
+    if (PyDict_SetItem(g_typeRegistry, type, func) != 0)
+    {
+      return NULL;
+    }
+  }
+
+  if (!rebuildTypeHandlers())
+  {
+    return NULL;
   }
-  pc->dictObj = dictObj;
-  pc->index = 0;
+
+  Py_RETURN_NONE;
 }
 
-void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc, JSONObjectEncoder *enc)
+/*
+Prefixes the message of the pending exception with the index of the record being encoded */
+static void setRecordError(Py_ssize_t index)
 {
-  PyObject *obj, *exc, *toDictFunc, *iter;
-  TypeContext *pc;
-  PRINTMARK();
-  if (!_obj) {
-    tc->type = JT_INVALID;
-    return;
+  PyObject *type;
+  PyObject *value;
+  PyObject *traceback;
+  PyObject *message;
+  PyObject *utf8 = NULL;
+
+  PyErr_Fetch(&type, &value, &traceback);
+  PyErr_NormalizeException(&type, &value, &traceback);
+
+  message = value ? PyObject_Str(value) : NULL;
+#if PY_MAJOR_VERSION >= 3
+  if (message)
+  {
+    utf8 = PyUnicode_AsUTF8String(message);
   }
+#else
+  utf8 = message;
+  Py_XINCREF(utf8);
+#endif
 
-  obj = (PyObject*) _obj;
+  if (utf8 == NULL)
+  {
+    PyErr_Clear();
+    PyErr_Restore(type, value, traceback);
+  }
+  else
+  {
+    PyErr_Format (type, "record %d: %s", (int) index, PyString_AS_STRING(utf8));
+    Py_DECREF(utf8);
+    Py_DECREF(type);
+    Py_XDECREF(value);
+    Py_XDECREF(traceback);
+  }
 
-  tc->prv = PyObject_Malloc(sizeof(TypeContext));
-  pc = (TypeContext *) tc->prv;
-  if (!pc)
+  Py_XDECREF(message);
+}
+
+PyObject* objToJSONLines(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  char buffer[65536];
+  PyObject *newobj = NULL;
+  PyObject *oinput = NULL;
+  PyObject *iterator;
+  PyObject *item;
+  Py_ssize_t index;
+  JSONObjectEncoder encoder;
+
+  PRINTMARK();
+
+  if (!parseEncoderArgs(args, kwargs, &encoder, &oinput))
   {
-    tc->type = JT_INVALID;
-    PyErr_NoMemory();
-    return;
+    return NULL;
   }
-  pc->newObj = NULL;
-  pc->dictObj = NULL;
-  pc->itemValue = NULL;
-  pc->itemName = NULL;
-  pc->iterator = NULL;
-  pc->attrList = NULL;
-  pc->index = 0;
-  pc->size = 0;
-  pc->longValue = 0;
 
-  if (PyIter_Check(obj))
+  if (encoder.indent)
   {
-    PRINTMARK();
-    goto ISITERABLE;
+    // Indenting would break records over several lines
+    PyErr_Format (PyExc_ValueError, "dumps_lines does not support indent");
+    return NULL;
   }
 
-  if (PyBool_Check(obj))
+  iterator = PyObject_GetIter(oinput);
+  if (iterator == NULL)
   {
-    PRINTMARK();
-    tc->type = (obj == Py_True) ? JT_TRUE : JT_FALSE;
-    return;
+    return NULL;
   }
-  else
-  if (PyLong_Check(obj))
+
+  /*
+  All records share one output buffer, so after the first few records grow it to fit
+  the rest are encoded without any further allocations */
+  JSON_EncodeBegin(&encoder, buffer, sizeof(buffer));
+
+  for (index = 0; (item = PyIter_Next(iterator)) != NULL; index ++)
   {
-    PRINTMARK();
-    pc->PyTypeToJSON = PyLongToINT64;
-    tc->type = JT_LONG;
-    GET_TC(tc)->longValue = PyLong_AsLongLong(obj);
+    JSON_EncodeAppend(item, &encoder);
+    Py_DECREF(item);
 
-    exc = PyErr_Occurred();
-    if (!exc)
+    if (PyErr_Occurred())
     {
-        return;
+      setRecordError(index);
+      goto BAIL;
     }
 
-    if (exc && PyErr_ExceptionMatches(PyExc_OverflowError))
+    if (!encoder.errorMsg)
     {
-      PyErr_Clear();
-      pc->PyTypeToJSON = PyLongToUINT64;
-      tc->type = JT_ULONG;
-      GET_TC(tc)->unsignedLongValue = PyLong_AsUnsignedLongLong(obj);
+      JSON_EncodeAppendRaw(&encoder, "\n", 1);
+    }
 
-      exc = PyErr_Occurred();
-      if (exc && PyErr_ExceptionMatches(PyExc_OverflowError))
-      {
-        PRINTMARK();
-        goto INVALID;
-      }
+    if (encoder.errorMsg)
+    {
+      PyErr_Format (PyExc_OverflowError, "record %d: %s", (int) index, encoder.errorMsg);
+      goto BAIL;
     }
+  }
 
-    return;
+  if (PyErr_Occurred())
+  {
+    goto BAIL;
   }
-  else
-  if (PyInt_Check(obj))
+
+  newobj = PyBytes_FromStringAndSize (encoder.start, encoder.offset - encoder.start);
+
+BAIL:
+  Py_DECREF(iterator);
+
+  if (encoder.heap && encoder.start)
   {
-    PRINTMARK();
-#ifdef _LP64
-    pc->PyTypeToJSON = PyIntToINT64; tc->type = JT_LONG;
-#else
-    pc->PyTypeToJSON = PyIntToINT32; tc->type = JT_INT;
-#endif
-    return;
+    encoder.free (encoder.start);
   }
-  else
-  if (PyString_Check(obj))
+
+  PRINTMARK();
+
+  return newobj;
+}
+
+static char *g_intoKwlist[] = { "obj", "buffer", "offset", "grow", ENCODER_KWLIST, NULL };
+
+PyObject* objToJSONInto(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *oinput = NULL;
+  PyObject *obuffer = NULL;
+  PyObject *ogrow = NULL;
+  EncoderOptions options = g_defaultEncoderOptions;
+  Py_ssize_t offset = 0;
+  Py_ssize_t cbOutput;
+  Py_buffer view;
+  JSONObjectEncoder encoder = g_objectEncoder;
+
+  PRINTMARK();
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|nO" ENCODER_FORMAT, g_intoKwlist, &oinput, &obuffer, &offset, &ogrow, ENCODER_ARGS(options, &encoder)))
   {
-    PRINTMARK();
-    pc->PyTypeToJSON = PyStringToUTF8; tc->type = JT_UTF8;
-    return;
+    return NULL;
   }
-  else
-  if (PyUnicode_Check(obj))
+
+  if (!setEncoderOptions(&encoder, &options))
   {
-    PRINTMARK();
-    pc->PyTypeToJSON = PyUnicodeToUTF8; tc->type = JT_UTF8;
-    return;
+    return NULL;
   }
-  else
-  if (PyFloat_Check(obj) || (type_decimal && PyObject_IsInstance(obj, type_decimal)))
+
+  if (PyObject_GetBuffer(obuffer, &view, PyBUF_WRITABLE) != 0)
   {
-    PRINTMARK();
-    pc->PyTypeToJSON = PyFloatToDOUBLE; tc->type = JT_DOUBLE;
-    return;
+    return NULL;
   }
-  else
-  if (PyDateTime_Check(obj))
+
+  if (offset < 0 || offset > view.len)
   {
-    PRINTMARK();
-    pc->PyTypeToJSON = PyDateTimeToINT64; tc->type = JT_LONG;
-    return;
+    PyBuffer_Release(&view);
+    PyErr_Format (PyExc_ValueError, "offset out of range");
+    return NULL;
   }
-  else
-  if (PyDate_Check(obj))
+
+  /*
+  Encode straight into the free space after offset. The encoder reserves room generously, so when
+  that runs short it carries on in a heap buffer of its own, whose output is then copied back into
+  the buffer if it fits after all, or into the grown bytearray */
+  JSON_EncodeBegin(&encoder, (char *) view.buf + offset, view.len - offset);
+  if (!encoder.errorMsg)
   {
-    PRINTMARK();
-    pc->PyTypeToJSON = PyDateToINT64; tc->type = JT_LONG;
-    return;
+    JSON_EncodeAppend(oinput, &encoder);
   }
-  else
-  if (obj == Py_None)
+
+  if (PyErr_Occurred() || encoder.errorMsg)
   {
-    PRINTMARK();
-    tc->type = JT_NULL;
-    return;
+    PyBuffer_Release(&view);
+
+    if (encoder.heap && encoder.start)
+    {
+      encoder.free (encoder.start);
+    }
+
+    if (!PyErr_Occurred())
+    {
+      PyErr_Format (PyExc_OverflowError, "%s", encoder.errorMsg);
+    }
+    return NULL;
   }
 
-ISITERABLE:
-  if (PyDict_Check(obj))
+  cbOutput = encoder.offset - encoder.start;
+
+  if (!encoder.heap)
   {
-    PRINTMARK();
-    tc->type = JT_OBJECT;
-    SetupDictIter(obj, pc, enc);
-    Py_INCREF(obj);
-    return;
+    PyBuffer_Release(&view);
   }
   else
-  if (PyList_Check(obj))
+  if (cbOutput <= view.len - offset)
   {
-    PRINTMARK();
-    tc->type = JT_ARRAY;
-    pc->iterEnd = List_iterEnd;
-    pc->iterNext = List_iterNext;
-    pc->iterGetValue = List_iterGetValue;
-    pc->iterGetName = List_iterGetName;
-    GET_TC(tc)->index =  0;
-    GET_TC(tc)->size = PyList_GET_SIZE( (PyObject *) obj);
-    return;
+    memcpy((char *) view.buf + offset, encoder.start, cbOutput);
+    PyBuffer_Release(&view);
+    encoder.free (encoder.start);
   }
   else
-  if (PyTuple_Check(obj))
   {
-    PRINTMARK();
-    tc->type = JT_ARRAY;
-    pc->iterEnd = Tuple_iterEnd;
-    pc->iterNext = Tuple_iterNext;
-    pc->iterGetValue = Tuple_iterGetValue;
-    pc->iterGetName = Tuple_iterGetName;
-    GET_TC(tc)->index = 0;
-    GET_TC(tc)->size = PyTuple_GET_SIZE( (PyObject *) obj);
-    GET_TC(tc)->itemValue = NULL;
+    PyBuffer_Release(&view);
 
-    return;
+    if (!PyByteArray_Check(obuffer) || (ogrow != NULL && !PyObject_IsTrue(ogrow)))
+    {
+      encoder.free (encoder.start);
+      PyErr_Format (PyExc_ValueError, "buffer too small, %zd bytes needed after offset", cbOutput);
+      return NULL;
+    }
+
+    if (PyByteArray_Resize(obuffer, offset + cbOutput) != 0)
+    {
+      encoder.free (encoder.start);
+      return NULL;
+    }
+
+    memcpy(PyByteArray_AS_STRING(obuffer) + offset, encoder.start, cbOutput);
+    encoder.free (encoder.start);
+  }
+
+  PRINTMARK();
+
+  return PyLong_FromSsize_t(cbOutput);
+}
+
+/*
+Streaming file output
+The encoder writes into a chunk sized buffer which is flushed to the file whenever it runs full,
+so memory use stays O(chunk_size) however large the output gets.
+*/
+typedef struct __FileEncoder
+{
+  JSONObjectEncoder encoder;
+  PyObject *write;
+  int fd;
+  int final;
+} FileEncoder;
+
+static size_t FileEncoder_flush(JSONObjectEncoder *enc, const char *data, size_t cbData)
+{
+  FileEncoder *fileEncoder = (FileEncoder *) enc;
+  PyObject *chunk;
+  PyObject *result;
+  Py_ssize_t cbConsumed = cbData;
+
+  if (fileEncoder->write == NULL)
+  {
+    size_t cbWritten = 0;
+    Py_ssize_t ret;
+
+    while (cbWritten < cbData)
+    {
+      Py_BEGIN_ALLOW_THREADS
+      ret = write(fileEncoder->fd, data + cbWritten, cbData - cbWritten);
+      Py_END_ALLOW_THREADS
+
+      if (ret < 0)
+      {
+        if (errno == EINTR && !PyErr_CheckSignals())
+        {
+          continue;
+        }
+
+        if (!PyErr_Occurred())
+        {
+          PyErr_SetFromErrno(PyExc_OSError);
+        }
+        enc->errorMsg = "Could not write output";
+        return 0;
+      }
+
+      cbWritten += ret;
+    }
+
+    return cbData;
   }
+
+#if PY_MAJOR_VERSION >= 3
   /*
-  else
-  if (PyAnySet_Check(obj))
+  Text files take str, so stop short of a UTF-8 sequence split by the chunk boundary. It stays
+  in the buffer and is completed by the next chunk */
+  chunk = PyUnicode_DecodeUTF8Stateful(data, cbData, "strict", fileEncoder->final ? NULL : &cbConsumed);
+#else
+  chunk = PyString_FromStringAndSize(data, cbData);
+#endif
+
+  if (chunk == NULL)
   {
-    PRINTMARK();
-    tc->type = JT_ARRAY;
-    pc->iterBegin = NULL;
-    pc->iterEnd = Iter_iterEnd;
-    pc->iterNext = Iter_iterNext;
-    pc->iterGetValue = Iter_iterGetValue;
-    pc->iterGetName = Iter_iterGetName;
-    return;
+    enc->errorMsg = "Could not write output";
+    return 0;
+  }
+
+  result = PyObject_CallFunctionObjArgs(fileEncoder->write, chunk, NULL);
+  Py_DECREF(chunk);
+
+  if (result == NULL)
+  {
+    enc->errorMsg = "Could not write output";
+    return 0;
+  }
+
+  Py_DECREF(result);
+  return cbConsumed;
+}
+
+static char *g_fileKwlist[] = { "obj", "fp", "chunk_size", ENCODER_KWLIST, NULL };
+
+PyObject* objToJSONFile(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *data;
+  PyObject *file;
+  EncoderOptions options = g_defaultEncoderOptions;
+  Py_ssize_t chunkSize = 65536;
+  char *buffer;
+  FileEncoder fileEncoder;
+  JSONObjectEncoder *encoder = &fileEncoder.encoder;
+
+  PRINTMARK();
+
+  fileEncoder.encoder = g_objectEncoder;
+  fileEncoder.write = NULL;
+  fileEncoder.fd = -1;
+  fileEncoder.final = 0;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|n" ENCODER_FORMAT, g_fileKwlist, &data, &file, &chunkSize, ENCODER_ARGS(options, encoder)))
+  {
+    return NULL;
+  }
+
+  if (!setEncoderOptions(encoder, &options))
+  {
+    return NULL;
   }
-  */
-
-  toDictFunc = PyObject_GetAttrString(obj, "toDict");
 
-  if (toDictFunc)
+  if (chunkSize <= 0)
   {
-    PyObject* tuple = PyTuple_New(0);
-    PyObject* toDictResult = PyObject_Call(toDictFunc, tuple, NULL);
-    Py_DECREF(tuple);
-    Py_DECREF(toDictFunc);
+    PyErr_Format (PyExc_ValueError, "chunk_size must be positive");
+    return NULL;
+  }
 
-    if (toDictResult == NULL)
+  if (PyInt_Check(file) || PyLong_Check(file))
+  {
+    // A raw file descriptor gets the UTF-8 bytes written to it directly
+    fileEncoder.fd = (int) PyLong_AsLong(file);
+    if (fileEncoder.fd == -1 && PyErr_Occurred())
     {
-      PyErr_Clear();
-      tc->type = JT_NULL;
-      return;
+      return NULL;
+    }
+  }
+  else
+  {
+    if (!PyObject_HasAttrString (file, "write"))
+    {
+      PyErr_Format (PyExc_TypeError, "expected file");
+      return NULL;
     }
 
-    if (!PyDict_Check(toDictResult))
+    fileEncoder.write = PyObject_GetAttrString (file, "write");
+
+    if (!PyCallable_Check (fileEncoder.write))
     {
-      Py_DECREF(toDictResult);
-      tc->type = JT_NULL;
-      return;
+      Py_XDECREF(fileEncoder.write);
+      PyErr_Format (PyExc_TypeError, "expected file");
+      return NULL;
     }
+  }
 
-    PRINTMARK();
-    tc->type = JT_OBJECT;
-    SetupDictIter(toDictResult, pc, enc);
-    return;
+  buffer = (char *) PyObject_Malloc(chunkSize);
+  if (!buffer)
+  {
+    Py_XDECREF(fileEncoder.write);
+    return PyErr_NoMemory();
   }
 
-  PRINTMARK();
-  PyErr_Clear();
+  encoder->flush = FileEncoder_flush;
 
-  iter = PyObject_GetIter(obj);
+  JSON_EncodeBegin(encoder, buffer, chunkSize);
+  if (!encoder->errorMsg)
+  {
+    JSON_EncodeAppend(data, encoder);
+  }
 
-  if (iter != NULL)
+  if (!encoder->errorMsg && !PyErr_Occurred() && encoder->offset > encoder->start)
   {
-    PRINTMARK();
-    tc->type = JT_ARRAY;
-    pc->iterator = iter;
-    pc->iterEnd = Iter_iterEnd;
-    pc->iterNext = Iter_iterNext;
-    pc->iterGetValue = Iter_iterGetValue;
-    pc->iterGetName = Iter_iterGetName;
-    return;
+    fileEncoder.final = 1;
+    FileEncoder_flush(encoder, encoder->start, encoder->offset - encoder->start);
   }
 
-  PRINTMARK();
-  PyErr_Clear();
+  if (encoder->heap && encoder->start)
+  {
+    encoder->free (encoder->start);
+  }
+  PyObject_Free(buffer);
+  Py_XDECREF(fileEncoder.write);
 
-  PRINTMARK();
-  tc->type = JT_OBJECT;
-  GET_TC(tc)->attrList = PyObject_Dir(obj);
-  
-  if (GET_TC(tc)->attrList == NULL)
+  if (PyErr_Occurred())
   {
-    PyErr_Clear();
-    goto INVALID;
+    return NULL;
   }
 
-  GET_TC(tc)->index = 0;
-  GET_TC(tc)->size = PyList_GET_SIZE(GET_TC(tc)->attrList);
-  PRINTMARK();
-  
-  pc->iterEnd = Dir_iterEnd;
-  pc->iterNext = Dir_iterNext;
-  pc->iterGetValue = Dir_iterGetValue;
-  pc->iterGetName = Dir_iterGetName;
-  return;
+  if (encoder->errorMsg)
+  {
+    PyErr_Format (PyExc_OverflowError, "%s", encoder->errorMsg);
+    return NULL;
+  }
 
-INVALID:
   PRINTMARK();
-  tc->type = JT_INVALID;
-  PyObject_Free(tc->prv);
-  tc->prv = NULL;
-  return;
+
+  Py_RETURN_NONE;
 }
 
-void Object_endTypeContext(JSOBJ obj, JSONTypeContext *tc)
+/*
+Hashing
+The output is handed to a hashlib object's update a buffer full at a time as it is encoded, so it is never
+held in full and memory use stays constant however large the object is. It is canonical JSON (RFC 8785)
+unless canonical=False is passed.
+*/
+typedef struct __DigestEncoder
 {
-  Py_XDECREF(GET_TC(tc)->newObj);
+  JSONObjectEncoder encoder;
+  PyObject *update;
+} DigestEncoder;
 
-  PyObject_Free(tc->prv);
-  tc->prv = NULL;
-}
+static PyObject *g_hashlibNew = NULL;
 
-const char *Object_getStringValue(JSOBJ obj, JSONTypeContext *tc, size_t *_outLen)
+static size_t DigestEncoder_flush(JSONObjectEncoder *enc, const char *data, size_t cbData)
 {
-  return GET_TC(tc)->PyTypeToJSON (obj, tc, NULL, _outLen);
-}
+  DigestEncoder *digestEncoder = (DigestEncoder *) enc;
+  PyObject *chunk;
+  PyObject *result;
 
-JSINT64 Object_getLongValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  JSINT64 ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
-}
+  chunk = PyBytes_FromStringAndSize(data, cbData);
+  if (chunk == NULL)
+  {
+    enc->errorMsg = "Could not hash output";
+    return 0;
+  }
 
-JSUINT64 Object_getUnsignedLongValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  JSUINT64 ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
-}
+  result = PyObject_CallFunctionObjArgs(digestEncoder->update, chunk, NULL);
+  Py_DECREF(chunk);
 
-JSINT32 Object_getIntValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  JSINT32 ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
-}
+  if (result == NULL)
+  {
+    enc->errorMsg = "Could not hash output";
+    return 0;
+  }
 
-double Object_getDoubleValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  double ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
+  Py_DECREF(result);
+  return cbData;
 }
 
-static void Object_releaseObject(JSOBJ _obj)
+static PyObject *newHash(PyObject *algorithm)
 {
-  Py_DECREF( (PyObject *) _obj);
-}
+  PyObject *hashlib;
 
-int Object_iterNext(JSOBJ obj, JSONTypeContext *tc)
-{
-  return GET_TC(tc)->iterNext(obj, tc);
-}
+  if (algorithm != NULL && !PyUnicode_Check(algorithm) && !PyString_Check(algorithm))
+  {
+    if (!PyCallable_Check(algorithm))
+    {
+      PyErr_Format (PyExc_TypeError, "algorithm must be a hashlib algorithm name or a callable returning a hash object");
+      return NULL;
+    }
+    return PyObject_CallFunctionObjArgs(algorithm, NULL);
+  }
 
-void Object_iterEnd(JSOBJ obj, JSONTypeContext *tc)
-{
-  GET_TC(tc)->iterEnd(obj, tc);
-}
+  if (g_hashlibNew == NULL)
+  {
+    hashlib = PyImport_ImportModule("hashlib");
+    if (hashlib == NULL)
+    {
+      return NULL;
+    }
+    g_hashlibNew = PyObject_GetAttrString(hashlib, "new");
+    Py_DECREF(hashlib);
+    if (g_hashlibNew == NULL)
+    {
+      return NULL;
+    }
+  }
 
-JSOBJ Object_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
-{
-  return GET_TC(tc)->iterGetValue(obj, tc);
+  if (algorithm == NULL)
+  {
+    return PyObject_CallFunction(g_hashlibNew, "s", "sha256");
+  }
+  return PyObject_CallFunctionObjArgs(g_hashlibNew, algorithm, NULL);
 }
 
-char *Object_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
-{
-  return GET_TC(tc)->iterGetName(obj, tc, outLen);
-}
+static char *g_digestKwlist[] = { "obj", "algorithm", ENCODER_KWLIST, NULL };
 
-PyObject* objToJSON(PyObject* self, PyObject *args, PyObject *kwargs)
+PyObject* objToJSONDigest(PyObject* self, PyObject *args, PyObject *kwargs)
 {
-  static char *kwlist[] = { "obj", "ensure_ascii", "double_precision", "encode_html_chars", "escape_forward_slashes", "sort_keys", "indent", NULL };
-
+  PyObject *data;
+  PyObject *algorithm = NULL;
+  PyObject *hash;
+  PyObject *result = NULL;
+  EncoderOptions options = g_defaultEncoderOptions;
   char buffer[65536];
-  char *ret;
-  PyObject *newobj;
-  PyObject *oinput = NULL;
-  PyObject *oensureAscii = NULL;
-  PyObject *oencodeHTMLChars = NULL;
-  PyObject *oescapeForwardSlashes = NULL;
-  PyObject *osortKeys = NULL;
-
-  JSONObjectEncoder encoder =
-  {
-    Object_beginTypeContext,
-    Object_endTypeContext,
-    Object_getStringValue,
-    Object_getLongValue,
-    Object_getUnsignedLongValue,
-    Object_getIntValue,
-    Object_getDoubleValue,
-    Object_iterNext,
-    Object_iterEnd,
-    Object_iterGetValue,
-    Object_iterGetName,
-    Object_releaseObject,
-    PyObject_Malloc,
-    PyObject_Realloc,
-    PyObject_Free,
-    -1, //recursionMax
-    10,  // default double precision setting
-    1, //forceAscii
-    0, //encodeHTMLChars
-    1, //escapeForwardSlashes
-    0, //sortKeys
-    0, //indent
-    NULL, //prv
-  };
-
+  DigestEncoder digestEncoder;
+  JSONObjectEncoder *encoder = &digestEncoder.encoder;
 
   PRINTMARK();
 
-  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OiOOOi", kwlist, &oinput, &oensureAscii, &encoder.doublePrecision, &oencodeHTMLChars, &oescapeForwardSlashes, &osortKeys, &encoder.indent))
+  digestEncoder.encoder = g_objectEncoder;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O" ENCODER_FORMAT, g_digestKwlist, &data, &algorithm, ENCODER_ARGS(options, encoder)))
   {
     return NULL;
   }
 
-  if (oensureAscii != NULL && !PyObject_IsTrue(oensureAscii))
+  if (options.ocanonical == NULL)
   {
-    encoder.forceASCII = 0;
+    options.ocanonical = Py_True;
   }
 
-  if (oencodeHTMLChars != NULL && PyObject_IsTrue(oencodeHTMLChars))
+  if (!setEncoderOptions(encoder, &options))
   {
-    encoder.encodeHTMLChars = 1;
+    return NULL;
   }
 
-  if (oescapeForwardSlashes != NULL && !PyObject_IsTrue(oescapeForwardSlashes))
+  hash = newHash(algorithm);
+  if (hash == NULL)
   {
-    encoder.escapeForwardSlashes = 0;
+    return NULL;
   }
 
-  if (osortKeys != NULL && PyObject_IsTrue(osortKeys))
+  digestEncoder.update = PyObject_GetAttrString(hash, "update");
+  if (digestEncoder.update == NULL)
   {
-    encoder.sortKeys = 1;
+    Py_DECREF(hash);
+    return NULL;
   }
 
-  PRINTMARK();
-  ret = JSON_EncodeObject (oinput, &encoder, buffer, sizeof (buffer));
-  PRINTMARK();
+  encoder->flush = DigestEncoder_flush;
 
-  if (PyErr_Occurred())
+  JSON_EncodeBegin(encoder, buffer, sizeof(buffer));
+  if (!encoder->errorMsg)
   {
-    return NULL;
+    JSON_EncodeAppend(data, encoder);
   }
 
-  if (encoder.errorMsg)
+  if (!encoder->errorMsg && !PyErr_Occurred() && encoder->offset > encoder->start)
   {
-    if (ret != buffer)
-    {
-      encoder.free (ret);
-    }
+    DigestEncoder_flush(encoder, encoder->start, encoder->offset - encoder->start);
+  }
 
-    PyErr_Format (PyExc_OverflowError, "%s", encoder.errorMsg);
-    return NULL;
+  if (encoder->heap && encoder->start)
+  {
+    encoder->free (encoder->start);
   }
+  Py_DECREF(digestEncoder.update);
 
-  newobj = PyString_FromString (ret);
+  if (PyErr_Occurred())
+  {
+    Py_DECREF(hash);
+    return NULL;
+  }
 
-  if (ret != buffer)
+  if (encoder->errorMsg)
   {
-    encoder.free (ret);
+    Py_DECREF(hash);
+    PyErr_Format (PyExc_OverflowError, "%s", encoder->errorMsg);
+    return NULL;
   }
 
   PRINTMARK();
 
-  return newobj;
+  result = PyObject_CallMethod(hash, "digest", NULL);
+  Py_DECREF(hash);
+  return result;
 }
 
-PyObject* objToJSONFile(PyObject* self, PyObject *args, PyObject *kwargs)
+//=============================================================================
+// Reusable encoder
+// Options are parsed once at construction. The heap buffer a large output grows into
+// is kept for the next call as long as it is no larger than maxBufferSize.
+//=============================================================================
+
+#define ENCODER_DEFAULT_MAX_BUFFER_SIZE (4 * 1024 * 1024)
+
+typedef struct __EncoderObject
 {
-  PyObject *data;
-  PyObject *file;
-  PyObject *string;
-  PyObject *write;
-  PyObject *argtuple;
+  PyObject_HEAD
+  JSONObjectEncoder encoder;
+  char *buffer;
+  size_t cbBuffer;
+  Py_ssize_t maxBufferSize;
+  PyObject *defaultFn;
+  int busy;
+} EncoderObject;
 
-  PRINTMARK();
+static char *g_encoderObjectKwlist[] = { ENCODER_KWLIST, "max_buffer_size", NULL };
+
+/*
+Starts out with the default options, so an encoder whose __init__ never ran still works */
+static PyObject *Encoder_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+  EncoderObject *self = (EncoderObject *) type->tp_alloc(type, 0);
 
-  if (!PyArg_ParseTuple (args, "OO", &data, &file))
+  if (self == NULL)
   {
     return NULL;
   }
 
-  if (!PyObject_HasAttrString (file, "write"))
+  self->encoder = g_objectEncoder;
+  self->maxBufferSize = ENCODER_DEFAULT_MAX_BUFFER_SIZE;
+  return (PyObject *) self;
+}
+
+static int Encoder_init(EncoderObject *self, PyObject *args, PyObject *kwargs)
+{
+  EncoderOptions options = g_defaultEncoderOptions;
+  JSONObjectEncoder encoder = g_objectEncoder;
+  Py_ssize_t maxBufferSize = ENCODER_DEFAULT_MAX_BUFFER_SIZE;
+
+  if (self->busy)
+  {
+    // A default handler re-initialising its encoder would free what the running encode uses
+    PyErr_Format (PyExc_RuntimeError, "Encoder can't be re-initialised while encoding");
+    return -1;
+  }
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|" ENCODER_FORMAT "n", g_encoderObjectKwlist, ENCODER_ARGS(options, &encoder), &maxBufferSize))
   {
-    PyErr_Format (PyExc_TypeError, "expected file");
-    return NULL;
+    return -1;
   }
 
-  write = PyObject_GetAttrString (file, "write");
+  if (maxBufferSize < 0)
+  {
+    PyErr_Format (PyExc_ValueError, "max_buffer_size must not be negative");
+    return -1;
+  }
 
-  if (!PyCallable_Check (write))
+  if (!setEncoderOptions(&encoder, &options))
   {
-    Py_XDECREF(write);
-    PyErr_Format (PyExc_TypeError, "expected file");
-    return NULL;
+    return -1;
   }
 
-  argtuple = PyTuple_Pack(1, data);
+  // The default handler has to outlive the arguments it came with
+  Py_XINCREF((PyObject *) encoder.prv);
+  Py_XDECREF(self->defaultFn);
+  self->defaultFn = (PyObject *) encoder.prv;
 
-  string = objToJSON (self, argtuple, kwargs);
+  self->encoder = encoder;
+  self->maxBufferSize = maxBufferSize;
 
-  if (string == NULL)
+  if (self->buffer && self->cbBuffer > (size_t) maxBufferSize)
   {
-    Py_XDECREF(write);
-    Py_XDECREF(argtuple);
-    return NULL;
+    PyObject_Free(self->buffer);
+    self->buffer = NULL;
+    self->cbBuffer = 0;
   }
 
-  Py_XDECREF(argtuple);
+  return 0;
+}
+
+/*
+A default handler may refer back to its encoder, the cycle is left to the garbage collector */
+static int Encoder_traverse(EncoderObject *self, visitproc visit, void *arg)
+{
+  Py_VISIT(self->defaultFn);
+  return 0;
+}
+
+static int Encoder_clear(EncoderObject *self)
+{
+  self->encoder.prv = NULL;
+  Py_CLEAR(self->defaultFn);
+  return 0;
+}
+
+static void Encoder_dealloc(EncoderObject *self)
+{
+  PyObject_GC_UnTrack(self);
+  Encoder_clear(self);
+  PyObject_Free(self->buffer);
+  Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static PyObject *Encoder_run(EncoderObject *self, PyObject *oinput, int asBytes)
+{
+  char stackBuffer[65536];
+  char *buffer;
+  size_t cbBuffer;
+  char *ret;
+  PyObject *newobj;
+  JSONObjectEncoder encoder = self->encoder;
+  int owner;
+
+  PRINTMARK();
+
+  /*
+  A default handler may call back into the same encoder, only the outermost call owns the retained buffer */
+  owner = !self->busy;
 
-  argtuple = PyTuple_Pack (1, string);
-  if (argtuple == NULL)
+  if (owner && self->buffer)
   {
-    Py_XDECREF(write);
-    return NULL;
+    buffer = self->buffer;
+    cbBuffer = self->cbBuffer;
+  }
+  else
+  {
+    buffer = stackBuffer;
+    cbBuffer = sizeof(stackBuffer);
+  }
+
+  self->busy = 1;
+  ret = JSON_EncodeObject (oinput, &encoder, buffer, cbBuffer);
+  if (owner)
+  {
+    self->busy = 0;
   }
-  if (PyObject_CallObject (write, argtuple) == NULL)
+
+  if (PyErr_Occurred() || encoder.errorMsg)
   {
-    Py_XDECREF(write);
-    Py_XDECREF(argtuple);
+    if (encoder.heap && encoder.start)
+    {
+      encoder.free (encoder.start);
+    }
+
+    if (!PyErr_Occurred())
+    {
+      PyErr_Format (PyExc_OverflowError, "%s", encoder.errorMsg);
+    }
     return NULL;
   }
 
-  Py_XDECREF(write);
-  Py_DECREF(argtuple);
-  Py_XDECREF(string);
+  newobj = asBytes ? PyBytes_FromStringAndSize (ret, encoder.offset - encoder.start - 1) : PyString_FromString (ret);
+
+  if (ret != buffer)
+  {
+    if (owner && (size_t) (encoder.end - encoder.start) <= (size_t) self->maxBufferSize)
+    {
+      PyObject_Free(self->buffer);
+      self->buffer = ret;
+      self->cbBuffer = encoder.end - encoder.start;
+    }
+    else
+    {
+      encoder.free (ret);
+    }
+  }
 
   PRINTMARK();
 
-  Py_RETURN_NONE;
+  return newobj;
+}
+
+static PyObject *Encoder_encode(EncoderObject *self, PyObject *oinput)
+{
+  return Encoder_run(self, oinput, 0);
+}
+
+static PyObject *Encoder_encodeBytes(EncoderObject *self, PyObject *oinput)
+{
+  return Encoder_run(self, oinput, 1);
 }
+
+static PyMethodDef Encoder_methods[] = {
+  {"encode", (PyCFunction) Encoder_encode, METH_O, "Converts arbitrary object recursivly into JSON using the options given to the constructor."},
+  {"encode_bytes", (PyCFunction) Encoder_encodeBytes, METH_O, "Converts arbitrary object recursivly into JSON as UTF-8 bytes using the options given to the constructor."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+PyTypeObject EncoderType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ultrajson.Encoder",          /* tp_name */
+  sizeof(EncoderObject),        /* tp_basicsize */
+  0,                            /* tp_itemsize */
+  (destructor) Encoder_dealloc, /* tp_dealloc */
+  0,                            /* tp_print */
+  0,                            /* tp_getattr */
+  0,                            /* tp_setattr */
+  0,                            /* tp_compare */
+  0,                            /* tp_repr */
+  0,                            /* tp_as_number */
+  0,                            /* tp_as_sequence */
+  0,                            /* tp_as_mapping */
+  0,                            /* tp_hash */
+  0,                            /* tp_call */
+  0,                            /* tp_str */
+  0,                            /* tp_getattro */
+  0,                            /* tp_setattro */
+  0,                            /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /* tp_flags */
+  "Reusable encoder. Takes the same options as dumps once at construction, and keeps output buffers up to max_buffer_size bytes between calls to encode().", /* tp_doc */
+  (traverseproc) Encoder_traverse, /* tp_traverse */
+  (inquiry) Encoder_clear,      /* tp_clear */
+  0,                            /* tp_richcompare */
+  0,                            /* tp_weaklistoffset */
+  0,                            /* tp_iter */
+  0,                            /* tp_iternext */
+  Encoder_methods,              /* tp_methods */
+  0,                            /* tp_members */
+  0,                            /* tp_getset */
+  0,                            /* tp_base */
+  0,                            /* tp_dict */
+  0,                            /* tp_descr_get */
+  0,                            /* tp_descr_set */
+  0,                            /* tp_dictoffset */
+  (initproc) Encoder_init,      /* tp_init */
+  0,                            /* tp_alloc */
+  Encoder_new,                  /* tp_new */
+  PyObject_GC_Del,              /* tp_free */
+};
@@ -46,22 +46,76 @@ void initObjToJSON(void);
 /* JSONToObj */
 PyObject* JSONToObj(PyObject* self, PyObject *args, PyObject *kwargs);
 
+/* objToJSONBytes */
+PyObject* objToJSONBytes(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* objToJSONDigest */
+PyObject* objToJSONDigest(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* objToJSONRegister */
+PyObject* objToJSONRegister(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* objToJSONInto */
+PyObject* objToJSONInto(PyObject* self, PyObject *args, PyObject *kwargs);
+
 /* objToJSONFile */
 PyObject* objToJSONFile(PyObject* self, PyObject *args, PyObject *kwargs);
 
 /* JSONFileToObj */
 PyObject* JSONFileToObj(PyObject* self, PyObject *args, PyObject *kwargs);
 
+/* JSONMmapToObj */
+PyObject* JSONMmapToObj(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* objToJSONLines */
+PyObject* objToJSONLines(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* JSONLinesToObj */
+PyObject* JSONLinesToObj(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* JSONValidate */
+PyObject* JSONValidate(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* JSONExtract */
+PyObject* JSONExtract(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* JSONToLazy */
+PyObject* JSONToLazy(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* JSONToColumns */
+PyObject* JSONToColumns(PyObject* self, PyObject *args, PyObject *kwargs);
+
+/* Decoder */
+extern PyTypeObject DecoderType;
+
+/* Lazy documents */
+extern PyTypeObject LazyArrayType;
+extern PyTypeObject LazyObjectType;
 
-#define ENCODER_HELP_TEXT "Use ensure_ascii=false to output UTF-8. Pass in double_precision to alter the maximum digit precision of doubles. Set encode_html_chars=True to encode < > & as unicode escape sequences. Set escape_forward_slashes=False to prevent escaping / characters."
+/* Encoder */
+extern PyTypeObject EncoderType;
+
+
+#define ENCODER_HELP_TEXT "Use ensure_ascii=false to output UTF-8. Pass in double_precision to alter the maximum digit precision of doubles. Set encode_html_chars=True to encode < > & as unicode escape sequences. Set escape_forward_slashes=False to prevent escaping / characters. Set shortest_float=True to encode doubles as the shortest string that reads back as the same value. Pass default=callable to encode objects of types without built-in support as the object it returns. Set canonical=True to encode as RFC 8785 canonical JSON, which overrides the formatting options."
 
 static PyMethodDef ultrajsonMethods[] = {
   {"encode", (PyCFunction) objToJSON, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursivly into JSON. " ENCODER_HELP_TEXT},
-  {"decode", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string to dict object structure. Use precise_float=True to use high precision float decoder."},
+  {"decode", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string, bytes or any object supporting the buffer protocol to dict object structure. Use precise_float=True to use high precision float decoder. Set release_gil=True to release the GIL while scanning large documents. Set cache_keys=False to disable reusing strings for repeated object keys."},
   {"dumps", (PyCFunction) objToJSON, METH_VARARGS | METH_KEYWORDS,  "Converts arbitrary object recursivly into JSON. " ENCODER_HELP_TEXT},
-  {"loads", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS,  "Converts JSON as string to dict object structure. Use precise_float=True to use high precision float decoder."},
-  {"dump", (PyCFunction) objToJSONFile, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON file. " ENCODER_HELP_TEXT},
+  {"loads", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS,  "Converts JSON as string, bytes or any object supporting the buffer protocol to dict object structure. Use precise_float=True to use high precision float decoder. Set release_gil=True to release the GIL while scanning large documents. Set cache_keys=False to disable reusing strings for repeated object keys."},
+  {"dumpb", (PyCFunction) objToJSONBytes, METH_VARARGS | METH_KEYWORDS,  "Converts arbitrary object recursivly into JSON returned as UTF-8 bytes, built directly from the encoder output. " ENCODER_HELP_TEXT},
+  {"digest", (PyCFunction) objToJSONDigest, METH_VARARGS | METH_KEYWORDS,  "Returns the hash of an object's canonical JSON (RFC 8785: sorted keys, no whitespace, ECMAScript number formatting, minimal string escaping) as bytes, hashing the output as it is encoded rather than building it. algorithm is a hashlib algorithm name, sha256 by default, or a callable returning a hash object. Pass canonical=False to hash the output the other encoder options describe instead. " ENCODER_HELP_TEXT},
+  {"register", (PyCFunction) objToJSONRegister, METH_VARARGS | METH_KEYWORDS, "Registers func to encode objects of exactly the given type, ahead of all built-in handling: func(obj) returns the object to encode in its place. Pass None as func to remove the registration."},
+  {"dumps_into", (PyCFunction) objToJSONInto, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursivly into JSON, written into a writable buffer such as a bytearray or memoryview starting at offset. Returns the number of bytes written. A bytearray is grown to fit unless grow=False, other buffers raise ValueError when too small. " ENCODER_HELP_TEXT},
+  {"dump", (PyCFunction) objToJSONFile, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON file, given as a file object or a file descriptor. The output is written in chunks of chunk_size bytes as it is encoded. " ENCODER_HELP_TEXT},
   {"load", (PyCFunction) JSONFileToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as file to dict object structure. Use precise_float=True to use high precision float decoder."},
+  {"load_mmap", (PyCFunction) JSONMmapToObj, METH_VARARGS | METH_KEYWORDS, "Converts the JSON file at the given path to dict object structure, decoding straight from a read only memory mapping of it. Takes the same options as loads."},
+  {"dumps_lines", (PyCFunction) objToJSONLines, METH_VARARGS | METH_KEYWORDS, "Converts an iterable of objects into newline delimited JSON bytes, one record per line. " ENCODER_HELP_TEXT},
+  {"loads_lines", (PyCFunction) JSONLinesToObj, METH_VARARGS | METH_KEYWORDS, "Converts newline delimited JSON as string, bytes or buffer to a list of objects, skipping blank lines. Use precise_float=True to use high precision float decoder."},
+  {"loads_lazy", (PyCFunction) JSONToLazy, METH_VARARGS | METH_KEYWORDS, "Validates JSON as string, bytes or buffer into a compact index and returns arrays and objects as LazyArray and LazyObject proxies, which only build the values that are accessed. Use precise_float=True to use high precision float decoder."},
+  {"loads_columns", (PyCFunction) JSONToColumns, METH_VARARGS | METH_KEYWORDS, "Decodes JSON as string, bytes or buffer holding an array of objects into a dict of columns, one per key, without building the objects. Columns of integers or of numbers become array.array('q') or array.array('d'), others are lists. Objects missing a key give None in its column. Set numpy=True to get numpy arrays in place of array.array. Use precise_float=True to use high precision float decoder."},
+  {"validate", (PyCFunction) JSONValidate, METH_VARARGS | METH_KEYWORDS, "Checks that JSON as string, bytes or buffer is valid without building any objects, with the GIL released. Returns True or raises ValueError naming the byte offset of the error. Set max_depth to limit how deeply arrays and objects may nest."},
+  {"extract", (PyCFunction) JSONExtract, METH_VARARGS | METH_KEYWORDS, "Returns the list of values the given JSON pointers (such as '/items/0/id') refer to in JSON as string, bytes or buffer, decoding only those values and skipping everything else. Pointers matching nothing give default. Set lines=True to get one such list per line of newline delimited JSON. Use precise_float=True to use high precision float decoder."},
   {NULL, NULL, 0, NULL}       /* Sentinel */
 };
 
@@ -97,6 +151,12 @@ PYMODINITFUNC
   PyObject *version_string;
 
   initObjToJSON();
+
+  if (PyType_Ready(&DecoderType) < 0 || PyType_Ready(&EncoderType) < 0 || PyType_Ready(&LazyArrayType) < 0 || PyType_Ready(&LazyObjectType) < 0)
+  {
+    MODINITERROR;
+  }
+
   module = PYMODULE_CREATE();
 
   if (module == NULL)
@@ -104,6 +164,18 @@ PYMODINITFUNC
     MODINITERROR;
   }
 
+  Py_INCREF(&DecoderType);
+  PyModule_AddObject (module, "Decoder", (PyObject *) &DecoderType);
+
+  Py_INCREF(&EncoderType);
+  PyModule_AddObject (module, "Encoder", (PyObject *) &EncoderType);
+
+  Py_INCREF(&LazyArrayType);
+  PyModule_AddObject (module, "LazyArray", (PyObject *) &LazyArrayType);
+
+  Py_INCREF(&LazyObjectType);
+  PyModule_AddObject (module, "LazyObject", (PyObject *) &LazyObjectType);
+
   version_string = PyString_FromString (ultrajson_VERSION);
   PyModule_AddObject (module, "__version__", version_string);
 
@@ -27,6 +27,18 @@ def ultrajsonEnc():
     x = ultrajson.encode(testObject, ensure_ascii=False)
     #print "ultrajsonEnc", x
 
+def ultrajsonEncShortest():
+    x = ultrajson.encode(testObject, ensure_ascii=False, shortest_float=True)
+    return x
+
+def ultrajsonEncASCII():
+    x = ultrajson.encode(testObject)
+    return x
+
+def ultrajsonEncHTML():
+    x = ultrajson.encode(testObject, ensure_ascii=False, encode_html_chars=True)
+    return x
+
 def simplejsonEnc():
     x = simplejson.dumps(testObject)
     #print "simplejsonEnc", x
@@ -63,6 +75,10 @@ def ultrajsonDec():
     x = ultrajson.decode(decodeData)
     #print "ultrajsonDec: ", x
 
+def ultrajsonDecPrecise():
+    x = ultrajson.decode(decodeData, precise_float=True)
+    #print "ultrajsonDecPrecise: ", x
+
 def simplejsonDec():
     x = simplejson.loads(decodeData)
     #print "simplejsonDec: ", x
@@ -110,6 +126,7 @@ for x in xrange(256):
 COUNT = 10000
 
 print "ultrajson encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonEnc()", "from __main__ import ultrajsonEnc", gettime,10, COUNT)), )
+print "ultrajson shortest    : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonEncShortest()", "from __main__ import ultrajsonEncShortest", gettime,10, COUNT)), )
 if not skip_lib_comparisons:
     print "simplejson encode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonEnc()", "from __main__ import simplejsonEnc", gettime,10, COUNT)), )
     print "yajl  encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlEnc()", "from __main__ import yajlEnc", gettime, 10, COUNT)), )
@@ -117,6 +134,7 @@ if not skip_lib_comparisons:
 decodeData = json.dumps(testObject)
 
 print "ultrajson decode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonDec()", "from __main__ import ultrajsonDec", gettime,10, COUNT)), )
+print "ultrajson precise     : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonDecPrecise()", "from __main__ import ultrajsonDecPrecise", gettime,10, COUNT)), )
 if not skip_lib_comparisons:
     print "simplejson decode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonDec()", "from __main__ import simplejsonDec", gettime,10, COUNT)), )
     print "yajl decode       : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlDec()", "from __main__ import yajlDec", gettime,10, COUNT)), )
@@ -249,3 +267,59 @@ print "ultrajson encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ul
 if not skip_lib_comparisons:
     print "simplejson encode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonEncSorted()", "from __main__ import simplejsonEncSorted", gettime,10, COUNT)), )
     print "yajl  encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlEncSorted()", "from __main__ import yajlEncSorted", gettime, 10, COUNT)), )
+
+print "Array with 4096 doubles across the exponent range:"
+testObject = []
+
+for x in xrange(4096):
+    testObject.append(random.random() * 10 ** random.randint(-300, 300))
+
+COUNT = 500
+
+decodeData = json.dumps(testObject)
+
+print "ultrajson decode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonDec()", "from __main__ import ultrajsonDec", gettime,10, COUNT)), )
+print "ultrajson precise     : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonDecPrecise()", "from __main__ import ultrajsonDecPrecise", gettime,10, COUNT)), )
+if not skip_lib_comparisons:
+    print "simplejson decode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonDec()", "from __main__ import simplejsonDec", gettime,10, COUNT)), )
+    print "yajl decode       : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlDec()", "from __main__ import yajlDec", gettime,10, COUNT)), )
+
+print "Array with 256 long log message strings:"
+testObject = []
+
+for x in xrange(256):
+    testObject.append("2014-03-01 12:00:%02d INFO worker-%d processed request id=%d for user %d in %d ms, cache hit ratio %.3f, upstream answered with status 200 and %d bytes" % (x % 60, x % 16, x * 7919, x * 31, x % 250, random.random(), x * 1024))
+
+COUNT = 2000
+
+print "ultrajson encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonEnc()", "from __main__ import ultrajsonEnc", gettime,10, COUNT)), )
+print "ultrajson ascii       : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonEncASCII()", "from __main__ import ultrajsonEncASCII", gettime,10, COUNT)), )
+print "ultrajson html        : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonEncHTML()", "from __main__ import ultrajsonEncHTML", gettime,10, COUNT)), )
+if not skip_lib_comparisons:
+    print "simplejson encode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonEnc()", "from __main__ import simplejsonEnc", gettime,10, COUNT)), )
+    print "yajl  encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlEnc()", "from __main__ import yajlEnc", gettime, 10, COUNT)), )
+
+print "Pretty printed array of 256 objects with long strings:"
+testObject = []
+
+for x in xrange(256):
+    testObject.append({"id": random.randint(10 ** 16, 10 ** 18), "user": user, "description": "A somewhat longer description of item %d that goes on for a while, as product descriptions and log messages tend to do." % x})
+
+COUNT = 2000
+
+decodeData = json.dumps(testObject, indent=4)
+
+print "ultrajson decode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonDec()", "from __main__ import ultrajsonDec", gettime,10, COUNT)), )
+if not skip_lib_comparisons:
+    print "simplejson decode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonDec()", "from __main__ import simplejsonDec", gettime,10, COUNT)), )
+    print "yajl decode       : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlDec()", "from __main__ import yajlDec", gettime,10, COUNT)), )
+
+print "Array of 1000000 small ints:"
+testObject = [x % 100 for x in xrange(1000000)]
+
+COUNT = 5
+
+print "ultrajson encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ultrajsonEnc()", "from __main__ import ultrajsonEnc", gettime,10, COUNT)), )
+if not skip_lib_comparisons:
+    print "simplejson encode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonEnc()", "from __main__ import simplejsonEnc", gettime,10, COUNT)), )
+    print "yajl  encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlEnc()", "from __main__ import yajlEnc", gettime, 10, COUNT)), )
@@ -23,6 +23,11 @@ except:
 
 import re
 import random
+import struct
+import array
+import hashlib
+import gc
+import weakref
 import decimal
 from functools import partial
 
@@ -45,7 +50,7 @@ class UltraJSONTests(unittest.TestCase):
         decoded = ultrajson.decode(encoded)
         self.assertEqual(decoded, 1337.1337)
 
-    def test_encodeStringConversion(self):
+    def test_encodeStringConversionEscapes(self):
         input = "A string \\ / \b \f \n \r \t </script> &"
         not_html_encoded = '"A string \\\\ \\/ \\b \\f \\n \\r \\t <\\/script> &"'
         html_encoded = '"A string \\\\ \\/ \\b \\f \\n \\r \\t \\u003c\\/script\\u003e \\u0026"'
@@ -1065,6 +1070,871 @@ class UltraJSONTests(unittest.TestCase):
         sortedKeys = ultrajson.dumps(data, sort_keys=True)
         self.assertEqual(sortedKeys, '{"a":1,"b":1,"c":1,"d":1,"e":1,"f":1}')
 
+    def test_decodeReleaseGIL(self):
+        input = '[{"a": 1, "b": "\\u00e5\\u00e4", "c": [1.5, null, true, false, -1099511627776, 18446744073709551615]}, {}, []]'
+        self.assertEqual(ultrajson.decode(input), ultrajson.decode(input, release_gil=True))
+        self.assertEqual(json.loads(input), ultrajson.decode(input, release_gil=True))
+
+    def test_decodeReleaseGILBroken(self):
+        for input in ['[1, 2', '{"a": }', '', '[1] x']:
+            self.assertRaises(ValueError, ultrajson.decode, input, release_gil=True)
+
+    def test_decodeReleaseGILThreaded(self):
+        import threading
+        input = ultrajson.encode([{"key": x, "value": str(x)} for x in range(1000)])
+        expected = ultrajson.decode(input)
+        results = []
+        def worker():
+            results.append(ultrajson.decode(input, release_gil=True))
+        threads = [threading.Thread(target=worker) for x in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([expected] * 4, results)
+
+    def test_decoderChunked(self):
+        input = '{"a": [1, 2, 3]} 12 "x\\"y" true\n[1] 3.5'
+        decoder = ultrajson.Decoder()
+        output = []
+        for chr in input:
+            decoder.feed(chr)
+            output.extend(decoder)
+        self.assertEqual([{"a": [1, 2, 3]}, 12, 'x"y', True, [1]], output)
+        decoder.close()
+        output.extend(decoder)
+        self.assertEqual([{"a": [1, 2, 3]}, 12, 'x"y', True, [1], 3.5], output)
+
+    def test_decoderArrayItems(self):
+        decoder = ultrajson.Decoder(array_items=True)
+        decoder.feed(' [ {"a": 1} , 2, "s"')
+        self.assertEqual([{"a": 1}, 2, "s"], list(decoder))
+        decoder.feed(', [3] ]')
+        self.assertEqual([[3]], list(decoder))
+        decoder.close()
+        self.assertEqual([], list(decoder))
+
+        decoder = ultrajson.Decoder(array_items=True)
+        decoder.feed('[]')
+        decoder.close()
+        self.assertEqual([], list(decoder))
+
+    def test_decoderTruncated(self):
+        decoder = ultrajson.Decoder()
+        decoder.feed('[1, 2')
+        self.assertEqual([], list(decoder))
+        decoder.close()
+        self.assertRaises(ValueError, list, decoder)
+
+        decoder = ultrajson.Decoder(array_items=True)
+        decoder.feed('[1, 2')
+        decoder.close()
+        self.assertRaises(ValueError, list, decoder)
+
+    def test_decoderBroken(self):
+        decoder = ultrajson.Decoder(array_items=True)
+        decoder.feed('{"a": 1}')
+        self.assertRaises(ValueError, list, decoder)
+
+        decoder = ultrajson.Decoder()
+        decoder.feed('1 }')
+        self.assertRaises(ValueError, list, decoder)
+        self.assertRaises(TypeError, decoder.feed, 1)
+        decoder.close()
+        self.assertRaises(ValueError, decoder.feed, "1")
+
+    def test_dumpsLines(self):
+        output = ultrajson.dumps_lines([{"a": 1}, [1, 2], "x", None], sort_keys=True)
+        self.assertEqual(b'{"a":1}\n[1,2]\n"x"\nnull\n', output)
+        self.assertEqual(b'0\n1\n2\n', ultrajson.dumps_lines(x for x in range(3)))
+        self.assertEqual(b'', ultrajson.dumps_lines([]))
+
+        # Every record stays on one line, so the output always reads back
+        input = [{"a": [1, {"b": 2}]}, {"c": "d"}]
+        self.assertRaises(ValueError, ultrajson.dumps_lines, input, indent=2)
+        self.assertEqual(input, ultrajson.loads_lines(ultrajson.dumps_lines(input, indent=0)))
+        self.assertEqual(input, ultrajson.loads_lines(ultrajson.dumps_lines(input, canonical=True, indent=2)))
+
+    def test_dumpsLinesLarge(self):
+        input = [{"key": "x" * 1000, "index": x} for x in range(1000)]
+        output = ultrajson.dumps_lines(input)
+        self.assertEqual(1000, output.count(b'\n'))
+        self.assertEqual(input, ultrajson.loads_lines(output))
+
+    def test_dumpsLinesBroken(self):
+        try:
+            ultrajson.dumps_lines([1, 2, float("inf")])
+            assert False, "expected OverflowError"
+        except OverflowError as e:
+            self.assertTrue(str(e).startswith("record 2:"))
+        self.assertRaises(TypeError, ultrajson.dumps_lines, 1)
+
+    def test_loadsLines(self):
+        input = '{"a": 1}\n[1, 2]\r\n\n   \n"x"\nnull'
+        self.assertEqual([{"a": 1}, [1, 2], "x", None], ultrajson.loads_lines(input))
+        self.assertEqual([1, 2], ultrajson.loads_lines(b'1\n2\n'))
+        self.assertEqual([], ultrajson.loads_lines(''))
+
+    def test_loadsLinesBroken(self):
+        try:
+            ultrajson.loads_lines('1\n{"a":\n2')
+            assert False, "expected ValueError"
+        except ValueError as e:
+            self.assertTrue(str(e).startswith("line 2:"))
+        self.assertRaises(ValueError, ultrajson.loads_lines, '1 2\n')
+
+    def test_encoderObject(self):
+        encoder = ultrajson.Encoder(sort_keys=True, ensure_ascii=False, escape_forward_slashes=False)
+        input = {"b": u"\xe5/", "a": [1, 2.5]}
+        expected = ultrajson.dumps(input, sort_keys=True, ensure_ascii=False, escape_forward_slashes=False)
+        self.assertEqual(expected, encoder.encode(input))
+        self.assertEqual(expected, encoder.encode(input))
+        self.assertRaises(OverflowError, encoder.encode, float("nan"))
+        self.assertRaises(ValueError, ultrajson.Encoder, max_buffer_size=-1)
+
+    def test_encoderObjectRetainedBuffer(self):
+        input = [{"key": "x" * 100, "index": x} for x in range(5000)]
+        expected = ultrajson.dumps(input)
+        for maxBufferSize in (0, 1 << 20):
+            encoder = ultrajson.Encoder(max_buffer_size=maxBufferSize)
+            for x in range(3):
+                self.assertEqual(expected, encoder.encode(input))
+            self.assertEqual("[1,2]", encoder.encode([1, 2]))
+
+    def test_encoderObjectReentrant(self):
+        encoder = ultrajson.Encoder()
+        input = ["x" * 100000]
+        class Inner:
+            def toDict(self):
+                return {"inner": encoder.encode(input)}
+        output = encoder.encode([Inner(), input])
+        self.assertEqual([{"inner": ultrajson.dumps(input)}, input], ultrajson.loads(output))
+
+    def test_encoderObjectUninitialised(self):
+        encoder = ultrajson.Encoder.__new__(ultrajson.Encoder)
+        self.assertEqual("[1,2]", encoder.encode([1, 2]))
+        self.assertEqual(b'{"a":"\\/"}', encoder.encode_bytes({"a": "/"}))
+
+    def test_encoderObjectReinitWhileEncoding(self):
+        def default(obj):
+            encoder.__init__(default=default, max_buffer_size=0)
+            return None
+        encoder = ultrajson.Encoder(default=default)
+        input = ["x" * 100000]
+        self.assertEqual(ultrajson.dumps(input), encoder.encode(input))
+        self.assertRaises(RuntimeError, encoder.encode, [input, object()])
+        self.assertEqual(ultrajson.dumps(input), encoder.encode(input))
+
+    def test_encoderObjectCycle(self):
+        class Default:
+            def __call__(self, obj):
+                return self.holder["encoder"].encode(obj.value)
+        class Value:
+            value = [1]
+        default = Default()
+        default.holder = {"encoder": ultrajson.Encoder(default=default)}
+        self.assertEqual('["[1]"]', default.holder["encoder"].encode([Value()]))
+
+        # The default handler refers back to its encoder
+        ref = weakref.ref(default)
+        del default
+        gc.collect()
+        self.assertTrue(ref() is None)
+
+    def test_decodeKeyCache(self):
+        input = '[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"\\u00e5\\ud83d\\ude00": 3}, {"\\u00e5\\ud83d\\ude00": 4}]'
+        output = ultrajson.loads(input)
+        self.assertEqual(json.loads(input), output)
+        self.assertEqual(output, ultrajson.loads(input, cache_keys=False))
+        self.assertEqual(output, ultrajson.loads(input, release_gil=True))
+        if sys.version_info >= (3, 3):
+            self.assertTrue(sorted(output[0])[0] is sorted(output[1])[0])
+            self.assertTrue(list(output[2])[0] is list(output[3])[0])
+
+    def test_decodeKeyCacheNotInterned(self):
+        # An interned string equal to a decoded key is not what the decoder returns
+        name = sys.intern("".join(["not", "interned"])) if PY3 else intern("".join(["not", "interned"]))
+        self.assertFalse(list(ultrajson.loads('{"notinterned": 1}'))[0] is name)
+
+    @unittest.skipIf(sys.version_info < (3, 4), "tracemalloc needs Python 3.4")
+    def test_decodeKeyCacheUniqueKeys(self):
+        # Keys that don't repeat are freed with the objects holding them
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            for batch in range(20):
+                ultrajson.loads(ultrajson.dumps(dict(("k%d_%d" % (batch, x), x) for x in range(5000))))
+                if batch == 1:
+                    baseline = tracemalloc.get_traced_memory()[0]
+            self.assertTrue(tracemalloc.get_traced_memory()[0] - baseline < 100000)
+        finally:
+            tracemalloc.stop()
+
+    @unittest.skipIf(sys.version_info < (3, 3), "Needs PEP 393 strings")
+    def test_decodeUnicodeInputKeepsNoCopy(self):
+        # Decoding leaves no UTF-8 copy attached to the input or to cached keys
+        input = u'[{"\u00e9t\u00e9": "\u00e5\u4e00"}, {"\u00e9t\u00e9": 2}, {"\U0001f600": 3}, {"\U0001f600": 4}]'
+        size = sys.getsizeof(input)
+        output = ultrajson.loads(input)
+        self.assertEqual(json.loads(input), output)
+        self.assertEqual(size, sys.getsizeof(input))
+        keys = [list(row)[0] for row in output]
+        self.assertTrue(keys[0] is keys[1] and keys[2] is keys[3])
+        self.assertEqual([sys.getsizeof(key) for key in keys], [sys.getsizeof(key.encode("utf-8").decode("utf-8")) for key in keys])
+        self.assertRaises(UnicodeEncodeError, ultrajson.loads, u'"\ud800"')
+
+    def test_decodeKeyCacheCollisions(self):
+        input = dict(("key%d" % x, x) for x in range(5000))
+        input["x" * 64] = 1
+        input["x" * 65] = 2
+        input[""] = 3
+        self.assertEqual(input, ultrajson.loads(ultrajson.dumps(input)))
+        self.assertEqual([input, input], ultrajson.loads_lines(ultrajson.dumps_lines([input, input])))
+
+    def test_decodeBufferProtocol(self):
+        input = '{"a": [1, 2.5, "x\\u00e5"], "b": null}'
+        expected = json.loads(input)
+        data = input.encode("utf-8")
+        for buffer in (data, bytearray(data), memoryview(data), memoryview(b"xx" + data + b"yy")[2:-2]):
+            self.assertEqual(expected, ultrajson.loads(buffer))
+            self.assertEqual(expected, ultrajson.loads(buffer, release_gil=True))
+        self.assertEqual([1, 2], ultrajson.loads_lines(bytearray(b"1\n2")))
+        self.assertRaises(TypeError, ultrajson.loads, None)
+
+    def test_decodeBufferNotTerminated(self):
+        self.assertEqual(12, ultrajson.loads(memoryview(b"12345")[:2]))
+        self.assertEqual(1.2, ultrajson.loads(memoryview(b"1.2345")[:3], precise_float=True))
+        self.assertEqual(True, ultrajson.loads(memoryview(b"trueX")[:4]))
+        input = b'{"k": ["\\u00e5\xc3\xa5", true, false, null, -1.5e3, 12]}'
+        for x in range(len(input)):
+            self.assertRaises(ValueError, ultrajson.loads, memoryview(input)[:x])
+
+    def test_loadMmap(self):
+        import mmap
+        import tempfile
+        import os
+        handle, path = tempfile.mkstemp()
+        try:
+            os.write(handle, b'{"key": [1, "value"]}')
+            os.close(handle)
+            self.assertEqual({"key": [1, "value"]}, ultrajson.load_mmap(path))
+
+            # A truncated document filling whole pages must not read past the mapping
+            f = open(path, "wb")
+            f.write(b'"' + b'a' * (mmap.PAGESIZE - 1))
+            f.close()
+            self.assertRaises(ValueError, ultrajson.load_mmap, path)
+        finally:
+            os.remove(path)
+        self.assertRaises(IOError, ultrajson.load_mmap, path)
+
+    def test_dumpsInto(self):
+        buffer = bytearray(b"xx")
+        self.assertEqual(11, ultrajson.dumps_into({"a": [1, 2]}, buffer, 2))
+        self.assertEqual(b'xx{"a":[1,2]}', bytes(buffer))
+
+        buffer = bytearray(100)
+        self.assertEqual(3, ultrajson.dumps_into("s", buffer, 10))
+        self.assertEqual(b'"s"', bytes(buffer[10:13]))
+        self.assertEqual(100, len(buffer))
+
+        buffer = bytearray()
+        self.assertEqual(4, ultrajson.dumps_into(u"\xe5", buffer, ensure_ascii=False))
+        self.assertEqual(b'"\xc3\xa5"', bytes(buffer))
+
+    def test_dumpsIntoLarge(self):
+        input = ["x" * 1000] * 1000
+        expected = ultrajson.dumps(input).encode("utf-8")
+        buffer = bytearray()
+        self.assertEqual(len(expected), ultrajson.dumps_into(input, buffer))
+        self.assertEqual(expected, bytes(buffer))
+
+        buffer = bytearray(len(expected) + 10)
+        self.assertEqual(len(expected), ultrajson.dumps_into(input, buffer, 10))
+        self.assertEqual(expected, bytes(buffer[10:]))
+
+    def test_dumpsIntoFixedBuffer(self):
+        view = memoryview(bytearray(10))
+        self.assertEqual(5, ultrajson.dumps_into([1, 2], view))
+        self.assertEqual(b'[1,2]', bytes(view[:5]))
+        self.assertRaises(ValueError, ultrajson.dumps_into, "x" * 20, view)
+        self.assertRaises(ValueError, ultrajson.dumps_into, "x" * 20, bytearray(3), grow=False)
+        self.assertRaises(ValueError, ultrajson.dumps_into, 1, bytearray(3), 5)
+        self.assertRaises(OverflowError, ultrajson.dumps_into, float("inf"), bytearray())
+
+    def test_dumpChunked(self):
+        class filelike:
+            def __init__(self):
+                self.chunks = []
+            def write(self, chunk):
+                self.chunks.append(chunk)
+        input = {"key": [u"\xe5中\U0001f600" * 50] * 200, "numbers": list(range(1000))}
+        for ensureAscii in (True, False):
+            for chunkSize in (1, 7, 100, 65536):
+                f = filelike()
+                ultrajson.dump(input, f, chunk_size=chunkSize, ensure_ascii=ensureAscii)
+                self.assertEqual(ultrajson.dumps(input, ensure_ascii=ensureAscii), "".join(f.chunks))
+                if chunkSize == 100:
+                    self.assertTrue(len(f.chunks) > 100)
+        self.assertRaises(ValueError, ultrajson.dump, [], filelike(), chunk_size=0)
+
+    def test_dumpToFileDescriptor(self):
+        import tempfile
+        import os
+        input = {"key": [u"\xe5中\U0001f600" * 50] * 200}
+        handle, path = tempfile.mkstemp()
+        try:
+            ultrajson.dump(input, handle, ensure_ascii=False, chunk_size=50)
+            os.close(handle)
+            f = open(path, "rb")
+            self.assertEqual(ultrajson.dumps(input, ensure_ascii=False).encode("utf-8"), f.read())
+            f.close()
+        finally:
+            os.remove(path)
+        self.assertRaises(OSError, ultrajson.dump, 1, -5)
+
+    def test_dumpWriteError(self):
+        class filelike:
+            def write(self, chunk):
+                raise IOError("disk full")
+        self.assertRaises(IOError, ultrajson.dump, list(range(100000)), filelike(), chunk_size=100)
+        self.assertRaises(IOError, ultrajson.dump, {"a": [list(range(1000))] * 10}, filelike(), chunk_size=100, indent=8)
+        self.assertRaises(OverflowError, ultrajson.dump, [1, float("nan")], StringIO())
+
+    def test_encodeShortestFloat(self):
+        for value in [0.1, 0.1 + 0.2, 1.0 / 3, 5e-324, 2.2250738585072014e-308, 1.7976931348623157e+308,
+                      1e16, 9999999999999998.0, 1e-4, 1e-5, 123456.789, 1e22, 1e23, 0.0, 100.0]:
+            for v in [value, -value]:
+                output = ultrajson.encode(v, shortest_float=True)
+                self.assertEqual(output, repr(v))
+                self.assertEqual(float(output), v)
+
+    def test_encodeShortestFloatRandom(self):
+        rng = random.Random(42)
+        for i in range(10000):
+            value = struct.unpack("<d", struct.pack("<Q", rng.getrandbits(64)))[0]
+            if math.isnan(value) or math.isinf(value):
+                continue
+            self.assertEqual(ultrajson.encode(value, shortest_float=True), repr(value))
+
+    def test_encodeShortestFloatOptions(self):
+        testObject = {"a": [1.5, 0.30000000000000004]}
+        self.assertEqual(ultrajson.dumps(testObject, shortest_float=True), '{"a":[1.5,0.30000000000000004]}')
+        self.assertEqual(ultrajson.Encoder(shortest_float=True).encode(testObject), '{"a":[1.5,0.30000000000000004]}')
+        buffer = bytearray(64)
+        length = ultrajson.dumps_into(testObject, buffer, shortest_float=True)
+        self.assertEqual(bytes(buffer[:length]), b'{"a":[1.5,0.30000000000000004]}')
+        self.assertRaises(OverflowError, ultrajson.dumps, float("nan"), shortest_float=True)
+        self.assertRaises(OverflowError, ultrajson.dumps, float("inf"), shortest_float=True)
+
+    def test_decodePreciseFloatRoundTrip(self):
+        rng = random.Random(42)
+        for i in range(10000):
+            value = struct.unpack("<d", struct.pack("<Q", rng.getrandbits(64)))[0]
+            if math.isnan(value) or math.isinf(value):
+                continue
+            for input in [repr(value), "%.17e" % value, "%.30e" % value]:
+                self.assertEqual(ultrajson.decode(input, precise_float=True), float(input))
+
+    def test_decodePreciseFloatEdgeCases(self):
+        for input in ["0.0", "-0.0", "1e23", "8.98846567431158e307", "1.7976931348623157e308",
+                      "2.2250738585072011e-308", "2.2250738585072012e-308", "5e-324", "2.4703282292062328e-324",
+                      "1e-400", "9007199254740993.0", "9007199254740992.9999999999999999999",
+                      "0.000000000000000000000000000000000001234", "123456789012345678901234567890.5",
+                      "1.00000000000000011102230246251565404236316680908203125",
+                      "1.00000000000000011102230246251565404236316680908203126"]:
+            output = ultrajson.decode(input, precise_float=True)
+            self.assertEqual(struct.pack("<d", output), struct.pack("<d", float(input)))
+        self.assertEqual(ultrajson.decode("[1.5E+3,2]", precise_float=True), [1500.0, 2])
+        self.assertRaises(ValueError, ultrajson.decode, "1.8e308", precise_float=True)
+        self.assertRaises(ValueError, ultrajson.decode, "-1e400", precise_float=True)
+
+    def test_decodeIntegerOverflowWrap(self):
+        self.assertRaises(ValueError, ultrajson.decode, "31766793740561793024")
+        self.assertRaises(ValueError, ultrajson.decode, "-92233720368547758080")
+        self.assertEqual(ultrajson.decode("18446744073709551615"), 18446744073709551615)
+
+    def test_decodeStringWidths(self):
+        for value in [u"plain ascii", u"caf\xe9 \xff", u"Ā € ￿", u"\U0001f600 \U0010ffff", u"a\xe5€\U0001f600"]:
+            for ensureAscii in (True, False):
+                input = json.dumps([value, {value: value}], ensure_ascii=ensureAscii)
+                self.assertEqual([value, {value: value}], ultrajson.loads(input))
+                self.assertEqual([value, {value: value}], ultrajson.loads(input.encode("utf-8")))
+                self.assertEqual([value, {value: value}], ultrajson.loads(input, release_gil=True))
+
+    def test_decodeStringSurrogates(self):
+        self.assertEqual(u"\U0001f600", ultrajson.loads('"\\ud83d\\ude00"'))
+        self.assertEqual(u"\ud800x", ultrajson.loads('"\\ud800x"'))
+        self.assertEqual(u"a\ud800", ultrajson.loads('"a\\ud800"'))
+        self.assertEqual(u"\udc00", ultrajson.loads('"\\udc00"'))
+        self.assertRaises(ValueError, ultrajson.loads, '"\\ud800\\u0041"')
+
+    def test_decodeStringInvalidUTF8(self):
+        self.assertEqual(u"\x80\xbf", ultrajson.loads(b'"\x80\xbf"'))
+        for input in [b'"\xf4\x90\x80\x80"', b'"\xc0\x80"', b'"\xe2\x82"', b'"\xe2\x82\x41"', b'"\xf8"']:
+            self.assertRaises(ValueError, ultrajson.loads, input)
+
+    def test_decodeLongEscapedString(self):
+        value = u"\xe5\n" * 200000 + u"\U0001f600"
+        input = json.dumps([u"x" * 300000, value, u"€" * 100000])
+        self.assertEqual([u"x" * 300000, value, u"€" * 100000], ultrajson.loads(input))
+
+    def test_encodeLongStringEscapes(self):
+        # Long strings are scanned in vector sized blocks, put every special character at every offset
+        specials = ['"', '\\', '/', '\n', '\x00', '\x1f', '<', '>', '&', '\x7f', '\xe9', '€', '\U0001f600']
+        for special in specials:
+            for offset in range(70):
+                input = 'a' * offset + special + 'b' * (69 - offset)
+                for ensure_ascii in (True, False):
+                    for encode_html_chars in (True, False):
+                        for escape_forward_slashes in (True, False):
+                            output = ultrajson.dumps(input, ensure_ascii=ensure_ascii, encode_html_chars=encode_html_chars, escape_forward_slashes=escape_forward_slashes)
+                            self.assertEqual(input, json.loads(output))
+                            self.assertEqual(special == '/' and escape_forward_slashes, '\\/' in output)
+                            self.assertEqual(encode_html_chars and special in '<>&', any(escape in output for escape in ('\\u003c', '\\u003e', '\\u0026')))
+                            self.assertEqual(ensure_ascii or ord(special) < 0x80, all(ord(c) < 0x80 for c in output))
+
+    def test_decodeLongStringsSpecialAtEveryOffset(self):
+        # Strings are scanned in vector sized blocks, put every special character at every offset
+        specials = ['\\"', '\\\\', '\\n', '\\u00e9', '\\ud83d\\ude00', '\xe9', '€', '\U0001f600', '\x7f']
+        for special in specials:
+            for offset in range(70):
+                value = 'a' * offset + special + 'b' * (69 - offset)
+                input = '{"%s": ["%s", "%s"]}' % (value, value, value * 3)
+                self.assertEqual(json.loads(input), ultrajson.decode(input))
+                self.assertEqual(json.loads(input), ultrajson.decode(input.encode('utf-8')))
+
+            # Unterminated at every length
+            for length in range(70):
+                self.assertRaises(ValueError, ultrajson.decode, '"' + 'a' * length + special)
+
+        # Plain runs after an escape that outgrow the scratch buffer
+        value = "\n" + "x" * 300000 + "\t" + "y" * 33
+        self.assertEqual(value, ultrajson.decode(json.dumps(value)))
+
+    def test_decodePrettyPrintedWhitespace(self):
+        obj = {"key": [1, 2.5, {"nested": ["value", None, True]}], "other": "string"}
+        for indent in (1, 2, 4, 8, 17, 40, "\t", "\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t\t"):
+            input = json.dumps(obj, indent=indent)
+            self.assertEqual(obj, ultrajson.decode(input))
+            self.assertEqual(obj, ultrajson.decode(input.replace("\n", "\r\n")))
+        self.assertEqual([1], ultrajson.decode(" \t\r\n" * 20 + "[1]" + " \t\r\n" * 20))
+
+    def test_decodeNumbersOfEveryLength(self):
+        # Digits are read 8 at a time where possible
+        for length in range(1, 20):
+            for digit in "1579":
+                input = digit * length
+                self.assertEqual(int(input), ultrajson.decode(input))
+                self.assertEqual(int(input), ultrajson.decode("[" + input + "]")[0])
+                if length < 19:
+                    self.assertEqual(-int(input), ultrajson.decode("-" + input))
+        for length in range(1, 25):
+            input = "1234567890123456789"[:length % 19 + 1] + "." + "98765432109876543210987"[:length % 23 + 1] + "e-3"
+            self.assertEqual(float(input), ultrajson.decode(input, precise_float=True))
+            self.assertAlmostEqual(float(input), ultrajson.decode(input), delta=float(input) * 1e-15)
+        self.assertRaises(ValueError, ultrajson.decode, "18446744073709551616")
+        self.assertRaises(ValueError, ultrajson.decode, "-9223372036854775809")
+
+    def test_encodeDefault(self):
+        class Point(object):
+            def __init__(self, x, y):
+                self.x = x
+                self.y = y
+
+        class Dictable(object):
+            def toDict(self):
+                return {"to": "dict"}
+
+        calls = []
+
+        def default(obj):
+            calls.append(obj)
+            return [obj.x, obj.y]
+
+        self.assertEqual('{"n":[3,[4,5]],"p":[1,2]}', ultrajson.dumps({"p": Point(1, 2), "n": [3, Point(4, 5)]}, default=default, sort_keys=True))
+        self.assertEqual(2, len(calls))
+
+        # Not called for supported types or objects with toDict
+        del calls[:]
+        self.assertEqual('[1,"a",null,{"to":"dict"}]', ultrajson.dumps([1, "a", None, Dictable()], default=default))
+        self.assertEqual([], calls)
+
+        # Nor for iterables, which are encoded as arrays with or without it
+        class Items(object):
+            def __iter__(self):
+                return iter([1, 2])
+
+        self.assertEqual('[1,2]', ultrajson.dumps((x for x in [1, 2]), default=str))
+        self.assertEqual('[[1,2],[1,2]]', ultrajson.dumps([set([1, 2]), Items()], default=str, sort_keys=True))
+        self.assertEqual('[3]', ultrajson.dumps(frozenset([3]), default=default))
+        self.assertEqual([], calls)
+
+        # Substitutes are indented like any other value
+        self.assertEqual(json.dumps({"p": Point(1, 2)}, default=default, indent=4), ultrajson.dumps({"p": Point(1, 2)}, default=default, indent=4).replace('":', '": '))
+
+        self.assertEqual('[{"x":1,"y":2}]', ultrajson.dumps([Point(1, 2)], default=None))
+        self.assertRaises(TypeError, ultrajson.dumps, Point(1, 2), default=1)
+        self.assertRaises(ZeroDivisionError, ultrajson.dumps, [1, Point(1, 2), 3], default=lambda obj: 1 / 0)
+        self.assertRaises(RuntimeError, ultrajson.dumps, Point(1, 2), default=lambda obj: obj)
+
+    def test_encodeDefaultEntryPoints(self):
+        class Opaque(object):
+            pass
+
+        default = lambda obj: "opaque"
+        self.assertEqual('["opaque"]', ultrajson.Encoder(default=default).encode([Opaque()]))
+        output = bytearray()
+        self.assertEqual(10, ultrajson.dumps_into([Opaque()], output, default=default))
+        self.assertEqual(b'["opaque"]', bytes(output[:10]))
+        self.assertEqual(b'"opaque"\n1\n', ultrajson.dumps_lines([Opaque(), 1], default=default))
+        fp = StringIO()
+        ultrajson.dump({"a": Opaque()}, fp, default=default)
+        self.assertEqual('{"a":"opaque"}', fp.getvalue())
+
+    def test_registerTypeHandler(self):
+        class Color(object):
+            def __init__(self, name):
+                self.name = name
+
+        class Shade(Color):
+            pass
+
+        ultrajson.register(Color, lambda color: color.name.upper())
+        ultrajson.register(datetime.date, lambda date: date.isoformat())
+        try:
+            self.assertEqual('["RED",{"name":"dark"}]', ultrajson.dumps([Color("red"), Shade("dark")]))
+            self.assertEqual('["2014-03-01",1393675200]', ultrajson.dumps([datetime.date(2014, 3, 1), datetime.datetime(2014, 3, 1, 12)]))
+            self.assertEqual('"RED"', ultrajson.dumps(Color("red"), default=lambda obj: "default"))
+        finally:
+            ultrajson.register(Color, None)
+            ultrajson.register(datetime.date, None)
+
+        self.assertEqual('{"name":"red"}', ultrajson.dumps(Color("red")))
+        self.assertEqual('1393632000', ultrajson.dumps(datetime.date(2014, 3, 1)))
+        ultrajson.register(Color, None)
+        self.assertRaises(TypeError, ultrajson.register, Color("red"), str)
+        self.assertRaises(TypeError, ultrajson.register, Color, 1)
+
+    def test_encodeObjectAttributes(self):
+        class Base(object):
+            kind = "base"
+            listed = [1]
+
+            def __init__(self, x):
+                self.x = x
+                self._hidden = 1
+
+            def method(self):
+                pass
+
+            @property
+            def double(self):
+                return self.x * 2
+
+            @staticmethod
+            def static():
+                pass
+
+            class Nested(object):
+                pass
+
+        class Slots(object):
+            __slots__ = ("a", "b")
+
+            def __init__(self):
+                self.a = 1
+
+        self.assertEqual('[{"double":2,"kind":"base","listed":[1],"x":1},{"double":4,"kind":"base","listed":[1],"x":2}]', ultrajson.dumps([Base(1), Base(2)]))
+        self.assertEqual('[{"a":1},{"a":1}]', ultrajson.dumps([Slots(), Slots()]))
+
+        # Instance attributes shadow class ones, callables are never encoded
+        obj = Base(3)
+        obj.method = "shadowed"
+        obj.kind = "instance"
+        obj.callback = len
+        self.assertEqual('{"double":6,"kind":"instance","listed":[1],"method":"shadowed","x":3}', ultrajson.dumps(obj))
+        self.assertEqual('{"double":2,"kind":"base","listed":[1],"x":1}', ultrajson.dumps(Base(1)))
+
+        # Modifying the class is picked up by the next encode
+        Base.listed.append(2)
+        Base.kind = "changed"
+        Base.added = True
+        Base.double = 0
+        try:
+            self.assertEqual('{"added":true,"double":0,"kind":"changed","listed":[1,2],"x":1}', ultrajson.dumps(Base(1)))
+        finally:
+            del Base.added
+
+        Base.double = lambda self: 0
+        self.assertEqual('{"kind":"changed","listed":[1,2],"x":1}', ultrajson.dumps(Base(1)))
+
+    @unittest.skipIf(sys.version_info < (3, 7), "dataclasses need Python 3.7")
+    def test_encodeDataclass(self):
+        import dataclasses
+
+        @dataclasses.dataclass
+        class Item:
+            name: str
+            price: float = 0.0
+            tags: list = dataclasses.field(default_factory=list)
+
+            def total(self, qty):
+                return self.price * qty
+
+        items = [Item("pen", 1.5, ["office"]), Item("ink")]
+        self.assertEqual('[{"name":"pen","price":1.5,"tags":["office"]},{"name":"ink","price":0.0,"tags":[]}]', ultrajson.dumps(items))
+        self.assertEqual([dataclasses.asdict(item) for item in items], ultrajson.loads(ultrajson.dumps(items)))
+
+    def test_decodeLargeContainers(self):
+        # Containers bigger than the decoder keeps on its stack, nested inside each other
+        obj = {"items": [list(range(i)) for i in range(0, 3000, 500)], "wide": dict(("key%d" % i, [i, {"v": i}]) for i in range(3000))}
+        encoded = json.dumps(obj)
+        self.assertEqual(obj, ultrajson.loads(encoded))
+        self.assertEqual(obj, ultrajson.loads(encoded, release_gil=True))
+        self.assertEqual([[[]], {}, [{}]], ultrajson.loads("[[[]], {}, [{}]]"))
+
+        for cut in (len(encoded) // 3, len(encoded) // 2, len(encoded) - 1):
+            self.assertRaises(ValueError, ultrajson.loads, encoded[:cut])
+            self.assertRaises(ValueError, ultrajson.loads, encoded[:cut], release_gil=True)
+
+    def test_loadsLazy(self):
+        obj = {"status": "ok", "items": [{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}], "page": {"total": 812}, "empty": {}}
+        doc = ultrajson.loads_lazy(json.dumps(obj))
+        self.assertTrue(isinstance(doc, ultrajson.LazyObject))
+        self.assertEqual("ok", doc["status"])
+        self.assertTrue(isinstance(doc["items"], ultrajson.LazyArray))
+        self.assertTrue(doc["items"] is doc["items"])
+        self.assertEqual(2, doc["items"][-1]["id"])
+        self.assertEqual(["a", "b"], list(doc["items"][0]["tags"]))
+        self.assertEqual(2, len(doc["items"]))
+        self.assertEqual(0, len(doc["empty"]))
+        self.assertEqual(sorted(obj.keys()), sorted(doc))
+        self.assertEqual(sorted(obj.keys()), sorted(doc.keys()))
+        self.assertTrue("page" in doc)
+        self.assertFalse("missing" in doc)
+        self.assertEqual(None, doc.get("missing"))
+        self.assertEqual(3, doc.get("missing", 3))
+        self.assertEqual(("status", "ok"), [item for item in doc.items() if item[0] == "status"][0])
+        self.assertEqual({"total": 812}, doc["page"].to_python())
+        self.assertEqual(obj, doc.to_python())
+        self.assertTrue(doc.to_python() is doc.to_python())
+        self.assertEqual(obj["items"], doc["items"].to_python())
+
+        self.assertRaises(KeyError, lambda: doc["missing"])
+        self.assertRaises(IndexError, lambda: doc["items"][2])
+        self.assertRaises(TypeError, lambda: doc["items"]["id"])
+
+        # Children keep the document alive
+        tags = ultrajson.loads_lazy(json.dumps(obj))["items"][0]["tags"]
+        self.assertEqual("b", tags[1])
+
+    def test_loadsLazyScalarsAndErrors(self):
+        self.assertEqual(5, ultrajson.loads_lazy("5"))
+        self.assertEqual("x", ultrajson.loads_lazy(b'"x"'))
+        self.assertEqual([], ultrajson.loads_lazy("[]").to_python())
+        self.assertEqual(None, ultrajson.loads_lazy("[1.5, null]")[1])
+        self.assertEqual(4.56, ultrajson.loads_lazy("[4.56]", precise_float=True)[0])
+
+        # Repeated keys behave as with loads, the last one wins
+        doc = ultrajson.loads_lazy('{"a": 1, "b": 2, "a": 3}')
+        self.assertEqual(2, len(doc))
+        self.assertEqual(3, doc["a"])
+        self.assertEqual({"a": 3, "b": 2}, doc.to_python())
+
+        for input in ("", "[1,", '{"a" 1}', "[1] x"):
+            self.assertRaises(ValueError, ultrajson.loads_lazy, input)
+
+    def test_extract(self):
+        doc = '{"meta": {"tenant": "acme", "a/b": 1, "m~n": 2}, "items": [{"id": 1, "s": "]}\\"{"}, {"id": 2}], "n": null}'
+        self.assertEqual(["acme", 1, {"id": 2}, 1, 2, None],
+                         ultrajson.extract(doc, ["/meta/tenant", "/items/0/id", "/items/1", "/meta/a~1b", "/meta/m~0n", "/n"]))
+        self.assertEqual([ultrajson.loads(doc)], ultrajson.extract(doc.encode("utf-8"), [""]))
+
+        # Pointers matching nothing give the default
+        self.assertEqual([None, None, None, None, None], ultrajson.extract(doc, ["/x", "/items/2", "/items/-", "/items/01", "/n/x"]))
+        self.assertEqual([0, "acme"], ultrajson.extract(doc, ["/meta/x", "/meta/tenant"], default=0))
+
+        self.assertEqual([2], ultrajson.extract('{"a": 1, "a": 2}', ["/a"]))
+        self.assertEqual([3, [1, 2, 3]], ultrajson.extract(u'{"é": [1, 2, 3]}', [u"/é/2", u"/é"]))
+        self.assertEqual([4.56], ultrajson.extract('[4.56]', ["/0"], precise_float=True))
+
+    def test_extractLines(self):
+        input = '{"id": 1, "tags": ["a"]}\n\n  \r\n{"id": 2, "skip": [{"x": "]"}]}\n'
+        self.assertEqual([[1, "a"], [2, None]], ultrajson.extract(input, ["/id", "/tags/0"], lines=True))
+        self.assertEqual([], ultrajson.extract("", ["/id"], lines=True))
+
+        try:
+            ultrajson.extract('{"id": 1}\n{"id": [}\n', ["/id"], lines=True)
+            assert False, "expected ValueError"
+        except ValueError as e:
+            self.assertTrue(str(e).startswith("line 2:"))
+
+    def test_extractErrors(self):
+        # Skipped values still have to be balanced and terminated
+        for input in ("", '{"a": 1', '{"b": [1, 2}', '{"b": "x}', '{"a": 1} x', '{"a" 1}', '{"b": {]}'):
+            self.assertRaises(ValueError, ultrajson.extract, input, ["/a"])
+        self.assertRaises(ValueError, ultrajson.extract, "[" * 1100 + "]" * 1100, ["/1"])
+
+        for pointer in ("a", "/~2", "/~"):
+            self.assertRaises(ValueError, ultrajson.extract, "{}", [pointer])
+        self.assertRaises(TypeError, ultrajson.extract, "{}", "/a")
+        self.assertRaises(TypeError, ultrajson.extract, "{}", [1])
+
+    def test_validate(self):
+        self.assertTrue(ultrajson.validate('{"a": [1, 2.5, "x\\u00e9", true, null]}'))
+        self.assertTrue(ultrajson.validate(b"5"))
+        self.assertTrue(ultrajson.validate(bytearray(b" [] ")))
+
+        for input in ("", '{"a": 1', "[1,]", '{"a" 1}', "[1] x", '"\\x"', "nul"):
+            self.assertRaises(ValueError, ultrajson.validate, input)
+            self.assertRaises(ValueError, ultrajson.loads, input)
+
+        try:
+            ultrajson.validate('{"id": [1, 2}')
+            assert False, "expected ValueError"
+        except ValueError as e:
+            self.assertTrue(str(e).endswith("at byte 12"))
+
+    def test_validateMaxDepth(self):
+        self.assertTrue(ultrajson.validate("[[1]]", max_depth=2))
+        self.assertTrue(ultrajson.validate("1", max_depth=0))
+        self.assertTrue(ultrajson.validate("[" * 1024 + "]" * 1024))
+        self.assertRaises(ValueError, ultrajson.validate, "[[1]]", max_depth=1)
+        self.assertRaises(ValueError, ultrajson.validate, '{"a": {}}', max_depth=1)
+        self.assertRaises(ValueError, ultrajson.validate, "[]", max_depth=0)
+        self.assertRaises(ValueError, ultrajson.validate, "[" * 1025 + "]" * 1025)
+        self.assertRaises(ValueError, ultrajson.validate, "1", max_depth=-1)
+        self.assertRaises(ValueError, ultrajson.validate, "1", max_depth=1025)
+
+        # The offset is that of the bracket going over the limit
+        for input, maxDepth, offset in (("[[1]]", 1, 1), ("  [[[1]]]", 2, 4), ('{"a": {}}', 1, 6), ("[]", 0, 0)):
+            try:
+                ultrajson.validate(input, max_depth=maxDepth)
+                assert False, "expected ValueError"
+            except ValueError as e:
+                self.assertEqual("Reached object decoding depth limit at byte %d" % offset, str(e))
+
+    def test_dumpb(self):
+        data = {"a": [1, 2.5, None, True], "b": u"caf\xe9 \U0001f600", "c": "x" * 100000}
+        for kwargs in ({}, {"ensure_ascii": False}, {"indent": 2, "sort_keys": True}):
+            output = ultrajson.dumpb(data, **kwargs)
+            self.assertTrue(isinstance(output, bytes))
+            self.assertEqual(ultrajson.dumps(data, **kwargs).encode("utf-8"), output)
+            self.assertEqual(output, ultrajson.Encoder(**kwargs).encode_bytes(data))
+        self.assertEqual(b"[]", ultrajson.dumpb([]))
+        self.assertEqual(data, ultrajson.loads(ultrajson.dumpb(data, ensure_ascii=False)))
+        self.assertRaises(OverflowError, ultrajson.dumpb, 2 ** 65)
+
+    def test_encodeUnicodeKinds(self):
+        values = [u"caf\xe9 \xff" * 20, u"<Ж/日\" >" * 5, u"\\\U0001f600\n\U0010ffff" * 5, u"\x00\x7f\x80"]
+        for value in values:
+            obj = {value: [value, value[:3]], u"ascii": value}
+            for kwargs in ({}, {"ensure_ascii": False}, {"encode_html_chars": True}, {"escape_forward_slashes": False, "sort_keys": True}):
+                self.assertEqual(obj, json.loads(ultrajson.dumps(obj, **kwargs)))
+        self.assertEqual(u'"\\u00e9\\u0416\\ud83d\\ude00"', ultrajson.dumps(u"\xe9Ж\U0001f600"))
+        self.assertEqual(u'{"\xe9Ж\U0001f600":1}', ultrajson.dumps({u"\xe9Ж\U0001f600": 1}, ensure_ascii=False))
+        for obj in (u"a\ud800", {u"\udfffЖ": 1}, {u"\U0001f600\ud800": 1}):
+            self.assertRaises(UnicodeEncodeError, ultrajson.dumps, obj)
+            self.assertRaises(UnicodeEncodeError, ultrajson.dumps, obj, sort_keys=True)
+
+    def test_encodeSortKeysUnorderable(self):
+        self.assertRaises(TypeError, ultrajson.dumps, {1: 1, "a": 2}, sort_keys=True)
+
+    def test_sortKeysCodePointOrder(self):
+        keys = [u"b", u"a", u"ab", u"", u"\xe9", u"Ж", u"\U0001f600", u"￿", u"B", u"\x7f"]
+        for i in range(20):
+            random.shuffle(keys)
+            obj = dict((key, [i, {key: 1, u"z": 2, u"a": 3}]) for key in keys)
+            self.assertEqual(json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":")),
+                             ultrajson.dumps(obj, sort_keys=True, ensure_ascii=False))
+        records = [{"z": i, "a": i, "m": i} for i in range(3)]
+        self.assertEqual('[{"a":0,"m":0,"z":0},{"a":1,"m":1,"z":1},{"a":2,"m":2,"z":2}]', ultrajson.dumps(records, sort_keys=True))
+        self.assertEqual('{"1.5":3,"2":2,"10":1}', ultrajson.dumps({10: 1, 2: 2, 1.5: 3}, sort_keys=True))
+
+    def test_encodeCanonical(self):
+        data = {"numbers": [333333333.33333329, 1E30, 4.50, 2e-3, 0.000000000000000000000000001],
+                "string": u"\u20ac$\u000F\u000aA'B\"\\\\\"/", "literals": [None, True, False]}
+        expected = u'{"literals":[null,true,false],"numbers":[333333333.3333333,1e+30,4.5,0.002,1e-27],"string":"€$\\u000f\\nA\'B\\"\\\\\\\\\\"/"}'
+        self.assertEqual(expected, ultrajson.dumps(data, canonical=True))
+        self.assertEqual(expected, ultrajson.dumps(data, canonical=True, ensure_ascii=True, indent=4, escape_forward_slashes=True))
+        for bits, text in (("0000000000000000", "0"), ("8000000000000000", "0"), ("0000000000000001", "5e-324"),
+                           ("7fefffffffffffff", "1.7976931348623157e+308"), ("4430000000000000", "295147905179352830000"),
+                           ("44b52d02c7e14af6", "1e+23"), ("444b1ae4d6e2ef50", "1e+21"), ("3eb0c6f7a0b5ed8c", "9.999999999999997e-7"),
+                           ("3eb0c6f7a0b5ed8d", "0.000001"), ("becbf647612f3696", "-0.0000033333333333333333")):
+            self.assertEqual(text, ultrajson.dumps(struct.unpack(">d", bytes.fromhex(bits))[0], canonical=True))
+        keys = [u"€", u"\r", u"דּ", u"1", u"\U0001f600", u"\x80", u"\xf6"]
+        output = ultrajson.dumps(dict((key, i) for i, key in enumerate(keys)), canonical=True)
+        self.assertEqual([1, 3, 5, 6, 0, 4, 2], list(json.loads(output).values()))
+        self.assertEqual('{"1":"a","10":"c","2":"b"}', ultrajson.dumps({10: "c", 2: "b", 1: "a"}, canonical=True))
+
+        # Keys written as the same name can't both be in canonical output
+        for input in ({1: 1, "1": 2}, {1.5: 1, "1.5": 2}, [{"a": 1}, {b"x": 1, u"x": 2}]):
+            self.assertRaises(ValueError, ultrajson.dumps, input, canonical=True)
+            self.assertRaises(ValueError, ultrajson.digest, input)
+        self.assertEqual('{"1":1,"2":2}', ultrajson.dumps({1: 1, "2": 2}, canonical=True))
+
+    def test_digest(self):
+        data = {"b": [1, 2.5, None, u"caf\xe9 \U0001f600"], "a": {"y": 1, "x": "/" * 100000}}
+        canonical = ultrajson.dumpb(data, canonical=True)
+        self.assertEqual(hashlib.sha256(canonical).digest(), ultrajson.digest(data))
+        self.assertEqual(hashlib.blake2b(canonical).digest(), ultrajson.digest(data, "blake2b"))
+        self.assertEqual(hashlib.md5(canonical).digest(), ultrajson.digest(data, algorithm=hashlib.md5))
+        self.assertEqual(ultrajson.digest({"x": 1.0, "y": [2]}), ultrajson.digest({"y": [2.0], "x": 1}))
+        self.assertEqual(hashlib.sha256(ultrajson.dumpb(data, sort_keys=True)).digest(), ultrajson.digest(data, canonical=False, sort_keys=True))
+        self.assertRaises(OverflowError, ultrajson.digest, [float("nan")])
+        self.assertRaises(ValueError, ultrajson.digest, 1, "no-such-hash")
+        self.assertRaises(TypeError, ultrajson.digest, 1, 3)
+
+    @unittest.skipIf(not PY3, "Typed columns need Python 3.3")
+    def test_loadsColumns(self):
+        doc = '[{"id": 1, "price": 2.5, "tag": "a", "n": -3}, {"price": 3, "id": 2, "tag": null, "n": 1.5}, {"id": 3, "price": 1e300, "x": [1, {"y": 2}], "n": 0}]'
+        columns = ultrajson.loads_columns(doc)
+        self.assertEqual(["id", "price", "tag", "n", "x"], sorted(columns, key=["id", "price", "tag", "n", "x"].index))
+        self.assertEqual(array.array("q", [1, 2, 3]), columns["id"])
+        self.assertEqual(array.array("d", [2.5, 3.0, 1e300]), columns["price"])
+        self.assertEqual(array.array("d", [-3.0, 1.5, 0.0]), columns["n"])
+        self.assertEqual(["a", None, None], columns["tag"])
+        self.assertEqual([None, None, [1, {"y": 2}]], columns["x"])
+
+        self.assertEqual({}, ultrajson.loads_columns(b" [ ] "))
+        self.assertEqual({}, ultrajson.loads_columns(bytearray(b"[{}, {}]")))
+        self.assertEqual({u"é": array.array("q", [1])}, ultrajson.loads_columns(u'[{"é": 1}]', cache_keys=False))
+
+        # Columns holding anything but numbers keep the values loads gives, integers included
+        self.assertEqual([1, 2.5, True], ultrajson.loads_columns('[{"a": 1}, {"a": 2.5}, {"a": true}]')["a"])
+        self.assertEqual([1, 2.5, 18446744073709551615], ultrajson.loads_columns('[{"a": 1}, {"a": 2.5}, {"a": 18446744073709551615}]')["a"])
+        self.assertEqual([9007199254740993, 0.5], ultrajson.loads_columns('[{"a": 9007199254740993}, {"a": 0.5}]')["a"])
+        self.assertEqual([1, None], ultrajson.loads_columns('[{"a": 1}, {"b": 2}]')["a"])
+        self.assertEqual(array.array("q", [2, 3]), ultrajson.loads_columns('[{"a": 1, "a": 2}, {"a": 3}]')["a"])
+
+        rows = [{"i": i, "f": i / 4.0, "s": str(i)} for i in range(1000)]
+        columns = ultrajson.loads_columns(ultrajson.dumps(rows))
+        self.assertEqual(array.array("q", range(1000)), columns["i"])
+        self.assertEqual([row["f"] for row in rows], columns["f"].tolist())
+        self.assertEqual([row["s"] for row in rows], columns["s"])
+
+    @unittest.skipIf(not PY3, "Typed columns need Python 3.3")
+    def test_loadsColumnsNumpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.assertRaises(ImportError, ultrajson.loads_columns, '[{"a": 1}]', numpy=True)
+            return
+
+        columns = ultrajson.loads_columns('[{"a": 1, "b": 1.5, "c": "x"}, {"a": 2, "b": 2, "c": "y"}]', numpy=True)
+        self.assertEqual(numpy.int64, columns["a"].dtype)
+        self.assertEqual([1, 2], columns["a"].tolist())
+        self.assertEqual(numpy.float64, columns["b"].dtype)
+        self.assertEqual([1.5, 2.0], columns["b"].tolist())
+        self.assertEqual(["x", "y"], columns["c"])
+
+    def test_loadsColumnsErrors(self):
+        for input in ("", "{}", "[1]", '[{"a": 1}, 2]', '[{"a": 1}', '[{"a": }]', '[{1: 2}]', '[{"a": 1}] x', '[{"a" 1}]', '[{"a": [1}]', "[,]"):
+            self.assertRaises(ValueError, ultrajson.loads_columns, input)
+        self.assertRaises(ValueError, ultrajson.loads_columns, '[{"a": ' + "[" * 1100 + "]" * 1100 + "}]")
+        self.assertRaises(TypeError, ultrajson.loads_columns, 1)
+
 """
 def test_decodeNumericIntFrcOverflow(self):
 input = "X.Y"